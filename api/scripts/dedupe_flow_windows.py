@@ -0,0 +1,42 @@
+"""Delete duplicate flow windows and build their unique index.
+
+Usage: DB_DSN=... DB_NAME=... uv run python scripts/dedupe_flow_windows.py
+
+Flow windows stored before the unique (user_id, device_id, window_start)
+index can hold daemon replays of the same window, and the API then logs at
+startup that the index could not be built. This keeps the first stored copy
+of each window, deletes the rest (beats.infrastructure.migrations) and
+builds the index. Replays written between the two steps fail the build;
+the script then exits 1 and can be re-run.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+
+from pymongo.errors import DuplicateKeyError
+
+from beats.infrastructure.database import FLOW_WINDOW_DEDUPE_KEYS, Database
+from beats.infrastructure.migrations import dedupe_flow_windows
+
+
+async def main() -> int:
+    await Database.connect()
+    try:
+        collection = Database.get_db().flow_windows
+        deleted = await dedupe_flow_windows(collection)
+        print(f"  duplicate flow windows: {deleted:>9,} deleted")
+        try:
+            await collection.create_index(FLOW_WINDOW_DEDUPE_KEYS, unique=True)
+        except DuplicateKeyError:
+            print("  new duplicates arrived before the index was built; re-run")
+            return 1
+    finally:
+        await Database.disconnect()
+    print("  unique index on flow_windows built")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,43 @@
+"""Backfill flow_windows / signal_summaries timestamps from ISO strings to dates.
+
+Usage: DB_DSN=... DB_NAME=... uv run python scripts/migrate_signal_dates.py [batch_size]
+
+Runs the same backfill the API starts in the background while
+LEGACY_DATE_READS is on (beats.infrastructure.migrations), in the
+foreground and without the inter-batch pause, then prints how many string
+rows are left per collection. Safe to run against a live deploy and to
+re-run. Once every count is 0, set LEGACY_DATE_READS=false.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+
+from beats.infrastructure.database import Database
+from beats.infrastructure.migrations import (
+    BACKFILL_BATCH_SIZE,
+    LEGACY_DATE_FIELDS,
+    backfill_legacy_dates,
+    count_legacy,
+)
+
+
+async def main(argv: list[str]) -> int:
+    batch_size = int(argv[1]) if len(argv) > 1 else BACKFILL_BATCH_SIZE
+    await Database.connect()
+    try:
+        db = Database.get_db()
+        converted = await backfill_legacy_dates(db, batch_size)
+        left = 0
+        for name, fields in LEGACY_DATE_FIELDS.items():
+            remaining = await count_legacy(db[name], fields)
+            left += remaining
+            print(f"  {name:<18} {converted[name]:>9,} converted  {remaining:>9,} left")
+    finally:
+        await Database.disconnect()
+    return 1 if left else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv)))
@@ -0,0 +1,42 @@
+"""Run one flow-data retention sweep in the foreground.
+
+Usage: DB_DSN=... DB_NAME=... uv run python scripts/sweep_flow_retention.py
+
+Moves existing data into the retention tiers
+(beats.infrastructure.flow_retention) using FLOW_WINDOW_RETENTION_DAYS and
+FLOW_HOURLY_RETENTION_DAYS: builds any missing hourly rollups, deletes raw
+flow windows past their retention and compacts old hours into daily rows.
+The API runs the same sweep every few hours; this is for the first pass on
+a large deploy, or with FLOW_RETENTION=false. Safe to re-run.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from datetime import UTC, datetime
+
+from beats.infrastructure.database import Database
+from beats.infrastructure.flow_retention import retention_cutoffs, sweep_flow_retention
+from beats.settings import settings
+
+
+async def main() -> int:
+    cutoffs = retention_cutoffs(
+        datetime.now(UTC),
+        settings.flow_window_retention_days,
+        settings.flow_hourly_retention_days,
+    )
+    await Database.connect()
+    try:
+        result = await sweep_flow_retention(Database.get_db(), cutoffs)
+    finally:
+        await Database.disconnect()
+    expired, compacted = result["expired_windows"], result["compacted_hours"]
+    print(f"  raw windows before {cutoffs.raw:%Y-%m-%d}: {expired:>9,} expired")
+    print(f"  hourly rows before {cutoffs.hourly:%Y-%m-%d}: {compacted:>9,} compacted")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
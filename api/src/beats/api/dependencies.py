@@ -1,13 +1,15 @@
 """FastAPI dependency injection configuration."""
 
-from functools import lru_cache
+from functools import lru_cache, partial
 from typing import Annotated
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from fastapi import Depends, HTTPException, Query, Request, status
 
+from beats.coach.context_cache import get_coach_context_cache
 from beats.domain.analytics import AnalyticsService
 from beats.domain.calendar import CalendarService
+from beats.domain.device_status import get_device_status_cache
 from beats.domain.fitbit import FitbitService
 from beats.domain.github import GitHubService
 from beats.domain.intelligence import IntelligenceService
@@ -17,19 +19,23 @@ from beats.infrastructure.database import Database
 from beats.infrastructure.repositories import (
     AutoStartRuleRepository,
     BeatRepository,
+    BeatRollupRepository,
     BiometricDayRepository,
     CalendarIntegrationRepository,
     DeviceRegistrationRepository,
     FitbitIntegrationRepository,
+    FlowRollupRepository,
     FlowWindowRepository,
     GitHubIntegrationRepository,
     InsightsRepository,
     MongoAutoStartRuleRepository,
     MongoBeatRepository,
+    MongoBeatRollupRepository,
     MongoBiometricDayRepository,
     MongoCalendarIntegrationRepository,
     MongoDeviceRegistrationRepository,
     MongoFitbitIntegrationRepository,
+    MongoFlowRollupRepository,
     MongoFlowWindowRepository,
     MongoGitHubIntegrationRepository,
     MongoInsightsRepository,
@@ -38,6 +44,7 @@ from beats.infrastructure.repositories import (
     MongoPendingSuggestionRepository,
     MongoProjectRepository,
     MongoSignalSummaryRepository,
+    MongoWebhookDeliveryRepository,
     MongoWebhookRepository,
     MongoWeeklyDigestRepository,
     MongoWeeklyPlanRepository,
@@ -46,6 +53,7 @@ from beats.infrastructure.repositories import (
     PendingSuggestionRepository,
     ProjectRepository,
     SignalSummaryRepository,
+    WebhookDeliveryRepository,
     WebhookRepository,
     WeeklyDigestRepository,
     WeeklyPlanRepository,
@@ -118,36 +126,75 @@ def get_flow_window_repository(user_id: CurrentUserId) -> FlowWindowRepository:
     return MongoFlowWindowRepository(db.flow_windows, user_id=user_id)
 
 
+def get_flow_rollup_repository(user_id: CurrentUserId) -> FlowRollupRepository:
+    """Get the hourly flow rollup repository scoped to the current user."""
+    db = Database.get_db()
+    return MongoFlowRollupRepository(db.flow_hourly, user_id=user_id, daily=db.flow_daily)
+
+
+def get_beat_rollup_repository(user_id: CurrentUserId) -> BeatRollupRepository:
+    """Get the daily beat rollup repository scoped to the current user."""
+    db = Database.get_db()
+    return MongoBeatRollupRepository(db.beat_daily_rollups, user_id=user_id)
+
+
+def _user_data_changed(user_id: str) -> None:
+    """Drop the per-user caches built from beats and projects."""
+    get_device_status_cache().invalidate(user_id)
+    get_coach_context_cache().invalidate(user_id)
+
+
 def get_timer_service(
+    user_id: CurrentUserId,
     beat_repo: Annotated[BeatRepository, Depends(get_beat_repository)],
     project_repo: Annotated[ProjectRepository, Depends(get_project_repository)],
     flow_repo: Annotated[FlowWindowRepository, Depends(get_flow_window_repository)],
+    rollup_repo: Annotated[BeatRollupRepository, Depends(get_beat_rollup_repository)],
 ) -> TimerService:
     """Get the timer service with injected repositories."""
-    return TimerService(beat_repo=beat_repo, project_repo=project_repo, flow_repo=flow_repo)
+    return TimerService(
+        beat_repo=beat_repo,
+        project_repo=project_repo,
+        flow_repo=flow_repo,
+        rollup_repo=rollup_repo,
+        on_change=partial(_user_data_changed, user_id),
+    )
 
 
 def get_beat_service(
+    user_id: CurrentUserId,
     beat_repo: Annotated[BeatRepository, Depends(get_beat_repository)],
     flow_repo: Annotated[FlowWindowRepository, Depends(get_flow_window_repository)],
+    rollup_repo: Annotated[BeatRollupRepository, Depends(get_beat_rollup_repository)],
 ) -> BeatService:
     """Get the beat service with injected repository."""
-    return BeatService(beat_repo=beat_repo, flow_repo=flow_repo)
+    return BeatService(
+        beat_repo=beat_repo,
+        flow_repo=flow_repo,
+        rollup_repo=rollup_repo,
+        on_change=partial(_user_data_changed, user_id),
+    )
 
 
 def get_project_service(
+    user_id: CurrentUserId,
     project_repo: Annotated[ProjectRepository, Depends(get_project_repository)],
     beat_repo: Annotated[BeatRepository, Depends(get_beat_repository)],
 ) -> ProjectService:
     """Get the project service with injected repositories."""
-    return ProjectService(project_repo=project_repo, beat_repo=beat_repo)
+    return ProjectService(
+        project_repo=project_repo,
+        beat_repo=beat_repo,
+        on_change=partial(_user_data_changed, user_id),
+    )
 
 
 def get_analytics_service(
     beat_repo: Annotated[BeatRepository, Depends(get_beat_repository)],
+    rollup_repo: Annotated[BeatRollupRepository, Depends(get_beat_rollup_repository)],
 ) -> AnalyticsService:
-    """Get the analytics service with injected repository."""
-    return AnalyticsService(beat_repo=beat_repo)
+    """Get the analytics service with injected repositories."""
+    return AnalyticsService(beat_repo=beat_repo, rollup_repo=rollup_repo)
 
 
 def get_webhook_repository(user_id: CurrentUserId) -> WebhookRepository:
@@ -156,6 +203,12 @@ def get_webhook_repository(user_id: CurrentUserId) -> WebhookRepository:
     return MongoWebhookRepository(db.webhooks, user_id=user_id)
 
 
+def get_webhook_delivery_repository(user_id: CurrentUserId) -> WebhookDeliveryRepository:
+    """Get the webhook delivery outbox scoped to the current user."""
+    db = Database.get_db()
+    return MongoWebhookDeliveryRepository(db.webhook_deliveries, user_id=user_id)
+
+
 def get_weekly_digest_repository(user_id: CurrentUserId) -> WeeklyDigestRepository:
     """Get the weekly digest repository scoped to the current user."""
     db = Database.get_db()
@@ -201,6 +254,9 @@ BeatServiceDep = Annotated[BeatService, Depends(get_beat_service)]
 ProjectServiceDep = Annotated[ProjectService, Depends(get_project_service)]
 AnalyticsServiceDep = Annotated[AnalyticsService, Depends(get_analytics_service)]
 WebhookRepoDep = Annotated[WebhookRepository, Depends(get_webhook_repository)]
+WebhookDeliveryRepoDep = Annotated[
+    WebhookDeliveryRepository, Depends(get_webhook_delivery_repository)
+]
 WeeklyDigestRepoDep = Annotated[WeeklyDigestRepository, Depends(get_weekly_digest_repository)]
 InsightsRepoDep = Annotated[InsightsRepository, Depends(get_insights_repository)]
 IntelligenceServiceDep = Annotated[IntelligenceService, Depends(get_intelligence_service)]
@@ -267,6 +323,7 @@ def get_signal_summary_repository(user_id: CurrentUserId) -> SignalSummaryReposi
 
 
 FlowWindowRepoDep = Annotated[FlowWindowRepository, Depends(get_flow_window_repository)]
+FlowRollupRepoDep = Annotated[FlowRollupRepository, Depends(get_flow_rollup_repository)]
 SignalSummaryRepoDep = Annotated[SignalSummaryRepository, Depends(get_signal_summary_repository)]
 
 
@@ -20,11 +20,12 @@ weekend of spotty wifi; short enough that the collection doesn't grow.
 from __future__ import annotations
 
 import logging
-from collections.abc import Callable
 from datetime import UTC, datetime
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import Response
+from pymongo.asynchronous.collection import AsyncCollection
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from beats.infrastructure.database import Database
 
@@ -65,31 +66,45 @@ async def ensure_mutation_log_indexes() -> None:
     )
 
 
-class IdempotencyMiddleware(BaseHTTPMiddleware):
+class IdempotencyMiddleware:
     """Must be installed inside (after) the authentication middleware so that
-    `request.state.user_id` is already set when we consult it."""
-
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        if request.method not in _MUTATION_METHODS:
-            return await call_next(request)
-
-        if not _is_idempotent_path(request.url.path):
-            return await call_next(request)
-
-        client_id = request.headers.get("X-Client-Id")
+    `request.state.user_id` is already set when we consult it.
+
+    Pure ASGI: requests that aren't opted in (wrong method or path, no
+    `X-Client-Id`) go straight to the app with no wrapping. Opted-in
+    requests have their response forwarded as it is produced while a copy
+    of the body is kept; on a 2xx the copy is recorded before the final
+    body chunk is sent, so a client that saw the response can rely on a
+    retry being replayed.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in _MUTATION_METHODS
+            or not _is_idempotent_path(scope["path"])
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        client_id = Headers(scope=scope).get("X-Client-Id")
         if not client_id:
             # Back-compat: clients that haven't adopted the queue don't pay
             # for a Mongo round-trip.
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
-        user_id = getattr(request.state, "user_id", None)
+        user_id = scope.get("state", {}).get("user_id")
         if not user_id:
             # Unauthenticated — the auth middleware will reject before this,
             # but be defensive.
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
-        db = Database.get_db()
-        collection = db.mutation_log
+        collection = Database.get_db().mutation_log
 
         existing = await collection.find_one(
             {"user_id": user_id, "client_id": client_id},
@@ -99,55 +114,63 @@ class IdempotencyMiddleware(BaseHTTPMiddleware):
                 "Idempotent replay for user=%s client_id=%s path=%s",
                 user_id,
                 client_id,
-                request.url.path,
+                scope["path"],
             )
-            return Response(
+            replay = Response(
                 content=existing.get("body", b""),
                 status_code=existing.get("status_code", 200),
                 media_type=existing.get("media_type") or "application/json",
                 headers={"X-Idempotent-Replay": "true"},
             )
-
-        response = await call_next(request)
-
-        if 200 <= response.status_code < 300:
-            # Drain the streaming body so we can both persist AND return it.
-            body_chunks: list[bytes] = []
-            async for chunk in response.body_iterator:
-                body_chunks.append(chunk)
-            body = b"".join(body_chunks)
-
-            try:
-                await collection.insert_one(
-                    {
-                        "user_id": user_id,
-                        "client_id": client_id,
-                        "status_code": response.status_code,
-                        "body": body,
-                        "media_type": response.headers.get("content-type", "application/json"),
-                        "created_at": datetime.now(UTC),
-                    },
-                )
-            except Exception:  # noqa: BLE001
-                # Duplicate-key races or transient storage errors must never
-                # block a successful write. Log and move on — the client may
-                # double-apply on the next retry, which is rare enough.
-                logger.warning(
-                    "mutation_log insert failed for user=%s client_id=%s",
-                    user_id,
-                    client_id,
-                    exc_info=True,
-                )
-
-            return Response(
-                content=body,
-                status_code=response.status_code,
-                media_type=response.headers.get("content-type"),
-                headers={
-                    k: v
-                    for k, v in response.headers.items()
-                    if k.lower() not in {"content-length", "content-type"}
-                },
-            )
-
-        return response
+            await replay(scope, receive, send)
+            return
+
+        status_code = 0
+        media_type = "application/json"
+        body_chunks: list[bytes] = []
+
+        async def capture(message: Message) -> None:
+            nonlocal status_code, media_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                content_type = Headers(raw=message.get("headers", [])).get("content-type")
+                media_type = content_type or media_type
+            elif message["type"] == "http.response.body" and 200 <= status_code < 300:
+                body_chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    body = b"".join(body_chunks)
+                    await _record(collection, user_id, client_id, status_code, body, media_type)
+            await send(message)
+
+        await self.app(scope, receive, capture)
+
+
+async def _record(
+    collection: AsyncCollection,
+    user_id: str,
+    client_id: str,
+    status_code: int,
+    body: bytes,
+    media_type: str,
+) -> None:
+    try:
+        await collection.insert_one(
+            {
+                "user_id": user_id,
+                "client_id": client_id,
+                "status_code": status_code,
+                "body": body,
+                "media_type": media_type,
+                "created_at": datetime.now(UTC),
+            },
+        )
+    except Exception:  # noqa: BLE001
+        # Duplicate-key races or transient storage errors must never
+        # block a successful write. Log and move on — the client may
+        # double-apply on the next retry, which is rare enough.
+        logger.warning(
+            "mutation_log insert failed for user=%s client_id=%s",
+            user_id,
+            client_id,
+            exc_info=True,
+        )
@@ -40,7 +40,7 @@ async def logout(request: Request) -> None:
     auth_header = request.headers.get("Authorization", "")
     if auth_header.startswith("Bearer "):
         token = auth_header[7:]
-        _session_manager.revoke_token(token)
+        await _session_manager.revoke_token(token)
 
 
 @router.post("/refresh", response_model=RefreshResponse)
@@ -54,7 +54,7 @@ async def refresh_token(request: Request) -> RefreshResponse:
             detail="Bearer token required",
         )
     token = auth_header[7:]
-    new_token = _session_manager.refresh_token(token)
+    new_token = await _session_manager.refresh_token(token)
     if new_token is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
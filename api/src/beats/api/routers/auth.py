@@ -8,7 +8,9 @@ from pydantic import BaseModel
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
+from beats.auth.device_cache import DeviceRegistrationCache
 from beats.auth.session import SessionManager
+from beats.auth.state_store import InMemoryStateStore, MongoStateStore, SharedStateStore
 from beats.auth.storage import MongoCredentialStorage
 from beats.auth.webauthn import WebAuthnManager
 from beats.domain.models import User
@@ -21,8 +23,22 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 limiter = Limiter(key_func=get_remote_address)
 
+# State every worker and instance must agree on: challenges, revocations,
+# device heartbeats (see beats.auth.state_store).
+_state_store: SharedStateStore = (
+    MongoStateStore(lambda: Database.get_db().shared_state)
+    if settings.shared_state_backend == "mongo"
+    else InMemoryStateStore()
+)
+
+
+def get_state_store() -> SharedStateStore:
+    """Get the shared state store instance."""
+    return _state_store
+
+
 # Shared singleton for session manager (needed by middleware)
-_session_manager = SessionManager(settings.jwt_secret)
+_session_manager = SessionManager(settings.jwt_secret, store=_state_store)
 
 
 def get_session_manager() -> SessionManager:
@@ -30,6 +46,15 @@ def get_session_manager() -> SessionManager:
     return _session_manager
 
 
+# Shared device registration cache (middleware reads, device router invalidates)
+_device_cache = DeviceRegistrationCache(ttl_seconds=settings.device_cache_ttl_seconds)
+
+
+def get_device_cache() -> DeviceRegistrationCache:
+    """Get the device registration cache instance (for use in middleware)."""
+    return _device_cache
+
+
 def get_credential_storage() -> MongoCredentialStorage:
     db = Database.get_db()
     return MongoCredentialStorage(db.credentials)
@@ -153,7 +178,7 @@ async def verify_registration(
 ) -> RegistrationVerifyResponse:
     """Verify registration response and store the credential."""
     # Get the pending registration user_id
-    user_id = _session_manager.get_pending_registration_user_id("registration")
+    user_id = await _session_manager.get_pending_registration_user_id("registration")
     if not user_id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
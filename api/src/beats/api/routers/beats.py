@@ -3,7 +3,7 @@
 import http
 from datetime import date
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 
 from beats.api.dependencies import BeatServiceDep
 from beats.api.schemas import CreateBeatRequest, UpdateBeatRequest
@@ -39,6 +39,20 @@ async def list_beats(
     return [b.model_dump() for b in beats]
 
 
+@router.get("/search")
+async def search_beats(
+    service: BeatServiceDep,
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+):
+    """Search completed beats by note and tag words (prefix match), best
+    match first, then most recent. Pass ``next_cursor`` as ``cursor`` for
+    the next page; it is null on the last one."""
+    page = await service.search_beats(q, limit=limit, cursor=cursor)
+    return {"beats": [b.model_dump() for b in page.beats], "next_cursor": page.next_cursor}
+
+
 @router.get("/{beat_id}")
 async def get_beat(beat_id: str, service: BeatServiceDep):
     """Get a specific beat by ID."""
@@ -14,6 +14,7 @@ from pydantic import BaseModel
 from beats.api.dependencies import CurrentUserId, TimezoneDep
 from beats.coach.brief import generate_brief, get_brief, list_briefs
 from beats.coach.chat import handle_chat_turn
+from beats.coach.context_cache import get_coach_context_cache
 from beats.coach.memory import MemoryStore
 from beats.coach.memory_rewrite import rewrite_coach_memory
 from beats.coach.repos import (
@@ -255,8 +256,7 @@ async def get_memory(user_id: CurrentUserId):
 @router.delete("/memory")
 async def delete_memory(user_id: CurrentUserId):
     """Delete the coach memory for this user."""
-    db = Database.get_db()
-    await db[COACH_MEMORY_COLLECTION].delete_one({"user_id": user_id})
+    await MemoryStore(Database.get_db(), user_id).delete()
     return {"status": "ok"}
 
 
@@ -272,6 +272,7 @@ async def delete_all_coach_data(user_id: CurrentUserId):
         LLM_USAGE_COLLECTION,
     ]:
         await db[col_name].delete_many({"user_id": user_id})
+    get_coach_context_cache().invalidate(user_id)
     return {"status": "ok", "deleted": "all coach data"}
 
 
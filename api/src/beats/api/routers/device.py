@@ -3,10 +3,11 @@
 import base64
 import hashlib
 import os
+import time
 import uuid
 from datetime import UTC, date, datetime, timedelta
 
-from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel
 
 from beats.api.dependencies import (
@@ -16,9 +17,17 @@ from beats.api.dependencies import (
     PairingCodeRepoDep,
     ProjectServiceDep,
     TimerServiceDep,
+    TimezoneDep,
 )
-from beats.api.routers.auth import get_session_manager, limiter
+from beats.api.routers.auth import (
+    get_device_cache,
+    get_session_manager,
+    get_state_store,
+    limiter,
+)
+from beats.domain.device_status import DeviceStatusSnapshot, get_device_status_cache
 from beats.domain.models import DeviceRegistration, PairingCode
+from beats.domain.utils import normalize_tz
 
 router = APIRouter(prefix="/api/device", tags=["device"])
 
@@ -92,53 +101,121 @@ class DeviceHeartbeatResponse(BaseModel):
     last_seen: datetime | None = None
 
 
-# In-memory heartbeat storage (single device)
-_last_heartbeat: dict | None = None
+# The wall clock's last heartbeat per user, in the shared state store so
+# every instance serves the same one.
+HEARTBEAT_NS = "heartbeat"
+HEARTBEAT_TTL = 30 * 24 * 3600
+
+
+# Longest a status long-poll (`?wait=`) is held open.
+STATUS_MAX_WAIT = 60
 
 
 @router.get("/status", response_model=DeviceStatusResponse)
 async def get_device_status(
+    request: Request,
+    response: Response,
+    user_id: CurrentUserId,
     timer_service: TimerServiceDep,
     beat_service: BeatServiceDep,
+    tz: TimezoneDep,
     theme: str = Query(default="ember"),
-) -> DeviceStatusResponse:
-    """Get timer state optimized for ESP32 wall clock firmware."""
-    theme_hex = THEME_ACCENTS.get(theme, THEME_ACCENTS["ember"])
-    theme_rgb = hex_to_rgb(theme_hex)
-
+    wait: int = Query(default=0, ge=0, le=STATUS_MAX_WAIT),
+) -> DeviceStatusResponse | Response:
+    """Get timer state optimized for ESP32 wall clock firmware.
+
+    Served from a per-user cache (beats.domain.device_status) that timer
+    starts/stops and beat edits invalidate. The response carries an
+    ``ETag``; a poll whose ``If-None-Match`` still matches gets a bodiless
+    304. With ``wait=N`` such a poll is instead held for up to N seconds
+    and answered as soon as the payload changes — a timer start or stop,
+    or the elapsed minute ticking over — or with 304 when nothing did. The daily total counts
+    completed beats that started on today's date in ``tz`` (UTC by default).
+    """
+    theme_rgb = hex_to_rgb(THEME_ACCENTS.get(theme, THEME_ACCENTS["ember"]))
+    cache = get_device_status_cache()
+
+    if_none_match = request.headers.get("if-none-match", "")
+    deadline = time.monotonic() + wait
+    while True:
+        now = datetime.now(UTC)
+        today = now.astimezone(tz).date()
+
+        async def load(day: date = today) -> DeviceStatusSnapshot:
+            return await _load_status_snapshot(timer_service, beat_service, day, tz.key)
+
+        snapshot = await cache.get(user_id, today, tz.key, load)
+        payload = _render_status(snapshot, theme_rgb, now)
+        etag = _status_etag(payload)
+        if not _etag_matches(if_none_match, etag):
+            response.headers["ETag"] = etag
+            return payload
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        timeout = min(remaining, cache.ttl_seconds)
+        if snapshot.started_at is not None:
+            # Wake for the next elapsed-minute tick, which changes the payload.
+            elapsed = (now - snapshot.started_at).total_seconds()
+            timeout = min(timeout, 60 - elapsed % 60)
+        await cache.wait_for_change(user_id, timeout)
+
+
+async def _load_status_snapshot(
+    timer_service: TimerServiceDep, beat_service: BeatServiceDep, today: date, tz: str
+) -> DeviceStatusSnapshot:
+    totals = await beat_service.beat_repo.daily_totals(today, today, tz)
+    completed = sum(b.duration.total_seconds() for b in totals)
     active_beat = await timer_service.beat_repo.get_active()
-
     if not active_beat:
-        # Calculate daily total even when not clocked in
-        daily_minutes = await _get_daily_total_minutes(beat_service)
-        energy = min(int(daily_minutes / 60), 7)
+        return DeviceStatusSnapshot(day=today, tz=tz, completed_seconds=completed)
+    project = await timer_service.project_repo.get_by_id(active_beat.project_id)
+    return DeviceStatusSnapshot(
+        day=today,
+        tz=tz,
+        completed_seconds=completed,
+        project_id=project.id,
+        project_name=project.name,
+        project_color=project.color or assign_color(project.id or ""),
+        started_at=normalize_tz(active_beat.start),
+    )
+
+
+def _render_status(
+    snapshot: DeviceStatusSnapshot, theme_rgb: list[int], now: datetime
+) -> DeviceStatusResponse:
+    daily_minutes = int(snapshot.completed_seconds / 60)
+    energy = min(int(daily_minutes / 60), 7)
+    if snapshot.started_at is None:
         return DeviceStatusResponse(
             clocked_in=False,
             daily_total_minutes=daily_minutes,
             energy_level=energy,
             theme_accent_rgb=theme_rgb,
         )
-
-    # Timer is running
-    project = await timer_service.project_repo.get_by_id(active_beat.project_id)
-    elapsed = active_beat.duration
-    elapsed_minutes = int(elapsed.total_seconds() / 60)
-    daily_minutes = await _get_daily_total_minutes(beat_service)
-    energy = min(int(daily_minutes / 60), 7)
-    color_hex = project.color or assign_color(project.id or "")
-
     return DeviceStatusResponse(
         clocked_in=True,
-        project_name=project.name,
-        project_id=project.id,
-        project_color_rgb=hex_to_rgb(color_hex),
-        elapsed_minutes=elapsed_minutes,
+        project_name=snapshot.project_name,
+        project_id=snapshot.project_id,
+        project_color_rgb=hex_to_rgb(snapshot.project_color or ""),
+        elapsed_minutes=int((now - snapshot.started_at).total_seconds() / 60),
         daily_total_minutes=daily_minutes,
         energy_level=energy,
         theme_accent_rgb=theme_rgb,
     )
 
 
+def _status_etag(payload: DeviceStatusResponse) -> str:
+    digest = hashlib.blake2b(payload.model_dump_json().encode(), digest_size=8).hexdigest()
+    return f'"{digest}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """RFC 9110 weak comparison of ``etag`` against an If-None-Match header."""
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return any(tag in ("*", etag) for tag in candidates if tag)
+
+
 @router.get("/favorites", response_model=list[DeviceFavoriteProject])
 async def get_favorites(
     project_service: ProjectServiceDep,
@@ -170,38 +247,48 @@ class DeviceWeeklyResponse(BaseModel):
 
 
 @router.get("/weekly", response_model=DeviceWeeklyResponse)
-async def get_device_weekly(beat_service: BeatServiceDep) -> DeviceWeeklyResponse:
-    """Last 7 days of total tracked minutes, oldest first."""
-    today = date.today()
-    days: list[DeviceWeeklyDay] = []
+async def get_device_weekly(beat_service: BeatServiceDep, tz: TimezoneDep) -> DeviceWeeklyResponse:
+    """Last 7 days of total tracked minutes, oldest first.
+
+    Days are local calendar days in ``tz`` (UTC by default); each counts the
+    completed beats that started on it.
+    """
+    today = datetime.now(tz).date()
     # Six days ago through today, inclusive — seven days total.
-    for offset in range(6, -1, -1):
-        d = today - timedelta(days=offset)
-        beats = await beat_service.beat_repo.list(date_filter=d)
-        total_seconds = sum(b.duration.total_seconds() for b in beats if not b.is_active)
-        days.append(DeviceWeeklyDay(date=d, minutes=int(total_seconds / 60)))
-    return DeviceWeeklyResponse(days=days)
+    first = today - timedelta(days=6)
+    buckets = await beat_service.beat_repo.daily_totals(first, today, tz.key)
+    totals = {b.start: b.duration for b in buckets}
+    days = [first + timedelta(days=offset) for offset in range(7)]
+    return DeviceWeeklyResponse(
+        days=[
+            DeviceWeeklyDay(date=d, minutes=int(totals.get(d, timedelta()).total_seconds() / 60))
+            for d in days
+        ]
+    )
 
 
 @router.post("/heartbeat", response_model=DeviceHeartbeatResponse)
-async def post_heartbeat(body: DeviceHeartbeatRequest) -> DeviceHeartbeatResponse:
+async def post_heartbeat(
+    body: DeviceHeartbeatRequest, user_id: CurrentUserId
+) -> DeviceHeartbeatResponse:
     """Receive a heartbeat from the wall clock device."""
-    global _last_heartbeat
-    _last_heartbeat = {
+    heartbeat = {
         "battery_voltage": body.battery_voltage,
         "wifi_rssi": body.wifi_rssi,
         "uptime_seconds": body.uptime_seconds,
         "last_seen": datetime.now(UTC),
     }
-    return DeviceHeartbeatResponse(**_last_heartbeat)
+    await get_state_store().set(HEARTBEAT_NS, user_id, heartbeat, HEARTBEAT_TTL)
+    return DeviceHeartbeatResponse(**heartbeat)
 
 
 @router.get("/heartbeat", response_model=DeviceHeartbeatResponse | None)
-async def get_heartbeat() -> DeviceHeartbeatResponse | None:
+async def get_heartbeat(user_id: CurrentUserId) -> DeviceHeartbeatResponse | None:
     """Get the last heartbeat from the wall clock device."""
-    if not _last_heartbeat:
+    heartbeat = await get_state_store().get(HEARTBEAT_NS, user_id)
+    if not heartbeat:
         return None
-    return DeviceHeartbeatResponse(**_last_heartbeat)
+    return DeviceHeartbeatResponse(**heartbeat)
 
 
 # --- Pairing schemas ---
@@ -326,11 +413,6 @@ async def revoke_registration(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Device registration not found",
         )
-
-
-async def _get_daily_total_minutes(beat_service: BeatServiceDep) -> int:
-    """Calculate total tracked minutes for today."""
-    today = date.today()
-    beats = await beat_service.beat_repo.list(date_filter=today)
-    total_seconds = sum(b.duration.total_seconds() for b in beats if not b.is_active)
-    return int(total_seconds / 60)
+    # Takes effect on this instance immediately; others follow within the
+    # cache TTL, or at once when the revocation change stream is running.
+    get_device_cache().invalidate(device_id)
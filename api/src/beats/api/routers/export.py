@@ -1,12 +1,12 @@
 """Export API router — CSV and JSON data export/import."""
 
-import csv
 import hashlib
 import io
 import json
-import sqlite3
 import tempfile
 import zipfile
+from collections.abc import AsyncIterator
+from dataclasses import asdict
 from datetime import UTC, datetime
 from pathlib import Path
 
@@ -18,19 +18,26 @@ from beats.api.dependencies import (
     CurrentUserId,
     ProjectServiceDep,
 )
+from beats.domain.bulk_import import (
+    READ_CHUNK_SIZE,
+    BulkImporter,
+    ImportReport,
+    iter_json_backup,
+)
 from beats.domain.export_signing import SignatureMismatch, sign, verify
 from beats.domain.export_sqlite import (
     ExportPayload,
     build_manifest,
     build_sqlite_bytes,
     canonical_manifest_bytes,
+    iter_sqlite_rows,
 )
+from beats.domain.export_stream import csv_chunks, json_object_chunks
 from beats.infrastructure.database import Database
 from beats.infrastructure.export_key_repo import ExportKeyRepository
 
 router = APIRouter(prefix="/api/export", tags=["export"])
 
-_COMPUTED_FIELDS = ("is_active", "duration", "day")
 EXPORT_VERSION = "sqlite-1"
 ZIP_SQLITE_NAME = "data.sqlite"
 ZIP_MANIFEST_NAME = "manifest.json"
@@ -44,39 +51,25 @@ async def export_sessions_csv(
     project_service: ProjectServiceDep,
     project_id: str | None = Query(default=None),
 ):
-    """Export sessions as CSV."""
-    if project_id:
-        beats = await beat_service.beat_repo.list_by_project(project_id)
-    else:
-        beats = await beat_service.beat_repo.list_all_completed()
-
+    """Export sessions as CSV, streamed straight off a batched cursor."""
     projects = await project_service.project_repo.list()
     project_map = {p.id: p.name for p in projects}
 
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["date", "project", "start", "end", "duration_minutes", "note", "tags"])
-
-    for beat in sorted(beats, key=lambda b: b.start):
-        if beat.end is None:
-            continue
-        duration_min = int(beat.duration.total_seconds() / 60)
-        writer.writerow(
-            [
+    async def rows() -> AsyncIterator[list]:
+        async for beat in beat_service.beat_repo.stream(project_id, completed_only=True):
+            yield [
                 beat.day.isoformat(),
                 project_map.get(beat.project_id, "Unknown"),
                 beat.start.isoformat(),
                 beat.end.isoformat(),
-                duration_min,
+                int(beat.duration.total_seconds() / 60),
                 beat.note or "",
                 ";".join(beat.tags) if beat.tags else "",
             ]
-        )
 
-    output.seek(0)
     filename = f"beats_sessions_{datetime.now(UTC).strftime('%Y%m%d')}.csv"
     return StreamingResponse(
-        iter([output.getvalue()]),
+        csv_chunks(["date", "project", "start", "end", "duration_minutes", "note", "tags"], rows()),
         media_type="text/csv",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
@@ -87,19 +80,28 @@ async def export_full_json(
     beat_service: BeatServiceDep,
     project_service: ProjectServiceDep,
 ):
-    """Export everything as JSON for backup."""
-    payload = await _gather_payload(beat_service, project_service)
-    data = {
-        "exported_at": datetime.now(UTC).isoformat(),
-        "version": "1.0",
-        "projects": payload.projects,
-        "beats": payload.beats,
-    }
+    """Export everything as JSON for backup.
 
-    output = json.dumps(data, indent=2, default=str)
+    Projects are few and loaded up front; beats are serialized one at a
+    time as the cursor yields them, so the backup never sits in memory.
+    """
+    projects = await project_service.project_repo.list()
+
+    async def beats() -> AsyncIterator[dict]:
+        async for beat in beat_service.beat_repo.stream():
+            yield beat.model_dump(mode="json")
+
+    body = json_object_chunks(
+        {
+            "exported_at": datetime.now(UTC).isoformat(),
+            "version": "1.0",
+            "projects": [p.model_dump(mode="json") for p in projects],
+            "beats": beats(),
+        }
+    )
     filename = f"beats_backup_{datetime.now(UTC).strftime('%Y%m%d')}.json"
     return StreamingResponse(
-        iter([output]),
+        body,
         media_type="application/json",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
@@ -172,67 +174,59 @@ async def import_sqlite(
     Cross-account restores are rejected: the bundle must be signed by THIS
     user. Sharing exports between accounts is out of scope for v1.
     """
-    blob = await file.read()
-    try:
-        with zipfile.ZipFile(io.BytesIO(blob)) as zf:
-            names = set(zf.namelist())
-            required = {ZIP_SQLITE_NAME, ZIP_MANIFEST_NAME, ZIP_SIGNATURE_NAME}
-            if not required.issubset(names):
-                missing = sorted(required - names)
-                raise HTTPException(status_code=400, detail=f"missing entries: {missing}")
-            sqlite_bytes = zf.read(ZIP_SQLITE_NAME)
-            manifest_bytes = zf.read(ZIP_MANIFEST_NAME)
-            signature = zf.read(ZIP_SIGNATURE_NAME)
-    except zipfile.BadZipFile as exc:
-        raise HTTPException(status_code=400, detail=f"not a zip: {exc}") from exc
-
-    # The authoritative public key is the one stored server-side for this
-    # user — bundling a public key inside the zip is a convenience, not a
-    # trust anchor. If the user has never exported before, there is nothing
-    # to verify against, and the import is rejected.
-    key_repo = ExportKeyRepository(Database.get_db(), user_id)
-    public_bytes = await key_repo.get_public()
-    if public_bytes is None:
-        raise HTTPException(
-            status_code=400,
-            detail="no export key on file; generate one via GET /api/export/sqlite first",
-        )
+    with tempfile.TemporaryDirectory() as tmp:
+        # Spool the upload and the embedded database to disk in chunks,
+        # hashing on the way, so the bundle never sits in memory whole.
+        bundle_path = Path(tmp) / "bundle.zip"
+        sqlite_path = Path(tmp) / ZIP_SQLITE_NAME
+        with bundle_path.open("wb") as out:
+            while chunk := await file.read(READ_CHUNK_SIZE):
+                out.write(chunk)
+        digest = hashlib.sha256()
+        try:
+            with zipfile.ZipFile(bundle_path) as zf:
+                names = set(zf.namelist())
+                required = {ZIP_SQLITE_NAME, ZIP_MANIFEST_NAME, ZIP_SIGNATURE_NAME}
+                if not required.issubset(names):
+                    missing = sorted(required - names)
+                    raise HTTPException(status_code=400, detail=f"missing entries: {missing}")
+                manifest_bytes = zf.read(ZIP_MANIFEST_NAME)
+                signature = zf.read(ZIP_SIGNATURE_NAME)
+                with zf.open(ZIP_SQLITE_NAME) as src, sqlite_path.open("wb") as out:
+                    while chunk := src.read(READ_CHUNK_SIZE):
+                        digest.update(chunk)
+                        out.write(chunk)
+        except zipfile.BadZipFile as exc:
+            raise HTTPException(status_code=400, detail=f"not a zip: {exc}") from exc
+
+        # The authoritative public key is the one stored server-side for this
+        # user — bundling a public key inside the zip is a convenience, not a
+        # trust anchor. If the user has never exported before, there is nothing
+        # to verify against, and the import is rejected.
+        key_repo = ExportKeyRepository(Database.get_db(), user_id)
+        public_bytes = await key_repo.get_public()
+        if public_bytes is None:
+            raise HTTPException(
+                status_code=400,
+                detail="no export key on file; generate one via GET /api/export/sqlite first",
+            )
 
-    try:
-        verify(public_bytes, manifest_bytes, signature)
-    except SignatureMismatch as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-
-    # Verify the SQLite blob hasn't been swapped post-signing.
-    manifest = json.loads(manifest_bytes)
-    actual_sha = hashlib.sha256(sqlite_bytes).hexdigest()
-    if manifest.get("sqlite_sha256") != actual_sha:
-        raise HTTPException(status_code=400, detail="sqlite payload does not match manifest")
-
-    # At this point the bundle is authentic. Read rows out of SQLite and
-    # upsert through the same repos used by the JSON import path.
-    counts = {"projects": 0, "beats": 0}
-    with tempfile.NamedTemporaryFile(suffix=".sqlite") as tmp:
-        Path(tmp.name).write_bytes(sqlite_bytes)
-        conn = sqlite3.connect(tmp.name)
-        conn.row_factory = sqlite3.Row
         try:
-            for row in conn.execute("SELECT data FROM projects"):
-                proj = json.loads(row["data"])
-                for k in _COMPUTED_FIELDS:
-                    proj.pop(k, None)
-                await project_service.project_repo.upsert(proj)
-                counts["projects"] += 1
-            for row in conn.execute("SELECT data FROM beats"):
-                beat = json.loads(row["data"])
-                for k in _COMPUTED_FIELDS:
-                    beat.pop(k, None)
-                await beat_service.beat_repo.upsert(beat)
-                counts["beats"] += 1
-        finally:
-            conn.close()
-
-    return {"status": "ok", "imported": counts, "version": manifest.get("version")}
+            verify(public_bytes, manifest_bytes, signature)
+        except SignatureMismatch as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+        # Verify the SQLite blob hasn't been swapped post-signing.
+        manifest = json.loads(manifest_bytes)
+        if manifest.get("sqlite_sha256") != digest.hexdigest():
+            raise HTTPException(status_code=400, detail="sqlite payload does not match manifest")
+
+        # At this point the bundle is authentic. Stream rows out of SQLite
+        # into the same batched writers the JSON import path uses.
+        report = await _importer(beat_service, project_service).run(iter_sqlite_rows(sqlite_path))
+    await beat_service.discard_rollups()
+
+    return {**_import_response(report), "version": manifest.get("version")}
 
 
 @router.post("/import")
@@ -241,22 +235,39 @@ async def import_full_json(
     beat_service: BeatServiceDep,
     project_service: ProjectServiceDep,
 ):
-    """Import a full JSON backup. Upserts by ID — safe to re-import."""
-    content = await file.read()
-    data = json.loads(content)
+    """Import a full JSON backup. Upserts by ID — safe to re-import.
 
-    counts = {"projects": 0, "beats": 0}
-
-    for proj in data.get("projects", []):
-        for k in _COMPUTED_FIELDS:
-            proj.pop(k, None)
-        await project_service.project_repo.upsert(proj)
-        counts["projects"] += 1
+    The upload is parsed incrementally and written in bulk batches; rows
+    that fail are listed under ``errors`` rather than aborting the restore.
+    """
+    rows = iter_json_backup(file.read)
+    try:
+        report = await _importer(beat_service, project_service).run(rows)
+    except ValueError as exc:
+        # Batches before the malformed spot are already written; upserts
+        # make a re-import of the fixed file safe.
+        raise HTTPException(status_code=400, detail=f"invalid backup: {exc}") from exc
+    finally:
+        await beat_service.discard_rollups()
+
+    return _import_response(report)
+
+
+def _importer(beat_service: BeatServiceDep, project_service: ProjectServiceDep) -> BulkImporter:
+    # Computed fields (is_active, duration, day) in the backup rows are
+    # dropped by serialize_to_document inside upsert_many.
+    return BulkImporter(
+        {
+            "projects": project_service.project_repo.upsert_many,
+            "beats": beat_service.beat_repo.upsert_many,
+        }
+    )
 
-    for beat in data.get("beats", []):
-        for k in _COMPUTED_FIELDS:
-            beat.pop(k, None)
-        await beat_service.beat_repo.upsert(beat)
-        counts["beats"] += 1
 
-    return {"status": "ok", "imported": counts}
+def _import_response(report: ImportReport) -> dict:
+    return {
+        "status": "partial" if report.failures else "ok",
+        "imported": report.counts,
+        "batches": report.batches,
+        "errors": [asdict(f) for f in report.failures],
+    }
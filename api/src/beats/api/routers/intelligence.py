@@ -220,6 +220,12 @@ async def get_inbox(
     user_insights = await insights_repo.get()
     dismissed = set(user_insights.dismissed_ids) if user_insights else set()
 
+    # One beats query and one projects query for the whole request: the
+    # suggestions and project-health sections below both slice this snapshot
+    # instead of each loading their own overlapping window.
+    today = datetime.now(tz).date()
+    snapshot = await service.load_snapshot(today, tz=tz)
+
     # Patterns (honor dismissed)
     if user_insights:
         for insight in user_insights.insights:
@@ -237,8 +243,7 @@ async def get_inbox(
             )
 
     # Daily suggestions (top N by suggested_minutes)
-    today = datetime.now(tz).date()
-    suggestions = await service.suggest_daily_plan(today, tz=tz)
+    suggestions = await service.suggest_daily_plan(today, tz=tz, snapshot=snapshot)
     suggestions_sorted = sorted(
         suggestions, key=lambda s: s.get("suggested_minutes", 0), reverse=True
     )
@@ -260,7 +265,7 @@ async def get_inbox(
         )
 
     # Project health alerts
-    health = await service.get_project_health(tz=tz)
+    health = await service.get_project_health(tz=tz, snapshot=snapshot)
     for entry in health:
         alert = entry.get("alert")
         if not alert:
@@ -9,6 +9,7 @@ from beats.api.dependencies import (
     GitHubServiceDep,
     ProjectServiceDep,
     TimerServiceDep,
+    WebhookDeliveryRepoDep,
     WebhookRepoDep,
 )
 from beats.api.routers.webhooks import dispatch_webhook_event
@@ -247,6 +248,7 @@ async def start_project_timer(
     time_validator: RecordTimeRequest,
     service: TimerServiceDep,
     webhook_repo: WebhookRepoDep,
+    delivery_repo: WebhookDeliveryRepoDep,
 ):
     """Start a timer for a project."""
     beat = await service.start_timer(project_id, time_validator.time)
@@ -255,6 +257,7 @@ async def start_project_timer(
         "timer.start",
         {"project_id": project_id, "project_name": project.name, "beat_id": beat.id},
         webhook_repo,
+        delivery_repo,
     )
     return beat.model_dump()
 
@@ -264,6 +267,7 @@ async def end_project_timer(
     time_validator: RecordTimeRequest,
     service: TimerServiceDep,
     webhook_repo: WebhookRepoDep,
+    delivery_repo: WebhookDeliveryRepoDep,
 ):
     """Stop the currently running timer."""
     beat = await service.stop_timer(time_validator.time)
@@ -275,5 +279,6 @@ async def end_project_timer(
             "duration_minutes": int(beat.duration.total_seconds() / 60),
         },
         webhook_repo,
+        delivery_repo,
     )
     return beat.model_dump()
@@ -1,22 +1,37 @@
 """Signals API router — flow windows and signal summaries from the daemon."""
 
-import csv
-import io
+import json
+import zlib
+from collections import defaultdict
+from collections.abc import AsyncIterator
 from datetime import UTC, datetime, timedelta
+from typing import Any, Literal
 
-from fastapi import APIRouter, Query, Request, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 
 from beats.api.dependencies import (
     CurrentUserId,
+    FlowRollupRepoDep,
     FlowWindowRepoDep,
     PendingSuggestionRepoDep,
     ProjectServiceDep,
     SignalSummaryRepoDep,
     TimerServiceDep,
+    TimezoneDep,
+)
+from beats.domain.export_stream import csv_chunks
+from beats.domain.flow_rollups import (
+    SeriesBucket,
+    flow_series,
+    load_flow_rollups,
+    record_flow_windows,
+    stats_from_rollups,
 )
 from beats.domain.models import FlowWindow, PendingSuggestion, SignalSummary
+from beats.infrastructure.flow_retention import retention_cutoffs
+from beats.settings import settings
 
 router = APIRouter(prefix="/api/signals", tags=["signals"])
 
@@ -44,6 +59,29 @@ class PostFlowWindowRequest(BaseModel):
     editor_language: str | None = None
 
 
+# Batch ingest limits: a full day of one-minute windows from one device
+# fits in one request.
+FLOW_WINDOW_BATCH_MAX = 1440
+FLOW_WINDOW_BATCH_MAX_BYTES = 4 * 1024 * 1024  # after gunzip
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+_WINDOW_LIST = TypeAdapter(list[PostFlowWindowRequest])
+
+
+class FlowWindowBatchItem(BaseModel):
+    index: int
+    status: Literal["created", "duplicate", "invalid"]
+    id: str | None = None
+    error: str | None = None
+
+
+class FlowWindowBatchResponse(BaseModel):
+    created: int
+    duplicates: int
+    invalid: int
+    results: list[FlowWindowBatchItem]
+
+
 class FlowWindowResponse(BaseModel):
     id: str
     window_start: datetime
@@ -69,6 +107,27 @@ class PostSignalSummaryRequest(BaseModel):
     idle_samples: int = 0
 
 
+# A week of hourly summaries from one device.
+SIGNAL_SUMMARY_BATCH_MAX = 168
+
+_SUMMARY_LIST = TypeAdapter(list[PostSignalSummaryRequest])
+
+
+class SignalSummaryBatchItem(BaseModel):
+    index: int
+    status: Literal["created", "updated", "duplicate", "invalid"]
+    id: str | None = None
+    error: str | None = None
+
+
+class SignalSummaryBatchResponse(BaseModel):
+    created: int
+    updated: int
+    duplicates: int
+    invalid: int
+    results: list[SignalSummaryBatchItem]
+
+
 class SignalSummaryResponse(BaseModel):
     id: str
     hour: datetime
@@ -79,6 +138,7 @@ class SignalSummaryResponse(BaseModel):
 
 class DeleteSignalsResponse(BaseModel):
     deleted_summaries: int
+    deleted_flow_rollups: int
 
 
 class TopBucket(BaseModel):
@@ -104,37 +164,206 @@ class FlowWindowSummaryResponse(BaseModel):
     top_bundle: TopBucket | None
 
 
+class FlowSeriesPointResponse(BaseModel):
+    """One bucket of GET /flow-windows/series. ``start`` is local to ``tz``;
+    avg / stddev / peak cover every window, drift markers included, while
+    the top repo / language count focused windows only."""
+
+    start: datetime
+    count: int
+    drift_count: int
+    avg: float
+    stddev: float
+    peak: float
+    top_repo: str | None
+    top_language: str | None
+
+
 # --- Endpoints ---
 
 
+def _to_flow_window(body: PostFlowWindowRequest, device_id: str) -> FlowWindow:
+    # Stored in UTC so the same window sent with a different offset still
+    # hits the (device_id, window_start) unique index.
+    fields = body.model_dump()
+    fields["window_start"] = body.window_start.astimezone(UTC)
+    fields["window_end"] = body.window_end.astimezone(UTC)
+    return FlowWindow(device_id=device_id, **fields)
+
+
 @router.post("/flow-windows", status_code=status.HTTP_201_CREATED)
 async def post_flow_window(
     body: PostFlowWindowRequest,
     request: Request,
     user_id: CurrentUserId,
     repo: FlowWindowRepoDep,
+    rollup_repo: FlowRollupRepoDep,
 ) -> dict[str, str]:
-    """Store a computed flow window from the daemon (device token required)."""
+    """Store a computed flow window from the daemon (device token required).
+
+    Idempotent per (device, window_start): a retried window returns the
+    id of the one already stored.
+    """
     device_id = getattr(request.state, "device_id", "")
-    window = FlowWindow(
-        device_id=device_id,
-        window_start=body.window_start,
-        window_end=body.window_end,
-        flow_score=body.flow_score,
-        cadence_score=body.cadence_score,
-        coherence_score=body.coherence_score,
-        category_fit_score=body.category_fit_score,
-        idle_fraction=body.idle_fraction,
-        dominant_bundle_id=body.dominant_bundle_id,
-        dominant_category=body.dominant_category,
-        context_switches=body.context_switches,
-        active_project_id=body.active_project_id,
-        editor_repo=body.editor_repo,
-        editor_branch=body.editor_branch,
-        editor_language=body.editor_language,
+    window = _to_flow_window(body, device_id)
+    [window_id] = await repo.insert_many([window])
+    if window_id is None:
+        # Already stored (and already rolled up): create hands back that row.
+        existing = await repo.create(window)
+        return {"id": existing.id or ""}
+    await record_flow_windows(rollup_repo, [window.model_copy(update={"id": window_id})])
+    return {"id": window_id}
+
+
+@router.post("/flow-windows:batch", response_model=FlowWindowBatchResponse)
+async def post_flow_windows_batch(
+    request: Request,
+    user_id: CurrentUserId,
+    repo: FlowWindowRepoDep,
+    rollup_repo: FlowRollupRepoDep,
+) -> FlowWindowBatchResponse:
+    """Store up to FLOW_WINDOW_BATCH_MAX windows in one request.
+
+    For daemon catch-up after a reconnect or sleep. The body is a JSON array
+    (or ``{"windows": [...]}``), or NDJSON with ``Content-Type:
+    application/x-ndjson``; either may be sent with ``Content-Encoding:
+    gzip``. Each window is reported on its own: ``created``, ``duplicate``
+    (already stored, or repeated earlier in the batch) or ``invalid``.
+    """
+    device_id = getattr(request.state, "device_id", "")
+    raw = await _read_batch_body(request)
+    items, errors = _parse_batch(raw, request.headers.get("content-type", ""))
+    if len(items) > FLOW_WINDOW_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"At most {FLOW_WINDOW_BATCH_MAX} windows per batch",
+        )
+    valid = _validate_batch(items, errors, _WINDOW_LIST)
+
+    results = [FlowWindowBatchItem(index=i, status="invalid", error=e) for i, e in errors.items()]
+    pending: list[tuple[int, FlowWindow]] = []
+    seen: set[datetime] = set()
+    for index, body in valid.items():
+        window = _to_flow_window(body, device_id)
+        if window.window_start in seen:
+            results.append(FlowWindowBatchItem(index=index, status="duplicate"))
+            continue
+        seen.add(window.window_start)
+        pending.append((index, window))
+
+    ids = await repo.insert_many([window for _, window in pending])
+    await record_flow_windows(
+        rollup_repo,
+        [
+            window.model_copy(update={"id": window_id})
+            for (_, window), window_id in zip(pending, ids, strict=True)
+            if window_id
+        ],
+    )
+    for (index, _), window_id in zip(pending, ids, strict=True):
+        results.append(
+            FlowWindowBatchItem(
+                index=index,
+                status="created" if window_id else "duplicate",
+                id=window_id,
+            )
+        )
+    results.sort(key=lambda r: r.index)
+    return FlowWindowBatchResponse(
+        created=sum(r.status == "created" for r in results),
+        duplicates=sum(r.status == "duplicate" for r in results),
+        invalid=len(errors),
+        results=results,
     )
-    created = await repo.create(window)
-    return {"id": created.id or ""}
+
+
+async def _read_batch_body(request: Request) -> bytes:
+    """The request body, gunzipped if needed, capped at FLOW_WINDOW_BATCH_MAX_BYTES."""
+    encoding = request.headers.get("content-encoding", "identity").strip().lower()
+    if encoding not in ("identity", "gzip"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported Content-Encoding: {encoding}",
+        )
+    too_large = HTTPException(
+        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+        detail=f"Batch body exceeds {FLOW_WINDOW_BATCH_MAX_BYTES} bytes",
+    )
+    gunzip = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS) if encoding == "gzip" else None
+    body = bytearray()
+    async for chunk in request.stream():
+        if gunzip is not None:
+            try:
+                # Bounded inflate: a gzip bomb stops at the cap instead of
+                # expanding into memory.
+                chunk = gunzip.decompress(chunk, FLOW_WINDOW_BATCH_MAX_BYTES - len(body) + 1)
+            except zlib.error as exc:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid gzip body: {exc}"
+                ) from exc
+            if gunzip.unconsumed_tail:
+                raise too_large
+        body += chunk
+        if len(body) > FLOW_WINDOW_BATCH_MAX_BYTES:
+            raise too_large
+    if gunzip is not None and not gunzip.eof:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid gzip body: truncated"
+        )
+    return bytes(body)
+
+
+def _parse_batch(
+    raw: bytes, content_type: str, key: str = "windows"
+) -> tuple[list[Any], dict[int, str]]:
+    """Split a batch body into items; NDJSON lines that aren't JSON are
+    returned as errors by index rather than failing the batch."""
+    errors: dict[int, str] = {}
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in NDJSON_MEDIA_TYPES:
+        items: list[Any] = []
+        for line in raw.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as exc:
+                errors[len(items)] = f"invalid JSON: {exc}"
+                items.append(None)
+        return items, errors
+    try:
+        payload = json.loads(raw)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid JSON body: {exc}"
+        ) from exc
+    if isinstance(payload, dict):
+        payload = payload.get(key)
+    if not isinstance(payload, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Expected a JSON array of {key} or {{"{key}": [...]}}',
+        )
+    return payload, errors
+
+
+def _validate_batch(
+    items: list[Any], errors: dict[int, str], adapter: TypeAdapter[list[Any]]
+) -> dict[int, Any]:
+    """Validate every item in one pass; failures are added to ``errors``."""
+    candidates = [i for i in range(len(items)) if i not in errors]
+    try:
+        valid = adapter.validate_python([items[i] for i in candidates])
+    except ValidationError as exc:
+        failed: dict[int, list[str]] = defaultdict(list)
+        for err in exc.errors(include_url=False):
+            index, *loc = err["loc"]
+            field = ".".join(str(part) for part in loc)
+            failed[candidates[index]].append(f"{field}: {err['msg']}" if field else err["msg"])
+        errors.update((i, "; ".join(msgs)) for i, msgs in failed.items())
+        candidates = [i for i in candidates if i not in failed]
+        valid = adapter.validate_python([items[i] for i in candidates])
+    return dict(zip(candidates, valid, strict=True))
 
 
 @router.get("/flow-windows", response_model=list[FlowWindowResponse])
@@ -160,6 +389,10 @@ async def list_flow_windows(
       this language id (e.g. "go", "typescriptreact").
     - `bundle_id` — only windows whose dominant frontmost app matched
       this macOS bundle id (e.g. "com.microsoft.VSCode").
+
+    Raw windows are only kept for `FLOW_WINDOW_RETENTION_DAYS`; older
+    ranges are available in aggregate from `/flow-windows/series` and
+    `/flow-windows/summary`.
     """
     windows = await repo.list_by_range(
         start,
@@ -208,7 +441,7 @@ async def export_flow_windows_csv(
     can download exactly the slice they're staring at on the Insights
     page (or pulling from `beatsd recent`). One row per window.
     """
-    windows = await repo.list_by_range(
+    windows = repo.stream_by_range(
         start,
         end,
         project_id=project_id,
@@ -217,29 +450,9 @@ async def export_flow_windows_csv(
         bundle_id=bundle_id,
     )
 
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(
-        [
-            "window_start",
-            "window_end",
-            "flow_score",
-            "cadence_score",
-            "coherence_score",
-            "category_fit_score",
-            "idle_fraction",
-            "dominant_bundle_id",
-            "dominant_category",
-            "context_switches",
-            "active_project_id",
-            "editor_repo",
-            "editor_branch",
-            "editor_language",
-        ]
-    )
-    for w in windows:
-        writer.writerow(
-            [
+    async def rows() -> AsyncIterator[list]:
+        async for w in windows:
+            yield [
                 w.window_start.isoformat(),
                 w.window_end.isoformat(),
                 f"{w.flow_score:.4f}",
@@ -255,11 +468,26 @@ async def export_flow_windows_csv(
                 w.editor_branch or "",
                 w.editor_language or "",
             ]
-        )
 
+    header = [
+        "window_start",
+        "window_end",
+        "flow_score",
+        "cadence_score",
+        "coherence_score",
+        "category_fit_score",
+        "idle_fraction",
+        "dominant_bundle_id",
+        "dominant_category",
+        "context_switches",
+        "active_project_id",
+        "editor_repo",
+        "editor_branch",
+        "editor_language",
+    ]
     filename = _csv_filename_for_range(start, end)
     return StreamingResponse(
-        iter([output.getvalue()]),
+        csv_chunks(header, rows()),
         media_type="text/csv",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
@@ -293,6 +521,7 @@ def _csv_filename_for_range(start: datetime, end: datetime) -> str:
 async def summarize_flow_windows(
     user_id: CurrentUserId,
     repo: FlowWindowRepoDep,
+    rollup_repo: FlowRollupRepoDep,
     start: datetime = Query(default_factory=lambda: datetime.now(UTC) - timedelta(days=1)),
     end: datetime = Query(default_factory=lambda: datetime.now(UTC)),
     project_id: str | None = Query(default=None),
@@ -309,8 +538,28 @@ async def summarize_flow_windows(
     without a second request.
 
     Accepts the same filter params as `GET /flow-windows`, AND-composed.
+    Computed by one server-side aggregation, so only the numbers leave
+    Mongo however long the range is.
+
+    An unfiltered range that starts before the raw-window retention is
+    served from the flow rollups instead (see `stats_from_rollups`), to
+    the hour — to the UTC day past the hourly retention — with no
+    `top_bundle`. Filtered reads, like `GET /flow-windows`, only see
+    windows still within retention.
     """
-    windows = await repo.list_by_range(
+    filtered = any(f is not None for f in (project_id, editor_repo, editor_language, bundle_id))
+    if settings.flow_retention_enabled and not filtered:
+        cutoffs = retention_cutoffs(
+            datetime.now(UTC),
+            settings.flow_window_retention_days,
+            settings.flow_hourly_retention_days,
+        )
+        if start < cutoffs.raw:
+            rollups = await load_flow_rollups(rollup_repo, repo, start, end)
+            return FlowWindowSummaryResponse.model_validate(
+                stats_from_rollups(rollups).model_dump()
+            )
+    stats = await repo.summarize_range(
         start,
         end,
         project_id=project_id,
@@ -318,30 +567,30 @@ async def summarize_flow_windows(
         editor_language=editor_language,
         bundle_id=bundle_id,
     )
+    return FlowWindowSummaryResponse.model_validate(stats.model_dump())
 
-    if not windows:
-        return FlowWindowSummaryResponse(
-            count=0,
-            avg=0.0,
-            peak=0.0,
-            peak_at=None,
-            top_repo=None,
-            top_language=None,
-            top_bundle=None,
-        )
 
-    total = sum(w.flow_score for w in windows)
-    peak_window = max(windows, key=lambda w: w.flow_score)
-
-    return FlowWindowSummaryResponse(
-        count=len(windows),
-        avg=total / len(windows),
-        peak=peak_window.flow_score,
-        peak_at=peak_window.window_start,
-        top_repo=_top_bucket(windows, lambda w: w.editor_repo or ""),
-        top_language=_top_bucket(windows, lambda w: w.editor_language or ""),
-        top_bundle=_top_bucket(windows, lambda w: w.dominant_bundle_id or ""),
-    )
+@router.get("/flow-windows/series", response_model=list[FlowSeriesPointResponse])
+async def flow_window_series(
+    user_id: CurrentUserId,
+    repo: FlowWindowRepoDep,
+    rollup_repo: FlowRollupRepoDep,
+    tz: TimezoneDep,
+    bucket: SeriesBucket = Query(default="day"),
+    start: datetime = Query(default_factory=lambda: datetime.now(UTC) - timedelta(days=30)),
+    end: datetime = Query(default_factory=lambda: datetime.now(UTC)),
+) -> list[FlowSeriesPointResponse]:
+    """Flow stats per hour, day or week (local to ``tz``) over [start, end].
+
+    Served from the hourly rollups rather than raw windows, so a year of
+    daily points reads ~9k rows however many windows the daemon sent.
+    Buckets without windows are omitted.
+    """
+    rollups = await load_flow_rollups(rollup_repo, repo, start, end)
+    return [
+        FlowSeriesPointResponse.model_validate(point.model_dump())
+        for point in flow_series(rollups, bucket, tz)
+    ]
 
 
 def _top_bucket(windows: list[FlowWindow], key_of) -> TopBucket | None:
@@ -350,7 +599,11 @@ def _top_bucket(windows: list[FlowWindow], key_of) -> TopBucket | None:
     Empty keys are skipped so an axis with no editor heartbeats returns
     None rather than a meaningless "" bucket. Tie-breaks on avg so the
     higher-quality bucket wins when minutes match — same rule as the
-    daemon's `beatsd top` and the UI's aggregation cards."""
+    daemon's `beatsd top` and the UI's aggregation cards.
+
+    No longer on the request path: the summary endpoint runs the same
+    reduction as a Mongo aggregation (`summarize_range`), and this is
+    the reference the tests hold it to."""
     sums: dict[str, float] = {}
     counts: dict[str, int] = {}
     for w in windows:
@@ -389,6 +642,73 @@ async def post_signal_summary(
     return {"id": result.id or ""}
 
 
+@router.post("/summaries:batch", response_model=SignalSummaryBatchResponse)
+async def post_signal_summaries_batch(
+    request: Request,
+    user_id: CurrentUserId,
+    repo: SignalSummaryRepoDep,
+) -> SignalSummaryBatchResponse:
+    """Upsert up to SIGNAL_SUMMARY_BATCH_MAX hourly summaries in one request.
+
+    For a daemon catching up on the hours it was offline. Accepts the same
+    bodies as ``/flow-windows:batch`` (a JSON array or ``{"summaries":
+    [...]}``, NDJSON, optionally gzipped) and writes them in one round-trip.
+    Each summary is reported as ``created``, ``updated`` (the hour was
+    already stored; only created rows get an ``id``), ``duplicate`` (the
+    same hour appears later in the batch, and the later one wins) or
+    ``invalid``.
+    """
+    device_id = getattr(request.state, "device_id", "")
+    raw = await _read_batch_body(request)
+    items, errors = _parse_batch(raw, request.headers.get("content-type", ""), "summaries")
+    if len(items) > SIGNAL_SUMMARY_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"At most {SIGNAL_SUMMARY_BATCH_MAX} summaries per batch",
+        )
+    valid: dict[int, PostSignalSummaryRequest] = _validate_batch(items, errors, _SUMMARY_LIST)
+
+    results = [
+        SignalSummaryBatchItem(index=i, status="invalid", error=e) for i, e in errors.items()
+    ]
+    latest: dict[datetime, int] = {}
+    for index, body in valid.items():
+        hour = body.hour.astimezone(UTC)
+        if hour in latest:
+            results.append(SignalSummaryBatchItem(index=latest[hour], status="duplicate"))
+        latest[hour] = index
+
+    indexes = sorted(latest.values())
+    ids = await repo.upsert_many(
+        [
+            SignalSummary(
+                device_id=device_id,
+                hour=valid[i].hour,
+                categories=valid[i].categories,
+                total_samples=valid[i].total_samples,
+                idle_samples=valid[i].idle_samples,
+            )
+            for i in indexes
+        ]
+    )
+    for index, summary_id in zip(indexes, ids, strict=True):
+        results.append(
+            SignalSummaryBatchItem(
+                index=index,
+                status="created" if summary_id else "updated",
+                id=summary_id,
+            )
+        )
+    results.sort(key=lambda r: r.index)
+    return SignalSummaryBatchResponse(
+        created=sum(r.status == "created" for r in results),
+        updated=sum(r.status == "updated" for r in results),
+        duplicates=sum(r.status == "duplicate" for r in results),
+        invalid=len(errors),
+        results=results,
+    )
+
+
 @router.get("/summaries", response_model=list[SignalSummaryResponse])
 async def list_signal_summaries(
     user_id: CurrentUserId,
@@ -571,6 +891,7 @@ async def post_drift_event(
     request: Request,
     user_id: CurrentUserId,
     repo: FlowWindowRepoDep,
+    rollup_repo: FlowRollupRepoDep,
 ) -> dict[str, str]:
     """Record a distraction drift event from the daemon.
 
@@ -579,6 +900,8 @@ async def post_drift_event(
     duration_seconds — previous versions set window_end to
     started_at, dropping the duration field on the floor and
     making "total distraction time" uncomputable from the data.
+    Like any window, it is folded into the hourly rollups, where it
+    counts towards ``drift_count``.
     """
     device_id = getattr(request.state, "device_id", "")
     window = FlowWindow(
@@ -590,8 +913,12 @@ async def post_drift_event(
         dominant_category="drift",
         context_switches=0,
     )
-    created = await repo.create(window)
-    return {"id": created.id or ""}
+    [window_id] = await repo.insert_many([window])
+    if window_id is None:
+        existing = await repo.create(window)
+        return {"id": existing.id or ""}
+    await record_flow_windows(rollup_repo, [window.model_copy(update={"id": window_id})])
+    return {"id": window_id}
 
 
 class DriftEvent(BaseModel):
@@ -652,7 +979,12 @@ async def get_recent_drift(
 async def delete_all_signals(
     user_id: CurrentUserId,
     summary_repo: SignalSummaryRepoDep,
+    rollup_repo: FlowRollupRepoDep,
 ) -> DeleteSignalsResponse:
-    """Delete all signal summaries for the current user (privacy dashboard)."""
+    """Delete all signal summaries and flow rollups for the current user
+    (privacy dashboard). Rollups outlive the raw windows they were built
+    from, repo paths included; the next flow read rebuilds them from the
+    windows still within retention."""
     deleted = await summary_repo.delete_all()
-    return DeleteSignalsResponse(deleted_summaries=deleted)
+    rollups = await rollup_repo.delete_all()
+    return DeleteSignalsResponse(deleted_summaries=deleted, deleted_flow_rollups=rollups)
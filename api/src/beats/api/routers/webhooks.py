@@ -1,21 +1,27 @@
-"""Webhooks API router — CRUD and dispatch for timer event webhooks."""
+"""Webhooks API router — CRUD, dispatch and the delivery log for timer event webhooks."""
 
-import asyncio
 import http
 import logging
 from collections import defaultdict
 from datetime import UTC, date, datetime, timedelta
+from typing import Literal
 
-import httpx
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, status
 from pydantic import BaseModel
 
 from beats.api.dependencies import (
     BeatServiceDep,
     ProjectServiceDep,
+    WebhookDeliveryRepoDep,
     WebhookRepoDep,
 )
-from beats.domain.models import Webhook
+from beats.domain.models import Webhook, WebhookDelivery
+from beats.infrastructure.repositories import WebhookDeliveryRepository, WebhookRepository
+from beats.infrastructure.webhook_dispatcher import (
+    host_of,
+    percentile,
+    wake_webhook_dispatcher,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +41,21 @@ class WebhookResponse(BaseModel):
     created_at: datetime
 
 
+class WebhookDeliveryResponse(BaseModel):
+    id: str
+    webhook_id: str
+    url: str
+    event: str
+    status: str
+    attempts: int
+    next_attempt_at: datetime
+    created_at: datetime
+    delivered_at: datetime | None = None
+    last_error: str | None = None
+    last_status_code: int | None = None
+    latency_ms: float | None = None
+
+
 @router.get("/", response_model=list[WebhookResponse])
 async def list_webhooks(repo: WebhookRepoDep):
     """List all registered webhooks."""
@@ -60,6 +81,7 @@ async def delete_webhook(webhook_id: str, repo: WebhookRepoDep):
 @router.post("/daily-summary/trigger")
 async def trigger_daily_summary(
     webhook_repo: WebhookRepoDep,
+    delivery_repo: WebhookDeliveryRepoDep,
     beat_service: BeatServiceDep,
     project_service: ProjectServiceDep,
     target_date: date = Query(default_factory=date.today),
@@ -94,33 +116,62 @@ async def trigger_daily_summary(
         "project_breakdown": breakdown,
     }
 
-    await dispatch_webhook_event("daily.summary", payload, webhook_repo)
+    await dispatch_webhook_event("daily.summary", payload, webhook_repo, delivery_repo)
     return payload
 
 
-# Module-level set holding strong references to in-flight webhook
-# dispatch tasks. asyncio.create_task only stores a weak reference
-# internally — without keeping a strong ref somewhere, Python's GC
-# can reap the task mid-execution and the webhook silently never
-# fires. The standard pattern (per the asyncio.create_task docs)
-# is to track tasks in a set and discard on completion.
-_pending_dispatches: set[asyncio.Task] = set()
+@router.get("/deliveries", response_model=list[WebhookDeliveryResponse])
+async def list_deliveries(
+    delivery_repo: WebhookDeliveryRepoDep,
+    delivery_status: Literal["pending", "delivered", "dead"] | None = Query(
+        default=None, alias="status"
+    ),
+    limit: int = Query(default=50, ge=1, le=500),
+):
+    """Recent deliveries, newest first — the dead-letter log with ``?status=dead``."""
+    deliveries = await delivery_repo.list_recent(delivery_status, limit)
+    return [d.model_dump(mode="json") for d in deliveries]
+
+
+@router.get("/deliveries/stats")
+async def delivery_stats(delivery_repo: WebhookDeliveryRepoDep):
+    """Queue depth per status and latency of recent successful deliveries."""
+    counts = await delivery_repo.count_by_status()
+    latencies = await delivery_repo.recent_latencies()
+    return {
+        "pending": counts.get("pending", 0),
+        "delivered": counts.get("delivered", 0),
+        "dead": counts.get("dead", 0),
+        "latency_p50_ms": percentile(latencies, 0.50),
+        "latency_p95_ms": percentile(latencies, 0.95),
+    }
+
+
+@router.post("/deliveries/{delivery_id}/replay", response_model=WebhookDeliveryResponse)
+async def replay_delivery(delivery_id: str, delivery_repo: WebhookDeliveryRepoDep):
+    """Queue a delivered or dead delivery again, with a fresh retry budget."""
+    delivery = await delivery_repo.requeue(delivery_id)
+    if delivery is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Delivery not found or already pending",
+        )
+    wake_webhook_dispatcher()
+    return delivery.model_dump(mode="json")
 
 
 async def dispatch_webhook_event(
     event: str,
     payload: dict,
-    repo: WebhookRepoDep,
+    repo: WebhookRepository,
+    deliveries: WebhookDeliveryRepository,
 ) -> None:
-    """Fire-and-forget webhook dispatch for a timer event.
-
-    The docstring used to claim "fire-and-forget" but the function
-    awaited the actual HTTP delivery — so a single slow webhook URL
-    could block timer start/stop for up to 10s × N webhooks. Now
-    truly fire-and-forget: the repo lookup is awaited (we need the
-    webhook list before scheduling), but the HTTP POSTs run in
-    detached background tasks. Callers return immediately to the
-    user; webhook delivery happens out-of-band.
+    """Queue ``event`` for every active webhook subscribed to it.
+
+    Only the outbox insert is awaited: the POSTs are made by the background
+    dispatcher (beats.infrastructure.webhook_dispatcher), so timer start/stop
+    latency doesn't depend on how fast — or whether — receivers answer, and
+    queued deliveries survive a restart.
     """
     webhooks = await repo.list_by_event(event)
     if not webhooks:
@@ -131,20 +182,10 @@ async def dispatch_webhook_event(
         "timestamp": datetime.now(UTC).isoformat(),
         "data": payload,
     }
-
-    async def _send(url: str) -> None:
-        try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                await client.post(url, json=body)
-        except Exception:
-            logger.warning("Webhook delivery failed for %s to %s", event, url)
-
-    # Detach delivery so the request that triggered the dispatch
-    # returns to the user without waiting on each webhook URL's
-    # response. Pin task references in _pending_dispatches so the
-    # GC doesn't reap them mid-flight — discard on done so the set
-    # doesn't grow unboundedly.
-    for w in webhooks:
-        task = asyncio.create_task(_send(w.url))
-        _pending_dispatches.add(task)
-        task.add_done_callback(_pending_dispatches.discard)
+    await deliveries.enqueue(
+        [
+            WebhookDelivery(webhook_id=w.id, url=w.url, host=host_of(w.url), event=event, body=body)
+            for w in webhooks
+        ]
+    )
+    wake_webhook_dispatcher()
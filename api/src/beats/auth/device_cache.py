@@ -0,0 +1,200 @@
+"""In-process cache of device registration state for device-token auth.
+
+Device tokens never expire, so the authentication middleware has to check on
+every request that the token's registration still exists and isn't revoked.
+That was a `device_registrations` read per request — and device traffic is
+the bulk of it (the wall clock polls /api/device/status every 10s, the
+daemon posts flow windows continuously). The answer only ever changes when a
+device is revoked, so it is cached here per device id:
+
+  - entries expire after ``ttl_seconds`` and the least recently used are
+    evicted past ``max_entries``;
+  - ``revoke_registration`` invalidates the device on the instance that
+    served the DELETE, so the revoking user sees it take effect immediately;
+  - other instances pick it up when their entry expires, or within seconds
+    when ``watch_device_revocations`` is running (a change stream on
+    `device_registrations`, which needs a replica set — Atlas, not the
+    standalone dev container). A stream lost to a failover or a network
+    error is reopened with backoff, and the cache cleared once it is back.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import OperationFailure, PyMongoError
+
+from beats.domain.models import DeviceRegistration
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on how long a revocation can go unnoticed by another instance
+# when no change stream is running.
+DEVICE_CACHE_TTL = 30.0
+DEVICE_CACHE_MAX_ENTRIES = 10_000
+
+# Server error for $changeStream on a standalone mongod: the one failure
+# reconnecting can't fix.
+CHANGE_STREAMS_UNSUPPORTED = 40573
+# Seconds before reopening a failed stream, doubling per consecutive failure.
+WATCH_RETRY_BASE_DELAY = 1.0
+WATCH_RETRY_MAX_DELAY = 60.0
+
+RegistrationLoader = Callable[[str], Awaitable[DeviceRegistration | None]]
+
+
+@dataclass(frozen=True, slots=True)
+class _Entry:
+    active: bool
+    registration_id: str | None
+    expires_at: float
+
+
+class DeviceRegistrationCache:
+    """TTL + LRU map of device id -> "registered and not revoked"."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEVICE_CACHE_TTL,
+        max_entries: int = DEVICE_CACHE_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        # Registration _id -> device id, so change events (which only carry
+        # the documentKey) can find the entry to drop.
+        self._by_registration: dict[str, str] = {}
+        # Bumped on every invalidation. A load that started before one is
+        # not stored, so a revoke racing an in-flight miss can't be undone
+        # by the pre-revoke read landing afterwards.
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def is_active(self, device_id: str, load: RegistrationLoader) -> bool:
+        """Whether ``device_id`` has a live registration; ``load`` runs on a miss.
+
+        Missing and revoked registrations are cached too — revocation is
+        one-way, and a token for an unknown device stays unknown.
+        """
+        now = self._clock()
+        entry = self._entries.get(device_id)
+        if entry is not None and entry.expires_at > now:
+            self._entries.move_to_end(device_id)
+            return entry.active
+
+        generation = self._generation
+        reg = await load(device_id)
+        active = reg is not None and not reg.revoked
+        if generation == self._generation:
+            self._store(
+                device_id,
+                _Entry(active, reg.id if reg is not None else None, now + self._ttl),
+            )
+        return active
+
+    def invalidate(self, device_id: str) -> None:
+        """Forget ``device_id``; the next request re-reads it from Mongo."""
+        self._generation += 1
+        self._drop(device_id)
+
+    def invalidate_registration(self, registration_id: str) -> None:
+        """Forget whichever device the registration document belongs to."""
+        device_id = self._by_registration.get(registration_id)
+        if device_id is not None:
+            self.invalidate(device_id)
+
+    def apply_change(self, change: Mapping[str, Any]) -> None:
+        """Apply one `device_registrations` change-stream event."""
+        if change.get("operationType") in ("update", "replace", "delete"):
+            self.invalidate_registration(str(change["documentKey"]["_id"]))
+        else:
+            # drop / rename / invalidate: no per-document key to go on.
+            self.clear()
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+        self._by_registration.clear()
+
+    def _store(self, device_id: str, entry: _Entry) -> None:
+        self._drop(device_id)
+        self._entries[device_id] = entry
+        if entry.registration_id is not None:
+            self._by_registration[entry.registration_id] = device_id
+        while len(self._entries) > self._max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, device_id: str) -> None:
+        entry = self._entries.pop(device_id, None)
+        if entry is not None and entry.registration_id is not None:
+            self._by_registration.pop(entry.registration_id, None)
+
+
+# Only events that can change the cached answer. update_last_seen rewrites
+# `last_seen` on every heartbeat; those updates are filtered out server-side.
+_REVOCATION_PIPELINE: list[dict[str, Any]] = [
+    {
+        "$match": {
+            "$or": [
+                {"operationType": {"$in": ["replace", "delete", "drop", "rename"]}},
+                {
+                    "operationType": "update",
+                    "updateDescription.updatedFields.revoked": {"$exists": True},
+                },
+            ]
+        }
+    }
+]
+
+
+async def watch_device_revocations(
+    collection: AsyncCollection,
+    cache: DeviceRegistrationCache,
+    sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+) -> None:
+    """Invalidate ``cache`` entries as registrations are revoked on any instance.
+
+    Runs until cancelled. If change streams aren't available (standalone
+    mongod) it logs once and returns — the TTL still bounds staleness. Any
+    other error (a failover, a dropped connection) reopens the stream after
+    a capped exponential backoff; revocations made meanwhile were never
+    seen, so the cache is cleared once it is open again.
+    """
+    failures = 0
+    while True:
+        try:
+            async with await collection.watch(_REVOCATION_PIPELINE) as stream:
+                if failures:
+                    cache.clear()
+                    logger.info("Device revocation change stream reopened")
+                    failures = 0
+                async for change in stream:
+                    cache.apply_change(change)
+        except PyMongoError as exc:
+            if isinstance(exc, OperationFailure) and exc.code == CHANGE_STREAMS_UNSUPPORTED:
+                logger.warning(
+                    "Device revocation change stream unavailable, relying on the cache TTL: %s",
+                    exc,
+                )
+                return
+            failures += 1
+            delay = min(WATCH_RETRY_MAX_DELAY, WATCH_RETRY_BASE_DELAY * 2 ** (failures - 1))
+            logger.warning(
+                "Device revocation change stream failed, reopening in %.0fs: %s", delay, exc
+            )
+            await sleep(delay)
+            continue
+        # The stream ends after an invalidate event (collection dropped or
+        # renamed): anything cached may be stale, so start over.
+        cache.clear()
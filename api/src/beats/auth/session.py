@@ -1,6 +1,7 @@
-"""Session management with JWT tokens and in-memory challenge storage."""
+"""Session management with JWT tokens and shared challenge / revocation storage."""
 
 import base64
+import hashlib
 import logging
 import time
 import uuid
@@ -8,7 +9,8 @@ from datetime import UTC, datetime, timedelta
 from typing import Any
 
 import jwt
-from pydantic import BaseModel
+
+from beats.auth.state_store import InMemoryStateStore, SharedStateStore
 
 logger = logging.getLogger(__name__)
 
@@ -19,81 +21,67 @@ CHALLENGE_TTL = 300
 SESSION_TTL = 3600
 
 
-class Challenge(BaseModel):
-    """A WebAuthn challenge with expiration."""
+# Shared-state namespaces (see beats.auth.state_store). Challenges are kept
+# per type, so a challenge can only be consumed by the ceremony it was
+# issued for.
+CHALLENGE_NS = "challenge:{}"
+PENDING_REGISTRATION_NS = "pending_registration"
+REVOKED_TOKEN_NS = "revoked_token"
+CHALLENGE_TYPES = ("registration", "authentication")
 
-    value: str
-    created_at: float
-    challenge_type: str  # "registration" or "authentication"
 
+def _b64(challenge: bytes) -> str:
+    return base64.urlsafe_b64encode(challenge).rstrip(b"=").decode("ascii")
 
-class SessionManager:
-    """Manages JWT sessions and WebAuthn challenges."""
 
-    def __init__(self, jwt_secret: str, session_ttl: int = SESSION_TTL):
-        self._jwt_secret = jwt_secret
-        self._session_ttl = session_ttl
-        # In-memory challenge storage: challenge_value -> Challenge
-        self._challenges: dict[str, Challenge] = {}
-        # Pending registration: challenge_b64 -> user_id
-        self._pending_registrations: dict[str, str] = {}
-        # Revoked tokens: token -> expiry timestamp (auto-cleaned)
-        self._revoked_tokens: dict[str, float] = {}
-
-    def get_current_challenge(self, challenge_type: str) -> str | None:
-        """Get the most recent unexpired challenge of the given type."""
-        self._cleanup_expired_challenges()
+def _token_key(token: str) -> str:
+    """Revocations are stored under the token's digest, never the token itself."""
+    return hashlib.sha256(token.encode()).hexdigest()
 
-        # Find the most recent challenge of the given type
-        valid_challenges = [
-            c for c in self._challenges.values() if c.challenge_type == challenge_type
-        ]
 
-        if not valid_challenges:
-            return None
+class SessionManager:
+    """Manages JWT sessions and WebAuthn challenges.
+
+    Challenges, pending registrations and revocations live in ``store``, so
+    every process sharing it sees the same ones; the default in-memory store
+    is only right for a single process.
+    """
+
+    def __init__(
+        self,
+        jwt_secret: str,
+        session_ttl: int = SESSION_TTL,
+        store: SharedStateStore | None = None,
+    ):
+        self._jwt_secret = jwt_secret
+        self._session_ttl = session_ttl
+        self.store = store if store is not None else InMemoryStateStore()
 
-        # Return the most recent one
-        most_recent = max(valid_challenges, key=lambda c: c.created_at)
-        return most_recent.value
+    async def get_current_challenge(self, challenge_type: str) -> str | None:
+        """Get the most recent unexpired challenge of the given type."""
+        latest = await self.store.latest(CHALLENGE_NS.format(challenge_type))
+        return latest[0] if latest else None
 
-    def validate_challenge(self, challenge: str, challenge_type: str) -> bool:
+    async def validate_challenge(self, challenge: str, challenge_type: str) -> bool:
         """Validate and consume a challenge."""
-        self._cleanup_expired_challenges()
-
-        stored = self._challenges.get(challenge)
-        if stored is None:
-            logger.warning(f"Challenge not found: {challenge[:20]}...")
-            return False
-
-        if stored.challenge_type != challenge_type:
-            logger.warning(
-                f"Challenge type mismatch: expected {challenge_type}, got {stored.challenge_type}"
-            )
+        if await self.store.pop(CHALLENGE_NS.format(challenge_type), challenge) is None:
+            logger.warning(f"Challenge not found for {challenge_type}: {challenge[:20]}...")
             return False
-
-        # Challenge is valid, consume it (one-time use)
-        del self._challenges[challenge]
         logger.debug(f"Validated and consumed challenge: {challenge[:20]}...")
         return True
 
-    def store_challenge(self, challenge: bytes, challenge_type: str = "authentication") -> str:
+    async def store_challenge(
+        self, challenge: bytes, challenge_type: str = "authentication"
+    ) -> str:
         """Store a challenge that was generated externally (e.g., by py_webauthn)."""
-        self._cleanup_expired_challenges()
-
-        challenge_b64 = base64.urlsafe_b64encode(challenge).rstrip(b"=").decode("ascii")
-
-        self._challenges[challenge_b64] = Challenge(
-            value=challenge_b64,
-            created_at=time.time(),
-            challenge_type=challenge_type,
-        )
-
+        challenge_b64 = _b64(challenge)
+        await self.store.set(CHALLENGE_NS.format(challenge_type), challenge_b64, {}, CHALLENGE_TTL)
         logger.debug(f"Stored {challenge_type} challenge: {challenge_b64[:20]}...")
         return challenge_b64
 
-    def get_stored_challenge(self, challenge_type: str) -> bytes | None:
+    async def get_stored_challenge(self, challenge_type: str) -> bytes | None:
         """Get the raw bytes of the most recent challenge of the given type."""
-        challenge_b64 = self.get_current_challenge(challenge_type)
+        challenge_b64 = await self.get_current_challenge(challenge_type)
         if challenge_b64 is None:
             return None
 
@@ -104,32 +92,19 @@ class SessionManager:
 
         return base64.urlsafe_b64decode(challenge_b64)
 
-    def _cleanup_expired_challenges(self) -> None:
-        """Remove expired challenges and their pending registrations from memory."""
-        now = time.time()
-        expired = [
-            key
-            for key, challenge in self._challenges.items()
-            if now - challenge.created_at > CHALLENGE_TTL
-        ]
-        for key in expired:
-            del self._challenges[key]
-            self._pending_registrations.pop(key, None)
-
-        if expired:
-            logger.debug(f"Cleaned up {len(expired)} expired challenges")
-
-    def store_pending_registration(self, challenge: bytes, user_id: str) -> None:
-        """Store user_id for a pending registration challenge."""
-        challenge_b64 = base64.urlsafe_b64encode(challenge).rstrip(b"=").decode("ascii")
-        self._pending_registrations[challenge_b64] = user_id
-
-    def get_pending_registration_user_id(self, challenge_type: str) -> str | None:
+    async def store_pending_registration(self, challenge: bytes, user_id: str) -> None:
+        """Store user_id for a pending registration challenge; it expires with it."""
+        await self.store.set(
+            PENDING_REGISTRATION_NS, _b64(challenge), {"user_id": user_id}, CHALLENGE_TTL
+        )
+
+    async def get_pending_registration_user_id(self, challenge_type: str) -> str | None:
         """Get the user_id for the current pending registration."""
-        challenge_b64 = self.get_current_challenge(challenge_type)
+        challenge_b64 = await self.get_current_challenge(challenge_type)
         if challenge_b64 is None:
             return None
-        return self._pending_registrations.get(challenge_b64)
+        pending = await self.store.get(PENDING_REGISTRATION_NS, challenge_b64)
+        return pending["user_id"] if pending else None
 
     def create_session_token(self, user_id: str, email: str = "") -> str:
         """Create a JWT session token."""
@@ -178,22 +153,10 @@ class SessionManager:
             logger.warning(f"Invalid device token: {e}")
             return None
 
-    def validate_session_token(self, token: str) -> dict | None:
+    async def validate_session_token(self, token: str) -> dict | None:
         """Validate a JWT session token and return the payload."""
-        self._cleanup_revoked_tokens()
-
-        if token in self._revoked_tokens:
-            logger.debug("Token has been revoked")
-            return None
-
         try:
             payload = jwt.decode(token, self._jwt_secret, algorithms=["HS256"])
-
-            if payload.get("type") != "session":
-                logger.warning("Token type is not 'session'")
-                return None
-
-            return payload
         except jwt.ExpiredSignatureError:
             logger.debug("Session token expired")
             return None
@@ -201,9 +164,20 @@ class SessionManager:
             logger.warning(f"Invalid session token: {e}")
             return None
 
-    def refresh_token(self, token: str) -> str | None:
+        if payload.get("type") != "session":
+            logger.warning("Token type is not 'session'")
+            return None
+
+        # Checked after the signature so forged tokens never reach the store.
+        if await self.store.get(REVOKED_TOKEN_NS, _token_key(token)) is not None:
+            logger.debug("Token has been revoked")
+            return None
+
+        return payload
+
+    async def refresh_token(self, token: str) -> str | None:
         """Issue a new token from a valid existing one, revoking the old one."""
-        payload = self.validate_session_token(token)
+        payload = await self.validate_session_token(token)
         if payload is None:
             return None
 
@@ -211,30 +185,24 @@ class SessionManager:
         email = payload.get("email", "")
 
         # Revoke the old token and issue a new one
-        self.revoke_token(token)
+        await self.revoke_token(token)
         return self.create_session_token(user_id, email)
 
-    def revoke_token(self, token: str) -> None:
+    async def revoke_token(self, token: str) -> None:
         """Add a token to the revocation list. It stays until its natural expiry."""
         try:
             # Decode without verification to read the expiry time
             payload = jwt.decode(
                 token, self._jwt_secret, algorithms=["HS256"], options={"verify_exp": False}
             )
-            exp = payload.get("exp", time.time())
-            self._revoked_tokens[token] = float(exp)
-            logger.info("Revoked session token for user: %s", payload.get("sub"))
         except jwt.InvalidTokenError:
-            pass  # Invalid token, nothing to revoke
-
-    def _cleanup_revoked_tokens(self) -> None:
-        """Remove expired entries from the revocation list."""
-        now = time.time()
-        expired = [t for t, exp in self._revoked_tokens.items() if now > exp]
-        for t in expired:
-            del self._revoked_tokens[t]
+            return  # Invalid token, nothing to revoke
+        remaining = float(payload.get("exp", 0)) - time.time()
+        if remaining > 0:
+            await self.store.set(REVOKED_TOKEN_NS, _token_key(token), {}, remaining)
+        logger.info("Revoked session token for user: %s", payload.get("sub"))
 
-    def get_challenge_count(self) -> int:
+    async def get_challenge_count(self) -> int:
         """Get the number of active challenges (for debugging)."""
-        self._cleanup_expired_challenges()
-        return len(self._challenges)
+        counts = [await self.store.count(CHALLENGE_NS.format(t)) for t in CHALLENGE_TYPES]
+        return sum(counts)
@@ -0,0 +1,183 @@
+"""Short-lived state shared by every API process: challenges, revocations, heartbeats.
+
+``SessionManager`` used to keep WebAuthn challenges, pending registrations
+and revoked tokens in dicts, and the device router kept the wall clock's
+last heartbeat in a module global. With more than one worker or instance, a
+logout on one left the token valid on the others, a passkey ceremony broke
+whenever its two requests landed on different processes, and the heartbeat
+read depended on which instance took the POST. The state now lives behind
+``SharedStateStore``:
+
+  - ``InMemoryStateStore`` — one process only (unit tests, local dev);
+  - ``MongoStateStore`` — the ``shared_state`` collection, for any number
+    of workers and instances (``SHARED_STATE=mongo``, the default).
+
+Entries are namespaced key → small dict with a TTL, and every store
+enforces the TTL itself: expired entries are never returned, and they
+are dropped lazily in memory or by a TTL index in Mongo. Nothing needs an
+O(n) sweep on the request path. A Redis-protocol backend would implement
+the same five methods (SET EX, GET, GETDEL, plus a per-namespace sorted
+set for ``latest`` and ``count``); Mongo is used here because every deploy
+already has it.
+"""
+
+from __future__ import annotations
+
+import heapq
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from pymongo.asynchronous.collection import AsyncCollection
+
+
+class SharedStateStore(ABC):
+    """Namespaced key → dict entries that expire after a per-entry TTL."""
+
+    @abstractmethod
+    async def set(self, namespace: str, key: str, value: dict[str, Any], ttl: float) -> None:
+        """Store ``value`` under ``key`` for ``ttl`` seconds, replacing any entry."""
+        ...
+
+    @abstractmethod
+    async def get(self, namespace: str, key: str) -> dict[str, Any] | None:
+        """The live entry under ``key``, or None."""
+        ...
+
+    @abstractmethod
+    async def pop(self, namespace: str, key: str) -> dict[str, Any] | None:
+        """Atomically remove and return the live entry under ``key``.
+
+        Of two concurrent pops of the same key, only one gets the entry —
+        which is what makes a challenge single-use across processes.
+        """
+        ...
+
+    @abstractmethod
+    async def latest(self, namespace: str) -> tuple[str, dict[str, Any]] | None:
+        """The most recently set live (key, value) in ``namespace``."""
+        ...
+
+    @abstractmethod
+    async def count(self, namespace: str) -> int:
+        """Live entries in ``namespace``."""
+        ...
+
+
+class InMemoryStateStore(SharedStateStore):
+    """Process-local store. Expired entries are skipped on read and dropped
+    when touched, or in bulk once a namespace has grown past ``sweep_at``."""
+
+    def __init__(self, clock: Callable[[], float] = time.time, sweep_at: int = 1024):
+        self._clock = clock
+        self._sweep_at = sweep_at
+        # namespace -> key -> (expires_at, set_at, value)
+        self._data: dict[str, dict[str, tuple[float, float, dict[str, Any]]]] = {}
+
+    def _live(self, namespace: str, key: str) -> dict[str, Any] | None:
+        entries = self._data.get(namespace, {})
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= self._clock():
+            del entries[key]
+            return None
+        return entry[2]
+
+    async def set(self, namespace: str, key: str, value: dict[str, Any], ttl: float) -> None:
+        now = self._clock()
+        entries = self._data.setdefault(namespace, {})
+        if len(entries) >= self._sweep_at:
+            # Amortized: a namespace only sweeps after it doubled since the last one.
+            for stale in [k for k, e in entries.items() if e[0] <= now]:
+                del entries[stale]
+            self._sweep_at = max(self._sweep_at, 2 * len(entries))
+        entries[key] = (now + ttl, now, dict(value))
+
+    async def get(self, namespace: str, key: str) -> dict[str, Any] | None:
+        value = self._live(namespace, key)
+        return dict(value) if value is not None else None
+
+    async def pop(self, namespace: str, key: str) -> dict[str, Any] | None:
+        value = self._live(namespace, key)
+        if value is not None:
+            del self._data[namespace][key]
+        return value
+
+    async def latest(self, namespace: str) -> tuple[str, dict[str, Any]] | None:
+        now = self._clock()
+        live = ((e[1], k, e[2]) for k, e in self._data.get(namespace, {}).items() if e[0] > now)
+        newest = heapq.nlargest(1, live, key=lambda item: item[0])
+        if not newest:
+            return None
+        _, key, value = newest[0]
+        return key, dict(value)
+
+    async def count(self, namespace: str) -> int:
+        now = self._clock()
+        return sum(1 for e in self._data.get(namespace, {}).values() if e[0] > now)
+
+
+class MongoStateStore(SharedStateStore):
+    """``shared_state`` documents ``{_id: "<namespace>:<key>", ns, value,
+    set_at, expires_at}``; the TTL index on ``expires_at`` removes them
+    (within about a minute), and reads filter on it so they never see one
+    that is due."""
+
+    def __init__(
+        self,
+        collection: Callable[[], AsyncCollection],
+        clock: Callable[[], datetime] = lambda: datetime.now(UTC),
+    ):
+        # Resolved per call: the store is built at import time, before the
+        # lifespan connects the database.
+        self._collection = collection
+        self._clock = clock
+
+    @staticmethod
+    def _id(namespace: str, key: str) -> str:
+        return f"{namespace}:{key}"
+
+    async def set(self, namespace: str, key: str, value: dict[str, Any], ttl: float) -> None:
+        now = self._clock()
+        await self._collection().replace_one(
+            {"_id": self._id(namespace, key)},
+            {
+                "ns": namespace,
+                "value": value,
+                "set_at": now,
+                "expires_at": now + timedelta(seconds=ttl),
+            },
+            upsert=True,
+        )
+
+    async def get(self, namespace: str, key: str) -> dict[str, Any] | None:
+        doc = await self._collection().find_one(
+            {"_id": self._id(namespace, key), "expires_at": {"$gt": self._clock()}},
+            {"value": 1},
+        )
+        return doc["value"] if doc else None
+
+    async def pop(self, namespace: str, key: str) -> dict[str, Any] | None:
+        doc = await self._collection().find_one_and_delete(
+            {"_id": self._id(namespace, key), "expires_at": {"$gt": self._clock()}},
+            projection={"value": 1},
+        )
+        return doc["value"] if doc else None
+
+    async def latest(self, namespace: str) -> tuple[str, dict[str, Any]] | None:
+        doc = await self._collection().find_one(
+            {"ns": namespace, "expires_at": {"$gt": self._clock()}},
+            {"value": 1},
+            sort=[("set_at", -1)],
+        )
+        if doc is None:
+            return None
+        return doc["_id"].removeprefix(f"{namespace}:"), doc["value"]
+
+    async def count(self, namespace: str) -> int:
+        return await self._collection().count_documents(
+            {"ns": namespace, "expires_at": {"$gt": self._clock()}}
+        )
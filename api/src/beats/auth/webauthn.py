@@ -79,8 +79,8 @@ class WebAuthnManager:
         )
 
         # Store the challenge and pending registration user_id
-        self.session.store_challenge(options.challenge, "registration")
-        self.session.store_pending_registration(options.challenge, user.id or "")
+        await self.session.store_challenge(options.challenge, "registration")
+        await self.session.store_pending_registration(options.challenge, user.id or "")
 
         # Walk authenticator_selection defensively: the call site above
         # populates both fields, but AuthenticatorSelectionCriteria's
@@ -141,7 +141,7 @@ class WebAuthnManager:
                 "Remove an existing one before registering a new one."
             )
 
-        expected_challenge = self.session.get_stored_challenge("registration")
+        expected_challenge = await self.session.get_stored_challenge("registration")
         if expected_challenge is None:
             raise ValueError("No pending registration challenge found")
 
@@ -190,7 +190,7 @@ class WebAuthnManager:
             user_verification=UserVerificationRequirement.PREFERRED,
         )
 
-        self.session.store_challenge(options.challenge, "authentication")
+        await self.session.store_challenge(options.challenge, "authentication")
 
         return {
             "challenge": bytes_to_base64url(options.challenge),
@@ -211,7 +211,7 @@ class WebAuthnManager:
         Returns:
             Dict with success status, session token, and user_id
         """
-        expected_challenge = self.session.get_stored_challenge("authentication")
+        expected_challenge = await self.session.get_stored_challenge("authentication")
         if expected_challenge is None:
             raise ValueError("No pending authentication challenge found")
 
@@ -4,31 +4,33 @@ Implements the conversation flow:
   1. Build context (system + user + day) via build_coach_messages
   2. Load conversation history (last 20 turns)
   3. Append user message
-  4. Call Anthropic; on tool_use blocks, execute tools, inject tool_result, loop
+  4. Stream an Anthropic round; on tool_use blocks, execute tools, inject
+     tool_result, loop
   5. Persist messages
   6. Yield SSE events for the UI
 
-Note: v1 uses non-streaming `complete()` per round, not `stream()`. The SSE
-transport to the client is real — events are yielded incrementally — but each
-LLM round resolves fully before yielding. True token-by-token streaming with
-tool-use is significantly more complex (partial tool_use blocks, incremental
-JSON parsing) and is deferred to a follow-up.
+Each round runs on the streaming gateway, so text reaches the client as
+deltas while the model is still writing. The SDK assembles each tool_use
+block's input from its JSON deltas; the tool starts the moment its block
+closes, overlapping with the rest of the stream, and the next round
+starts streaming once every tool of this one has returned.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import uuid
 from collections.abc import AsyncIterator
 from datetime import UTC, datetime
 from typing import Any
 
-from anthropic.types import TextBlock, ToolUseBlock
+from anthropic.types import Message, TextBlock, ToolUseBlock
 
 from beats.coach.context import build_coach_messages
-from beats.coach.gateway import complete
+from beats.coach.gateway import stream
 from beats.coach.repos import COACH_CONVERSATIONS_COLLECTION, build_repos
-from beats.coach.tools import TOOL_SCHEMAS, execute_tool
+from beats.coach.tools import TOOL_SCHEMAS, ToolContext, execute_tool
 from beats.infrastructure.database import Database
 
 logger = logging.getLogger(__name__)
@@ -84,6 +86,14 @@ async def _persist_message(
     await db[COACH_CONVERSATIONS_COLLECTION].insert_one(doc)
 
 
+async def _run_tool(user_id: str, block: ToolUseBlock, context: ToolContext) -> str:
+    """Execute one tool call; a failure becomes its result text."""
+    try:
+        return await execute_tool(user_id, block.name, block.input, context=context)
+    except Exception as exc:
+        return f"Error: {exc}"
+
+
 async def handle_chat_turn(
     *,
     user_id: str,
@@ -105,69 +115,72 @@ async def handle_chat_turn(
 
     await _persist_message(user_id, conv_id, "user", message)
 
-    # Build tool context once for the entire turn
+    # Build tool context once for the entire turn: every tool call in
+    # every round shares its reads.
     repos = await build_repos(user_id)
-    projects = await repos.project.list()
+    tool_context = ToolContext(repos, await repos.project.list())
 
     # Tool-use loop: keep calling until we get a non-tool response,
     # capped at MAX_TOOL_TURNS to prevent runaway cost.
     for _ in range(MAX_TOOL_TURNS):
-        result = await complete(
-            user_id=user_id,
-            system=system,
-            messages=all_messages,
-            tools=TOOL_SCHEMAS,
-            cache_spec=spec,
-            temperature=0.7,
-            max_tokens=4096,
-            purpose="chat",
-        )
-
-        text_parts: list[str] = []
-        tool_calls_made: list[dict] = []
-        tool_use_blocks: list[dict[str, Any]] = []
-
-        for block in result.content:
-            if isinstance(block, TextBlock):
-                text_parts.append(block.text)
-                yield {"type": "text", "text": block.text}
-            elif isinstance(block, ToolUseBlock):
-                # isinstance narrows the union for the type checker —
-                # the previous `block.type == "tool_use"` discriminator
-                # was correct at runtime but ty couldn't see it, leaving
-                # `.name` / `.input` / `.id` flagged as unresolved on
-                # the broader content-block union.
-                tool_calls_made.append({"name": block.name, "input": block.input})
+        final: Message | None = None
+        # One task per tool_use block, started as the block closes.
+        pending: list[tuple[ToolUseBlock, asyncio.Task[str]]] = []
+        try:
+            async for event in stream(
+                user_id=user_id,
+                system=system,
+                messages=all_messages,
+                tools=TOOL_SCHEMAS,
+                cache_spec=spec,
+                temperature=0.7,
+                max_tokens=4096,
+                purpose="chat",
+            ):
+                if event.type == "text":
+                    yield {"type": "text", "text": event.text}
+                elif event.type == "content_block_stop" and isinstance(
+                    event.content_block, ToolUseBlock
+                ):
+                    block = event.content_block
+                    yield {"type": "tool_use", "name": block.name, "input": block.input}
+                    task = asyncio.create_task(_run_tool(user_id, block, tool_context))
+                    pending.append((block, task))
+                elif event.type == "message_stop":
+                    final = event.message
+
+            if final is None:
+                raise RuntimeError("Anthropic stream ended without a message")
+
+            tool_results: list[dict[str, Any]] = []
+            for block, task in pending:
+                result_text = await task
                 yield {
-                    "type": "tool_use",
+                    "type": "tool_result",
                     "name": block.name,
-                    "input": block.input,
+                    "result": result_text[:TOOL_RESULT_DISPLAY_LIMIT],
                 }
-                tool_use_blocks.append(
+                tool_results.append(
                     {
-                        "type": "tool_use",
-                        "id": block.id,
-                        "name": block.name,
-                        "input": block.input,
+                        "type": "tool_result",
+                        "tool_use_id": block.id,
+                        "content": result_text,
                     }
                 )
+        finally:
+            # Client went away or the stream failed: don't leave tools running.
+            for _, task in pending:
+                task.cancel()
 
-        if not tool_use_blocks:
-            full_text = "".join(text_parts)
-            if not full_text and not tool_calls_made:
-                logger.warning("LLM returned empty content for user=%s", user_id)
-            await _persist_message(
-                user_id, conv_id, "assistant", full_text, tool_calls_made or None
-            )
-            yield {"type": "done", "conversation_id": conv_id}
-            return
-
-        # Execute tools and build tool_result messages
+        text_parts: list[str] = []
         assistant_content: list[dict[str, Any]] = []
-        for block in result.content:
+        for block in final.content:
             if isinstance(block, TextBlock):
+                text_parts.append(block.text)
                 assistant_content.append({"type": "text", "text": block.text})
             elif isinstance(block, ToolUseBlock):
+                # isinstance narrows the union for the type checker —
+                # `.name` / `.input` / `.id` aren't on every content block.
                 assistant_content.append(
                     {
                         "type": "tool_use",
@@ -177,30 +190,15 @@ async def handle_chat_turn(
                     }
                 )
 
-        all_messages.append({"role": "assistant", "content": assistant_content})
-
-        tool_results: list[dict[str, Any]] = []
-        for tb in tool_use_blocks:
-            try:
-                result_text = await execute_tool(
-                    user_id, tb["name"], tb["input"], repos=repos, projects=projects
-                )
-            except Exception as exc:
-                result_text = f"Error: {exc}"
-
-            yield {
-                "type": "tool_result",
-                "name": tb["name"],
-                "result": result_text[:TOOL_RESULT_DISPLAY_LIMIT],
-            }
-            tool_results.append(
-                {
-                    "type": "tool_result",
-                    "tool_use_id": tb["id"],
-                    "content": result_text,
-                }
-            )
+        if not pending:
+            full_text = "".join(text_parts)
+            if not full_text:
+                logger.warning("LLM returned empty content for user=%s", user_id)
+            await _persist_message(user_id, conv_id, "assistant", full_text)
+            yield {"type": "done", "conversation_id": conv_id}
+            return
 
+        all_messages.append({"role": "assistant", "content": assistant_content})
         all_messages.append({"role": "user", "content": tool_results})
 
     # Exhausted tool rounds — the LLM kept calling tools without
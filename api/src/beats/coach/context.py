@@ -2,23 +2,36 @@
 
 Each block maps to a cache-control boundary:
   - SystemBlock: persona + tool schemas (~2k tokens, cached)
-  - UserContextBlock: 30-day aggregates + memory (~3–5k tokens, cached nightly)
+  - UserContextBlock: 30-day aggregates + memory (~3–5k tokens, cached; see
+    context_cache)
   - DayContextBlock: today's raw signals (~0.5–2k tokens, not cached)
 
-The blocks are composed into messages by the brief/chat callers.
+The blocks are composed into messages by the brief/chat callers. Each
+block's reads (projects, beats, score, flow, memory, calendar, biometrics)
+are independent and run concurrently; the optional ones have a timeout so
+a slow calendar API can't hold up a brief or a chat turn. Work that can
+outlast those timeouts — the first build of a user's flow rollups — runs
+in the background instead, and the section waits for it.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
 from datetime import UTC, date, datetime, timedelta
-from typing import TYPE_CHECKING
+from functools import partial
+from typing import TYPE_CHECKING, Any
 from zoneinfo import ZoneInfo
 
+from beats.coach.context_cache import RenderedContext, get_coach_context_cache
 from beats.coach.memory import MemoryStore
 from beats.coach.prompts import COACH_PERSONA
 from beats.coach.repos import CoachRepos, build_repos, fmt_minutes
 from beats.domain.flow import summarize_flow
+from beats.domain.flow_rollups import ensure_flow_rollups, summarize_rollups
 from beats.domain.intelligence import IntelligenceService
 from beats.domain.utils import local_date, local_dt
 from beats.infrastructure.database import Database
@@ -30,24 +43,178 @@ logger = logging.getLogger(__name__)
 
 UTC_TZ = ZoneInfo("UTC")
 
+# Seconds an optional source may take before its section is left out.
+CONTEXT_SOURCE_TIMEOUTS = {
+    "score": 3.0,
+    "flow": 2.0,
+    "calendar": 3.0,
+    "biometrics": 2.0,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class ContextSource:
+    """One independent fetch of a context block.
+
+    Without a ``timeout`` the source is required: the block can't render
+    without it. With one, it's best-effort and falls back to ``default``.
+    """
+
+    fetch: Callable[[], Awaitable[Any]]
+    timeout: float | None = None
+    default: Any = None
+
+    @property
+    def required(self) -> bool:
+        return self.timeout is None
+
 
 def build_system_block() -> str:
     return COACH_PERSONA
 
 
-async def build_user_context(user_id: str, repos: CoachRepos) -> str:
-    """30-day aggregates + coach memory. Designed to be cached."""
-    db = Database.get_db()
+async def _gather_sources(
+    block: str, sources: dict[str, ContextSource], fallbacks: set[str] | None = None
+) -> dict[str, Any]:
+    """Run a block's fetches concurrently; the block waits for its slowest
+    source instead of the sum of all of them.
 
-    projects = await repos.project.list()
-    active = [p for p in projects if not p.archived]
-    project_map = {p.id: p.name for p in projects}
+    A required source's exception cancels the others and is re-raised as
+    itself, outside the group, so callers don't get an ExceptionGroup. An
+    optional source that fails or runs past its timeout resolves to its
+    ``default``, and its name is added to ``fallbacks`` when one is given.
+    Each source's wall time is logged on one line per block.
+    """
+    results: dict[str, Any] = {}
+    timings: dict[str, str] = {}
+
+    async def run(name: str, source: ContextSource) -> None:
+        started = time.perf_counter()
+        outcome = ""
+        try:
+            async with asyncio.timeout(source.timeout):
+                results[name] = await source.fetch()
+        except asyncio.CancelledError:
+            outcome = " cancelled"
+            raise
+        except Exception as exc:
+            if source.required:
+                outcome = " failed"
+                raise
+            outcome = " timeout" if isinstance(exc, TimeoutError) else " failed"
+            logger.debug("%s unavailable for %s context", name, block, exc_info=True)
+            results[name] = source.default
+            if fallbacks is not None:
+                fallbacks.add(name)
+        finally:
+            timings[name] = f"{(time.perf_counter() - started) * 1000:.0f}ms{outcome}"
+
+    started = time.perf_counter()
+    try:
+        async with asyncio.TaskGroup() as tg:
+            for name, source in sources.items():
+                tg.create_task(run(name, source))
+    except ExceptionGroup as group:
+        raise group.exceptions[0] from None
+    finally:
+        logger.info(
+            "coach %s context in %.0fms: %s",
+            block,
+            (time.perf_counter() - started) * 1000,
+            ", ".join(f"{name}={timings[name]}" for name in sources if name in timings),
+        )
+    return results
+
+
+# First builds of flow rollups started for the user-context block, by user:
+# one at a time per user, and referenced so a running build isn't collected.
+_flow_builds: dict[str, asyncio.Task[None]] = {}
 
-    now = datetime.now(UTC)
+
+def _build_flow_rollups_later(user_id: str, repos: CoachRepos) -> None:
+    """Start the user's flow rollup build outside any source timeout.
+
+    The build scans every raw window the user has; under the flow
+    section's timeout it would be cut off on each attempt for a user with
+    a long history.
+    """
+    if user_id in _flow_builds:
+        return
+    task = asyncio.create_task(ensure_flow_rollups(repos.flow_rollup, repos.flow))
+    _flow_builds[user_id] = task
+
+    def done(task: asyncio.Task[None]) -> None:
+        _flow_builds.pop(user_id, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Flow rollup build failed", exc_info=task.exception())
+
+    task.add_done_callback(done)
+
+
+async def build_user_context(user_id: str, repos: CoachRepos) -> RenderedContext:
+    """30-day aggregates + coach memory, cached per user (see context_cache).
+
+    Windows are anchored to the start of the UTC day rather than the
+    current instant, so the same data renders the same text all day long.
+    The block is degraded — rendered, but not cached — when the score or
+    flow section fell back, or the flow rollups are still being built.
+    """
+    now = datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
     thirty_days_ago = now - timedelta(days=30)
 
-    beats = await repos.beat.list_all_completed()
-    recent_beats = [b for b in beats if b.start >= thirty_days_ago]
+    async def score_line() -> str:
+        intel = IntelligenceService(
+            beat_repo=repos.beat,
+            project_repo=repos.project,
+        )
+        score_data = await intel.compute_productivity_score()
+        return (
+            f"Productivity score: {score_data['score']}/100 "
+            f"(consistency={score_data['components']['consistency']}, "
+            f"goals={score_data['components']['goals']}, "
+            f"quality={score_data['components']['quality']})"
+        )
+
+    # 30-day flow rollup from the ambient daemon, summed from the hourly
+    # rollups (best-effort — the coach must render even when the daemon
+    # has never reported). None while the rollups are still being built.
+    async def flow_lines() -> list[str] | None:
+        if not await repos.flow_rollup.is_materialized():
+            _build_flow_rollups_later(user_id, repos)
+            return None
+        fs = summarize_rollups(await repos.flow_rollup.list_range(thirty_days_ago, now))
+        if not fs:
+            return []
+        parts = [f"avg {round(fs.avg_score * 100)}/100 across {fs.count} focus windows"]
+        if fs.top_repo:
+            parts.append(f"most in repo {fs.top_repo}")
+        if fs.top_language:
+            parts.append(f"top language {fs.top_language}")
+        return ["", "### Flow (30 days, from ambient signals)", "  " + ", ".join(parts)]
+
+    fallbacks: set[str] = set()
+    fetched = await _gather_sources(
+        "user",
+        {
+            "projects": ContextSource(repos.project.list),
+            "beats": ContextSource(repos.beat.list_all_completed),
+            "score": ContextSource(
+                score_line,
+                timeout=CONTEXT_SOURCE_TIMEOUTS["score"],
+                default="Productivity score: unavailable",
+            ),
+            "flow": ContextSource(flow_lines, timeout=CONTEXT_SOURCE_TIMEOUTS["flow"], default=[]),
+            "memory": ContextSource(MemoryStore(Database.get_db(), user_id).read),
+        },
+        fallbacks,
+    )
+    flow = fetched["flow"]
+
+    projects = fetched["projects"]
+    active = [p for p in projects if not p.archived]
+    project_map = {p.id: p.name for p in projects}
+
+    recent_beats = [b for b in fetched["beats"] if b.start >= thirty_days_ago]
 
     # Per-project hours (last 30 days)
     project_hours: dict[str, float] = {}
@@ -66,48 +233,13 @@ async def build_user_context(user_id: str, repos: CoachRepos) -> str:
         week_label = start.strftime("%b %d")
         week_totals.append(f"  Week of {week_label}: {week_hours:.1f}h")
 
-    # Productivity score
-    intel = IntelligenceService(
-        beat_repo=repos.beat,
-        project_repo=repos.project,
-    )
-    try:
-        score_data = await intel.compute_productivity_score()
-        score_line = (
-            f"Productivity score: {score_data['score']}/100 "
-            f"(consistency={score_data['components']['consistency']}, "
-            f"goals={score_data['components']['goals']}, "
-            f"quality={score_data['components']['quality']})"
-        )
-    except Exception:
-        logger.debug("Productivity score unavailable", exc_info=True)
-        score_line = "Productivity score: unavailable"
-
     # Goals
     goals = []
     for p in active:
         if p.weekly_goal:
             goals.append(f"  {p.name}: {p.weekly_goal}h/week ({p.goal_type})")
 
-    # 30-day flow rollup from the ambient daemon (best-effort — the coach
-    # must render even when the daemon has never reported).
-    flow_lines: list[str] = []
-    try:
-        windows = await repos.flow.list_by_range(thirty_days_ago, now)
-        fs = summarize_flow(windows)
-        if fs:
-            parts = [f"avg {round(fs.avg_score * 100)}/100 across {fs.count} focus windows"]
-            if fs.top_repo:
-                parts.append(f"most in repo {fs.top_repo}")
-            if fs.top_language:
-                parts.append(f"top language {fs.top_language}")
-            flow_lines = ["", "### Flow (30 days, from ambient signals)", "  " + ", ".join(parts)]
-    except Exception:
-        logger.debug("Flow rollup unavailable for user context", exc_info=True)
-
-    # Coach memory
-    memory_store = MemoryStore(db, user_id)
-    memory = await memory_store.read()
+    memory = fetched["memory"]
     memory_section = memory if memory else "(No coach memory yet — generated after first week.)"
 
     lines = [
@@ -124,8 +256,8 @@ async def build_user_context(user_id: str, repos: CoachRepos) -> str:
         "### Weekly totals",
         *week_totals,
         "",
-        score_line,
-        *flow_lines,
+        fetched["score"],
+        *(flow or []),
         "",
         "### Weekly goals",
         *(goals if goals else ["  (No goals set)"]),
@@ -133,23 +265,124 @@ async def build_user_context(user_id: str, repos: CoachRepos) -> str:
         "## Coach memory",
         memory_section,
     ]
-    return "\n".join(lines)
+    return RenderedContext("\n".join(lines), degraded=bool(fallbacks) or flow is None)
 
 
 async def build_day_context(
     user_id: str, repos: CoachRepos, target_date: date | None = None, tz: ZoneInfo = UTC_TZ
 ) -> str:
     """Today's raw signals. Small and NOT cached."""
-    project_map = {p.id: p.name for p in await repos.project.list()}
-
     today = target_date or datetime.now(tz).date()
     yesterday = today - timedelta(days=1)
 
+    # Calendar events (if connected). The whole block is best-effort —
+    # a missing/unconfigured calendar integration must NOT break the
+    # day briefing. The previous version had two latent bugs that the
+    # broad except hid: (1) `CalendarService(cal_doc)` passed the raw
+    # mongo doc as `settings`, but the constructor needs (Settings,
+    # CalendarIntegrationRepository); (2) the call was `.get_events`,
+    # which doesn't exist — the real method is `fetch_events`. Result:
+    # calendar events have never landed in the coach's day context.
+    async def calendar_lines() -> list[str]:
+        db = Database.get_db()
+        cal_doc = await db.calendar_integrations.find_one({"user_id": user_id, "enabled": True})
+        if not cal_doc:
+            return []
+        from beats.domain.calendar import CalendarService
+        from beats.infrastructure.repositories import MongoCalendarIntegrationRepository
+        from beats.settings import settings
+
+        cal_repo = MongoCalendarIntegrationRepository(db.calendar_integrations, user_id=user_id)
+        cal_service = CalendarService(settings=settings, repo=cal_repo)
+        events = await cal_service.fetch_events(
+            datetime.combine(today, datetime.min.time()),
+            datetime.combine(today, datetime.max.time()),
+        )
+        lines = []
+        for ev in events[:5]:
+            # fetch_events returns RFC3339 datetime strings ("2026-05-
+            # 01T09:00:00-07:00") or ISO dates for all-day events
+            # ("2026-05-01"). Slice 11:16 to extract HH:MM from the
+            # dateTime form; for all-day rows it gives the empty
+            # string, so we render those as "all-day" instead.
+            # Defensive .get("", ...) — Google's API can occasionally
+            # return events without a `start.dateTime` key (e.g.
+            # cancelled instances of recurring events). Fall through
+            # to the all-day branch instead of KeyError'ing the
+            # whole calendar block.
+            start_raw = ev.get("start") or ""
+            end_raw = ev.get("end") or ""
+            summary = ev.get("summary", "(no title)")
+            start_t = start_raw[11:16] if "T" in start_raw else "all-day"
+            end_t = end_raw[11:16] if "T" in end_raw else ""
+            if start_t == "all-day":
+                lines.append(f"  all-day {summary}")
+            else:
+                lines.append(f"  {start_t}–{end_t} {summary}")
+        return lines
+
+    # Biometric data (if available)
+    async def biometric_lines() -> list[str]:
+        bio_doc = await Database.get_db().biometric_days.find_one(
+            {"user_id": user_id, "date": yesterday.isoformat()},
+            sort=[("created_at", -1)],
+        )
+        if not bio_doc:
+            return []
+        bio_lines = [""]
+        if bio_doc.get("sleep_minutes"):
+            efficiency = bio_doc.get("sleep_efficiency")
+            eff_str = f" (efficiency {efficiency * 100:.0f}%)" if efficiency else ""
+            bio_lines.append(f"  Sleep: {bio_doc['sleep_minutes'] / 60:.1f}h{eff_str}")
+        if bio_doc.get("hrv_ms"):
+            bio_lines.append(f"  HRV: {bio_doc['hrv_ms']:.0f}ms")
+        if bio_doc.get("resting_hr_bpm"):
+            bio_lines.append(f"  Resting HR: {bio_doc['resting_hr_bpm']} bpm")
+        if bio_doc.get("readiness_score"):
+            bio_lines.append(f"  Readiness: {bio_doc['readiness_score']}/100")
+        return bio_lines if len(bio_lines) > 1 else []
+
+    # Today's flow signals from the ambient daemon (best-effort). Converts the
+    # user's local day to a UTC instant range to match how the daemon stores
+    # window_start.
+    async def flow_lines() -> list[str]:
+        start_utc = datetime.combine(today, datetime.min.time(), tzinfo=tz).astimezone(UTC)
+        end_utc = datetime.combine(today, datetime.max.time(), tzinfo=tz).astimezone(UTC)
+        fs = summarize_flow(await repos.flow.list_by_range(start_utc, end_utc))
+        if not fs:
+            return []
+        lines = [
+            f"  {fs.count} focus windows, avg {round(fs.avg_score * 100)}/100 "
+            f"(peak {round(fs.peak_score * 100)}/100)"
+        ]
+        if fs.top_repo:
+            lines.append(f"  Most time in repo: {fs.top_repo}")
+        if fs.top_language:
+            lines.append(f"  Dominant language: {fs.top_language}")
+        return lines
+
+    fetched = await _gather_sources(
+        "day",
+        {
+            "projects": ContextSource(repos.project.list),
+            "beats": ContextSource(repos.beat.list_all_completed),
+            "calendar": ContextSource(
+                calendar_lines, timeout=CONTEXT_SOURCE_TIMEOUTS["calendar"], default=[]
+            ),
+            "biometrics": ContextSource(
+                biometric_lines, timeout=CONTEXT_SOURCE_TIMEOUTS["biometrics"], default=[]
+            ),
+            "flow": ContextSource(flow_lines, timeout=CONTEXT_SOURCE_TIMEOUTS["flow"], default=[]),
+        },
+    )
+
+    project_map = {p.id: p.name for p in fetched["projects"]}
+
     # Bucket sessions by the user's LOCAL calendar day. Beat.day is the UTC
     # date of b.start, so a late-evening (or early-morning) session would
     # otherwise be attributed to the wrong day; local_date matches the
     # timezone-aware analytics layer.
-    all_beats = await repos.beat.list_all_completed()
+    all_beats = fetched["beats"]
     today_beats = [b for b in all_beats if local_date(b.start, tz) == today]
     yesterday_beats = [b for b in all_beats if local_date(b.start, tz) == yesterday]
 
@@ -167,52 +400,6 @@ async def build_day_context(
         lines.append(f"  Total: {total:.1f}h across {len(beats_list)} sessions")
         return lines
 
-    # Calendar events (if connected). The whole block is best-effort —
-    # a missing/unconfigured calendar integration must NOT break the
-    # day briefing. The previous version had two latent bugs that the
-    # broad except hid: (1) `CalendarService(cal_doc)` passed the raw
-    # mongo doc as `settings`, but the constructor needs (Settings,
-    # CalendarIntegrationRepository); (2) the call was `.get_events`,
-    # which doesn't exist — the real method is `fetch_events`. Result:
-    # calendar events have never landed in the coach's day context.
-    calendar_lines: list[str] = []
-    try:
-        db = Database.get_db()
-        cal_doc = await db.calendar_integrations.find_one({"user_id": user_id, "enabled": True})
-        if cal_doc:
-            from beats.domain.calendar import CalendarService
-            from beats.infrastructure.repositories import MongoCalendarIntegrationRepository
-            from beats.settings import settings
-
-            cal_repo = MongoCalendarIntegrationRepository(db.calendar_integrations, user_id=user_id)
-            cal_service = CalendarService(settings=settings, repo=cal_repo)
-            events = await cal_service.fetch_events(
-                datetime.combine(today, datetime.min.time()),
-                datetime.combine(today, datetime.max.time()),
-            )
-            for ev in events[:5]:
-                # fetch_events returns RFC3339 datetime strings ("2026-05-
-                # 01T09:00:00-07:00") or ISO dates for all-day events
-                # ("2026-05-01"). Slice 11:16 to extract HH:MM from the
-                # dateTime form; for all-day rows it gives the empty
-                # string, so we render those as "all-day" instead.
-                # Defensive .get("", ...) — Google's API can occasionally
-                # return events without a `start.dateTime` key (e.g.
-                # cancelled instances of recurring events). Fall through
-                # to the all-day branch instead of KeyError'ing the
-                # whole calendar block.
-                start_raw = ev.get("start") or ""
-                end_raw = ev.get("end") or ""
-                summary = ev.get("summary", "(no title)")
-                start_t = start_raw[11:16] if "T" in start_raw else "all-day"
-                end_t = end_raw[11:16] if "T" in end_raw else ""
-                if start_t == "all-day":
-                    calendar_lines.append(f"  all-day {summary}")
-                else:
-                    calendar_lines.append(f"  {start_t}–{end_t} {summary}")
-    except Exception:
-        logger.debug("Calendar fetch failed for day context", exc_info=True)
-
     lines = [
         f"## Today: {today.isoformat()} ({today.strftime('%A')})",
         "",
@@ -223,53 +410,12 @@ async def build_day_context(
         *beats_summary(today_beats, "today"),
     ]
 
-    if calendar_lines:
-        lines += ["", "### Calendar today", *calendar_lines]
-
-    # Biometric data (if available)
-    try:
-        db = Database.get_db()
-        yesterday_str = yesterday.isoformat()
-        bio_doc = await db.biometric_days.find_one(
-            {"user_id": user_id, "date": yesterday_str},
-            sort=[("created_at", -1)],
-        )
-        if bio_doc:
-            bio_lines = [""]
-            if bio_doc.get("sleep_minutes"):
-                efficiency = bio_doc.get("sleep_efficiency")
-                eff_str = f" (efficiency {efficiency * 100:.0f}%)" if efficiency else ""
-                bio_lines.append(f"  Sleep: {bio_doc['sleep_minutes'] / 60:.1f}h{eff_str}")
-            if bio_doc.get("hrv_ms"):
-                bio_lines.append(f"  HRV: {bio_doc['hrv_ms']:.0f}ms")
-            if bio_doc.get("resting_hr_bpm"):
-                bio_lines.append(f"  Resting HR: {bio_doc['resting_hr_bpm']} bpm")
-            if bio_doc.get("readiness_score"):
-                bio_lines.append(f"  Readiness: {bio_doc['readiness_score']}/100")
-            if len(bio_lines) > 1:
-                lines += ["", "### Last night's biometrics", *bio_lines]
-    except Exception:
-        logger.debug("Biometric fetch failed for day context", exc_info=True)
-
-    # Today's flow signals from the ambient daemon (best-effort). Converts the
-    # user's local day to a UTC instant range to match how the daemon stores
-    # window_start.
-    try:
-        start_utc = datetime.combine(today, datetime.min.time(), tzinfo=tz).astimezone(UTC)
-        end_utc = datetime.combine(today, datetime.max.time(), tzinfo=tz).astimezone(UTC)
-        fs = summarize_flow(await repos.flow.list_by_range(start_utc, end_utc))
-        if fs:
-            flow_lines = [
-                f"  {fs.count} focus windows, avg {round(fs.avg_score * 100)}/100 "
-                f"(peak {round(fs.peak_score * 100)}/100)"
-            ]
-            if fs.top_repo:
-                flow_lines.append(f"  Most time in repo: {fs.top_repo}")
-            if fs.top_language:
-                flow_lines.append(f"  Dominant language: {fs.top_language}")
-            lines += ["", "### Flow today (ambient signals)", *flow_lines]
-    except Exception:
-        logger.debug("Flow fetch failed for day context", exc_info=True)
+    if fetched["calendar"]:
+        lines += ["", "### Calendar today", *fetched["calendar"]]
+    if fetched["biometrics"]:
+        lines += ["", "### Last night's biometrics", *fetched["biometrics"]]
+    if fetched["flow"]:
+        lines += ["", "### Flow today (ambient signals)", *fetched["flow"]]
 
     return "\n".join(lines)
 
@@ -288,19 +434,33 @@ async def build_coach_messages(
     Returns (system, messages, cache_spec). ``tz`` controls the local-day
     bucketing of the (uncached) day context; the cached user-context block is
     timezone-independent so the prompt cache isn't fragmented per timezone.
+    The user-context block comes from the coach context cache, so a warm
+    chat turn does no reads for it and sends the same bytes as the last one.
+    The two blocks are built concurrently.
     """
     from beats.coach.gateway import CacheSpec
 
     repos = await build_repos(user_id)
 
+    async def user_ctx() -> str:
+        cached = await get_coach_context_cache().get(
+            user_id, datetime.now(UTC).date(), partial(build_user_context, user_id, repos)
+        )
+        return cached.text
+
     system = build_system_block()
-    user_ctx = await build_user_context(user_id, repos)
-    day_ctx = await build_day_context(user_id, repos, target_date, tz)
+    blocks = await _gather_sources(
+        "messages",
+        {
+            "user_ctx": ContextSource(user_ctx),
+            "day_ctx": ContextSource(partial(build_day_context, user_id, repos, target_date, tz)),
+        },
+    )
 
     preamble = [
-        {"role": "user", "content": user_ctx},
+        {"role": "user", "content": blocks["user_ctx"]},
         {"role": "assistant", "content": "Context loaded."},
-        {"role": "user", "content": day_ctx},
+        {"role": "user", "content": blocks["day_ctx"]},
         {"role": "assistant", "content": "Ready."},
     ]
 
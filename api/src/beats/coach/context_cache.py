@@ -0,0 +1,132 @@
+"""Per-user cache of the coach's user-context block.
+
+``build_user_context`` reads every project, the user's completed beats, a
+productivity score (another beat scan), 30 days of flow rollups and the
+coach memory — on every brief and every chat turn, although none of it
+changes between the user's writes. The rendered block is cached here per
+user and UTC day:
+
+  - ``TimerService`` / ``BeatService`` / ``ProjectService`` call
+    ``invalidate`` after every write (through the ``on_change`` hook the
+    API wires up), and ``MemoryStore`` after a memory write;
+  - entries expire after ``ttl_seconds``, which bounds how long a change
+    made through another instance goes unnoticed, and when the UTC day the
+    block was built for is over;
+  - a load that started before an invalidation is not stored (see
+    ``DeviceRegistrationCache`` for the same race);
+  - a block rendered without one of its best-effort sections (a score or
+    flow read that timed out or failed, flow rollups still being built) is
+    served but not stored, so the next call tries those sources again
+    instead of repeating the gap for ``ttl_seconds``.
+
+The block is message[0] of every coach call and carries the prompt-cache
+breakpoint, so Anthropic only serves a cache read when it is byte-identical
+to the last call's. Serving the cached string keeps it identical between
+turns; a rebuild that renders the same text keeps the cached entry, so the
+``digest`` (the key Anthropic's cache effectively uses) only moves when the
+content did.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import date
+
+COACH_CONTEXT_TTL = 600.0
+COACH_CONTEXT_MAX_ENTRIES = 10_000
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedContext:
+    """A loader's output: the block's text, and whether a best-effort
+    section was left out of it."""
+
+    text: str
+    degraded: bool = False
+
+
+ContextLoader = Callable[[], Awaitable[RenderedContext]]
+
+
+@dataclass(frozen=True, slots=True)
+class CachedContext:
+    """A rendered user-context block and the digest of its text."""
+
+    text: str
+    digest: str
+    day: date
+
+
+@dataclass(frozen=True, slots=True)
+class _Entry:
+    context: CachedContext
+    expires_at: float
+
+
+def context_digest(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+class CoachContextCache:
+    """TTL + LRU map of user id -> CachedContext."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = COACH_CONTEXT_TTL,
+        max_entries: int = COACH_CONTEXT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        # Kept past expiry and invalidation: a rebuild that renders the
+        # same text reuses it.
+        self._last: dict[str, CachedContext] = {}
+        self._generation: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, user_id: str, day: date, load: ContextLoader) -> CachedContext:
+        """The user's block for UTC ``day``; ``load`` renders it on a miss,
+        on expiry, after an invalidation, or when the cached one is for
+        another day (or was never stored because it came back degraded)."""
+        entry = self._entries.get(user_id)
+        if entry is not None and entry.expires_at > self._clock() and entry.context.day == day:
+            self._entries.move_to_end(user_id)
+            return entry.context
+        generation = self._generation.get(user_id, 0)
+        rendered = await load()
+        text = rendered.text
+        digest = context_digest(text)
+        last = self._last.get(user_id)
+        if last is not None and (last.digest, last.day) == (digest, day):
+            context = last
+        else:
+            context = CachedContext(text=text, digest=digest, day=day)
+        if not rendered.degraded and self._generation.get(user_id, 0) == generation:
+            self._entries[user_id] = _Entry(context, self._clock() + self.ttl_seconds)
+            self._last[user_id] = context
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self._max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._last.pop(evicted, None)
+        return context
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop the user's block; the next call rebuilds it."""
+        self._entries.pop(user_id, None)
+        self._generation[user_id] = self._generation.get(user_id, 0) + 1
+
+
+_cache = CoachContextCache()
+
+
+def get_coach_context_cache() -> CoachContextCache:
+    """The process-wide coach context cache."""
+    return _cache
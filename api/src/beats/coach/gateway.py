@@ -194,15 +194,16 @@ async def stream(
     purpose: str = "chat",
 ) -> AsyncIterator[MessageStreamEvent]:
     """Streaming completion. Yields the SDK's high-level stream events
-    (TextEvent / CitationEvent / ThinkingEvent / etc.) from
-    ``client.messages.stream``. The previous annotation said
-    ``RawMessageStreamEvent`` but the stream manager iterator yields
-    the parsed wrapper events, not the raw SSE protocol events —
-    consumers expecting `.text` / `.delta` on the events would have
-    found AttributeErrors had this ever been called.
-
-    Usage is tracked at the end via the `message_stop` event which carries
-    the final usage stats.
+    (TextEvent / InputJsonEvent / ContentBlockStopEvent / MessageStopEvent
+    / etc.) from ``client.messages.stream``, which also assembles each
+    tool_use block's input from its JSON deltas.
+
+    Retries like ``complete()``, but only while nothing has been yielded —
+    a retry after the first event would replay text the caller already
+    forwarded. Usage is recorded once per stream from the accumulated
+    message (the ``message_start`` / ``message_delta`` usage fields that
+    ``message_stop`` carries), including for a stream the caller abandons
+    midway, since Anthropic bills the tokens generated up to that point.
     """
     tracker = UsageTracker(user_id)
     await tracker.enforce_budget()
@@ -221,21 +222,45 @@ async def stream(
     if tools:
         kwargs["tools"] = tools
 
-    async with client.messages.stream(**kwargs) as stream_mgr:
-        async for event in stream_mgr:
-            yield event
-
-        final = await stream_mgr.get_final_message()
-        usage = final.usage
-        cache_creation = getattr(usage, "cache_creation_input_tokens", 0) or 0
-        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
-        cost = _estimate_cost(usage.input_tokens, usage.output_tokens, cache_creation, cache_read)
-        await tracker.record(
-            model=final.model,
-            input_tokens=usage.input_tokens,
-            output_tokens=usage.output_tokens,
-            cache_creation=cache_creation,
-            cache_read=cache_read,
-            cost_usd=cost,
-            purpose=purpose,
-        )
+    final: Message | None = None
+    try:
+        for attempt in range(MAX_RETRIES):
+            started = False
+            try:
+                async with client.messages.stream(**kwargs) as stream_mgr:
+                    try:
+                        async for event in stream_mgr:
+                            started = True
+                            yield event
+                    finally:
+                        if started:
+                            final = stream_mgr.current_message_snapshot
+                return
+            except anthropic.APIStatusError as exc:
+                if (
+                    not started
+                    and exc.status_code in (429, 500, 502, 503, 529)
+                    and attempt < MAX_RETRIES - 1
+                ):
+                    delay = BASE_DELAY_S * (2**attempt) + random.uniform(0, 1)
+                    logger.warning("Anthropic %s, retrying in %.1fs", exc.status_code, delay)
+                    await asyncio.sleep(delay)
+                    continue
+                raise
+    finally:
+        if final is not None:
+            usage = final.usage
+            cache_creation = getattr(usage, "cache_creation_input_tokens", 0) or 0
+            cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+            cost = _estimate_cost(
+                usage.input_tokens, usage.output_tokens, cache_creation, cache_read
+            )
+            await tracker.record(
+                model=final.model,
+                input_tokens=usage.input_tokens,
+                output_tokens=usage.output_tokens,
+                cache_creation=cache_creation,
+                cache_read=cache_read,
+                cost_usd=cost,
+                purpose=purpose,
+            )
@@ -2,7 +2,8 @@
 
 Each user has a single Markdown document that the coach rewrites weekly.
 Stored in the `coach_memory` Mongo collection. The content becomes part of
-the cached UserContextBlock, so the coach's personality evolves over time.
+the cached UserContextBlock, so the coach's personality evolves over time;
+writes invalidate this process's cached block (see context_cache).
 """
 
 from __future__ import annotations
@@ -11,6 +12,7 @@ from datetime import UTC, datetime
 
 from pymongo.asynchronous.database import AsyncDatabase
 
+from beats.coach.context_cache import get_coach_context_cache
 from beats.coach.repos import COACH_MEMORY_COLLECTION
 
 
@@ -50,3 +52,8 @@ class MemoryStore:
             },
             upsert=True,
         )
+        get_coach_context_cache().invalidate(self._user_id)
+
+    async def delete(self) -> None:
+        await self._col.delete_one({"user_id": self._user_id})
+        get_coach_context_cache().invalidate(self._user_id)
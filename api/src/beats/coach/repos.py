@@ -11,6 +11,7 @@ from dataclasses import dataclass
 from beats.infrastructure.database import Database
 from beats.infrastructure.repositories import (
     MongoBeatRepository,
+    MongoFlowRollupRepository,
     MongoFlowWindowRepository,
     MongoProjectRepository,
     MongoWeeklyDigestRepository,
@@ -31,6 +32,7 @@ class CoachRepos:
     beat: MongoBeatRepository
     digest: MongoWeeklyDigestRepository
     flow: MongoFlowWindowRepository
+    flow_rollup: MongoFlowRollupRepository
 
 
 def fmt_minutes(minutes: float) -> str:
@@ -46,4 +48,5 @@ async def build_repos(user_id: str) -> CoachRepos:
         beat=MongoBeatRepository(db.timeLogs, user_id=user_id),
         digest=MongoWeeklyDigestRepository(db.weeklyDigests, user_id=user_id),
         flow=MongoFlowWindowRepository(db.flow_windows, user_id=user_id),
+        flow_rollup=MongoFlowRollupRepository(db.flow_hourly, user_id=user_id, daily=db.flow_daily),
     )
@@ -2,14 +2,21 @@
 
 Each tool is a Python async function that the chat loop calls when the LLM
 requests it. Tool schemas are Anthropic-format JSON for the `tools` parameter.
+
+The chat loop runs a round's tool calls concurrently and shares one
+``ToolContext`` across every call and round of a turn, so a read one tool
+made (a week of beats, the productivity score) isn't repeated by the next.
 """
 
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
 from datetime import UTC, date, datetime, timedelta
 from typing import Any
 
 from beats.coach.repos import CoachRepos, build_repos, fmt_minutes
+from beats.domain.beat_search import query_terms
 from beats.domain.intelligence import IntelligenceService
 
 TOOL_SCHEMAS: list[dict[str, Any]] = [
@@ -78,13 +85,16 @@ TOOL_SCHEMAS: list[dict[str, Any]] = [
     },
     {
         "name": "search_beats",
-        "description": "Search sessions by note text or tags.",
+        "description": (
+            "Search sessions by words in their notes or tags. Each word matches "
+            "by prefix ('refac' finds 'refactor'); best matches first, then newest."
+        ),
         "input_schema": {
             "type": "object",
             "properties": {
                 "query": {
                     "type": "string",
-                    "description": "Text to search in notes and tags.",
+                    "description": "Words to search for in notes and tags.",
                 },
             },
             "required": ["query"],
@@ -93,13 +103,19 @@ TOOL_SCHEMAS: list[dict[str, Any]] = [
 ]
 
 
-class _ToolContext:
-    """Shared state for a single tool execution round."""
+class ToolContext:
+    """Repos, projects and the reads tools made, for one chat turn.
+
+    Reads are memoized per key; concurrent tools asking for the same key
+    share one read. A failed read isn't cached, so a later tool retries it.
+    """
 
     def __init__(self, repos: CoachRepos, projects: list) -> None:
         self.repos = repos
         self.projects = projects
         self.project_map = {p.id: p.name for p in projects}
+        self._values: dict[Hashable, Any] = {}
+        self._locks: dict[Hashable, asyncio.Lock] = {}
 
     def _build_intel(self):
         return IntelligenceService(
@@ -107,8 +123,38 @@ class _ToolContext:
             project_repo=self.repos.project,
         )
 
+    async def _memo(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        if key not in self._values:
+            async with self._locks.setdefault(key, asyncio.Lock()):
+                if key not in self._values:
+                    self._values[key] = await load()
+        return self._values[key]
+
+    async def beats_between(self, start: date, end: date) -> list:
+        """Completed beats that started on a (UTC) day in [start, end].
+
+        Served from an earlier read that covers the window, if any;
+        otherwise only the window is queried.
+        """
+        for key, beats in list(self._values.items()):
+            if isinstance(key, tuple) and key[0] == "beats" and key[1] <= start and end <= key[2]:
+                return [b for b in beats if start <= b.day <= end]
+        return await self._memo(
+            ("beats", start, end), lambda: self.repos.beat.list_completed_in_range(start, end)
+        )
+
+    async def search(self, terms: list[str]) -> list:
+        """The top 20 search hits for ``terms`` (see beat_search)."""
+        return await self._memo(("search", *terms), lambda: self.repos.beat.search(terms, 20))
+
+    async def productivity_score(self) -> dict:
+        return await self._memo("score", self._build_intel().compute_productivity_score)
 
-async def _handle_get_projects(ctx: _ToolContext, tool_input: dict) -> str:
+    async def patterns(self) -> list:
+        return await self._memo("patterns", self._build_intel().detect_patterns)
+
+
+async def _handle_get_projects(ctx: ToolContext, tool_input: dict) -> str:
     include_archived = tool_input.get("include_archived", False)
     filtered = ctx.projects if include_archived else [p for p in ctx.projects if not p.archived]
     lines = []
@@ -119,15 +165,14 @@ async def _handle_get_projects(ctx: _ToolContext, tool_input: dict) -> str:
     return "\n".join(lines) if lines else "No projects found."
 
 
-async def _handle_get_beats(ctx: _ToolContext, tool_input: dict) -> str:
+async def _handle_get_beats(ctx: ToolContext, tool_input: dict) -> str:
     today = datetime.now(UTC).date()
     start_str = tool_input.get("start_date")
     end_str = tool_input.get("end_date")
     start_d = date.fromisoformat(start_str) if start_str else today - timedelta(days=7)
     end_d = date.fromisoformat(end_str) if end_str else today
 
-    beats = await ctx.repos.beat.list_all_completed()
-    filtered = [b for b in beats if start_d <= b.day <= end_d]
+    filtered = await ctx.beats_between(start_d, end_d)
 
     proj_filter = tool_input.get("project_name", "").lower()
     if proj_filter:
@@ -135,7 +180,8 @@ async def _handle_get_beats(ctx: _ToolContext, tool_input: dict) -> str:
             b for b in filtered if ctx.project_map.get(b.project_id, "").lower() == proj_filter
         ]
 
-    filtered.sort(key=lambda b: b.start)
+    # sorted, not .sort(): the list may be the turn's cached read.
+    filtered = sorted(filtered, key=lambda b: b.start)
     lines = []
     for b in filtered[:50]:
         name = ctx.project_map.get(b.project_id, "?")
@@ -148,10 +194,9 @@ async def _handle_get_beats(ctx: _ToolContext, tool_input: dict) -> str:
     return ("\n".join(lines) + summary) if lines else "No sessions found."
 
 
-async def _handle_get_productivity_score(ctx: _ToolContext, _tool_input: dict) -> str:
-    intel = ctx._build_intel()
+async def _handle_get_productivity_score(ctx: ToolContext, _tool_input: dict) -> str:
     try:
-        score = await intel.compute_productivity_score()
+        score = await ctx.productivity_score()
         c = score["components"]
         return (
             f"Score: {score['score']}/100\n"
@@ -163,10 +208,9 @@ async def _handle_get_productivity_score(ctx: _ToolContext, _tool_input: dict) -
         return f"Could not compute score: {exc}"
 
 
-async def _handle_get_patterns(ctx: _ToolContext, _tool_input: dict) -> str:
-    intel = ctx._build_intel()
+async def _handle_get_patterns(ctx: ToolContext, _tool_input: dict) -> str:
     try:
-        patterns = await intel.detect_patterns()
+        patterns = await ctx.patterns()
         if not patterns:
             return "No patterns detected yet."
         lines = []
@@ -177,19 +221,14 @@ async def _handle_get_patterns(ctx: _ToolContext, _tool_input: dict) -> str:
         return f"Pattern detection failed: {exc}"
 
 
-async def _handle_search_beats(ctx: _ToolContext, tool_input: dict) -> str:
-    query = tool_input.get("query", "").lower()
-    if not query:
+async def _handle_search_beats(ctx: ToolContext, tool_input: dict) -> str:
+    query = tool_input.get("query", "")
+    terms = query_terms(query)
+    if not terms:
         return "No search query provided."
-    beats = await ctx.repos.beat.list_all_completed()
-    matched = [
-        b
-        for b in beats
-        if (b.note and query in b.note.lower()) or any(query in t.lower() for t in (b.tags or []))
-    ]
-    matched.sort(key=lambda b: b.start, reverse=True)
+    hits = await ctx.search(terms)
     lines = []
-    for b in matched[:20]:
+    for b in (h.beat for h in hits):
         name = ctx.project_map.get(b.project_id, "?")
         dur = fmt_minutes(b.duration.total_seconds() / 60)
         note = f" — {b.note}" if b.note else ""
@@ -213,13 +252,20 @@ async def execute_tool(
     *,
     repos: CoachRepos | None = None,
     projects: list | None = None,
+    context: ToolContext | None = None,
 ) -> str:
-    """Execute a tool and return the result as a string for the LLM."""
-    if repos is None:
-        repos = await build_repos(user_id)
-    if projects is None:
-        projects = await repos.project.list()
-    ctx = _ToolContext(repos, projects)
+    """Execute a tool and return the result as a string for the LLM.
+
+    Pass the turn's ``context`` to share reads with its other tool calls;
+    without one, a fresh context is built from ``repos`` and ``projects``.
+    """
+    ctx = context
+    if ctx is None:
+        if repos is None:
+            repos = await build_repos(user_id)
+        if projects is None:
+            projects = await repos.project.list()
+        ctx = ToolContext(repos, projects)
 
     handler = _TOOL_HANDLERS.get(tool_name)
     if handler:
@@ -4,8 +4,10 @@ from collections import defaultdict
 from datetime import date, datetime, timedelta
 from zoneinfo import ZoneInfo
 
+from beats.domain.models import BeatDailyRollup
+from beats.domain.rollups import UNTAGGED, distribute_to_slots, ensure_materialized
 from beats.domain.utils import local_date, local_dt
-from beats.infrastructure.repositories import BeatRepository
+from beats.infrastructure.repositories import BeatRepository, BeatRollupRepository
 
 UTC_TZ = ZoneInfo("UTC")
 
@@ -13,8 +15,28 @@ UTC_TZ = ZoneInfo("UTC")
 class AnalyticsService:
     """Service for computing analytics across all projects."""
 
-    def __init__(self, beat_repo: BeatRepository):
+    def __init__(
+        self,
+        beat_repo: BeatRepository,
+        rollup_repo: BeatRollupRepository | None = None,
+    ):
         self.beat_repo = beat_repo
+        self.rollup_repo = rollup_repo
+
+    async def _rollups(
+        self,
+        rollup_repo: BeatRollupRepository,
+        tz: ZoneInfo,
+        start: date | None,
+        end: date | None,
+        project_id: str | None,
+        tag: str | None,
+    ) -> list[BeatDailyRollup]:
+        """Read materialized daily rollups, building them for ``tz`` on first use."""
+        await ensure_materialized(rollup_repo, self.beat_repo, tz)
+        return await rollup_repo.list_range(
+            tz.key, start, end, project_id=project_id or None, tag=tag or UNTAGGED
+        )
 
     async def get_heatmap(
         self,
@@ -28,7 +50,14 @@ class AnalyticsService:
         Returns a list of dicts with date, total_minutes, session_count, project_count
         for each day that has at least one session. Days are bucketed by the
         session's local calendar date in ``tz``.
+
+        With a rollup repository the days come from ``beat_daily_rollups``;
+        without one they're folded from raw beats (the reference path the
+        rollup equivalence tests compare against).
         """
+        if self.rollup_repo is not None:
+            return await self._heatmap_from_rollups(self.rollup_repo, year, project_id, tag, tz)
+
         beats = await self.beat_repo.list_all_completed()
 
         day_data: dict[date, dict] = defaultdict(
@@ -58,6 +87,36 @@ class AnalyticsService:
             for d, data in sorted(day_data.items())
         ]
 
+    async def _heatmap_from_rollups(
+        self,
+        rollup_repo: BeatRollupRepository,
+        year: int,
+        project_id: str | None,
+        tag: str | None,
+        tz: ZoneInfo,
+    ) -> list[dict]:
+        rollups = await self._rollups(
+            rollup_repo, tz, date(year, 1, 1), date(year, 12, 31), project_id, tag
+        )
+        day_data: dict[date, dict] = defaultdict(
+            lambda: {"total_seconds": 0.0, "session_count": 0, "projects": set()}
+        )
+        for rollup in rollups:
+            entry = day_data[rollup.local_date]
+            entry["total_seconds"] += rollup.seconds
+            entry["session_count"] += rollup.session_count
+            entry["projects"].add(rollup.project_id)
+
+        return [
+            {
+                "date": str(d),
+                "total_minutes": round(data["total_seconds"] / 60),
+                "session_count": data["session_count"],
+                "project_count": len(data["projects"]),
+            }
+            for d, data in sorted(day_data.items())
+        ]
+
     async def get_daily_rhythm(
         self,
         period: str = "all",
@@ -75,6 +134,11 @@ class AnalyticsService:
 
         Returns list of 48 slots with average minutes per slot.
         """
+        if self.rollup_repo is not None:
+            return await self._daily_rhythm_from_rollups(
+                self.rollup_repo, period, project_id, tag, tz
+            )
+
         beats = await self.beat_repo.list_all_completed()
         if project_id:
             beats = [b for b in beats if b.project_id == project_id]
@@ -112,6 +176,37 @@ class AnalyticsService:
         num_days = max(num_days, 1)
         return [{"slot": i, "minutes": round(slots[i] / num_days, 1)} for i in range(48)]
 
+    async def _daily_rhythm_from_rollups(
+        self,
+        rollup_repo: BeatRollupRepository,
+        period: str,
+        project_id: str | None,
+        tag: str | None,
+        tz: ZoneInfo,
+    ) -> list[dict]:
+        today = datetime.now(tz).date()
+        period_start: date | None = None
+        if period == "week":
+            period_start = today - timedelta(days=today.weekday())
+        elif period == "month":
+            period_start = today.replace(day=1)
+
+        rollups = await self._rollups(rollup_repo, tz, period_start, None, project_id, tag)
+        if period_start is not None:
+            num_days = (today - period_start).days + 1
+        elif rollups:
+            num_days = (today - min(r.local_date for r in rollups)).days + 1
+        else:
+            num_days = 1
+
+        slots = [0.0] * 48
+        for rollup in rollups:
+            for i, minutes in enumerate(rollup.slot_minutes):
+                slots[i] += minutes
+
+        num_days = max(num_days, 1)
+        return [{"slot": i, "minutes": round(slots[i] / num_days, 1)} for i in range(48)]
+
     async def get_untracked_gaps(
         self, target_date: date, min_gap_minutes: int = 15, tz: ZoneInfo = UTC_TZ
     ) -> list[dict]:
@@ -153,20 +248,7 @@ class AnalyticsService:
     def _distribute_to_slots(slots: list[float], start: datetime, end: datetime) -> None:
         """Distribute a session's minutes into half-hour slots (0-47).
 
-        Slots are indexed by time-of-day, so a session that crosses midnight
-        has its after-midnight minutes attributed to the next day's slots
-        (which wrap back to slot 0). The minutes are never dropped.
+        Delegates to ``rollups.distribute_to_slots`` so the raw-beat path and
+        the materialized rollups can never disagree on slot math.
         """
-        cursor = start
-        while cursor < end:
-            slot_index = (cursor.hour * 2 + (1 if cursor.minute >= 30 else 0)) % 48
-            # Next half-hour boundary
-            next_min = 30 if cursor.minute < 30 else 0
-            next_half = cursor.replace(minute=next_min, second=0, microsecond=0)
-            if cursor.minute >= 30:
-                next_half += timedelta(hours=1)
-
-            chunk_end = min(end, next_half)
-            minutes = (chunk_end - cursor).total_seconds() / 60
-            slots[slot_index] += minutes
-            cursor = chunk_end
+        distribute_to_slots(slots, start, end)
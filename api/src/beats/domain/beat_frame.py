@@ -0,0 +1,191 @@
+"""Columnar beat frame behind the intelligence score, digest, pattern and health math.
+
+Those computations used to walk lists of pydantic Beats, re-deriving each
+beat's local date and duration inside nested week/day loops — the 52-week
+score history rescanned the whole list once per week. A BeatFrame holds the
+same completed beats as parallel typed columns, built in one pass straight
+from the repository's raw documents: int64 epoch-microsecond start/end,
+float seconds, local-day ordinals and start hours in one timezone, project
+codes and tag bitsets. Rows are sorted by start, so the local-day column is
+non-decreasing and any local date range is a contiguous slice found by
+bisection; every aggregation below is a single pass over such a slice.
+
+The gains are that single load, with no Beat models and no per-beat
+timezone work afterwards, and the bisected slices in place of rescans.
+Nothing is vectorized: the columns are stdlib ``array``s, which are compact
+to hold, but every aggregation is a Python loop, and each element it reads
+comes back as a new Python int or float.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from beats.domain.models import Beat
+from beats.domain.utils import normalize_tz
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Every row — the default slice for the aggregations.
+ALL = slice(None)
+
+
+@dataclass(frozen=True, slots=True)
+class BeatFrame:
+    """Completed beats as columns, sorted by start, localized to ``tz``.
+
+    Row ``i`` of every column describes the same beat. ``project`` and
+    ``tags`` hold codes into ``project_ids`` and bit positions into
+    ``tag_names``.
+    """
+
+    tz: ZoneInfo
+    start_us: array  # int64 epoch microseconds
+    end_us: array  # int64 epoch microseconds
+    seconds: array  # float duration, same value as Beat.duration.total_seconds()
+    day: array  # local-day ordinal (date.toordinal) of the start in tz
+    hour: array  # local hour of the start in tz
+    project: array  # index into project_ids
+    tags: tuple[int, ...]  # bitset over tag_names
+    project_ids: tuple[str, ...]
+    tag_names: tuple[str, ...]
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[Mapping[str, Any]], tz: ZoneInfo) -> BeatFrame:
+        """Build from raw timeLogs documents — no model construction.
+
+        Needs only ``start``, ``end``, ``project_id`` and ``tags``; running
+        beats (``end`` missing or null) are skipped.
+        """
+        return cls._build(
+            ((d["start"], d.get("end"), d.get("project_id"), d.get("tags")) for d in docs), tz
+        )
+
+    @classmethod
+    def from_beats(cls, beats: Iterable[Beat], tz: ZoneInfo) -> BeatFrame:
+        """Build from already-loaded Beats (e.g. a request snapshot)."""
+        return cls._build(((b.start, b.end, b.project_id, b.tags) for b in beats), tz)
+
+    @classmethod
+    def _build(
+        cls,
+        rows: Iterable[tuple[datetime, datetime | None, str | None, Iterable[str] | None]],
+        tz: ZoneInfo,
+    ) -> BeatFrame:
+        completed = sorted(
+            (
+                (normalize_tz(start), normalize_tz(end), project_id or "", tags or ())
+                for start, end, project_id, tags in rows
+                if end is not None
+            ),
+            key=lambda row: row[0],
+        )
+        start_us, end_us = array("q"), array("q")
+        seconds = array("d")
+        day, hour, project = array("l"), array("b"), array("l")
+        tag_masks: list[int] = []
+        project_codes: dict[str, int] = {}
+        tag_bits: dict[str, int] = {}
+        for start, end, project_id, tags in completed:
+            local = start.astimezone(tz)
+            start_us.append((start - _EPOCH) // _MICROSECOND)
+            end_us.append((end - _EPOCH) // _MICROSECOND)
+            seconds.append((end - start).total_seconds())
+            day.append(local.toordinal())
+            hour.append(local.hour)
+            project.append(project_codes.setdefault(project_id, len(project_codes)))
+            mask = 0
+            for tag in tags:
+                mask |= 1 << tag_bits.setdefault(tag, len(tag_bits))
+            tag_masks.append(mask)
+        return cls(
+            tz=tz,
+            start_us=start_us,
+            end_us=end_us,
+            seconds=seconds,
+            day=day,
+            hour=hour,
+            project=project,
+            tags=tuple(tag_masks),
+            project_ids=tuple(project_codes),
+            tag_names=tuple(tag_bits),
+        )
+
+    def __len__(self) -> int:
+        return len(self.start_us)
+
+    def span(self, first: date, last: date = date.max) -> slice:
+        """Rows whose local start date is in [first, last]."""
+        return slice(
+            bisect_left(self.day, first.toordinal()),
+            bisect_right(self.day, last.toordinal()),
+        )
+
+    def _rows(self, sl: slice) -> range:
+        return range(*sl.indices(len(self)))
+
+    def tag_mask(self, tag: str) -> int:
+        """Bit for ``tag`` in the ``tags`` column, 0 if no row carries it."""
+        try:
+            return 1 << self.tag_names.index(tag)
+        except ValueError:
+            return 0
+
+    def days(self, sl: slice = ALL) -> set[date]:
+        """Distinct local dates with at least one session."""
+        return {date.fromordinal(o) for o in set(self.day[sl])}
+
+    def seconds_by_day(self, sl: slice = ALL) -> dict[date, float]:
+        """Tracked seconds per local date, in chronological order."""
+        totals: dict[int, float] = {}
+        for i in self._rows(sl):
+            totals[self.day[i]] = totals.get(self.day[i], 0.0) + self.seconds[i]
+        return {date.fromordinal(o): s for o, s in totals.items()}
+
+    def seconds_by_project(self, sl: slice = ALL) -> dict[str, float]:
+        """Tracked seconds per project id."""
+        totals: dict[int, float] = {}
+        for i in self._rows(sl):
+            totals[self.project[i]] = totals.get(self.project[i], 0.0) + self.seconds[i]
+        return {self.project_ids[code]: s for code, s in totals.items()}
+
+    def sessions_by_project(self, sl: slice = ALL) -> dict[str, int]:
+        """Session count per project id."""
+        counts: dict[int, int] = {}
+        for i in self._rows(sl):
+            counts[self.project[i]] = counts.get(self.project[i], 0) + 1
+        return {self.project_ids[code]: n for code, n in counts.items()}
+
+    def seconds_by_block(self, hours: int, sl: slice = ALL) -> dict[int, float]:
+        """Tracked seconds per ``hours``-wide local time-of-day block of the start."""
+        totals: dict[int, float] = {}
+        for i in self._rows(sl):
+            block = self.hour[i] // hours
+            totals[block] = totals.get(block, 0.0) + self.seconds[i]
+        return totals
+
+    def last_day_by_project(self, sl: slice = ALL) -> dict[str, date]:
+        """Latest local date each project was worked on."""
+        last: dict[int, int] = {}
+        for i in self._rows(sl):
+            # Rows are sorted by start, so the last row seen per project wins.
+            last[self.project[i]] = self.day[i]
+        return {self.project_ids[code]: date.fromordinal(o) for code, o in last.items()}
+
+    def short_gaps(self, minutes: float, sl: slice = ALL) -> int:
+        """Count back-to-back same-day sessions separated by under ``minutes``."""
+        limit_us = minutes * 60_000_000
+        count = 0
+        rows = self._rows(sl)
+        for prev, curr in zip(rows, rows[1:], strict=False):
+            if self.day[prev] != self.day[curr]:
+                continue
+            gap_us = self.start_us[curr] - self.end_us[prev]
+            if 0 < gap_us < limit_us:
+                count += 1
+        return count
@@ -0,0 +1,130 @@
+"""Beat search over notes and tags — word-prefix matching, ranked, paginated.
+
+Every beat document carries ``search_terms``: the distinct lowercased words
+of its note and tags (plus each whole tag), written by the repository on
+every beat write and backfilled for older rows (see
+``beats.infrastructure.migrations``). A query is split into words the same
+way, and a beat matches when every query word is a prefix of one of its
+terms — "refac" finds "refactor", "deep" finds the "deep-work" tag.
+
+The multikey ``(user_id, search_terms, start)`` index turns each prefix
+into a range scan, so a search reads the matching beats only, however long
+the user's history. Matches are ranked by how many query words they hit
+exactly, then by recency; pages are continued with an opaque cursor over
+that order, so a page never repeats or skips a beat when earlier ones are
+added. ``search_page`` is the reference for the Mongo query: the same
+match, rank and order over beats in memory.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+
+from beats.domain.exceptions import InvalidSearchCursor
+from beats.domain.models import Beat
+
+# Query words past this many are ignored; each one is another index range.
+MAX_QUERY_TERMS = 8
+# Distinct terms kept per beat, so one pasted wall of text can't bloat the index.
+MAX_BEAT_TERMS = 256
+
+_WORD = re.compile(r"\w+")
+
+
+def _words(text: str) -> list[str]:
+    return _WORD.findall(text.lower())
+
+
+def search_terms(note: str | None, tags: Iterable[str] | None) -> list[str]:
+    """The terms stored on a beat for its note and tags."""
+    terms: dict[str, None] = {}
+    for word in _words(note or ""):
+        terms[word] = None
+    for tag in tags or ():
+        whole = tag.strip().lower()
+        if whole:
+            terms[whole] = None
+        for word in _words(tag):
+            terms[word] = None
+    return list(terms)[:MAX_BEAT_TERMS]
+
+
+def query_terms(query: str) -> list[str]:
+    """The distinct words of a search query, in order."""
+    return list(dict.fromkeys(_words(query)))[:MAX_QUERY_TERMS]
+
+
+def rank(terms: Iterable[str], query: list[str]) -> int | None:
+    """None unless every query word prefixes one of ``terms``; otherwise
+    how many query words are among ``terms`` exactly."""
+    stored = set(terms)
+    if not all(any(t.startswith(q) for t in stored) for q in query):
+        return None
+    return sum(1 for q in query if q in stored)
+
+
+@dataclass(frozen=True, slots=True)
+class SearchCursor:
+    """Position of the last beat of a page in (rank, start, id) order."""
+
+    rank: int
+    start: datetime
+    id: str
+
+    def encode(self) -> str:
+        raw = json.dumps([self.rank, self.start.isoformat(), self.id]).encode()
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+    @classmethod
+    def decode(cls, cursor: str) -> SearchCursor:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            rank_, start, id_ = json.loads(raw)
+            return cls(int(rank_), datetime.fromisoformat(start), str(id_))
+        except (binascii.Error, ValueError, TypeError) as exc:
+            raise InvalidSearchCursor() from exc
+
+    def is_before(self, rank_: int, start: datetime, id_: str) -> bool:
+        """Whether a beat at (rank, start, id) sorts after this position."""
+        return (rank_, start, id_) < (self.rank, self.start, self.id)
+
+
+@dataclass(frozen=True, slots=True)
+class BeatSearchHit:
+    beat: Beat
+    rank: int
+
+    @property
+    def cursor(self) -> SearchCursor:
+        return SearchCursor(self.rank, self.beat.start, self.beat.id or "")
+
+
+@dataclass(frozen=True, slots=True)
+class BeatSearchPage:
+    beats: list[Beat]
+    next_cursor: str | None = None
+
+
+def search_page(
+    beats: Iterable[Beat], query: list[str], limit: int, after: SearchCursor | None = None
+) -> list[BeatSearchHit]:
+    """Up to ``limit`` completed beats matching ``query`` after ``after``,
+    best first — what ``BeatRepository.search`` returns."""
+    hits = []
+    for beat in beats:
+        if beat.end is None:
+            continue
+        score = rank(search_terms(beat.note, beat.tags), query)
+        if score is None:
+            continue
+        if after is not None and not after.is_before(score, beat.start, beat.id or ""):
+            continue
+        hits.append(BeatSearchHit(beat, score))
+    hits.sort(key=lambda h: (h.rank, h.beat.start, h.beat.id or ""), reverse=True)
+    return hits[:limit]
@@ -0,0 +1,258 @@
+"""Batched restore pipeline behind the JSON and SQLite import endpoints.
+
+Imports used to ``await repo.upsert(row)`` once per document — one Mongo
+round-trip per row, so a 50k-beat restore took minutes — after decoding the
+entire upload into memory. Here rows arrive from an incremental source (the
+JSON reader below, or a SQLite cursor), are grouped into batches of
+``batch_size`` per collection and handed to a writer that issues one
+``bulk_write`` per batch. Up to ``concurrency`` batches are in flight at
+once; the source is only pulled when a slot frees up, so memory is bounded
+by ``batch_size * concurrency`` rows whatever the upload size.
+
+A batch that fails (partly or entirely) is recorded in the report instead of
+aborting the restore. Upserts are by id, so re-running an import after
+fixing the bad rows is safe.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+import json
+import logging
+import re
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 500
+IMPORT_CONCURRENCY = 4
+# Bytes pulled from the upload per read while parsing a JSON backup.
+READ_CHUNK_SIZE = 64 * 1024
+
+# Takes one batch of rows, returns one message per row it could not write.
+BatchWriter = Callable[[list[dict]], Awaitable[list[str]]]
+
+
+@dataclass(frozen=True, slots=True)
+class BatchFailure:
+    """Rows of one batch that were not written, and why."""
+
+    collection: str
+    offset: int  # position of the batch's first row within its collection
+    size: int
+    errors: tuple[str, ...]
+
+
+@dataclass(slots=True)
+class ImportReport:
+    """Running totals, updated as each batch completes."""
+
+    counts: dict[str, int]
+    batches: int = 0
+    failures: list[BatchFailure] = field(default_factory=list)
+
+
+class BulkImporter:
+    """Route ``(collection, row)`` pairs into concurrent batched writers."""
+
+    def __init__(
+        self,
+        writers: Mapping[str, BatchWriter],
+        batch_size: int = IMPORT_BATCH_SIZE,
+        concurrency: int = IMPORT_CONCURRENCY,
+        on_progress: Callable[[ImportReport], None] | None = None,
+    ):
+        self.writers = writers
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.on_progress = on_progress
+
+    async def run(
+        self, rows: AsyncIterable[tuple[str, dict]] | Iterable[tuple[str, dict]]
+    ) -> ImportReport:
+        """Drain ``rows`` and return the final report.
+
+        ``rows`` may be sync (a SQLite cursor walk) or async (the JSON
+        reader). Rows for collections without a writer are ignored, matching
+        the old importers that only read ``projects`` and ``beats``. An
+        exception from ``rows`` itself is re-raised once in-flight batches
+        have finished.
+        """
+        report = ImportReport(counts=dict.fromkeys(self.writers, 0))
+        pending: dict[str, list[dict]] = {name: [] for name in self.writers}
+        offsets = dict.fromkeys(self.writers, 0)
+        slots = asyncio.Semaphore(self.concurrency)
+
+        source_error: Exception | None = None
+
+        async with asyncio.TaskGroup() as tg:
+
+            async def flush(name: str) -> None:
+                batch, pending[name] = pending[name], []
+                offset, offsets[name] = offsets[name], offsets[name] + len(batch)
+                # Back-pressure: wait for a free slot before reading further.
+                await slots.acquire()
+                tg.create_task(self._write(name, offset, batch, slots, report))
+
+            try:
+                async for name, row in _rows(rows):
+                    if name not in pending:
+                        continue
+                    pending[name].append(row)
+                    if len(pending[name]) >= self.batch_size:
+                        await flush(name)
+            except Exception as exc:
+                # A malformed source stops reading, but batches already in
+                # flight finish so the report matches what was written.
+                # Raised below, outside the group, so callers see the
+                # original exception rather than an ExceptionGroup.
+                source_error = exc
+            else:
+                for name, batch in pending.items():
+                    if batch:
+                        await flush(name)
+        if source_error is not None:
+            raise source_error
+        return report
+
+    async def _write(
+        self,
+        name: str,
+        offset: int,
+        batch: list[dict],
+        slots: asyncio.Semaphore,
+        report: ImportReport,
+    ) -> None:
+        try:
+            try:
+                errors = await self.writers[name](batch)
+                written = len(batch) - len(errors)
+            except Exception as exc:
+                logger.warning("Import batch %s@%d failed: %s", name, offset, exc)
+                errors, written = [f"batch failed: {exc}"], 0
+            report.batches += 1
+            report.counts[name] += written
+            if errors:
+                report.failures.append(BatchFailure(name, offset, len(batch), tuple(errors)))
+            logger.info(
+                "Import progress: %d batches, %s, %d failed",
+                report.batches,
+                report.counts,
+                len(report.failures),
+            )
+            if self.on_progress is not None:
+                self.on_progress(report)
+        finally:
+            slots.release()
+
+
+async def _rows(
+    rows: AsyncIterable[tuple[str, dict]] | Iterable[tuple[str, dict]],
+) -> AsyncIterator[tuple[str, dict]]:
+    if isinstance(rows, AsyncIterable):
+        async for row in rows:
+            yield row
+    else:
+        for row in rows:
+            yield row
+
+
+# --- Incremental JSON backup reader ---
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+class _JsonReader:
+    """Just enough of a pull parser to walk a backup's top-level object.
+
+    Values are decoded whole with ``raw_decode`` on a sliding text buffer
+    that is refilled from ``read`` whenever a value runs past its end.
+    """
+
+    def __init__(self, read: Callable[[int], Awaitable[bytes]], chunk_size: int):
+        self._read = read
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    async def _fill(self) -> None:
+        chunk = await self._read(self._chunk_size)
+        self._eof = not chunk
+        self._buf = self._buf[self._pos :] + self._decoder.decode(chunk, final=self._eof)
+        self._pos = 0
+
+    async def peek(self) -> str:
+        """Next non-whitespace character, without consuming it ("" at EOF)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if self._eof:
+                return ""
+            await self._fill()
+
+    async def take(self, expected: str) -> str:
+        """Consume the next structural character, which must be in ``expected``."""
+        char = await self.peek()
+        if not char or char not in expected:
+            raise ValueError(f"expected one of {expected!r}, found {char or 'end of input'!r}")
+        self._pos += 1
+        return char
+
+    async def value(self) -> Any:
+        await self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buf, self._pos)
+                # A value that ends exactly at the buffer edge may be a
+                # number cut mid-digits; only trust it once more input
+                # (or EOF) is behind it.
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            await self._fill()
+
+
+async def iter_json_backup(
+    read: Callable[[int], Awaitable[bytes]],
+    collections: Iterable[str] = ("projects", "beats"),
+    chunk_size: int = READ_CHUNK_SIZE,
+) -> AsyncIterator[tuple[str, dict]]:
+    """Yield ``(collection, row)`` for every item of the backup's arrays.
+
+    ``read`` is an ``UploadFile.read``-style coroutine. Only one row (plus
+    one read chunk) is decoded at a time; other top-level keys are parsed
+    and dropped. Raises ``ValueError`` on malformed input.
+    """
+    wanted = set(collections)
+    reader = _JsonReader(read, chunk_size)
+    await reader.take("{")
+    if await reader.peek() == "}":
+        return
+    while True:
+        key = await reader.value()
+        if not isinstance(key, str):
+            raise ValueError("expected an object key")
+        await reader.take(":")
+        if key in wanted and await reader.peek() == "[":
+            await reader.take("[")
+            if await reader.peek() == "]":
+                await reader.take("]")
+            else:
+                while True:
+                    yield key, await reader.value()
+                    if await reader.take(",]") == "]":
+                        break
+        else:
+            await reader.value()
+        if await reader.take(",}") == "}":
+            return
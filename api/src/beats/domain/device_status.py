@@ -0,0 +1,131 @@
+"""Per-user cache of the wall clock's status, with change notification.
+
+The ESP32 wall clock polls ``GET /api/device/status`` every 10 seconds, and
+each poll used to read the active beat, its project and every beat of the
+day to sum today's minutes. None of that changes between timer starts,
+stops and beat edits, so it is cached here per user as a
+``DeviceStatusSnapshot``; the per-poll parts (elapsed minutes, theme) are
+computed from it on the way out.
+
+  - ``TimerService`` / ``BeatService`` call ``invalidate`` (through the
+    ``on_change`` hook the API wires up) after every write, which also
+    wakes long-polls waiting in ``wait_for_change``;
+  - entries expire after ``ttl_seconds``, which bounds how long a change
+    made through another instance goes unnoticed, and when the caller's
+    local day (or timezone) no longer matches the snapshot's;
+  - a load that started before an invalidation is not stored (see
+    ``DeviceRegistrationCache`` for the same race).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import date, datetime
+
+# Also the longest a long-poll sleeps between re-reads, so changes made on
+# another instance reach it within this many seconds.
+DEVICE_STATUS_TTL = 15.0
+DEVICE_STATUS_MAX_ENTRIES = 10_000
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceStatusSnapshot:
+    """What the status payload is built from, minus anything time-dependent."""
+
+    day: date
+    tz: str
+    completed_seconds: float
+    project_id: str | None = None
+    project_name: str | None = None
+    project_color: str | None = None
+    started_at: datetime | None = None
+
+
+SnapshotLoader = Callable[[], Awaitable[DeviceStatusSnapshot]]
+
+
+@dataclass(frozen=True, slots=True)
+class _Entry:
+    snapshot: DeviceStatusSnapshot
+    expires_at: float
+
+
+class DeviceStatusCache:
+    """TTL + LRU map of user id -> DeviceStatusSnapshot."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEVICE_STATUS_TTL,
+        max_entries: int = DEVICE_STATUS_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._generation: dict[str, int] = {}
+        # One event per user with a long-poll in flight; set and dropped on
+        # invalidation so every waiter wakes once.
+        self._changed: dict[str, asyncio.Event] = {}
+        self._waiters: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(
+        self, user_id: str, day: date, tz: str, load: SnapshotLoader
+    ) -> DeviceStatusSnapshot:
+        """The user's snapshot for local ``day`` in ``tz``; ``load`` runs on
+        a miss, on expiry, or when the cached one is for another day or zone."""
+        entry = self._entries.get(user_id)
+        if (
+            entry is not None
+            and entry.expires_at > self._clock()
+            and (entry.snapshot.day, entry.snapshot.tz) == (day, tz)
+        ):
+            self._entries.move_to_end(user_id)
+            return entry.snapshot
+        generation = self._generation.get(user_id, 0)
+        snapshot = await load()
+        if self._generation.get(user_id, 0) == generation:
+            self._entries[user_id] = _Entry(snapshot, self._clock() + self.ttl_seconds)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop the user's snapshot and wake their long-polls."""
+        self._entries.pop(user_id, None)
+        self._generation[user_id] = self._generation.get(user_id, 0) + 1
+        event = self._changed.pop(user_id, None)
+        if event is not None:
+            event.set()
+
+    async def wait_for_change(self, user_id: str, timeout: float) -> bool:
+        """Sleep until ``invalidate(user_id)`` or ``timeout``; True if it changed."""
+        event = self._changed.setdefault(user_id, asyncio.Event())
+        self._waiters[user_id] = self._waiters.get(user_id, 0) + 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except TimeoutError:
+            return False
+        finally:
+            self._waiters[user_id] -= 1
+            if not self._waiters[user_id]:
+                del self._waiters[user_id]
+                if self._changed.get(user_id) is event:
+                    del self._changed[user_id]
+
+
+_cache = DeviceStatusCache()
+
+
+def get_device_status_cache() -> DeviceStatusCache:
+    """The process-wide device status cache."""
+    return _cache
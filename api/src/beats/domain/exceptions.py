@@ -80,6 +80,12 @@ class BeatNotFound(DomainException):
             super().__init__()
 
 
+class InvalidSearchCursor(DomainException):
+    """Raised when a beat search cursor wasn't issued by a previous page."""
+
+    message = "Invalid search cursor"
+
+
 # General data exceptions
 class NoObjectMatched(DomainException):
     """Raised when a query returns no results."""
@@ -12,7 +12,7 @@ import hashlib
 import json
 import sqlite3
 import tempfile
-from collections.abc import Callable, Sequence
+from collections.abc import Callable, Iterator, Sequence
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -92,6 +92,23 @@ def canonical_manifest_bytes(manifest: dict[str, Any]) -> bytes:
     return json.dumps(manifest, sort_keys=True, separators=(",", ":")).encode("utf-8")
 
 
+def iter_sqlite_rows(db_path: Path, fetch_size: int = 500) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Yield ``(table, row)`` from a snapshot's ``data`` columns, projects first.
+
+    Reads ``fetch_size`` rows per ``fetchmany`` so a restore never pulls a
+    whole table into memory.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        for table, _, _ in _INSERT_PLANS:
+            cursor = conn.execute(f"SELECT data FROM {table}")
+            while batch := cursor.fetchmany(fetch_size):
+                for (data,) in batch:
+                    yield table, json.loads(data)
+    finally:
+        conn.close()
+
+
 # Per-table configs: (table_name, column_names, value_extractor).
 # The `data` column is appended automatically as the full JSON-serialized row,
 # so every extractor only needs to return the typed columns.
@@ -0,0 +1,88 @@
+"""Incremental CSV and JSON serializers for the streaming export endpoints.
+
+The exports used to render the whole file into one string (``io.StringIO``
+or ``json.dumps``) before handing it to ``StreamingResponse`` — peak memory
+grew with the user's history and the first byte only left once the last
+row was formatted, which is what pushed heavy users' full exports past the
+Cloud Run request timeout. These helpers consume rows from an async
+iterator (the repositories' batched cursors) and yield text in chunks of
+``chunk_rows`` rows, so memory is bounded by one chunk and the response
+starts as soon as the first batch arrives.
+
+Kept framework-agnostic like ``export_sqlite``: callers pass plain rows /
+dicts and wrap the generator in whatever response type they use.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Mapping, Sequence
+from typing import Any
+
+# Rows per yielded chunk. Small enough that the first bytes go out right
+# after the first cursor batch, large enough that per-chunk overhead
+# (one ASGI send each) stays negligible.
+CHUNK_ROWS = 500
+
+
+async def csv_chunks(
+    header: Sequence[str],
+    rows: AsyncIterable[Iterable[Any]],
+    chunk_rows: int = CHUNK_ROWS,
+) -> AsyncIterator[str]:
+    """Yield ``header`` then ``rows`` as CSV text, ``chunk_rows`` rows at a time.
+
+    Byte-for-byte what a single ``csv.writer`` over the whole dataset
+    would produce; the buffer is reset after every chunk.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    pending = 0
+    async for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def _dumps(value: Any, depth: int) -> str:
+    """``json.dumps(indent=2)`` of ``value`` as it would appear nested at ``depth``."""
+    return json.dumps(value, indent=2, default=str).replace("\n", "\n" + "  " * depth)
+
+
+async def json_object_chunks(
+    fields: Mapping[str, Any],
+    chunk_rows: int = CHUNK_ROWS,
+) -> AsyncIterator[str]:
+    """Yield a JSON object whose async-iterable values are written as arrays
+    item by item.
+
+    Plain values are serialized in one go; ``AsyncIterable`` values are
+    drained lazily, ``chunk_rows`` items per yielded chunk. The output is
+    identical to ``json.dumps(materialized, indent=2, default=str)``, so
+    the backup format (and the importer that reads it) is unchanged.
+    """
+    parts: list[str] = ["{"]
+    for index, (key, value) in enumerate(fields.items()):
+        parts.append(("," if index else "") + f"\n  {json.dumps(key)}: ")
+        if not isinstance(value, AsyncIterable):
+            parts.append(_dumps(value, 1))
+            continue
+        parts.append("[")
+        count = 0
+        async for item in value:
+            parts.append(("," if count else "") + "\n    " + _dumps(item, 2))
+            count += 1
+            if count % chunk_rows == 0:
+                yield "".join(parts)
+                parts.clear()
+        parts.append("\n  ]" if count else "]")
+    parts.append("\n}" if fields else "}")
+    yield "".join(parts)
@@ -0,0 +1,305 @@
+"""Hourly flow-window rollups — pre-aggregated totals behind long-range flow reads.
+
+Every ingested window is folded into its UTC hour's ``flow_hourly`` row as
+it arrives (``record_flow_windows``), so a 30-day or 12-month read sums a
+few hundred rollup rows instead of tens of thousands of raw windows. Rows
+hold sums (count, score, score², drift) rather than lists, which is enough
+for avg / stddev / peak and for the same top-bucket rule as
+``beats.domain.flow``, and can be merged into day or week buckets in any
+timezone.
+
+Windows that landed before the rollups existed are folded in lazily: the
+first read builds every row from raw windows (``ensure_flow_rollups``) and
+marks the user materialized. Ingest always applies its delta, and a window
+is counted at most once per row (rows keep the ids of the windows they
+hold), so deltas that land while a build is scanning are neither lost nor
+doubled: the build only inserts hours that have no row yet, and tops up
+the others window by window.
+
+Hours past the hourly retention are compacted into daily rows, and raw
+windows past theirs are deleted once the rollups are checked to count them
+(``beats.infrastructure.flow_retention``). ``list_range`` returns both
+rollup tiers. A daily row is a UTC day: series put it on the local day with
+the same date in any timezone (and at local midnight in hour buckets), so
+past the hourly retention local days are UTC days.
+"""
+
+import math
+from collections.abc import Iterable, Sequence
+from datetime import UTC, datetime, time, timedelta
+from typing import Literal
+from zoneinfo import ZoneInfo
+
+from beats.domain.flow import FlowSummary, _repo_basename
+from beats.domain.models import (
+    FlowBucket,
+    FlowHourlyRollup,
+    FlowSeriesPoint,
+    FlowWindow,
+    FlowWindowStats,
+)
+from beats.domain.utils import local_dt
+from beats.infrastructure.repositories import FlowRollupRepository, FlowWindowRepository
+
+SeriesBucket = Literal["hour", "day", "week"]
+
+# Bounds for the one-time rebuild scan: every window the user ever sent.
+_ALL_TIME = (datetime(1970, 1, 1, tzinfo=UTC), datetime(9999, 1, 1, tzinfo=UTC))
+
+# Hours the rebuild holds in memory before inserting them.
+REBUILD_BATCH_HOURS = 1000
+
+
+def hour_of(dt: datetime) -> datetime:
+    """The UTC hour a window starting at ``dt`` is rolled up into."""
+    return dt.astimezone(UTC).replace(minute=0, second=0, microsecond=0)
+
+
+def _fold(rows: dict[datetime, FlowHourlyRollup], window: FlowWindow) -> None:
+    hour = hour_of(window.window_start)
+    row = rows.get(hour)
+    if row is None:
+        row = rows[hour] = FlowHourlyRollup(hour=hour)
+    score = window.flow_score
+    row.count += 1
+    if window.id:
+        row.window_ids.append(window.id)
+    row.score_sum += score
+    row.score_sq_sum += score * score
+    row.score_max = max(row.score_max, score)
+    if score <= 0:
+        row.drift_count += 1
+        return
+    if window.editor_repo:
+        row.repo_counts[window.editor_repo] = row.repo_counts.get(window.editor_repo, 0) + 1
+        row.repo_scores[window.editor_repo] = row.repo_scores.get(window.editor_repo, 0.0) + score
+    language = (window.editor_language or "").lower()
+    if language:
+        row.language_counts[language] = row.language_counts.get(language, 0) + 1
+        row.language_scores[language] = row.language_scores.get(language, 0.0) + score
+
+
+def _merge(into: FlowHourlyRollup, row: FlowHourlyRollup) -> None:
+    into.count += row.count
+    into.score_sum += row.score_sum
+    into.score_sq_sum += row.score_sq_sum
+    into.score_max = max(into.score_max, row.score_max)
+    into.drift_count += row.drift_count
+    for counts, scores, row_counts, row_scores in (
+        (into.repo_counts, into.repo_scores, row.repo_counts, row.repo_scores),
+        (into.language_counts, into.language_scores, row.language_counts, row.language_scores),
+    ):
+        for key, n in row_counts.items():
+            counts[key] = counts.get(key, 0) + n
+            scores[key] = scores.get(key, 0.0) + row_scores.get(key, 0.0)
+
+
+def build_flow_rollups(windows: Iterable[FlowWindow]) -> list[FlowHourlyRollup]:
+    """Fold windows into one rollup per UTC hour, in hour order."""
+    rows: dict[datetime, FlowHourlyRollup] = {}
+    for window in windows:
+        _fold(rows, window)
+    return [rows[hour] for hour in sorted(rows)]
+
+
+def _top(counts: dict[str, int], scores: dict[str, float]) -> str | None:
+    """Most windows, tie-broken on higher average — `_top_key`'s rule."""
+    if not counts:
+        return None
+    return max(counts, key=lambda k: (counts[k], scores.get(k, 0.0) / counts[k]))
+
+
+def _bucket_start(row: FlowHourlyRollup, bucket: SeriesBucket, tz: ZoneInfo) -> datetime:
+    if row.compacted:
+        # Only the UTC day is known: keep its date rather than shifting it
+        # to the local day its UTC midnight falls on.
+        local = datetime.combine(row.hour.date(), time.min, tzinfo=tz)
+    else:
+        local = local_dt(row.hour, tz)
+    if bucket == "hour":
+        return local
+    day = local.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    if bucket == "week":
+        day -= timedelta(days=day.weekday())
+    return day.replace(tzinfo=tz)
+
+
+def flow_series(
+    rollups: Iterable[FlowHourlyRollup], bucket: SeriesBucket, tz: ZoneInfo
+) -> list[FlowSeriesPoint]:
+    """Merge hourly rows into hour / day / week points local to ``tz``.
+
+    Days and weeks (starting Monday) are local calendar buckets. A UTC hour
+    goes wholly to the local day its start falls on, which only blurs the
+    edges in zones with a sub-hour offset. A compacted UTC day goes to the
+    local day of the same date.
+    """
+    merged: dict[datetime, FlowHourlyRollup] = {}
+    for row in rollups:
+        start = _bucket_start(row, bucket, tz)
+        acc = merged.get(start)
+        if acc is None:
+            acc = merged[start] = FlowHourlyRollup(hour=row.hour)
+        _merge(acc, row)
+    points = []
+    for start in sorted(merged):
+        acc = merged[start]
+        avg = acc.score_sum / acc.count if acc.count else 0.0
+        variance = acc.score_sq_sum / acc.count - avg * avg if acc.count else 0.0
+        points.append(
+            FlowSeriesPoint(
+                start=start,
+                count=acc.count,
+                drift_count=acc.drift_count,
+                avg=avg,
+                stddev=math.sqrt(max(variance, 0.0)),
+                peak=acc.score_max,
+                top_repo=_top(acc.repo_counts, acc.repo_scores),
+                top_language=_top(acc.language_counts, acc.language_scores),
+            )
+        )
+    return points
+
+
+def summarize_rollups(rollups: Sequence[FlowHourlyRollup]) -> FlowSummary | None:
+    """``summarize_flow`` over the windows these rows were built from.
+
+    Same numbers — drift excluded, repo basenamed, language lowercased —
+    except that a tie on both count and average goes to the key seen in
+    the earliest hour rather than the earliest window.
+    """
+    total = FlowHourlyRollup(hour=_ALL_TIME[0])
+    for row in rollups:
+        _merge(total, row)
+    focused = total.count - total.drift_count
+    if focused <= 0:
+        return None
+    top_repo = _top(total.repo_counts, total.repo_scores)
+    return FlowSummary(
+        count=focused,
+        avg_score=total.score_sum / focused,
+        peak_score=total.score_max,
+        top_repo=_repo_basename(top_repo) if top_repo else None,
+        top_language=_top(total.language_counts, total.language_scores),
+    )
+
+
+def hour_bounds(hour: datetime) -> tuple[datetime, datetime]:
+    """Inclusive window_start range of the windows rolled up into ``hour``."""
+    return hour, hour + timedelta(hours=1) - timedelta(microseconds=1)
+
+
+async def refold_hours(
+    rollup_repo: FlowRollupRepository, flow_repo: FlowWindowRepository, hours: Iterable[datetime]
+) -> None:
+    """Add every stored window of ``hours`` that their rows don't count yet."""
+    for hour in hours:
+        windows = [w async for w in flow_repo.stream_by_range(*hour_bounds(hour))]
+        await record_flow_windows(rollup_repo, windows)
+
+
+def stats_from_rollups(rollups: Sequence[FlowHourlyRollup]) -> FlowWindowStats:
+    """``FlowWindowStats`` for the windows these rows count.
+
+    Count, average and peak match the raw reduction; ``peak_at`` is the
+    start of the hour (or day) holding the peak. The top repo and language
+    count focused windows only, like every rollup tally, and rows carry no
+    app tally, so ``top_bundle`` is None.
+    """
+    total = FlowHourlyRollup(hour=_ALL_TIME[0])
+    peak_at = None
+    for row in rollups:
+        if row.count and (peak_at is None or row.score_max > total.score_max):
+            peak_at = row.hour
+        _merge(total, row)
+    if not total.count:
+        return FlowWindowStats()
+
+    def bucket(counts: dict[str, int], scores: dict[str, float]) -> FlowBucket | None:
+        key = _top(counts, scores)
+        if key is None:
+            return None
+        return FlowBucket(key=key, avg=scores.get(key, 0.0) / counts[key], count=counts[key])
+
+    return FlowWindowStats(
+        count=total.count,
+        avg=total.score_sum / total.count,
+        peak=total.score_max,
+        peak_at=peak_at,
+        top_repo=bucket(total.repo_counts, total.repo_scores),
+        top_language=bucket(total.language_counts, total.language_scores),
+    )
+
+
+async def uncounted_hours(
+    rollup_repo: FlowRollupRepository, flow_repo: FlowWindowRepository, before: datetime
+) -> list[datetime]:
+    """UTC hours before ``before`` holding more raw windows than their
+    hourly rows count, after topping up the rows that are short.
+
+    An hour already compacted into a daily row is not topped up — that
+    would count its other windows twice — so a window that arrived for it
+    without reaching the rollups keeps it on the list.
+    """
+    raw = await flow_repo.count_by_hour(before)
+    hourly, compacted = await rollup_repo.count_by_hour(before)
+    short = [h for h, n in raw.items() if hourly.get(h, 0) < n]
+    refold = [h for h in short if h not in compacted]
+    if refold:
+        await refold_hours(rollup_repo, flow_repo, refold)
+        hourly, _ = await rollup_repo.count_by_hour(before)
+        short = [h for h, n in raw.items() if hourly.get(h, 0) < n]
+    return sorted(short)
+
+
+async def _insert_hours(
+    rollup_repo: FlowRollupRepository,
+    flow_repo: FlowWindowRepository,
+    rows: dict[datetime, FlowHourlyRollup],
+) -> None:
+    if rows:
+        existing = await rollup_repo.insert_missing(list(rows.values()))
+        await refold_hours(rollup_repo, flow_repo, existing)
+
+
+async def ensure_flow_rollups(
+    rollup_repo: FlowRollupRepository, flow_repo: FlowWindowRepository
+) -> None:
+    """Build the user's hourly rollups from raw windows the first time they're read.
+
+    Safe to interrupt and to run concurrently with ingest or another build:
+    hours that already have a row are topped up window by window.
+    """
+    if await rollup_repo.is_materialized():
+        return
+    rows: dict[datetime, FlowHourlyRollup] = {}
+    async for window in flow_repo.stream_by_range(*_ALL_TIME):
+        if len(rows) >= REBUILD_BATCH_HOURS and hour_of(window.window_start) not in rows:
+            await _insert_hours(rollup_repo, flow_repo, rows)
+            rows = {}
+        _fold(rows, window)
+    await _insert_hours(rollup_repo, flow_repo, rows)
+    await rollup_repo.mark_materialized()
+
+
+async def record_flow_windows(
+    rollup_repo: FlowRollupRepository, windows: Sequence[FlowWindow]
+) -> None:
+    """Add stored windows to their hours' rollups; a window a row already
+    counts is skipped."""
+    if windows:
+        # One delta per window: a row that counts some of a batch's windows
+        # still takes the rest.
+        await rollup_repo.apply([row for w in windows for row in build_flow_rollups([w])])
+
+
+async def load_flow_rollups(
+    rollup_repo: FlowRollupRepository,
+    flow_repo: FlowWindowRepository,
+    start: datetime,
+    end: datetime,
+) -> list[FlowHourlyRollup]:
+    """Rollups for the hours of windows starting in [start, end], building
+    them first if needed."""
+    await ensure_flow_rollups(rollup_repo, flow_repo)
+    return await rollup_repo.list_range(hour_of(start), end)
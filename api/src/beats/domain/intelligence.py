@@ -2,11 +2,21 @@
 
 import uuid
 from collections import defaultdict
+from collections.abc import Callable, Sequence
 from datetime import date, datetime, timedelta
 from statistics import median
 from zoneinfo import ZoneInfo
 
-from beats.domain.models import Beat, FlowWindow, InsightCard, WeeklyDigest
+from beats.domain.beat_frame import BeatFrame
+from beats.domain.models import (
+    Beat,
+    FlowHourlyRollup,
+    FlowWindow,
+    InsightCard,
+    Project,
+    WeeklyDigest,
+)
+from beats.domain.snapshot import BeatSnapshot
 from beats.domain.utils import local_date, local_dt
 from beats.infrastructure.repositories import (
     BeatRepository,
@@ -37,6 +47,32 @@ def _rescale_score(consistency: float, goals: float, quality: float) -> int:
     return min(100, round((consistency + goals + quality) * 4 / 3))
 
 
+def _length_score(seconds: Sequence[float]) -> int:
+    """Session-length component (0-25) from the median session length.
+
+    0 when there are no sessions. Shared by the live score, its weekly
+    history, and the digest."""
+    if not seconds:
+        return 0
+    med = median(s / 60 for s in seconds)
+    if med < 15:
+        return 5
+    if med < 30:
+        return 10
+    if med < 60:
+        return 18
+    if med < 120:
+        return 23
+    return 25
+
+
+def _as_frame(beats: BeatFrame | Sequence[Beat], tz: ZoneInfo) -> BeatFrame:
+    """Accept either a prebuilt frame or plain Beats (tests, snapshots)."""
+    if isinstance(beats, BeatFrame):
+        return beats
+    return BeatFrame.from_beats(beats, tz)
+
+
 class IntelligenceService:
     """Service for computing productivity insights and patterns."""
 
@@ -48,6 +84,61 @@ class IntelligenceService:
         self.beat_repo = beat_repo
         self.project_repo = project_repo
 
+    # =========================================================================
+    # Request-scoped snapshot
+    # =========================================================================
+
+    async def load_snapshot(self, target_date: date, tz: ZoneInfo = UTC_TZ) -> BeatSnapshot:
+        """Load one snapshot wide enough for every per-day computation on
+        ``target_date``: the daily plan's 8 weeks of history (widened by a
+        day each side) also spans focus scoring's 30-day peak window and
+        project health's 4 weeks."""
+        return await BeatSnapshot.load(
+            self.beat_repo,
+            self.project_repo,
+            target_date - timedelta(weeks=8, days=1),
+            target_date + timedelta(days=1),
+            tz,
+        )
+
+    async def _completed_in_range(
+        self, start: date, end: date, snapshot: BeatSnapshot | None
+    ) -> list[Beat]:
+        """Slice the snapshot when it covers [start, end], else hit the repo."""
+        if snapshot is not None and snapshot.covers(start, end):
+            return snapshot.completed_in_range(start, end)
+        return await self.beat_repo.list_completed_in_range(start, end)
+
+    async def _load_frame(
+        self,
+        start: date,
+        end: date,
+        tz: ZoneInfo,
+        snapshot: BeatSnapshot | None = None,
+    ) -> BeatFrame:
+        """Completed beats with UTC start date in [start, end] as a BeatFrame.
+
+        Built straight from the repository's raw documents, or from the
+        snapshot's already-loaded beats when it covers the window.
+        """
+        if snapshot is not None and snapshot.covers(start, end):
+            return BeatFrame.from_beats(snapshot.completed_in_range(start, end), tz)
+        docs = await self.beat_repo.list_completed_documents(start, end)
+        return BeatFrame.from_documents(docs, tz)
+
+    async def _active_projects(self, snapshot: BeatSnapshot | None) -> list[Project]:
+        if snapshot is not None:
+            return list(snapshot.projects)
+        return await self.project_repo.list(archived=False)
+
+    @staticmethod
+    def _local_day(tz: ZoneInfo, snapshot: BeatSnapshot | None) -> Callable[[Beat], date]:
+        """Beat → local start date, reusing the snapshot's precomputed dates
+        when it was localized in the same tz."""
+        if snapshot is not None and snapshot.tz == tz:
+            return snapshot.local_day
+        return lambda b: local_date(b.start, tz)
+
     # =========================================================================
     # Productivity Score
     # =========================================================================
@@ -60,13 +151,13 @@ class IntelligenceService:
         # Load data for the last 7 days (widen by a day so local-date
         # bucketing near the UTC boundary still finds edge sessions).
         range_start = today - timedelta(days=6)
-        beats = await self.beat_repo.list_completed_in_range(
-            range_start - timedelta(days=1), today + timedelta(days=1)
+        frame = await self._load_frame(
+            range_start - timedelta(days=1), today + timedelta(days=1), tz
         )
         projects = await self.project_repo.list(archived=False)
 
         # 1. Consistency (0-25): weekdays tracked in last 5 weekdays
-        tracked_dates = {local_date(b.start, tz) for b in beats}
+        tracked_dates = frame.days()
         weekdays = []
         for i in range(7):
             d = today - timedelta(days=i)
@@ -81,10 +172,10 @@ class IntelligenceService:
         goal_projects = [p for p in projects if p.weekly_goal]
         if goal_projects:
             # Sum hours per project this week
-            week_beats = [b for b in beats if local_date(b.start, tz) >= week_start]
-            project_hours: dict[str, float] = defaultdict(float)
-            for b in week_beats:
-                project_hours[b.project_id] += b.duration.total_seconds() / 3600
+            project_hours = {
+                pid: secs / 3600
+                for pid, secs in frame.seconds_by_project(frame.span(week_start)).items()
+            }
 
             progresses = []
             for p in goal_projects:
@@ -97,34 +188,10 @@ class IntelligenceService:
             goal_score = 13  # neutral
 
         # 3. Session quality (0-25)
-        durations = [b.duration.total_seconds() / 60 for b in beats]
-        if durations:
-            med = median(durations)
-            if med < 15:
-                length_score = 5
-            elif med < 30:
-                length_score = 10
-            elif med < 60:
-                length_score = 18
-            elif med < 120:
-                length_score = 23
-            else:
-                length_score = 25
-
+        if len(frame):
+            length_score = _length_score(frame.seconds)
             # Fragmentation penalty: check for gaps < 5 min between same-day sessions
-            day_beats: dict[date, list[Beat]] = defaultdict(list)
-            for b in beats:
-                day_beats[local_date(b.start, tz)].append(b)
-            frag_penalty = 0
-            for day_b in day_beats.values():
-                sorted_b = sorted(day_b, key=lambda x: x.start)
-                for i in range(1, len(sorted_b)):
-                    prev_end = sorted_b[i - 1].end
-                    curr_start = sorted_b[i].start
-                    if prev_end:
-                        gap = (curr_start - prev_end).total_seconds() / 60
-                        if 0 < gap < 5:
-                            frag_penalty += 5
+            frag_penalty = frame.short_gaps(5) * 5
             quality_score = max(0, min(25, length_score - frag_penalty))
         else:
             quality_score = 0
@@ -149,7 +216,7 @@ class IntelligenceService:
 
         # Load all data for the full range
         range_start = current_monday - timedelta(weeks=weeks)
-        all_beats = await self.beat_repo.list_completed_in_range(range_start, today)
+        frame = await self._load_frame(range_start, today, tz)
         projects = await self.project_repo.list(archived=False)
         goal_projects = [p for p in projects if p.weekly_goal]
 
@@ -157,16 +224,18 @@ class IntelligenceService:
             monday = current_monday - timedelta(weeks=w)
             sunday = monday + timedelta(days=6)
 
-            week_beats = [b for b in all_beats if monday <= local_date(b.start, tz) <= sunday]
+            # Each week is a bisected slice of the start-sorted frame, so
+            # the history costs one pass over the beats, not one per week.
+            week = frame.span(monday, sunday)
 
             # Simplified score for history
-            tracked_dates = {local_date(b.start, tz) for b in week_beats}
+            tracked_dates = frame.days(week)
             weekdays = [monday + timedelta(days=d) for d in range(5)]
             consistency = round(sum(1 for d in weekdays if d in tracked_dates) / 5 * 25)
 
-            project_hours: dict[str, float] = defaultdict(float)
-            for b in week_beats:
-                project_hours[b.project_id] += b.duration.total_seconds() / 3600
+            project_hours = {
+                pid: secs / 3600 for pid, secs in frame.seconds_by_project(week).items()
+            }
             if goal_projects:
                 progresses = []
                 for p in goal_projects:
@@ -177,21 +246,7 @@ class IntelligenceService:
             else:
                 goal_s = 13
 
-            durs = [b.duration.total_seconds() / 60 for b in week_beats]
-            if durs:
-                med = median(durs)
-                if med < 15:
-                    quality = 5
-                elif med < 30:
-                    quality = 10
-                elif med < 60:
-                    quality = 18
-                elif med < 120:
-                    quality = 23
-                else:
-                    quality = 25
-            else:
-                quality = 0
+            quality = _length_score(frame.seconds[week])
 
             score = _rescale_score(consistency, goal_s, quality)
             history.append({"week_of": monday.isoformat(), "score": score})
@@ -210,32 +265,25 @@ class IntelligenceService:
         prev_monday = week_monday - timedelta(days=7)
         prev_sunday = prev_monday + timedelta(days=6)
 
-        # Widen repo queries by a day so local-date bucketing keeps sessions
-        # whose UTC date sits just outside the week boundary.
-        beats = await self.beat_repo.list_completed_in_range(
-            week_monday - timedelta(days=1), sunday + timedelta(days=1)
+        # One load covers both weeks; widen by a day so local-date bucketing
+        # keeps sessions whose UTC date sits just outside a week boundary.
+        frame = await self._load_frame(
+            prev_monday - timedelta(days=1), sunday + timedelta(days=1), tz
         )
-        beats = [b for b in beats if week_monday <= local_date(b.start, tz) <= sunday]
-        prev_beats = await self.beat_repo.list_completed_in_range(
-            prev_monday - timedelta(days=1), prev_sunday + timedelta(days=1)
-        )
-        prev_beats = [
-            b for b in prev_beats if prev_monday <= local_date(b.start, tz) <= prev_sunday
-        ]
+        week = frame.span(week_monday, sunday)
+        prev_week = frame.span(prev_monday, prev_sunday)
         projects = await self.project_repo.list(archived=False)
         project_map = {p.id: p for p in projects}
 
         # Totals
-        total_minutes = sum(b.duration.total_seconds() / 60 for b in beats)
+        total_minutes = sum(frame.seconds[week]) / 60
         total_hours = total_minutes / 60
-        session_count = len(beats)
-        active_dates = {local_date(b.start, tz) for b in beats}
+        session_count = len(frame.seconds[week])
+        active_dates = frame.days(week)
         active_days = len(active_dates)
 
         # Project breakdown
-        proj_minutes: dict[str, float] = defaultdict(float)
-        for b in beats:
-            proj_minutes[b.project_id] += b.duration.total_seconds() / 60
+        proj_minutes = {pid: secs / 60 for pid, secs in frame.seconds_by_project(week).items()}
         breakdown = []
         for pid, mins in sorted(proj_minutes.items(), key=lambda x: -x[1]):
             p = project_map.get(pid)
@@ -251,9 +299,7 @@ class IntelligenceService:
         top = breakdown[0] if breakdown else None
 
         # Longest day
-        day_minutes: dict[date, float] = defaultdict(float)
-        for b in beats:
-            day_minutes[local_date(b.start, tz)] += b.duration.total_seconds() / 60
+        day_minutes = {d: secs / 60 for d, secs in frame.seconds_by_day(week).items()}
         if day_minutes:
             # `max(d, key=d.get)` is the idiomatic shape but ty can't
             # follow the bound-method's signature past the dict's
@@ -267,7 +313,7 @@ class IntelligenceService:
             longest_day_hours = 0
 
         # Vs last week
-        prev_minutes = sum(b.duration.total_seconds() / 60 for b in prev_beats)
+        prev_minutes = sum(frame.seconds[prev_week]) / 60
         if prev_minutes > 0:
             vs_last_week_pct = round((total_minutes - prev_minutes) / prev_minutes * 100, 1)
         else:
@@ -285,9 +331,9 @@ class IntelligenceService:
                 break
 
         # Previous weeks data for observation
-        prev_proj_minutes: dict[str, float] = defaultdict(float)
-        for b in prev_beats:
-            prev_proj_minutes[b.project_id] += b.duration.total_seconds() / 60
+        prev_proj_minutes = {
+            pid: secs / 60 for pid, secs in frame.seconds_by_project(prev_week).items()
+        }
 
         observation = self._generate_observation(
             proj_minutes, prev_proj_minutes, project_map, day_minutes, total_hours, session_count
@@ -295,23 +341,10 @@ class IntelligenceService:
 
         # Compute productivity score for the week
         # Simplified: use the session data we already have
-        durs = [b.duration.total_seconds() / 60 for b in beats]
         weekday_dates = {d for d in active_dates if d.weekday() < 5}
         possible_weekdays = sum(1 for i in range(5) if week_monday + timedelta(days=i) <= sunday)
         consistency = round(len(weekday_dates) / max(possible_weekdays, 1) * 25)
-        quality = 0
-        if durs:
-            med = median(durs)
-            if med < 15:
-                quality = 5
-            elif med < 30:
-                quality = 10
-            elif med < 60:
-                quality = 18
-            elif med < 120:
-                quality = 23
-            else:
-                quality = 25
+        quality = _length_score(frame.seconds[week])
         # Simplified digest score: goals held at a neutral 13 (unlike the live
         # productivity score, which computes real weekly goal progress),
         # consistency + quality from this week's sessions, rescaled to 0-100.
@@ -386,34 +419,32 @@ class IntelligenceService:
 
         # Load data (widen by a day for local-date bucketing at the edges)
         range_start = today - timedelta(days=60)
-        beats = await self.beat_repo.list_completed_in_range(
-            range_start - timedelta(days=1), today + timedelta(days=1)
+        frame = await self._load_frame(
+            range_start - timedelta(days=1), today + timedelta(days=1), tz
         )
         projects = await self.project_repo.list(archived=False)
 
-        insights.extend(self._detect_day_pattern(beats, today, tz))
-        insights.extend(self._detect_peak_hours(beats, tz))
-        insights.extend(self._detect_stale_projects(beats, projects, today, tz))
-        insights.extend(self._detect_session_trend(beats, today, tz))
-        insights.extend(self._detect_goal_pacing(beats, projects, today, tz))
+        insights.extend(self._detect_day_pattern(frame, today, tz))
+        insights.extend(self._detect_peak_hours(frame, tz))
+        insights.extend(self._detect_stale_projects(frame, projects, today, tz))
+        insights.extend(self._detect_session_trend(frame, today, tz))
+        insights.extend(self._detect_goal_pacing(frame, projects, today, tz))
 
         insights.sort(key=lambda x: -x.priority)
         return insights
 
     def _detect_day_pattern(
-        self, beats: list[Beat], today: date, tz: ZoneInfo = UTC_TZ
+        self, beats: BeatFrame | list[Beat], today: date, tz: ZoneInfo = UTC_TZ
     ) -> list[InsightCard]:
         """Check if any day of week is significantly more productive."""
+        day_seconds = _as_frame(beats, tz).seconds_by_day()
         # Aggregate hours per weekday over the last 8 weeks
         day_hours: dict[int, list[float]] = defaultdict(list)
         for w in range(8):
             monday = _monday_of(today) - timedelta(weeks=w)
             for dow in range(7):
                 d = monday + timedelta(days=dow)
-                mins = sum(
-                    b.duration.total_seconds() / 60 for b in beats if local_date(b.start, tz) == d
-                )
-                day_hours[dow].append(mins)
+                day_hours[dow].append(day_seconds.get(d, 0) / 60)
 
         day_avgs = {dow: sum(hrs) / len(hrs) for dow, hrs in day_hours.items() if hrs}
         if not day_avgs:
@@ -440,12 +471,14 @@ class IntelligenceService:
                 ]
         return []
 
-    def _detect_peak_hours(self, beats: list[Beat], tz: ZoneInfo = UTC_TZ) -> list[InsightCard]:
+    def _detect_peak_hours(
+        self, beats: BeatFrame | list[Beat], tz: ZoneInfo = UTC_TZ
+    ) -> list[InsightCard]:
         """Find peak productivity time blocks."""
-        blocks: dict[int, float] = defaultdict(float)  # 2-hour blocks: 0=0-2, 1=2-4, etc.
-        for b in beats:
-            block = local_dt(b.start, tz).hour // 2
-            blocks[block] += b.duration.total_seconds() / 60
+        # 2-hour blocks: 0=0-2, 1=2-4, etc.
+        blocks = {
+            block: secs / 60 for block, secs in _as_frame(beats, tz).seconds_by_block(2).items()
+        }
 
         if len(blocks) < 3:
             return []
@@ -473,15 +506,14 @@ class IntelligenceService:
         return []
 
     def _detect_stale_projects(
-        self, beats: list[Beat], projects: list, today: date, tz: ZoneInfo = UTC_TZ
+        self,
+        beats: BeatFrame | list[Beat],
+        projects: list,
+        today: date,
+        tz: ZoneInfo = UTC_TZ,
     ) -> list[InsightCard]:
         """Alert on projects with goals but no recent activity."""
-        last_beat: dict[str, date] = {}
-        for b in beats:
-            pid = b.project_id
-            d = local_date(b.start, tz)
-            if pid not in last_beat or d > last_beat[pid]:
-                last_beat[pid] = d
+        last_beat = _as_frame(beats, tz).last_day_by_project()
 
         results = []
         for p in projects:
@@ -504,20 +536,21 @@ class IntelligenceService:
         return results
 
     def _detect_session_trend(
-        self, beats: list[Beat], today: date, tz: ZoneInfo = UTC_TZ
+        self, beats: BeatFrame | list[Beat], today: date, tz: ZoneInfo = UTC_TZ
     ) -> list[InsightCard]:
         """Compare this week's avg session length to 4-week average."""
+        frame = _as_frame(beats, tz)
         this_monday = _monday_of(today)
         four_weeks_ago = this_monday - timedelta(weeks=4)
 
-        this_week = [b for b in beats if local_date(b.start, tz) >= this_monday]
-        prev_weeks = [b for b in beats if four_weeks_ago <= local_date(b.start, tz) < this_monday]
+        this_week = frame.seconds[frame.span(this_monday)]
+        prev_weeks = frame.seconds[frame.span(four_weeks_ago, this_monday - timedelta(days=1))]
 
         if len(this_week) < 3 or len(prev_weeks) < 5:
             return []
 
-        this_avg = sum(b.duration.total_seconds() / 60 for b in this_week) / len(this_week)
-        prev_avg = sum(b.duration.total_seconds() / 60 for b in prev_weeks) / len(prev_weeks)
+        this_avg = sum(this_week) / 60 / len(this_week)
+        prev_avg = sum(prev_weeks) / 60 / len(prev_weeks)
 
         if prev_avg < 5:
             return []
@@ -540,7 +573,11 @@ class IntelligenceService:
         ]
 
     def _detect_goal_pacing(
-        self, beats: list[Beat], projects: list, today: date, tz: ZoneInfo = UTC_TZ
+        self,
+        beats: BeatFrame | list[Beat],
+        projects: list,
+        today: date,
+        tz: ZoneInfo = UTC_TZ,
     ) -> list[InsightCard]:
         """Warn about weekly goals that need attention."""
         monday = _monday_of(today)
@@ -548,10 +585,10 @@ class IntelligenceService:
         if days_left <= 0:
             return []
 
-        week_beats = [b for b in beats if local_date(b.start, tz) >= monday]
-        project_hours: dict[str, float] = defaultdict(float)
-        for b in week_beats:
-            project_hours[b.project_id] += b.duration.total_seconds() / 3600
+        frame = _as_frame(beats, tz)
+        project_hours = {
+            pid: secs / 3600 for pid, secs in frame.seconds_by_project(frame.span(monday)).items()
+        }
 
         results = []
         for p in projects:
@@ -587,17 +624,23 @@ class IntelligenceService:
     # Smart Daily Plan Suggestions
     # =========================================================================
 
-    async def suggest_daily_plan(self, target_date: date, tz: ZoneInfo = UTC_TZ) -> list[dict]:
+    async def suggest_daily_plan(
+        self,
+        target_date: date,
+        tz: ZoneInfo = UTC_TZ,
+        snapshot: BeatSnapshot | None = None,
+    ) -> list[dict]:
         """Suggest up to 3 projects and durations to focus on today."""
         dow = target_date.weekday()
         monday = _monday_of(target_date)
+        day_of = self._local_day(tz, snapshot)
 
         # Load 8 weeks of history for this day of week (widen for local-date edges)
         range_start = target_date - timedelta(weeks=8)
-        beats = await self.beat_repo.list_completed_in_range(
-            range_start - timedelta(days=1), target_date + timedelta(days=1)
+        beats = await self._completed_in_range(
+            range_start - timedelta(days=1), target_date + timedelta(days=1), snapshot
         )
-        projects = await self.project_repo.list(archived=False)
+        projects = await self._active_projects(snapshot)
         project_map = {p.id: p for p in projects}
 
         # Day-of-week averages per project
@@ -608,7 +651,7 @@ class IntelligenceService:
                 continue
             project_day_mins: dict[str, float] = defaultdict(float)
             for b in beats:
-                if local_date(b.start, tz) == d:
+                if day_of(b) == d:
                     project_day_mins[b.project_id] += b.duration.total_seconds() / 60
             for pid in project_map:
                 dow_minutes[pid].append(project_day_mins.get(pid, 0))
@@ -620,14 +663,14 @@ class IntelligenceService:
         }
 
         # Weekly goal remaining
-        week_beats = [b for b in beats if local_date(b.start, tz) >= monday]
+        week_beats = [b for b in beats if day_of(b) >= monday]
         week_hours: dict[str, float] = defaultdict(float)
         for b in week_beats:
             week_hours[b.project_id] += b.duration.total_seconds() / 3600
 
         # Recency (worked yesterday?)
         yesterday = target_date - timedelta(days=1)
-        yesterday_projects = {b.project_id for b in beats if local_date(b.start, tz) == yesterday}
+        yesterday_projects = {b.project_id for b in beats if day_of(b) == yesterday}
 
         # Score each project
         scores: list[tuple[str, float, int, str]] = []
@@ -698,20 +741,26 @@ class IntelligenceService:
     # Focus Quality Score
     # =========================================================================
 
-    async def compute_focus_scores(self, target_date: date, tz: ZoneInfo = UTC_TZ) -> list[dict]:
+    async def compute_focus_scores(
+        self,
+        target_date: date,
+        tz: ZoneInfo = UTC_TZ,
+        snapshot: BeatSnapshot | None = None,
+    ) -> list[dict]:
         """Compute focus quality scores for all sessions on a given local date."""
+        day_of = self._local_day(tz, snapshot)
         # Widen the query by a day so sessions whose UTC date differs from
         # their local date are included, then scope precisely by local date.
-        beats = await self.beat_repo.list_completed_in_range(
-            target_date - timedelta(days=1), target_date + timedelta(days=1)
+        beats = await self._completed_in_range(
+            target_date - timedelta(days=1), target_date + timedelta(days=1), snapshot
         )
-        beats = [b for b in beats if local_date(b.start, tz) == target_date]
+        beats = [b for b in beats if day_of(b) == target_date]
         if not beats:
             return []
 
         # Compute user's peak hours from recent data
         recent_start = target_date - timedelta(days=30)
-        recent_beats = await self.beat_repo.list_completed_in_range(recent_start, target_date)
+        recent_beats = await self._completed_in_range(recent_start, target_date, snapshot)
         peak_block = self._find_peak_block(recent_beats, tz)
 
         sorted_beats = sorted(beats, key=lambda b: b.start)
@@ -789,39 +838,39 @@ class IntelligenceService:
     # Project Health
     # =========================================================================
 
-    async def get_project_health(self, tz: ZoneInfo = UTC_TZ) -> list[dict]:
+    async def get_project_health(
+        self, tz: ZoneInfo = UTC_TZ, snapshot: BeatSnapshot | None = None
+    ) -> list[dict]:
         """Compute health metrics for each active project."""
         today = datetime.now(tz).date()
         range_start = today - timedelta(weeks=4)
-        beats = await self.beat_repo.list_completed_in_range(range_start, today)
-        projects = await self.project_repo.list(archived=False)
+        frame = await self._load_frame(range_start, today, tz, snapshot)
+        projects = await self._active_projects(snapshot)
 
         # Last beat date per project
-        last_beat: dict[str, date] = {}
-        for b in beats:
-            pid = b.project_id
-            d = local_date(b.start, tz)
-            if pid not in last_beat or d > last_beat[pid]:
-                last_beat[pid] = d
+        last_beat = frame.last_day_by_project()
+
+        # Per-project seconds and session counts for each of the last 4 weeks,
+        # one pass per week rather than one filter per (project, week).
+        weeks = []
+        for w in range(4, 0, -1):
+            monday = _monday_of(today) - timedelta(weeks=w)
+            week = frame.span(monday, monday + timedelta(days=6))
+            weeks.append((frame.seconds_by_project(week), frame.sessions_by_project(week)))
 
         # Weekly hours and session lengths per project (last 4 weeks)
         results = []
         for p in projects:
             pid = p.id or ""
-            proj_beats = [b for b in beats if b.project_id == pid]
 
             # Weekly goal trend (4 weeks)
             weekly_hours = []
             weekly_avg_session = []
-            for w in range(4, 0, -1):
-                monday = _monday_of(today) - timedelta(weeks=w)
-                sunday = monday + timedelta(days=6)
-                week_b = [b for b in proj_beats if monday <= local_date(b.start, tz) <= sunday]
-                total = sum(b.duration.total_seconds() / 3600 for b in week_b)
-                weekly_hours.append(round(total, 2))
-                if week_b:
-                    avg_len = sum(b.duration.total_seconds() / 60 for b in week_b) / len(week_b)
-                    weekly_avg_session.append(round(avg_len, 1))
+            for week_seconds, week_sessions in weeks:
+                secs = week_seconds.get(pid, 0.0)
+                weekly_hours.append(round(secs / 3600, 2))
+                if pid in week_sessions:
+                    weekly_avg_session.append(round(secs / 60 / week_sessions[pid], 1))
                 else:
                     weekly_avg_session.append(0)
 
@@ -889,11 +938,34 @@ def detect_chronotype(flow_windows: list[FlowWindow]) -> list[InsightCard]:
 
     # Compute hourly medians
     hourly_medians = {h: median(scores) for h, scores in hour_scores.items() if scores}
+    return _chronotype_cards(hourly_medians)
+
+
+def detect_chronotype_from_rollups(rollups: list[FlowHourlyRollup]) -> list[InsightCard]:
+    """detect_chronotype over hourly flow rollups instead of raw windows.
+
+    Same thresholds and labelling; rollups keep sums rather than every
+    score, so each hour of day is represented by its mean, not its median.
+    """
+    counts: dict[int, int] = defaultdict(int)
+    sums: dict[int, float] = defaultdict(float)
+    for r in rollups:
+        counts[r.hour.hour] += r.count
+        sums[r.hour.hour] += r.score_sum
+    if sum(counts.values()) < 50:
+        return []
+    hour_means = {h: sums[h] / n for h, n in counts.items() if n}
+    if len(hour_means) < 4:
+        return []
+    return _chronotype_cards(hour_means)
+
 
+def _chronotype_cards(hourly: dict[int, float]) -> list[InsightCard]:
+    """Label the chronotype from a typical flow score per hour of day."""
     # 3-hour rolling average (smoothing)
     smoothed: dict[int, float] = {}
     for h in range(24):
-        neighbors = [hourly_medians.get((h + d) % 24, 0) for d in [-1, 0, 1]]
+        neighbors = [hourly.get((h + d) % 24, 0) for d in [-1, 0, 1]]
         valid = [v for v in neighbors if v > 0]
         smoothed[h] = sum(valid) / len(valid) if valid else 0
 
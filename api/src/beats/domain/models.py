@@ -1,8 +1,10 @@
 """Domain models - pure business entities with no external dependencies."""
 
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 from datetime import date as date_type
 from enum import StrEnum
+from typing import Literal
 
 from pydantic import BaseModel, ConfigDict, Field, computed_field, model_validator
 
@@ -330,6 +332,130 @@ class BiometricDay(TzNormalizedModel):
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
 
 
+class BeatDailyRollup(BaseModel):
+    """Completed-beat totals for one (local day, tz, project, tag) bucket.
+
+    Materialized from beats so the heatmap and rhythm endpoints can read
+    one row per day instead of rebuilding every Beat the user ever logged.
+    A beat lands wholly on the local date it *started* on (same rule the
+    raw-beat aggregations use); its half-hour slot minutes wrap past
+    midnight into slot 0. ``tag == ""`` is the untagged total row — every
+    session counts there once, and once more in each of its tag rows.
+    ``contributions`` maps the id of each beat the row counts to the
+    version counted (see rollups.contribution_span); it guards writes and
+    is never returned.
+    """
+
+    local_date: date_type
+    tz: str = "UTC"
+    project_id: str
+    tag: str = ""
+    seconds: float = 0.0
+    session_count: int = 0
+    slot_minutes: list[float] = Field(default_factory=lambda: [0.0] * 48)
+    contributions: dict[str, str] = Field(default_factory=dict, exclude=True)
+
+
+@dataclass(frozen=True, slots=True)
+class BeatRecord:
+    """A completed beat as a plain record, for lifetime analytics scans.
+
+    Built straight from a stored document with no pydantic validation (see
+    BeatRepository.list_completed_records); carries only what the rollup
+    builder reads, duck-typing the matching Beat attributes.
+    """
+
+    project_id: str
+    start: datetime
+    end: datetime
+    tags: tuple[str, ...] = ()
+    id: str | None = None
+
+    @property
+    def duration(self) -> timedelta:
+        return self.end - self.start
+
+
+class BeatDurationBucket(BaseModel):
+    """Summed beat durations for one calendar bucket (a day or a month).
+
+    Produced by the repository's server-side aggregation; ``start`` is the
+    bucket's first local calendar day in the timezone it was grouped by.
+    """
+
+    start: date_type
+    duration: timedelta = timedelta()
+    session_count: int = 0
+
+
+class FlowBucket(BaseModel):
+    """Windows sharing one key on a grouping axis (repo, language, app)."""
+
+    key: str
+    avg: float
+    count: int
+
+
+class FlowWindowStats(BaseModel):
+    """Summary of a flow-window slice, reduced server-side.
+
+    ``top_*`` is the bucket with the most windows on that axis, tie-broken
+    on higher ``avg`` and then on whichever bucket appeared first; windows
+    without a key on the axis are left out, so an axis with none is None.
+    """
+
+    count: int = 0
+    avg: float = 0.0
+    peak: float = 0.0
+    peak_at: datetime | None = None
+    top_repo: FlowBucket | None = None
+    top_language: FlowBucket | None = None
+    top_bundle: FlowBucket | None = None
+
+
+class FlowHourlyRollup(TzNormalizedModel):
+    """Flow-window totals for one UTC hour, maintained as windows arrive.
+
+    Lets long-range reads (series charts, chronotype, the coach's 30-day
+    headline) sum a row per hour instead of every one-minute window.
+    ``hour`` is the window_start truncated to the hour. Drift markers
+    (flow_score == 0) count in ``count`` and ``drift_count`` but not in the
+    per-repo / per-language tallies, which hold window counts and score
+    sums of focused windows only; languages are lowercased.
+
+    ``window_ids`` lists the stored windows counted in the row, so adding a
+    window twice (an ingest delta racing the first build) is a no-op; it is
+    kept out of dumps and out of rollup reads. ``compacted`` marks a whole
+    UTC day read back from the daily tier (``hour`` is its midnight).
+    """
+
+    hour: datetime
+    count: int = 0
+    score_sum: float = 0.0
+    score_sq_sum: float = 0.0
+    score_max: float = 0.0
+    drift_count: int = 0
+    repo_counts: dict[str, int] = Field(default_factory=dict)
+    repo_scores: dict[str, float] = Field(default_factory=dict)
+    language_counts: dict[str, int] = Field(default_factory=dict)
+    language_scores: dict[str, float] = Field(default_factory=dict)
+    window_ids: list[str] = Field(default_factory=list, exclude=True)
+    compacted: bool = Field(default=False, exclude=True)
+
+
+class FlowSeriesPoint(BaseModel):
+    """One hour, day or week of a flow series, merged from hourly rollups."""
+
+    start: datetime
+    count: int = 0
+    drift_count: int = 0
+    avg: float = 0.0
+    stddev: float = 0.0
+    peak: float = 0.0
+    top_repo: str | None = None
+    top_language: str | None = None
+
+
 class PendingSuggestion(TzNormalizedModel):
     """An auto-timer suggestion the API has surfaced but the user hasn't
     yet acted on.
@@ -421,3 +547,29 @@ class Webhook(TzNormalizedModel):
     events: list[str] = Field(default_factory=lambda: ["timer.start", "timer.stop"])
     active: bool = True
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+
+class WebhookDelivery(TzNormalizedModel):
+    """One event queued for one webhook URL — a row of the delivery outbox.
+
+    Written in the request that raised the event and delivered by the
+    background dispatcher, which retries with backoff until ``max_attempts``
+    and then leaves the row ``dead`` for inspection and replay.
+    """
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: str | None = None
+    webhook_id: str
+    url: str
+    host: str = ""  # lowercased URL host; the dispatcher limits concurrency per host
+    event: str
+    body: dict = Field(default_factory=dict)
+    status: Literal["pending", "delivered", "dead"] = "pending"
+    attempts: int = 0
+    next_attempt_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    delivered_at: datetime | None = None
+    last_error: str | None = None
+    last_status_code: int | None = None
+    latency_ms: float | None = None
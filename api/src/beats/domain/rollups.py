@@ -0,0 +1,159 @@
+"""Daily beat rollups — materialized per-day totals behind the heatmap and rhythm.
+
+Rollups are built lazily per timezone: the first heatmap/rhythm read in a
+timezone marks it materialized and folds every completed beat into
+``beat_daily_rollups``. From then on every beat write (timer stop, beat
+create/update/delete) applies its delta to each materialized timezone, so
+reads scale with the number of days asked for instead of with the user's
+lifetime session count. Bulk paths (import/restore) drop the rollups and let
+the next read rebuild them.
+
+Writes apply deltas from the moment the build starts, so the build and a
+write can both see the same beat. Each row records which version of each
+beat it counts, and which beats a write took out of it: the build skips
+beats a write already counted or removed, so every beat is counted once, in
+its current version, however the two interleave.
+"""
+
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from beats.domain.models import Beat, BeatDailyRollup, BeatRecord
+from beats.domain.utils import local_date, local_dt
+from beats.infrastructure.repositories import BeatRepository, BeatRollupRepository
+
+# Tag of the per-(day, project) total row every session contributes to.
+UNTAGGED = ""
+
+SLOTS_PER_DAY = 48
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+def distribute_to_slots(slots: list[float], start: datetime, end: datetime) -> None:
+    """Distribute a session's minutes into half-hour slots (0-47).
+
+    Slots are indexed by time-of-day, so a session that crosses midnight
+    has its after-midnight minutes attributed to the next day's slots
+    (which wrap back to slot 0). The minutes are never dropped.
+    """
+    cursor = start
+    while cursor < end:
+        slot_index = (cursor.hour * 2 + (1 if cursor.minute >= 30 else 0)) % SLOTS_PER_DAY
+        # Next half-hour boundary
+        next_min = 30 if cursor.minute < 30 else 0
+        next_half = cursor.replace(minute=next_min, second=0, microsecond=0)
+        if cursor.minute >= 30:
+            next_half += timedelta(hours=1)
+
+        chunk_end = min(end, next_half)
+        minutes = (chunk_end - cursor).total_seconds() / 60
+        slots[slot_index] += minutes
+        cursor = chunk_end
+
+
+def contribution_span(start: datetime, end: datetime) -> str:
+    """The version of a beat a rollup row counts: its start and end in
+    epoch milliseconds, the precision Mongo stores them at, so the beat a
+    write replaces matches the one the row counted however it was read."""
+    ms = timedelta(milliseconds=1)
+    return f"{(start - _EPOCH) // ms}/{(end - _EPOCH) // ms}"
+
+
+def rollups_for_beat(beat: Beat | BeatRecord, tz: ZoneInfo) -> list[BeatDailyRollup]:
+    """One completed beat's contribution: its untagged row plus one per tag.
+
+    Running beats contribute nothing — the raw-beat aggregations only ever
+    read completed ones.
+    """
+    if beat.end is None:
+        return []
+    slots = [0.0] * SLOTS_PER_DAY
+    distribute_to_slots(
+        slots,
+        local_dt(beat.start, tz).replace(tzinfo=None),
+        local_dt(beat.end, tz).replace(tzinfo=None),
+    )
+    day = local_date(beat.start, tz)
+    seconds = beat.duration.total_seconds()
+    # dict.fromkeys dedupes while keeping order: `tag in beat.tags` counts a
+    # session once however many times the tag repeats.
+    tags = [t for t in dict.fromkeys(beat.tags) if t != UNTAGGED]
+    span = contribution_span(beat.start, beat.end)
+    return [
+        BeatDailyRollup(
+            local_date=day,
+            tz=tz.key,
+            project_id=beat.project_id,
+            tag=tag,
+            seconds=seconds,
+            session_count=1,
+            slot_minutes=list(slots),
+            contributions={beat.id: span} if beat.id else {},
+        )
+        for tag in (UNTAGGED, *tags)
+    ]
+
+
+def build_rollups(beats: Iterable[Beat | BeatRecord], tz: ZoneInfo) -> list[BeatDailyRollup]:
+    """Fold many beats into one rollup per (local_date, project_id, tag)."""
+    merged: dict[tuple, BeatDailyRollup] = {}
+    for beat in beats:
+        for rollup in rollups_for_beat(beat, tz):
+            key = _bucket(rollup)
+            acc = merged.get(key)
+            if acc is None:
+                merged[key] = rollup
+                continue
+            acc.seconds += rollup.seconds
+            acc.session_count += rollup.session_count
+            acc.slot_minutes = [
+                a + b for a, b in zip(acc.slot_minutes, rollup.slot_minutes, strict=True)
+            ]
+            acc.contributions.update(rollup.contributions)
+    return list(merged.values())
+
+
+def _bucket(rollup: BeatDailyRollup) -> tuple:
+    return (rollup.local_date, rollup.project_id, rollup.tag)
+
+
+async def ensure_materialized(
+    rollup_repo: BeatRollupRepository, beat_repo: BeatRepository, tz: ZoneInfo
+) -> None:
+    """Build ``tz``'s rollups from raw beats the first time it's read.
+
+    The timezone is marked materialized before the scan, so writes made
+    while it runs apply their deltas, and the scan merges into the rows
+    instead of replacing them. A read racing the build runs it too: the
+    merge is idempotent, and the timezone only counts as built once one
+    of them finishes.
+    """
+    if tz.key in await rollup_repo.built_timezones():
+        return
+    await rollup_repo.start_build(tz.key)
+    beats = await beat_repo.list_completed_records()
+    conflicts = await rollup_repo.merge(build_rollups(beats, tz))
+    if conflicts:
+        # A write counted or removed some beat of these rows first; merge
+        # their beats one at a time so only that beat is skipped.
+        buckets = {_bucket(r) for r in conflicts}
+        await rollup_repo.merge(
+            [r for beat in beats for r in rollups_for_beat(beat, tz) if _bucket(r) in buckets]
+        )
+    await rollup_repo.mark_built(tz.key)
+
+
+async def record_beat_change(
+    rollup_repo: BeatRollupRepository, before: Beat | None, after: Beat | None
+) -> None:
+    """Move one beat's contribution from ``before`` to ``after`` in every
+    materialized timezone, built or still building. Pass ``before=None``
+    for a create and ``after=None`` for a delete."""
+    for name in await rollup_repo.materialized_timezones():
+        tz = ZoneInfo(name)
+        if before is not None:
+            await rollup_repo.apply(rollups_for_beat(before, tz), sign=-1)
+        if after is not None:
+            await rollup_repo.apply(rollups_for_beat(after, tz))
@@ -1,9 +1,12 @@
 """Domain services - business logic that coordinates multiple entities."""
 
 from collections import defaultdict
+from collections.abc import Callable
 from datetime import UTC, date, datetime, timedelta
 
+from beats.domain.beat_search import BeatSearchPage, SearchCursor, query_terms
 from beats.domain.exceptions import (
+    BeatNotFound,
     InvalidEndTime,
     NoActiveTimer,
     NoObjectMatched,
@@ -11,13 +14,19 @@ from beats.domain.exceptions import (
     TimerAlreadyRunning,
 )
 from beats.domain.models import Beat, Project
+from beats.domain.rollups import record_beat_change
 from beats.domain.utils import normalize_tz
 from beats.infrastructure.repositories import (
     BeatRepository,
+    BeatRollupRepository,
     FlowWindowRepository,
     ProjectRepository,
 )
 
+# A completed beat longer than this is almost certainly a forgotten timer;
+# monthly totals still count it but surface a warning.
+_RUNAWAY_BEAT = timedelta(hours=24)
+
 # Cap on auto-derived tags per session — enough to capture the repos + languages
 # a focused session touches without turning the tag cloud into noise.
 _MAX_FLOW_TAGS = 6
@@ -48,6 +57,10 @@ async def derive_flow_tags(
     return tags[:_MAX_FLOW_TAGS]
 
 
+def _runaway_warning(beat: Beat) -> str:
+    return f"Warning: Log {beat.id} has duration longer than 24 hours ({beat.duration})."
+
+
 def _has_override_for_week(project: Project, week_monday: date) -> bool:
     """Return True iff a goal override resolves for the given week."""
     for o in project.goal_overrides:
@@ -71,10 +84,19 @@ class TimerService:
         beat_repo: BeatRepository,
         project_repo: ProjectRepository,
         flow_repo: FlowWindowRepository | None = None,
+        rollup_repo: BeatRollupRepository | None = None,
+        on_change: Callable[[], None] | None = None,
     ):
         self.beat_repo = beat_repo
         self.project_repo = project_repo
         self.flow_repo = flow_repo
+        self.rollup_repo = rollup_repo
+        # Called after every write, e.g. to drop the cached device status.
+        self.on_change = on_change
+
+    def _changed(self) -> None:
+        if self.on_change is not None:
+            self.on_change()
 
     async def start_timer(self, project_id: str, start_time: datetime | None = None) -> Beat:
         """Start a new timer for a project.
@@ -106,7 +128,9 @@ class TimerService:
         # Create new beat
         start = start_time or datetime.now(UTC)
         beat = Beat(project_id=project_id, start=start)
-        return await self.beat_repo.create(beat)
+        created = await self.beat_repo.create(beat)
+        self._changed()
+        return created
 
     async def stop_timer(self, end_time: datetime | None = None) -> Beat:
         """Stop the currently running timer.
@@ -136,7 +160,13 @@ class TimerService:
         active.end = end
         if self.flow_repo is not None:
             active.tags = await derive_flow_tags(self.flow_repo, active.start, end)
-        return await self.beat_repo.update(active)
+        stopped = await self.beat_repo.update(active)
+        if self.rollup_repo is not None:
+            # The running beat contributed nothing to the rollups; the
+            # stopped one contributes its whole session.
+            await record_beat_change(self.rollup_repo, None, stopped)
+        self._changed()
+        return stopped
 
     async def get_status(self) -> dict:
         """Get the current timer status.
@@ -176,15 +206,41 @@ class TimerService:
 class BeatService:
     """Service for managing beat CRUD operations."""
 
-    def __init__(self, beat_repo: BeatRepository, flow_repo: FlowWindowRepository | None = None):
+    def __init__(
+        self,
+        beat_repo: BeatRepository,
+        flow_repo: FlowWindowRepository | None = None,
+        rollup_repo: BeatRollupRepository | None = None,
+        on_change: Callable[[], None] | None = None,
+    ):
         self.beat_repo = beat_repo
         self.flow_repo = flow_repo
+        self.rollup_repo = rollup_repo
+        # Called after every write, e.g. to drop the cached device status.
+        self.on_change = on_change
+
+    def _changed(self) -> None:
+        if self.on_change is not None:
+            self.on_change()
+
+    async def _existing(self, beat_id: str | None) -> Beat | None:
+        """The stored beat a write is about to replace, for rollup deltas."""
+        if beat_id is None:
+            return None
+        try:
+            return await self.beat_repo.get_by_id(beat_id)
+        except BeatNotFound, NoObjectMatched:
+            return None
 
     async def create_beat(self, beat: Beat) -> Beat:
         """Create a new beat, auto-tagging it from daemon flow signals."""
         if self.flow_repo is not None and beat.end is not None:
             beat.tags = await derive_flow_tags(self.flow_repo, beat.start, beat.end)
-        return await self.beat_repo.create(beat)
+        created = await self.beat_repo.create(beat)
+        if self.rollup_repo is not None:
+            await record_beat_change(self.rollup_repo, None, created)
+        self._changed()
+        return created
 
     async def get_beat(self, beat_id: str) -> Beat:
         """Get a beat by ID."""
@@ -203,18 +259,31 @@ class BeatService:
             end = normalize_tz(beat.end)
             if end < start:
                 raise InvalidEndTime()
+        before = await self._existing(beat.id) if self.rollup_repo is not None else None
         if self.flow_repo is not None and beat.end is not None:
             derived = await derive_flow_tags(self.flow_repo, beat.start, beat.end)
             if derived:
                 beat.tags = derived
             elif beat.id is not None:
-                existing = await self.beat_repo.get_by_id(beat.id)
+                existing = before or await self.beat_repo.get_by_id(beat.id)
                 beat.tags = existing.tags
-        return await self.beat_repo.update(beat)
+        updated = await self.beat_repo.update(beat)
+        # No stored beat means the update matched nothing, so there is no
+        # contribution to move.
+        if self.rollup_repo is not None and before is not None:
+            await record_beat_change(self.rollup_repo, before, updated)
+        self._changed()
+        return updated
 
     async def delete_beat(self, beat_id: str) -> bool:
         """Delete a beat by ID."""
-        return await self.beat_repo.delete(beat_id)
+        before = await self._existing(beat_id) if self.rollup_repo is not None else None
+        deleted = await self.beat_repo.delete(beat_id)
+        if self.rollup_repo is not None and deleted and before is not None:
+            await record_beat_change(self.rollup_repo, before, None)
+        if deleted:
+            self._changed()
+        return deleted
 
     async def list_beats(
         self,
@@ -224,27 +293,68 @@ class BeatService:
         """List beats with optional filters."""
         return await self.beat_repo.list(project_id=project_id, date_filter=date_filter)
 
+    async def search_beats(
+        self, query: str, limit: int = 20, cursor: str | None = None
+    ) -> BeatSearchPage:
+        """Completed beats whose notes or tags match ``query`` (see
+        beat_search), best match first; pass ``next_cursor`` back for the
+        following page."""
+        terms = query_terms(query)
+        if not terms:
+            return BeatSearchPage(beats=[])
+        after = SearchCursor.decode(cursor) if cursor else None
+        # One extra row tells whether there is a next page.
+        hits = await self.beat_repo.search(terms, limit + 1, after)
+        page = hits[:limit]
+        next_cursor = page[-1].cursor.encode() if len(hits) > limit else None
+        return BeatSearchPage(beats=[h.beat for h in page], next_cursor=next_cursor)
+
+    async def discard_rollups(self) -> None:
+        """Drop the materialized daily rollups after a bulk write that went
+        straight to the repository (import/restore); the next heatmap or
+        rhythm read rebuilds them from beats."""
+        if self.rollup_repo is not None:
+            await self.rollup_repo.delete_all()
+        self._changed()
+
 
 class ProjectService:
     """Service for managing project operations and analytics."""
 
-    def __init__(self, project_repo: ProjectRepository, beat_repo: BeatRepository):
+    def __init__(
+        self,
+        project_repo: ProjectRepository,
+        beat_repo: BeatRepository,
+        on_change: Callable[[], None] | None = None,
+    ):
         self.project_repo = project_repo
         self.beat_repo = beat_repo
+        # Called after every project write (see TimerService.on_change).
+        self.on_change = on_change
+
+    def _changed(self) -> None:
+        if self.on_change is not None:
+            self.on_change()
 
     async def create_project(self, project: Project) -> Project:
         """Create a new project."""
-        return await self.project_repo.create(project)
+        created = await self.project_repo.create(project)
+        self._changed()
+        return created
 
     async def update_project(self, project: Project) -> Project:
         """Update an existing project."""
-        return await self.project_repo.update(project)
+        updated = await self.project_repo.update(project)
+        self._changed()
+        return updated
 
     async def archive_project(self, project_id: str) -> Project:
         """Archive a project."""
         project = await self.project_repo.get_by_id(project_id)
         project.archived = True
-        return await self.project_repo.update(project)
+        updated = await self.project_repo.update(project)
+        self._changed()
+        return updated
 
     async def unarchive_project(self, project_id: str) -> Project:
         """Restore an archived project — symmetric to archive_project.
@@ -257,18 +367,21 @@ class ProjectService:
         """
         project = await self.project_repo.get_by_id(project_id)
         project.archived = False
-        return await self.project_repo.update(project)
+        updated = await self.project_repo.update(project)
+        self._changed()
+        return updated
 
     async def list_projects(self, archived: bool = False) -> list[Project]:
         """List projects with optional archived filter."""
         return await self.project_repo.list(archived=archived)
 
     async def get_today_time(self, project_id: str) -> timedelta:
-        """Get total time spent on project today."""
-        beats = await self.beat_repo.list_by_project(project_id)
+        """Get total time spent on project today, including a running timer."""
         today = date.today()
-        today_beats = [b for b in beats if b.start.date() == today]
-        return sum((b.duration for b in today_beats), timedelta())
+        buckets = await self.beat_repo.sum_durations(
+            project_id, "day", start=today, end=today, include_active=True
+        )
+        return sum((b.duration for b in buckets), timedelta())
 
     async def get_last_tracked_at(self, project_id: str) -> datetime | None:
         """The timestamp of the project's most recent activity.
@@ -281,13 +394,15 @@ class ProjectService:
         return self._last_tracked_from_beats(beats)
 
     # ------------------------------------------------------------------ #
-    # FF.15: pure-Python helpers below. Each public method above fetches
-    # beats per-project and delegates. The list_projects route (after
+    # FF.15: pure-Python helpers below. The list_projects route (after
     # FF.15) fetches every displayed project's beats in ONE Mongo find and
     # calls these helpers directly, sharing the same in-memory list across
-    # the three aggregations. The helpers MUST stay byte-for-byte
-    # equivalent to the original public-method bodies — the
-    # `*_matches_public_method` tests in test_domain.py guard the drift.
+    # the three aggregations. The per-project public methods instead ask
+    # the repository for server-side duration buckets (sum_durations) so
+    # a long-lived project never ships every session over the wire. The
+    # helpers are the reference for both: they MUST stay byte-for-byte
+    # equivalent to the public methods — the `*_matches_public_method`
+    # tests in test_domain.py guard the drift.
     # ------------------------------------------------------------------ #
 
     @staticmethod
@@ -312,11 +427,28 @@ class ProjectService:
         Returns:
             Dict with time per day and total hours.
         """
-        beats = await self.beat_repo.list_by_project(project_id)
         project = await self.project_repo.get_by_id(project_id)
-        return self._week_breakdown_from_beats(
-            beats, project, weeks_ago=weeks_ago, include_log_details=include_log_details
+        if include_log_details:
+            # Per-session log entries need the beats themselves.
+            beats = await self.beat_repo.list_by_project(project_id)
+            return self._week_breakdown_from_beats(
+                beats, project, weeks_ago=weeks_ago, include_log_details=True
+            )
+        start_of_week, end_of_week = self._week_bounds(weeks_ago)
+        buckets = await self.beat_repo.sum_durations(
+            project_id, "day", start=start_of_week, end=end_of_week
         )
+        per_day_duration: dict[str, timedelta] = defaultdict(timedelta)
+        for bucket in buckets:
+            per_day_duration[bucket.start.strftime("%A")] += bucket.duration
+        return self._week_breakdown_result(per_day_duration, {}, start_of_week, project, False)
+
+    @staticmethod
+    def _week_bounds(weeks_ago: int) -> tuple[date, date]:
+        """Monday and Sunday of the week ``weeks_ago`` weeks back."""
+        today = date.today() - timedelta(weeks=weeks_ago)
+        start_of_week = today - timedelta(days=today.weekday())  # Monday
+        return start_of_week, start_of_week + timedelta(days=6)  # Sunday
 
     @staticmethod
     def _week_breakdown_from_beats(
@@ -325,10 +457,7 @@ class ProjectService:
         weeks_ago: int = 0,
         include_log_details: bool = False,
     ) -> dict:
-        # Calculate week boundaries
-        today = date.today() - timedelta(weeks=weeks_ago)
-        start_of_week = today - timedelta(days=today.weekday())  # Monday
-        end_of_week = start_of_week + timedelta(days=6)  # Sunday
+        start_of_week, end_of_week = ProjectService._week_bounds(weeks_ago)
 
         # Filter to completed beats in this week
         week_beats = [
@@ -351,6 +480,18 @@ class ProjectService:
                     }
                 )
 
+        return ProjectService._week_breakdown_result(
+            per_day_duration, per_day_logs, start_of_week, project, include_log_details
+        )
+
+    @staticmethod
+    def _week_breakdown_result(
+        per_day_duration: dict[str, timedelta],
+        per_day_logs: dict[str, list],
+        start_of_week: date,
+        project: Project | None,
+        include_log_details: bool,
+    ) -> dict:
         result = {}
         total_duration = timedelta()
         for i in range(7):
@@ -389,8 +530,11 @@ class ProjectService:
         Returns:
             Dict with durations per month, total minutes, and any warnings.
         """
-        beats = await self.beat_repo.list_by_project(project_id)
-        return self._monthly_totals_from_beats(beats)
+        buckets = await self.beat_repo.sum_durations(project_id, "month")
+        runaways = await self.beat_repo.list_longer_than(project_id, _RUNAWAY_BEAT)
+        warnings = [_runaway_warning(beat) for beat in runaways]
+        durations_per_month = {b.start.strftime("%Y-%m"): b.duration for b in buckets}
+        return self._monthly_totals_result(durations_per_month, warnings)
 
     @staticmethod
     def _monthly_totals_from_beats(beats: list[Beat]) -> dict:
@@ -401,13 +545,17 @@ class ProjectService:
         for beat in beats:
             if beat.end is None:
                 continue
-            if beat.duration > timedelta(hours=24):
-                warnings.append(
-                    f"Warning: Log {beat.id} has duration longer than 24 hours ({beat.duration})."
-                )
+            if beat.duration > _RUNAWAY_BEAT:
+                warnings.append(_runaway_warning(beat))
             month_key = beat.start.strftime("%Y-%m")
             durations_per_month[month_key] += beat.duration
 
+        return ProjectService._monthly_totals_result(durations_per_month, warnings)
+
+    @staticmethod
+    def _monthly_totals_result(
+        durations_per_month: dict[str, timedelta], warnings: list[str]
+    ) -> dict:
         # Calculate totals
         grand_total = sum(durations_per_month.values(), timedelta())
         total_minutes = round(grand_total.total_seconds() / 60)
@@ -426,27 +574,16 @@ class ProjectService:
 
     async def get_daily_average(self, project_id: str, days: int = 30) -> dict:
         """Get average daily session time for a project over the last N days."""
-        beats = await self.beat_repo.list_by_project(project_id)
         cutoff = date.today() - timedelta(days=days)
-        completed = [b for b in beats if b.end is not None and b.start.date() >= cutoff]
-        if not completed:
+        by_day = await self.beat_repo.sum_durations(project_id, "day", start=cutoff)
+        if not by_day:
             return {"avg_minutes": 0, "days_tracked": 0}
-        by_day: dict[date, timedelta] = defaultdict(timedelta)
-        for b in completed:
-            by_day[b.start.date()] += b.duration
         days_tracked = len(by_day)
-        total = sum(by_day.values(), timedelta())
+        total = sum((b.duration for b in by_day), timedelta())
         avg_minutes = round(total.total_seconds() / 60 / days_tracked)
         return {"avg_minutes": avg_minutes, "days_tracked": days_tracked}
 
     async def get_daily_summary(self, project_id: str) -> dict[str, str]:
         """Get summary of time per day for a project."""
-        beats = await self.beat_repo.list_by_project(project_id)
-
-        by_day: dict[date, list[timedelta]] = {}
-        for beat in beats:
-            if beat.day not in by_day:
-                by_day[beat.day] = []
-            by_day[beat.day].append(beat.duration)
-
-        return {str(day): str(sum(durations, timedelta())) for day, durations in by_day.items()}
+        by_day = await self.beat_repo.sum_durations(project_id, "day", include_active=True)
+        return {str(b.start): str(b.duration) for b in by_day}
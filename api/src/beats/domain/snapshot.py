@@ -0,0 +1,79 @@
+"""Request-scoped beat snapshot shared by composite intelligence endpoints.
+
+The Inbox (and anything else that stitches several IntelligenceService
+computations into one response) used to let each computation load its own
+overlapping window of completed beats plus the active project list — four to
+six Mongo round-trips for data that was mostly identical. A BeatSnapshot is
+loaded once for the widest window any of those computations needs; each
+method then slices it in memory with the same semantics as the repository
+query it replaces.
+"""
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import date
+from zoneinfo import ZoneInfo
+
+from beats.domain.models import Beat, Project
+from beats.domain.utils import local_date, normalize_tz
+from beats.infrastructure.repositories import BeatRepository, ProjectRepository
+
+
+@dataclass(frozen=True, slots=True)
+class BeatSnapshot:
+    """Completed beats whose UTC start date falls in [start, end], sorted by
+    start, with each beat's local calendar date in ``tz`` precomputed; plus
+    the user's active (non-archived) projects."""
+
+    start: date
+    end: date
+    tz: ZoneInfo
+    beats: tuple[Beat, ...]
+    projects: tuple[Project, ...]
+    # UTC start date per beat, parallel to ``beats`` — the bisect key that
+    # reproduces list_completed_in_range's date filter.
+    _utc_dates: tuple[date, ...] = field(init=False, repr=False)
+    # Local date per beat, keyed by object identity: slices hand out the
+    # very Beat instances held here, so lookups never recompute.
+    _local_dates: dict[int, date] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        ordered = tuple(sorted(self.beats, key=lambda b: b.start))
+        object.__setattr__(self, "beats", ordered)
+        object.__setattr__(self, "_utc_dates", tuple(normalize_tz(b.start).date() for b in ordered))
+        object.__setattr__(
+            self, "_local_dates", {id(b): local_date(b.start, self.tz) for b in ordered}
+        )
+
+    @classmethod
+    async def load(
+        cls,
+        beat_repo: BeatRepository,
+        project_repo: ProjectRepository,
+        start: date,
+        end: date,
+        tz: ZoneInfo,
+    ) -> BeatSnapshot:
+        """One range query and one project list — the whole request's reads."""
+        beats = await beat_repo.list_completed_in_range(start, end)
+        projects = await project_repo.list(archived=False)
+        return cls(start=start, end=end, tz=tz, beats=tuple(beats), projects=tuple(projects))
+
+    def covers(self, start: date, end: date) -> bool:
+        """Whether [start, end] lies inside the loaded window."""
+        return self.start <= start and end <= self.end
+
+    def completed_in_range(self, start: date, end: date) -> list[Beat]:
+        """Beats with UTC start date in [start, end], like the repository query.
+
+        Only meaningful when ``covers(start, end)``; outside the loaded
+        window the result is silently truncated.
+        """
+        lo = bisect_left(self._utc_dates, start)
+        hi = bisect_right(self._utc_dates, end)
+        return list(self.beats[lo:hi])
+
+    def local_day(self, beat: Beat) -> date:
+        """Local calendar date of ``beat``'s start in the snapshot's tz."""
+        day = self._local_dates.get(id(beat))
+        return day if day is not None else local_date(beat.start, self.tz)
@@ -1,10 +1,12 @@
 """Domain utilities.
 
 Datetime convention: all datetimes in the domain layer are UTC-aware.
-MongoDB returns naive datetimes; the TzNormalizedModel base class adds
-UTC tzinfo on construction. Code should use ``datetime.now(UTC)`` freely
-and never need to call ``normalize_tz()`` manually — it's applied
-automatically by the model validator.
+The Mongo client decodes BSON dates as UTC-aware (``tz_aware=True``, see
+``Database.connect``); naive datetimes still come in from request bodies
+and ISO strings without an offset, and the TzNormalizedModel base class
+adds UTC tzinfo to those on construction. Code should use
+``datetime.now(UTC)`` freely and never need to call ``normalize_tz()``
+manually — it's applied automatically by the model validator.
 """
 
 from datetime import UTC, date, datetime
@@ -16,9 +18,9 @@ from pydantic import BaseModel, model_validator
 def local_dt(dt: datetime, tz: ZoneInfo) -> datetime:
     """Convert an aware-or-naive-UTC datetime to a localized datetime in ``tz``.
 
-    Naive datetimes are treated as UTC (the DB stores UTC; Mongo may return
-    naive datetimes). Use this for ``.hour`` slot math and cross-midnight
-    splitting that must run in the user's local wall clock.
+    Naive datetimes are treated as UTC (the DB stores UTC). Use this for
+    ``.hour`` slot math and cross-midnight splitting that must run in the
+    user's local wall clock.
 
     Args:
         dt: A datetime, either UTC-aware or naive (interpreted as UTC).
@@ -67,7 +69,8 @@ class TzNormalizedModel(BaseModel):
     """Pydantic base model that normalizes all datetime fields to UTC-aware.
 
     Inherit from this instead of ``BaseModel`` for any domain model that
-    may be constructed from MongoDB documents (which return naive datetimes).
+    may be constructed from naive datetimes (request bodies, offset-less
+    ISO strings).
     """
 
     @model_validator(mode="after")
@@ -1,10 +1,19 @@
 """Database connection management using the PyMongo async MongoDB driver."""
 
+import logging
+
 from pymongo import AsyncMongoClient
 from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import DuplicateKeyError
 
 from beats.settings import settings
 
+logger = logging.getLogger(__name__)
+
+# The unique key of a stored flow window: a daemon replay of a window
+# collides with the copy already stored.
+FLOW_WINDOW_DEDUPE_KEYS = [("user_id", 1), ("device_id", 1), ("window_start", 1)]
+
 
 class Database:
     """Async MongoDB connection manager.
@@ -26,7 +35,12 @@ class Database:
         """
         dsn = dsn or settings.db_dsn
         db_name = db_name or settings.db_name
-        cls.client = AsyncMongoClient(dsn)
+        # tz_aware decodes BSON dates as UTC-aware datetimes in the driver,
+        # so bulk reads skip TzNormalizedModel's per-row naive→UTC pass and
+        # BeatRepository.list_completed_records can use them as-is. Leave
+        # tzinfo at the driver's default UTC: an explicit tzinfo=UTC adds
+        # an astimezone() per decoded date.
+        cls.client = AsyncMongoClient(dsn, tz_aware=True)
         cls.db = cls.client[db_name]
         await cls._ensure_indexes()
 
@@ -46,6 +60,23 @@ class Database:
         await cls.db.users.create_index("email", unique=True)
         await cls.db.credentials.create_index("credential_id", unique=True)
         await cls.db.credentials.create_index("user_id")
+        # Beats (timeLogs) — every MongoBeatRepository query is user-scoped.
+        # (user_id, end) serves get_active's {end: None} lookup that the
+        # wall-clock polls; (user_id, start) serves the range scans and
+        # get_last's sort; (user_id, project_id, start) the per-project views.
+        await cls.db.timeLogs.create_index([("user_id", 1), ("end", 1)])
+        await cls.db.timeLogs.create_index([("user_id", 1), ("start", -1)])
+        await cls.db.timeLogs.create_index([("user_id", 1), ("project_id", 1), ("start", -1)])
+        # Beat search (see beat_search): multikey over the note/tag terms,
+        # so each query prefix is one range scan within the user.
+        await cls.db.timeLogs.create_index([("user_id", 1), ("search_terms", 1), ("start", -1)])
+        await cls.db.projects.create_index([("user_id", 1), ("archived", 1)])
+        # Daily rollups: one row per (tz, tag, local_date, project) bucket;
+        # equality on tz/tag first so the heatmap's date range is one scan.
+        await cls.db.beat_daily_rollups.create_index(
+            [("user_id", 1), ("tz", 1), ("tag", 1), ("local_date", 1), ("project_id", 1)],
+            unique=True,
+        )
         # Device pairing indexes
         await cls.db.pairing_codes.create_index("expires_at", expireAfterSeconds=0)
         await cls.db.pairing_codes.create_index("code_hash", unique=True)
@@ -53,15 +84,51 @@ class Database:
         await cls.db.device_registrations.create_index("user_id")
         # Flow windows and signal summaries
         await cls.db.flow_windows.create_index([("user_id", 1), ("window_start", -1)])
+        await cls._ensure_flow_window_dedupe_index()
         await cls.db.signal_summaries.create_index(
             [("user_id", 1), ("device_id", 1), ("hour", 1)], unique=True
         )
+        # Hourly flow rollups: one row per (user, UTC hour), plus the
+        # null-hour materialization marker.
+        await cls.db.flow_hourly.create_index([("user_id", 1), ("hour", 1)], unique=True)
+        # Days whose hourly rollups aged out (see flow_retention).
+        await cls.db.flow_daily.create_index([("user_id", 1), ("day", 1)], unique=True)
+        # Shared auth state (see beats.auth.state_store): expired entries are
+        # removed by the TTL index, the latest challenge found per namespace.
+        await cls.db.shared_state.create_index("expires_at", expireAfterSeconds=0)
+        await cls.db.shared_state.create_index([("ns", 1), ("set_at", -1)])
         # Biometrics
         await cls.db.biometric_days.create_index(
             [("user_id", 1), ("date", 1), ("source", 1)], unique=True
         )
         await cls.db.fitbit_integrations.create_index("user_id", unique=True)
         await cls.db.oura_integrations.create_index("user_id", unique=True)
+        # Webhook delivery outbox: the dispatcher claims by (status, due time),
+        # the delivery log lists per user; delivered rows expire after a week.
+        await cls.db.webhook_deliveries.create_index([("status", 1), ("next_attempt_at", 1)])
+        await cls.db.webhook_deliveries.create_index([("user_id", 1), ("created_at", -1)])
+        await cls.db.webhook_deliveries.create_index(
+            "delivered_at", expireAfterSeconds=7 * 24 * 3600
+        )
+
+    @classmethod
+    async def _ensure_flow_window_dedupe_index(cls) -> None:
+        """One stored window per (user, device, window_start).
+
+        Batch ingest dedupes daemon replays on this index. Collections that
+        predate it can already hold such replays, which fail the build:
+        that is logged and startup carries on, with ingest storing replays
+        again until ``scripts/dedupe_flow_windows.py`` removes the copies
+        and builds the index. Nothing is deleted here.
+        """
+        try:
+            await cls.db.flow_windows.create_index(FLOW_WINDOW_DEDUPE_KEYS, unique=True)
+        except DuplicateKeyError as exc:
+            logger.error(
+                "flow_windows holds duplicate windows, so its unique index was not built;"
+                " run scripts/dedupe_flow_windows.py: %s",
+                exc,
+            )
 
     @classmethod
     def get_db(cls) -> AsyncDatabase:
@@ -0,0 +1,115 @@
+"""Retention tiers for flow data: raw windows → hourly rollups → daily rollups.
+
+A daemon sends a window a minute, so ``flow_windows`` grows by ~500k rows
+per active user per year while everything past the last few weeks is only
+ever read in aggregate. The sweep here keeps three tiers:
+
+  - raw ``flow_windows`` for ``FLOW_WINDOW_RETENTION_DAYS`` (90) — what the
+    drift, summary and per-window endpoints read;
+  - ``flow_hourly`` rollups for ``FLOW_HOURLY_RETENTION_DAYS`` (400);
+  - ``flow_daily`` rollups after that, kept indefinitely.
+
+A user's hourly rollups are materialized before any of their raw windows
+are deleted, and the expiring windows are checked against them hour by
+hour (``uncounted_hours``): a short hour is topped up from its raw windows
+first, and one that still can't be verified keeps its windows. Expiring a
+window therefore never loses it from the series, the coach context or the
+chronotype read; ``MongoFlowRollupRepository.list_range`` returns both
+rollup tiers, so those readers don't need to know which tier a range
+falls in. Daily rows are UTC days (see beats.domain.flow_rollups).
+
+The raw tier stays a regular collection rather than a time-series one: a
+time-series collection can't carry the unique (user, device, window_start)
+index that makes batched ingest idempotent, and the rows need ``$set``
+updates for the date backfill. A dated ``deleteMany`` on the
+(user_id, window_start) index does the expiry instead of a TTL index, which
+couldn't wait for the rollups to be built first.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import PyMongoError
+
+from beats.domain.flow_rollups import ensure_flow_rollups, uncounted_hours
+from beats.infrastructure.repositories import MongoFlowRollupRepository, MongoFlowWindowRepository
+
+logger = logging.getLogger(__name__)
+
+SWEEP_INTERVAL = timedelta(hours=6)
+
+
+@dataclass(slots=True)
+class RetentionCutoffs:
+    """Oldest instant kept in each tier; everything before moves down a tier."""
+
+    raw: datetime
+    hourly: datetime
+
+
+def retention_cutoffs(now: datetime, raw_days: int, hourly_days: int) -> RetentionCutoffs:
+    """Cutoffs for a sweep at ``now``, aligned to UTC midnight.
+
+    Day alignment keeps a daily row from ever being built out of a partial
+    set of hours by one sweep and topped up by the next. Hours are never
+    compacted while their raw windows are kept, so an hourly retention
+    shorter than the raw one is stretched to match it.
+    """
+    midnight = now.astimezone(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+    return RetentionCutoffs(
+        raw=midnight - timedelta(days=raw_days),
+        hourly=midnight - timedelta(days=max(hourly_days, raw_days)),
+    )
+
+
+async def sweep_flow_retention(db: AsyncDatabase, cutoffs: RetentionCutoffs) -> dict[str, int]:
+    """Move every user's expired flow data down a tier.
+
+    Returns the raw windows deleted and hourly rows compacted. Each step is
+    safe to interrupt and re-run.
+    """
+    expired = compacted = 0
+    for user_id in await db.flow_windows.distinct(
+        "user_id", {"window_start": {"$lt": cutoffs.raw}}
+    ):
+        rollup_repo = MongoFlowRollupRepository(db.flow_hourly, user_id, daily=db.flow_daily)
+        flow_repo = MongoFlowWindowRepository(db.flow_windows, user_id)
+        await ensure_flow_rollups(rollup_repo, flow_repo)
+        keep = await uncounted_hours(rollup_repo, flow_repo, cutoffs.raw)
+        if keep:
+            logger.warning(
+                "Keeping raw flow windows of %d hours the rollups don't count (user %s)",
+                len(keep),
+                user_id,
+            )
+        expired += await flow_repo.delete_before(cutoffs.raw, keep_hours=keep)
+    for user_id in await db.flow_hourly.distinct("user_id", {"hour": {"$lt": cutoffs.hourly}}):
+        rollup_repo = MongoFlowRollupRepository(db.flow_hourly, user_id, daily=db.flow_daily)
+        compacted += await rollup_repo.compact_before(cutoffs.hourly)
+    return {"expired_windows": expired, "compacted_hours": compacted}
+
+
+async def run_flow_retention(
+    db: AsyncDatabase,
+    raw_days: int,
+    hourly_days: int,
+    interval: timedelta = SWEEP_INTERVAL,
+) -> None:
+    """Lifespan entry point: sweep now and every ``interval`` until cancelled.
+
+    Mongo errors are logged and the sweep retried on the next tick.
+    """
+    while True:
+        cutoffs = retention_cutoffs(datetime.now(UTC), raw_days, hourly_days)
+        try:
+            result = await sweep_flow_retention(db, cutoffs)
+            if any(result.values()):
+                logger.info("Flow retention sweep: %s", result)
+        except PyMongoError as exc:
+            logger.warning("Flow retention sweep failed, retrying later: %s", exc)
+        await asyncio.sleep(interval.total_seconds())
@@ -0,0 +1,142 @@
+"""Startup query-plan check for the hot repository query shapes.
+
+Every shape below mirrors a filter a Mongo repository actually issues on a
+request path (the wall-clock's get_active poll, the heatmap's completed-beat
+scan, the projects list). At startup each one is run through explain() and
+any winning plan that falls back to a COLLSCAN is logged as a warning, so a
+dropped or renamed index shows up in the boot log instead of as a slow
+dashboard weeks later. The check is advisory only — it never blocks startup.
+"""
+
+import logging
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from pymongo.asynchronous.database import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+# Placeholder values — the planner picks an index from the filter's shape,
+# not its values, so nothing here has to exist in the collection.
+_PROBE_USER_ID = "index-advisor-probe"
+_PROBE_START = datetime(2000, 1, 1)
+_PROBE_END = datetime(2000, 1, 2)
+
+
+@dataclass(frozen=True, slots=True)
+class QueryShape:
+    """A repository query to explain: collection, filter and optional sort."""
+
+    name: str
+    collection: str
+    filter: dict[str, Any]
+    sort: list[tuple[str, int]] = field(default_factory=list)
+
+
+QUERY_SHAPES: tuple[QueryShape, ...] = (
+    QueryShape("beats.get_active", "timeLogs", {"user_id": _PROBE_USER_ID, "end": None}),
+    QueryShape(
+        "beats.get_last",
+        "timeLogs",
+        {"user_id": _PROBE_USER_ID},
+        sort=[("start", -1)],
+    ),
+    QueryShape(
+        "beats.list_all_completed",
+        "timeLogs",
+        {"user_id": _PROBE_USER_ID, "end": {"$ne": None}},
+    ),
+    QueryShape(
+        "beats.list_completed_in_range",
+        "timeLogs",
+        {
+            "user_id": _PROBE_USER_ID,
+            "start": {"$gte": _PROBE_START, "$lte": _PROBE_END},
+            "end": {"$ne": None},
+        },
+    ),
+    QueryShape(
+        "beats.list_by_project",
+        "timeLogs",
+        {"user_id": _PROBE_USER_ID, "project_id": "probe"},
+    ),
+    QueryShape(
+        "beats.list_grouped_by_project_ids",
+        "timeLogs",
+        {"user_id": _PROBE_USER_ID, "project_id": {"$in": ["probe-a", "probe-b"]}},
+    ),
+    QueryShape(
+        "beats.search",
+        "timeLogs",
+        {"user_id": _PROBE_USER_ID, "search_terms": {"$regex": "^probe"}, "end": {"$ne": None}},
+    ),
+    QueryShape("projects.list", "projects", {"user_id": _PROBE_USER_ID, "archived": False}),
+    QueryShape(
+        "flow_windows.list_by_range",
+        "flow_windows",
+        {
+            "user_id": _PROBE_USER_ID,
+            "window_start": {"$gte": _PROBE_START, "$lte": _PROBE_END},
+        },
+        sort=[("window_start", 1)],
+    ),
+    # The webhook dispatcher's claim, every few seconds on every instance.
+    QueryShape(
+        "webhook_deliveries.claim_due",
+        "webhook_deliveries",
+        {"status": "pending", "next_attempt_at": {"$lte": _PROBE_END}},
+        sort=[("next_attempt_at", 1)],
+    ),
+)
+
+
+def plan_stages(plan: Any) -> Iterator[str]:
+    """Yield every `stage` name in an explain() plan tree.
+
+    Walks generically rather than following `inputStage`/`inputStages`
+    by name: classic and SBE plans nest children under different keys
+    (`queryPlan`, `outerStage`, `innerStage`, …) across server versions.
+    """
+    if isinstance(plan, dict):
+        stage = plan.get("stage")
+        if isinstance(stage, str):
+            yield stage
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+
+
+async def find_collscans(
+    db: AsyncDatabase, shapes: tuple[QueryShape, ...] = QUERY_SHAPES
+) -> list[str]:
+    """Return the names of the shapes whose winning plan contains a COLLSCAN."""
+    collscans: list[str] = []
+    for shape in shapes:
+        cursor = db[shape.collection].find(shape.filter)
+        if shape.sort:
+            cursor = cursor.sort(shape.sort)
+        explain = await cursor.explain()
+        winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in plan_stages(winning):
+            collscans.append(shape.name)
+    return collscans
+
+
+async def check_query_plans(db: AsyncDatabase) -> list[str]:
+    """Log a warning for every hot query shape that would scan its collection.
+
+    Best-effort: an explain() failure (permissions, an old server) is
+    logged and swallowed so the advisor can never take the API down.
+    """
+    try:
+        collscans = await find_collscans(db)
+    except Exception:
+        logger.warning("Index advisor could not explain query plans", exc_info=True)
+        return []
+    for name in collscans:
+        logger.warning("Index advisor: %s runs as a COLLSCAN — check its index", name)
+    return collscans
@@ -0,0 +1,217 @@
+"""Online backfill of ISO-string timestamps to BSON dates.
+
+``flow_windows`` and ``signal_summaries`` were written with
+``model_dump(mode="json")``, so their timestamps are strings: range scans
+compare variable-length text (and break on "Z" vs "+00:00"), and nothing
+date-aware — ``$dateTrunc``, TTLs — can run over them. Beats restored from
+a JSON backup (``timeLogs``) kept the backup's strings the same way. The
+repositories now write dates. This module converts the rows written before that, in the
+usual expand/contract order:
+
+  1. new code writes dates and reads both types (``LEGACY_DATE_READS``,
+     on by default);
+  2. ``backfill_legacy_dates`` runs in the background at startup (or via
+     ``scripts/migrate_signal_dates.py``) until no string is left;
+  3. ``LEGACY_DATE_READS=false`` drops the string branch from the reads.
+
+Each batch is an unordered bulk of per-document updates matched on the
+original strings, so a row rewritten concurrently is left for the next
+pass, and re-running is always safe.
+
+``backfill_search_terms`` does the same for beats stored before beat search
+(beats.domain.beat_search): it adds the ``search_terms`` every beat write
+now stores, matched on their absence so a concurrent write wins.
+
+``dedupe_flow_windows`` is not run by the API: it deletes the daemon
+replays stored before flow windows had their unique index, and only runs
+from ``scripts/dedupe_flow_windows.py``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Sequence
+from datetime import UTC, datetime
+from typing import Any
+
+from pymongo import UpdateOne
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from beats.domain.beat_search import search_terms
+from beats.infrastructure.database import FLOW_WINDOW_DEDUPE_KEYS
+from beats.infrastructure.repositories import DUPLICATE_KEY
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 500
+# Seconds between batches when running alongside live traffic.
+BACKGROUND_PAUSE = 0.05
+
+# Collection -> timestamp fields stored as ISO strings before the switch.
+LEGACY_DATE_FIELDS: dict[str, tuple[str, ...]] = {
+    "flow_windows": ("window_start", "window_end", "created_at"),
+    "signal_summaries": ("hour", "created_at"),
+    # Beats imported from a JSON backup before import rows were validated.
+    "timeLogs": ("start", "end"),
+}
+
+
+def parse_legacy_date(value: str) -> datetime:
+    """An ISO string as written by ``model_dump(mode="json")``, as UTC."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=UTC)
+    return parsed.astimezone(UTC)
+
+
+def _legacy_filter(fields: Sequence[str]) -> dict[str, Any]:
+    return {"$or": [{field: {"$type": "string"}} for field in fields]}
+
+
+async def count_legacy(collection: AsyncCollection, fields: Sequence[str]) -> int:
+    """Documents that still have a string in any of ``fields``."""
+    return await collection.count_documents(_legacy_filter(fields))
+
+
+async def backfill_dates(
+    collection: AsyncCollection,
+    fields: Sequence[str],
+    batch_size: int = BACKFILL_BATCH_SIZE,
+    pause: float = 0.0,
+) -> int:
+    """Convert string ``fields`` to dates in batches; returns documents converted.
+
+    A legacy row whose converted key collides with a unique index (the
+    same window or hour was re-sent, and stored as a date, after the
+    switch) is deleted: the date copy is the newer write. Strings that
+    don't parse are logged and left alone. ``pause`` sleeps between
+    batches to keep the load of a large backfill down.
+    """
+    converted = 0
+    skipped: list[Any] = []
+    projection = dict.fromkeys(fields, 1)
+    while True:
+        query = _legacy_filter(fields)
+        if skipped:
+            query["_id"] = {"$nin": skipped}
+        docs = await collection.find(query, projection).limit(batch_size).to_list(length=None)
+        if not docs:
+            return converted
+
+        ops: list[UpdateOne] = []
+        ids: list[Any] = []
+        for doc in docs:
+            strings = {f: doc[f] for f in fields if isinstance(doc.get(f), str)}
+            try:
+                dates = {f: parse_legacy_date(v) for f, v in strings.items()}
+            except ValueError as exc:
+                logger.warning("Leaving %s %s as is: %s", collection.name, doc["_id"], exc)
+                skipped.append(doc["_id"])
+                continue
+            ops.append(UpdateOne({"_id": doc["_id"], **strings}, {"$set": dates}))
+            ids.append(doc["_id"])
+        if not ops:
+            continue
+
+        try:
+            result = await collection.bulk_write(ops, ordered=False)
+            converted += result.modified_count
+        except BulkWriteError as exc:
+            write_errors = exc.details.get("writeErrors") or []
+            if not write_errors or any(e.get("code") != DUPLICATE_KEY for e in write_errors):
+                raise
+            converted += exc.details.get("nModified", 0)
+            superseded = [ids[e["index"]] for e in write_errors]
+            await collection.delete_many({"_id": {"$in": superseded}})
+            logger.info(
+                "Dropped %d legacy %s rows superseded by date rows",
+                len(superseded),
+                collection.name,
+            )
+        if pause:
+            await asyncio.sleep(pause)
+
+
+async def backfill_legacy_dates(
+    db: AsyncDatabase, batch_size: int = BACKFILL_BATCH_SIZE, pause: float = 0.0
+) -> dict[str, int]:
+    """Run ``backfill_dates`` over every collection in LEGACY_DATE_FIELDS."""
+    converted: dict[str, int] = {}
+    for name, fields in LEGACY_DATE_FIELDS.items():
+        converted[name] = await backfill_dates(db[name], fields, batch_size, pause)
+        remaining = await count_legacy(db[name], fields)
+        logger.info("Date backfill for %s: %d converted, %d left", name, converted[name], remaining)
+    return converted
+
+
+async def backfill_search_terms(
+    collection: AsyncCollection, batch_size: int = BACKFILL_BATCH_SIZE, pause: float = 0.0
+) -> int:
+    """Store ``search_terms`` on beats that don't have them; returns beats updated."""
+    updated = 0
+    missing = {"search_terms": {"$exists": False}}
+    while True:
+        docs = await (
+            collection.find(missing, {"note": 1, "tags": 1}).limit(batch_size).to_list(length=None)
+        )
+        if not docs:
+            return updated
+        ops = [
+            UpdateOne(
+                {"_id": doc["_id"], **missing},
+                {"$set": {"search_terms": search_terms(doc.get("note"), doc.get("tags"))}},
+            )
+            for doc in docs
+        ]
+        result = await collection.bulk_write(ops, ordered=False)
+        updated += result.modified_count
+        if pause:
+            await asyncio.sleep(pause)
+
+
+async def dedupe_flow_windows(collection: AsyncCollection) -> int:
+    """Delete all but the first stored copy of each flow window key
+    (FLOW_WINDOW_DEDUPE_KEYS); returns windows deleted."""
+    group_id = {field: f"${field}" for field, _ in FLOW_WINDOW_DEDUPE_KEYS}
+    cursor = await collection.aggregate(
+        [
+            {"$sort": {"_id": 1}},
+            {"$group": {"_id": group_id, "ids": {"$push": "$_id"}}},
+            {"$match": {"ids.1": {"$exists": True}}},
+        ],
+        allowDiskUse=True,
+    )
+    deleted = 0
+    async for group in cursor:
+        result = await collection.delete_many({"_id": {"$in": group["ids"][1:]}})
+        deleted += result.deleted_count
+    return deleted
+
+
+async def run_search_terms_backfill(db: AsyncDatabase) -> None:
+    """Lifespan entry point for ``backfill_search_terms`` over ``timeLogs``.
+
+    Beats without terms only go unfound by search until it finishes, and
+    the next startup resumes where this one stopped.
+    """
+    try:
+        updated = await backfill_search_terms(db.timeLogs, pause=BACKGROUND_PAUSE)
+        if updated:
+            logger.info("Search terms backfill: %d beats updated", updated)
+    except PyMongoError as exc:
+        logger.warning("Search terms backfill stopped, will resume on next start: %s", exc)
+
+
+async def run_legacy_date_backfill(db: AsyncDatabase) -> None:
+    """Lifespan entry point: backfill, logging instead of raising on Mongo errors.
+
+    Whatever isn't converted is still read through the dual-read branch,
+    and the next startup picks up where this one stopped.
+    """
+    try:
+        await backfill_legacy_dates(db, pause=BACKGROUND_PAUSE)
+    except PyMongoError as exc:
+        logger.warning("Date backfill stopped, will resume on next start: %s", exc)
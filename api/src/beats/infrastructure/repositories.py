@@ -1,21 +1,41 @@
 """Repository implementations for MongoDB using the PyMongo async driver."""
 
+import hashlib
+import re
 from abc import ABC, abstractmethod
-from datetime import UTC, date, datetime
-from typing import Any
+from collections.abc import AsyncIterator, Collection
+from datetime import UTC, date, datetime, time, timedelta
+from typing import Any, Literal, cast
+from zoneinfo import ZoneInfo
 
 from bson import ObjectId
+from bson.errors import InvalidId
+from pydantic import BaseModel
+from pymongo import InsertOne, ReturnDocument, UpdateOne
 from pymongo.asynchronous.collection import AsyncCollection
-
-from beats.domain.exceptions import BeatNotFound, NoObjectMatched, ProjectNotFound
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from beats.domain.beat_search import BeatSearchHit, SearchCursor, search_terms
+from beats.domain.exceptions import (
+    BeatNotFound,
+    InvalidSearchCursor,
+    NoObjectMatched,
+    ProjectNotFound,
+)
 from beats.domain.models import (
     AutoStartRule,
     Beat,
+    BeatDailyRollup,
+    BeatDurationBucket,
+    BeatRecord,
     BiometricDay,
     CalendarIntegration,
     DeviceRegistration,
     FitbitIntegration,
+    FlowBucket,
+    FlowHourlyRollup,
     FlowWindow,
+    FlowWindowStats,
     GitHubIntegration,
     OuraIntegration,
     PairingCode,
@@ -25,9 +45,11 @@ from beats.domain.models import (
     User,
     UserInsights,
     Webhook,
+    WebhookDelivery,
     WeeklyDigest,
     WeeklyPlan,
 )
+from beats.settings import settings
 
 
 def serialize_from_document(doc: dict[str, Any]) -> dict[str, Any]:
@@ -43,6 +65,33 @@ def serialize_from_document(doc: dict[str, Any]) -> dict[str, Any]:
     return result
 
 
+def projection_for(model: type[BaseModel]) -> dict[str, int]:
+    """Inclusion projection of a model's stored fields (``_id`` comes back
+    by default), so bulk reads skip anything the model would drop."""
+    return {name: 1 for name in model.model_fields if name != "id"}
+
+
+# Server error code for a unique-index violation.
+DUPLICATE_KEY = 11000
+
+# Cursor batch size for the streaming export reads: documents per getMore,
+# so an export holds one batch in memory rather than the whole collection.
+STREAM_BATCH_SIZE = 1000
+
+
+def _date_range(field: str, start: datetime, end: datetime) -> dict[str, Any]:
+    """``start <= field <= end`` over BSON dates.
+
+    While ``legacy_date_reads`` is on, rows that still hold the ISO string
+    written before the switch to dates (see beats.infrastructure.migrations)
+    are matched too, with the string comparison they always used.
+    """
+    dates = {field: {"$gte": start, "$lte": end}}
+    if not settings.legacy_date_reads:
+        return dates
+    return {"$or": [dates, {field: {"$gte": start.isoformat(), "$lte": end.isoformat()}}]}
+
+
 def serialize_to_document(data: dict[str, Any]) -> dict[str, Any]:
     """Convert domain model data to MongoDB document format.
 
@@ -73,6 +122,71 @@ class MongoUserScoped:
             q.update(extra)
         return q
 
+    def _upsert_document(self, row: BaseModel) -> dict[str, Any]:
+        """The stored form of a validated upsert row. Repositories that keep
+        derived fields next to the model's (beat search terms) add them."""
+        return serialize_to_document(row.model_dump(exclude_none=True))
+
+    def _upsert_op(
+        self, model: type[BaseModel], row: dict
+    ) -> tuple[ObjectId | None, UpdateOne | InsertOne]:
+        """The write for one ``upsert`` row, validated against ``model``
+        first: backup rows carry dates as ISO strings, and stored as-is they
+        would break every date query and aggregation on the collection.
+
+        A row with an id replaces the model's fields on that document; its
+        None fields are unset, so the document matches the row exactly.
+        """
+        validated = model.model_validate(row)
+        doc = self._upsert_document(validated)
+        doc["user_id"] = self.user_id
+        doc_id = doc.pop("_id", None)
+        if not doc_id:
+            return None, InsertOne(doc)
+        update: dict[str, Any] = {"$set": doc}
+        unset = {
+            name: ""
+            for name in model.model_fields
+            if name != "id" and getattr(validated, name) is None
+        }
+        if unset:
+            update["$unset"] = unset
+        return doc_id, UpdateOne({"_id": doc_id}, update, upsert=True)
+
+    async def _bulk_upsert(self, model: type[BaseModel], rows: list[dict]) -> list[str]:
+        """Batch form of the beat/project ``upsert``: one unordered bulk_write
+        of UpdateOne(upsert=True) by id (InsertOne for id-less rows).
+
+        Rows that fail validation or can't be converted (bad ObjectId, not
+        an object) and writes the server rejects are reported as
+        ``"<id or #row>: reason"`` instead of raising, so one bad row doesn't
+        sink the batch.
+        """
+        errors: list[str] = []
+        ops: list[UpdateOne | InsertOne] = []
+        labels: list[str] = []
+        for index, row in enumerate(rows):
+            try:
+                doc_id, op = self._upsert_op(model, row)
+            except (InvalidId, TypeError, ValueError) as exc:
+                errors.append(f"#{index}: {exc}")
+                continue
+            ops.append(op)
+            labels.append(str(doc_id) if doc_id else f"#{index}")
+        if not ops:
+            return errors
+        try:
+            await self.collection.bulk_write(ops, ordered=False)
+        except BulkWriteError as exc:
+            write_errors = exc.details.get("writeErrors") or []
+            if not write_errors:
+                # e.g. a write-concern failure: nothing row-specific to report.
+                raise
+            errors.extend(
+                f"{labels[e['index']]}: {e.get('errmsg', 'write failed')}" for e in write_errors
+            )
+        return errors
+
 
 # Abstract Repository Interfaces
 
@@ -163,11 +277,94 @@ class BeatRepository(ABC):
         """List completed beats with start date in [start, end]."""
         ...
 
+    @abstractmethod
+    def stream(
+        self, project_id: str | None = None, completed_only: bool = False
+    ) -> AsyncIterator[Beat]:
+        """Yield beats sorted by start, one cursor batch in memory at a time.
+
+        For exports: unlike the list methods, nothing is materialized up
+        front, so memory stays flat however long the user's history is.
+        """
+        ...
+
+    @abstractmethod
+    async def list_completed_records(self) -> list[BeatRecord]:
+        """Every completed beat as a BeatRecord, without building a Beat per row.
+
+        The lifetime scan behind rollup materialization, where model
+        validation used to dominate the read.
+        """
+        ...
+
+    @abstractmethod
+    async def list_completed_documents(self, start: date, end: date) -> list[dict]:
+        """Raw documents for list_completed_in_range's beats, no model construction.
+
+        Only ``start``, ``end``, ``project_id`` and ``tags`` are returned —
+        enough to build a BeatFrame for the columnar intelligence math.
+        """
+        ...
+
+    @abstractmethod
+    async def sum_durations(
+        self,
+        project_id: str,
+        unit: Literal["day", "month"] = "day",
+        start: date | None = None,
+        end: date | None = None,
+        tz: str = "UTC",
+        include_active: bool = False,
+    ) -> list[BeatDurationBucket]:
+        """Sum a project's beat durations per local day or month, server-side.
+
+        Beats are bucketed by the local calendar date of their start in
+        ``tz``; ``start``/``end`` bound that date inclusively. Running beats
+        count up to now only when ``include_active`` is set. Buckets come
+        back in ascending order and only for periods with sessions.
+        """
+        ...
+
+    @abstractmethod
+    async def daily_totals(
+        self, start: date, end: date, tz: str = "UTC"
+    ) -> list[BeatDurationBucket]:
+        """Sum completed beats across every project per local day in ``tz``.
+
+        Same bucketing as ``sum_durations``: by the local date of each
+        beat's start, ``start``/``end`` inclusive, days without sessions
+        left out.
+        """
+        ...
+
+    @abstractmethod
+    async def list_longer_than(self, project_id: str, threshold: timedelta) -> list[Beat]:
+        """List a project's completed beats whose duration exceeds ``threshold``."""
+        ...
+
     @abstractmethod
     async def upsert(self, data: dict) -> None:
         """Upsert a beat by ID for import/restore."""
         ...
 
+    @abstractmethod
+    async def upsert_many(self, rows: list[dict]) -> list[str]:
+        """Upsert a batch of beats like ``upsert``, in one round-trip.
+
+        Returns one message per row that could not be written; the rest of
+        the batch is still applied.
+        """
+        ...
+
+    @abstractmethod
+    async def search(
+        self, terms: list[str], limit: int, after: SearchCursor | None = None
+    ) -> list[BeatSearchHit]:
+        """Up to ``limit`` completed beats whose search terms match every
+        one of ``terms`` by prefix, best first, after ``after``
+        (``beat_search.search_page`` is the reference)."""
+        ...
+
 
 class ProjectRepository(ABC):
     """Abstract interface for Project persistence operations."""
@@ -202,10 +399,32 @@ class ProjectRepository(ABC):
         """Upsert a project by ID for import/restore."""
         ...
 
+    @abstractmethod
+    async def upsert_many(self, rows: list[dict]) -> list[str]:
+        """Upsert a batch of projects like ``upsert``, in one round-trip.
+
+        Returns one message per row that could not be written; the rest of
+        the batch is still applied.
+        """
+        ...
+
 
 # MongoDB Implementations
 
 
+# Bulk list methods fetch only the fields Beat declares (no user_id).
+_BEAT_PROJECTION = projection_for(Beat)
+
+
+def _beat_document(beat: Beat) -> dict[str, Any]:
+    """A beat's stored form, with the search terms (see beat_search) of its
+    note and tags. Derived from the whole model rather than the document,
+    which leaves a None note out, so the terms always cover both fields."""
+    doc = serialize_to_document(beat.model_dump(exclude_none=True))
+    doc["search_terms"] = search_terms(beat.note, beat.tags)
+    return doc
+
+
 class MongoBeatRepository(MongoUserScoped, BeatRepository):
     """MongoDB implementation of BeatRepository using PyMongo's async driver."""
 
@@ -228,7 +447,7 @@ class MongoBeatRepository(MongoUserScoped, BeatRepository):
         return Beat(**serialize_from_document(doc))
 
     async def create(self, beat: Beat) -> Beat:
-        data = serialize_to_document(beat.model_dump(exclude_none=True))
+        data = _beat_document(beat)
         data["user_id"] = self.user_id
         result = await self.collection.insert_one(data)
         return Beat(**serialize_from_document({**data, "_id": result.inserted_id}))
@@ -236,7 +455,7 @@ class MongoBeatRepository(MongoUserScoped, BeatRepository):
     async def update(self, beat: Beat) -> Beat:
         if not beat.id:
             raise ValueError("Beat ID is required for update")
-        data = serialize_to_document(beat.model_dump(exclude_none=True))
+        data = _beat_document(beat)
         data["user_id"] = self.user_id
         await self.collection.replace_one(self._q({"_id": ObjectId(beat.id)}), data)
         return beat
@@ -258,12 +477,12 @@ class MongoBeatRepository(MongoUserScoped, BeatRepository):
             end_of_day = datetime.combine(date_filter, datetime.max.time())
             query["start"] = {"$gte": start_of_day, "$lte": end_of_day}
 
-        cursor = self.collection.find(query)
+        cursor = self.collection.find(query, _BEAT_PROJECTION)
         docs = await cursor.to_list(length=None)
         return [Beat(**serialize_from_document(doc)) for doc in docs]
 
     async def list_by_project(self, project_id: str) -> list[Beat]:
-        cursor = self.collection.find(self._q({"project_id": project_id}))
+        cursor = self.collection.find(self._q({"project_id": project_id}), _BEAT_PROJECTION)
         docs = await cursor.to_list(length=None)
         return [Beat(**serialize_from_document(doc)) for doc in docs]
 
@@ -273,7 +492,9 @@ class MongoBeatRepository(MongoUserScoped, BeatRepository):
         # called with no projects (a fresh user).
         if not project_ids:
             return {}
-        cursor = self.collection.find(self._q({"project_id": {"$in": project_ids}}))
+        cursor = self.collection.find(
+            self._q({"project_id": {"$in": project_ids}}), _BEAT_PROJECTION
+        )
         docs = await cursor.to_list(length=None)
         buckets: dict[str, list[Beat]] = {pid: [] for pid in project_ids}
         for doc in docs:
@@ -284,7 +505,7 @@ class MongoBeatRepository(MongoUserScoped, BeatRepository):
         return buckets
 
     async def list_all_completed(self) -> list[Beat]:
-        cursor = self.collection.find(self._q({"end": {"$ne": None}}))
+        cursor = self.collection.find(self._q({"end": {"$ne": None}}), _BEAT_PROJECTION)
         docs = await cursor.to_list(length=None)
         return [Beat(**serialize_from_document(doc)) for doc in docs]
 
@@ -292,19 +513,193 @@ class MongoBeatRepository(MongoUserScoped, BeatRepository):
         start_dt = datetime.combine(start, datetime.min.time())
         end_dt = datetime.combine(end, datetime.max.time())
         cursor = self.collection.find(
-            self._q({"start": {"$gte": start_dt, "$lte": end_dt}, "end": {"$ne": None}})
+            self._q({"start": {"$gte": start_dt, "$lte": end_dt}, "end": {"$ne": None}}),
+            _BEAT_PROJECTION,
         )
         docs = await cursor.to_list(length=None)
         return [Beat(**serialize_from_document(doc)) for doc in docs]
 
+    async def list_completed_records(self) -> list[BeatRecord]:
+        cursor = self.collection.find(
+            self._q({"end": {"$ne": None}}),
+            {"project_id": 1, "start": 1, "end": 1, "tags": 1},
+        )
+        docs = await cursor.to_list(length=None)
+        records = []
+        for doc in docs:
+            # start/end arrive UTC-aware from the client's tz_aware codec.
+            start, end = doc["start"], doc["end"]
+            if not (isinstance(start, datetime) and isinstance(end, datetime)):
+                # A string-dated row the date backfill hasn't converted yet.
+                beat = Beat(**doc)
+                start, end = beat.start, beat.end
+            tags = tuple(doc.get("tags") or ())
+            records.append(BeatRecord(doc["project_id"], start, end, tags, id=str(doc["_id"])))
+        return records
+
+    async def stream(
+        self, project_id: str | None = None, completed_only: bool = False
+    ) -> AsyncIterator[Beat]:
+        query = self._q()
+        if project_id:
+            query["project_id"] = project_id
+        if completed_only:
+            query["end"] = {"$ne": None}
+        # Walks the (user_id[, project_id], start) indexes backwards for
+        # the ascending sort, so the server never sorts in memory either.
+        cursor = (
+            self.collection.find(query, _BEAT_PROJECTION)
+            .sort("start", 1)
+            .batch_size(STREAM_BATCH_SIZE)
+        )
+        async for doc in cursor:
+            yield Beat(**serialize_from_document(doc))
+
+    async def list_completed_documents(self, start: date, end: date) -> list[dict]:
+        start_dt = datetime.combine(start, datetime.min.time())
+        end_dt = datetime.combine(end, datetime.max.time())
+        cursor = self.collection.find(
+            self._q({"start": {"$gte": start_dt, "$lte": end_dt}, "end": {"$ne": None}}),
+            {"_id": 0, "start": 1, "end": 1, "project_id": 1, "tags": 1},
+        )
+        return await cursor.to_list(length=None)
+
+    async def sum_durations(
+        self,
+        project_id: str,
+        unit: Literal["day", "month"] = "day",
+        start: date | None = None,
+        end: date | None = None,
+        tz: str = "UTC",
+        include_active: bool = False,
+    ) -> list[BeatDurationBucket]:
+        match = self._q({"project_id": project_id})
+        match["end"] = {"$not": {"$type": "string"}} if include_active else {"$type": "date"}
+        return await self._sum_by_bucket(match, unit, start, end, tz)
+
+    async def daily_totals(
+        self, start: date, end: date, tz: str = "UTC"
+    ) -> list[BeatDurationBucket]:
+        return await self._sum_by_bucket(self._q({"end": {"$type": "date"}}), "day", start, end, tz)
+
+    async def _sum_by_bucket(
+        self,
+        match: dict[str, Any],
+        unit: Literal["day", "month"],
+        start: date | None,
+        end: date | None,
+        tz: str,
+    ) -> list[BeatDurationBucket]:
+        zone = ZoneInfo(tz)
+        # Local-day bounds → UTC instants, so the (user_id, [project_id,]
+        # start) index narrows the scan before anything is grouped. Only
+        # date-typed start/end reach $dateTrunc/$subtract (callers match
+        # ``end``): a row still holding ISO strings would fail the whole
+        # aggregation, so it sits out until the date backfill converts it.
+        bounds: dict[str, Any] = {"$type": "date"}
+        if start is not None:
+            bounds["$gte"] = datetime.combine(start, time.min, tzinfo=zone)
+        if end is not None:
+            bounds["$lt"] = datetime.combine(end + timedelta(days=1), time.min, tzinfo=zone)
+        match["start"] = bounds
+        pipeline = [
+            {"$match": match},
+            {
+                "$group": {
+                    "_id": {"$dateTrunc": {"date": "$start", "unit": unit, "timezone": tz}},
+                    # Date subtraction yields milliseconds — BSON dates carry
+                    # no finer precision, so the sum is exact.
+                    "ms": {"$sum": {"$subtract": [{"$ifNull": ["$end", "$$NOW"]}, "$start"]}},
+                    "count": {"$sum": 1},
+                }
+            },
+            {"$sort": {"_id": 1}},
+        ]
+        cursor = await self.collection.aggregate(pipeline)
+        docs = await cursor.to_list(length=None)
+        return [
+            BeatDurationBucket(
+                # $dateTrunc returns the bucket's local midnight as a UTC
+                # instant; convert back to get the local calendar date.
+                start=doc["_id"].replace(tzinfo=UTC).astimezone(zone).date(),
+                duration=timedelta(milliseconds=doc["ms"]),
+                session_count=doc["count"],
+            )
+            for doc in docs
+        ]
+
+    async def list_longer_than(self, project_id: str, threshold: timedelta) -> list[Beat]:
+        threshold_ms = threshold / timedelta(milliseconds=1)
+        cursor = self.collection.find(
+            self._q(
+                {
+                    "project_id": project_id,
+                    # $subtract fails on a not-yet-backfilled string date.
+                    "start": {"$type": "date"},
+                    "end": {"$type": "date"},
+                    "$expr": {"$gt": [{"$subtract": ["$end", "$start"]}, threshold_ms]},
+                }
+            )
+        )
+        docs = await cursor.to_list(length=None)
+        return [Beat(**serialize_from_document(doc)) for doc in docs]
+
+    def _upsert_document(self, row: BaseModel) -> dict[str, Any]:
+        # ``upsert`` validates its rows against Beat.
+        return _beat_document(cast(Beat, row))
+
     async def upsert(self, data: dict) -> None:
-        doc = serialize_to_document(dict(data))
-        doc["user_id"] = self.user_id
-        doc_id = doc.pop("_id", None)
-        if doc_id:
-            await self.collection.update_one({"_id": doc_id}, {"$set": doc}, upsert=True)
-        else:
-            await self.collection.insert_one(doc)
+        _, op = self._upsert_op(Beat, data)
+        await self.collection.bulk_write([op])
+
+    async def upsert_many(self, rows: list[dict]) -> list[str]:
+        return await self._bulk_upsert(Beat, rows)
+
+    async def search(
+        self, terms: list[str], limit: int, after: SearchCursor | None = None
+    ) -> list[BeatSearchHit]:
+        # Each prefix is a range on the multikey (user_id, search_terms,
+        # start) index; ranking only touches the beats that matched.
+        match = self._q(
+            {
+                "end": {"$ne": None},
+                "$and": [{"search_terms": {"$regex": f"^{re.escape(t)}"}} for t in terms],
+            }
+        )
+        pipeline: list[dict[str, Any]] = [
+            {"$match": match},
+            {"$addFields": {"_rank": {"$size": {"$setIntersection": ["$search_terms", terms]}}}},
+        ]
+        if after is not None:
+            try:
+                after_id = ObjectId(after.id)
+            except InvalidId as exc:
+                raise InvalidSearchCursor() from exc
+            pipeline.append(
+                {
+                    "$match": {
+                        "$or": [
+                            {"_rank": {"$lt": after.rank}},
+                            {"_rank": after.rank, "start": {"$lt": after.start}},
+                            {
+                                "_rank": after.rank,
+                                "start": after.start,
+                                "_id": {"$lt": after_id},
+                            },
+                        ]
+                    }
+                }
+            )
+        pipeline += [
+            {"$sort": {"_rank": -1, "start": -1, "_id": -1}},
+            {"$limit": limit},
+            {"$project": {**_BEAT_PROJECTION, "_rank": 1}},
+        ]
+        cursor = await self.collection.aggregate(pipeline)
+        return [
+            BeatSearchHit(Beat(**serialize_from_document(doc)), doc["_rank"])
+            async for doc in cursor
+        ]
 
 
 class MongoProjectRepository(MongoUserScoped, ProjectRepository):
@@ -342,14 +737,16 @@ class MongoProjectRepository(MongoUserScoped, ProjectRepository):
         docs = await cursor.to_list(length=None)
         return [Project(**serialize_from_document(doc)) for doc in docs]
 
+    def _upsert_document(self, row: BaseModel) -> dict[str, Any]:
+        # Stored in JSON form, like ``create``: goal overrides hold dates.
+        return serialize_to_document(row.model_dump(mode="json", exclude_none=True))
+
     async def upsert(self, data: dict) -> None:
-        doc = serialize_to_document(dict(data))
-        doc["user_id"] = self.user_id
-        doc_id = doc.pop("_id", None)
-        if doc_id:
-            await self.collection.update_one({"_id": doc_id}, {"$set": doc}, upsert=True)
-        else:
-            await self.collection.insert_one(doc)
+        _, op = self._upsert_op(Project, data)
+        await self.collection.bulk_write([op])
+
+    async def upsert_many(self, rows: list[dict]) -> list[str]:
+        return await self._bulk_upsert(Project, rows)
 
 
 # User Repository
@@ -436,6 +833,200 @@ class MongoWebhookRepository(MongoUserScoped, WebhookRepository):
         return webhook
 
 
+# Webhook Delivery Repositories
+
+
+def _delivery_document(delivery: WebhookDelivery) -> dict[str, Any]:
+    # Python-mode dump: the timestamps stay BSON dates, which the due-time
+    # query and the delivered_at TTL index both need.
+    return serialize_to_document(delivery.model_dump(exclude={"id"}))
+
+
+class WebhookDeliveryRepository(ABC):
+    """Abstract interface for a user's view of the webhook delivery outbox."""
+
+    @abstractmethod
+    async def enqueue(self, deliveries: list[WebhookDelivery]) -> list[WebhookDelivery]: ...
+
+    @abstractmethod
+    async def list_recent(
+        self, status: str | None = None, limit: int = 50
+    ) -> list[WebhookDelivery]: ...
+
+    @abstractmethod
+    async def requeue(self, delivery_id: str) -> WebhookDelivery | None: ...
+
+    @abstractmethod
+    async def count_by_status(self) -> dict[str, int]: ...
+
+    @abstractmethod
+    async def recent_latencies(self, limit: int = 500) -> list[float]: ...
+
+
+class MongoWebhookDeliveryRepository(MongoUserScoped, WebhookDeliveryRepository):
+    """MongoDB implementation of WebhookDeliveryRepository."""
+
+    async def enqueue(self, deliveries: list[WebhookDelivery]) -> list[WebhookDelivery]:
+        if not deliveries:
+            return []
+        docs = [{**_delivery_document(d), "user_id": self.user_id} for d in deliveries]
+        result = await self.collection.insert_many(docs)
+        return [
+            d.model_copy(update={"id": str(inserted_id)})
+            for d, inserted_id in zip(deliveries, result.inserted_ids, strict=True)
+        ]
+
+    async def list_recent(
+        self, status: str | None = None, limit: int = 50
+    ) -> list[WebhookDelivery]:
+        query = self._q({"status": status} if status else None)
+        cursor = self.collection.find(query).sort("created_at", -1).limit(limit)
+        docs = await cursor.to_list(length=None)
+        return [WebhookDelivery(**serialize_from_document(doc)) for doc in docs]
+
+    async def requeue(self, delivery_id: str) -> WebhookDelivery | None:
+        """Put a delivered or dead row back in the queue with a fresh attempt budget."""
+        try:
+            oid = ObjectId(delivery_id)
+        except InvalidId:
+            return None
+        doc = await self.collection.find_one_and_update(
+            self._q({"_id": oid, "status": {"$ne": "pending"}}),
+            {
+                "$set": {
+                    "status": "pending",
+                    "attempts": 0,
+                    "next_attempt_at": datetime.now(UTC),
+                    "delivered_at": None,
+                    "last_error": None,
+                    "last_status_code": None,
+                },
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+        return WebhookDelivery(**serialize_from_document(doc)) if doc else None
+
+    async def count_by_status(self) -> dict[str, int]:
+        pipeline = [
+            {"$match": self._q()},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+        ]
+        cursor = await self.collection.aggregate(pipeline)
+        return {doc["_id"]: doc["count"] async for doc in cursor}
+
+    async def recent_latencies(self, limit: int = 500) -> list[float]:
+        cursor = (
+            self.collection.find(
+                self._q({"status": "delivered", "latency_ms": {"$ne": None}}),
+                {"latency_ms": 1, "_id": 0},
+            )
+            .sort("delivered_at", -1)
+            .limit(limit)
+        )
+        return [doc["latency_ms"] async for doc in cursor]
+
+
+class WebhookOutbox(ABC):
+    """Abstract interface for the dispatcher's side of the outbox (not user-scoped)."""
+
+    @abstractmethod
+    async def claim_due(
+        self, now: datetime, lease: timedelta, skip_hosts: Collection[str] = ()
+    ) -> WebhookDelivery | None: ...
+
+    @abstractmethod
+    async def mark_delivered(
+        self, delivery: WebhookDelivery, status_code: int, latency_ms: float, at: datetime
+    ) -> None: ...
+
+    @abstractmethod
+    async def mark_retry(
+        self,
+        delivery: WebhookDelivery,
+        next_attempt_at: datetime,
+        error: str,
+        status_code: int | None,
+    ) -> None: ...
+
+    @abstractmethod
+    async def mark_dead(
+        self, delivery: WebhookDelivery, error: str, status_code: int | None
+    ) -> None: ...
+
+
+class MongoWebhookOutbox(WebhookOutbox):
+    """MongoDB implementation of WebhookOutbox.
+
+    Claiming a row pushes its ``next_attempt_at`` out by the lease and bumps
+    ``attempts`` in one atomic update, so concurrent workers (one per
+    instance) never pick up the same row, and a worker that dies mid-POST
+    leaves the row to be retried once the lease runs out. The ``mark_*``
+    writes match on the claimed ``attempts``: a row replayed or re-claimed
+    in the meantime is left alone.
+    """
+
+    def __init__(self, collection: AsyncCollection):
+        self.collection = collection
+
+    async def claim_due(
+        self, now: datetime, lease: timedelta, skip_hosts: Collection[str] = ()
+    ) -> WebhookDelivery | None:
+        """Claim the longest-due pending row, ignoring rows for ``skip_hosts``."""
+        query: dict[str, Any] = {"status": "pending", "next_attempt_at": {"$lte": now}}
+        if skip_hosts:
+            query["host"] = {"$nin": list(skip_hosts)}
+        doc = await self.collection.find_one_and_update(
+            query,
+            {"$set": {"next_attempt_at": now + lease}, "$inc": {"attempts": 1}},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        return WebhookDelivery(**serialize_from_document(doc)) if doc else None
+
+    async def _finish(self, delivery: WebhookDelivery, fields: dict[str, Any]) -> None:
+        await self.collection.update_one(
+            {"_id": ObjectId(delivery.id), "attempts": delivery.attempts}, {"$set": fields}
+        )
+
+    async def mark_delivered(
+        self, delivery: WebhookDelivery, status_code: int, latency_ms: float, at: datetime
+    ) -> None:
+        await self._finish(
+            delivery,
+            {
+                "status": "delivered",
+                "delivered_at": at,
+                "last_status_code": status_code,
+                "last_error": None,
+                "latency_ms": latency_ms,
+            },
+        )
+
+    async def mark_retry(
+        self,
+        delivery: WebhookDelivery,
+        next_attempt_at: datetime,
+        error: str,
+        status_code: int | None,
+    ) -> None:
+        await self._finish(
+            delivery,
+            {
+                "next_attempt_at": next_attempt_at,
+                "last_error": error,
+                "last_status_code": status_code,
+            },
+        )
+
+    async def mark_dead(
+        self, delivery: WebhookDelivery, error: str, status_code: int | None
+    ) -> None:
+        await self._finish(
+            delivery,
+            {"status": "dead", "last_error": error, "last_status_code": status_code},
+        )
+
+
 # Weekly Digest Repository
 
 
@@ -800,6 +1391,12 @@ class FlowWindowRepository(ABC):
     @abstractmethod
     async def create(self, window: FlowWindow) -> FlowWindow: ...
 
+    @abstractmethod
+    async def insert_many(self, windows: list[FlowWindow]) -> list[str | None]:
+        """Store ``windows`` in one write; per window, the new id or None if
+        its (device_id, window_start) was already stored."""
+        ...
+
     @abstractmethod
     async def list_by_range(
         self,
@@ -812,16 +1409,111 @@ class FlowWindowRepository(ABC):
         dominant_category: str | None = None,
     ) -> list[FlowWindow]: ...
 
+    @abstractmethod
+    def stream_by_range(
+        self,
+        start: datetime,
+        end: datetime,
+        project_id: str | None = None,
+        editor_repo: str | None = None,
+        editor_language: str | None = None,
+        bundle_id: str | None = None,
+    ) -> AsyncIterator[FlowWindow]:
+        """list_by_range's windows, yielded one cursor batch at a time (exports)."""
+        ...
+
+    @abstractmethod
+    async def delete_before(self, cutoff: datetime, keep_hours: Collection[datetime] = ()) -> int:
+        """Drop windows that started before ``cutoff`` (retention), except
+        those in the UTC hours ``keep_hours``; returns the count."""
+        ...
+
+    @abstractmethod
+    async def count_by_hour(self, before: datetime) -> dict[datetime, int]:
+        """Windows per UTC hour (as ``hour_of`` buckets them) that started
+        before ``before``."""
+        ...
+
+    @abstractmethod
+    async def summarize_range(
+        self,
+        start: datetime,
+        end: datetime,
+        project_id: str | None = None,
+        editor_repo: str | None = None,
+        editor_language: str | None = None,
+        bundle_id: str | None = None,
+    ) -> FlowWindowStats:
+        """Stats over list_by_range's windows, reduced without loading them."""
+        ...
+
+
+_FLOW_WINDOW_PROJECTION = projection_for(FlowWindow)
+
+# Grouping axes of FlowWindowStats -> the stored field each one groups on.
+_FLOW_SUMMARY_AXES = {
+    "top_repo": "editor_repo",
+    "top_language": "editor_language",
+    "top_bundle": "dominant_bundle_id",
+}
+
+
+def _top_bucket_stages(field: str) -> list[dict[str, Any]]:
+    """$facet branch for one axis: most windows, then higher avg, then earliest."""
+    return [
+        {"$match": {field: {"$nin": [None, ""]}}},
+        {
+            "$group": {
+                "_id": f"${field}",
+                "count": {"$sum": 1},
+                "total": {"$sum": "$flow_score"},
+                "first": {"$min": "$window_start"},
+            }
+        },
+        {"$set": {"avg": {"$divide": ["$total", "$count"]}}},
+        {"$sort": {"count": -1, "avg": -1, "first": 1}},
+        {"$limit": 1},
+    ]
+
 
 class MongoFlowWindowRepository(MongoUserScoped, FlowWindowRepository):
     """MongoDB implementation of FlowWindowRepository."""
 
-    async def create(self, window: FlowWindow) -> FlowWindow:
-        data = serialize_to_document(window.model_dump(mode="json", exclude_none=True))
+    def _document(self, window: FlowWindow) -> dict[str, Any]:
+        # Python-mode dump: timestamps are stored as BSON dates.
+        data = serialize_to_document(window.model_dump(exclude_none=True))
         data["user_id"] = self.user_id
-        result = await self.collection.insert_one(data)
+        return data
+
+    async def create(self, window: FlowWindow) -> FlowWindow:
+        data = self._document(window)
+        try:
+            result = await self.collection.insert_one(data)
+        except DuplicateKeyError:
+            # A daemon retry of a window that already landed: hand back the
+            # stored one, so the POST stays idempotent.
+            doc = await self.collection.find_one(
+                self._q({"device_id": data["device_id"], "window_start": data["window_start"]})
+            )
+            return FlowWindow(**serialize_from_document(doc))
         return FlowWindow(**serialize_from_document({**data, "_id": result.inserted_id}))
 
+    async def insert_many(self, windows: list[FlowWindow]) -> list[str | None]:
+        if not windows:
+            return []
+        docs = [self._document(w) for w in windows]
+        duplicates: set[int] = set()
+        try:
+            # insert_many assigns each doc's _id client-side, so the ids of
+            # the rows that went in are known even when others bounce.
+            await self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as exc:
+            write_errors = exc.details.get("writeErrors") or []
+            if not write_errors or any(e.get("code") != DUPLICATE_KEY for e in write_errors):
+                raise
+            duplicates = {e["index"] for e in write_errors}
+        return [None if i in duplicates else str(doc["_id"]) for i, doc in enumerate(docs)]
+
     async def list_by_range(
         self,
         start: datetime,
@@ -832,6 +1524,126 @@ class MongoFlowWindowRepository(MongoUserScoped, FlowWindowRepository):
         bundle_id: str | None = None,
         dominant_category: str | None = None,
     ) -> list[FlowWindow]:
+        query = self._range_query(
+            start, end, project_id, editor_repo, editor_language, bundle_id, dominant_category
+        )
+        cursor = self.collection.find(query, _FLOW_WINDOW_PROJECTION).sort("window_start", 1)
+        docs = await cursor.to_list(length=None)
+        windows = [FlowWindow(**serialize_from_document(doc)) for doc in docs]
+        if settings.legacy_date_reads:
+            # Mongo sorts every string before every date; order by instant.
+            windows.sort(key=lambda w: w.window_start)
+        return windows
+
+    async def stream_by_range(
+        self,
+        start: datetime,
+        end: datetime,
+        project_id: str | None = None,
+        editor_repo: str | None = None,
+        editor_language: str | None = None,
+        bundle_id: str | None = None,
+    ) -> AsyncIterator[FlowWindow]:
+        query = self._range_query(start, end, project_id, editor_repo, editor_language, bundle_id)
+        # No re-sort here: legacy string rows sort first, and they all
+        # predate the date rows, so the order is chronological anyway.
+        cursor = (
+            self.collection.find(query, _FLOW_WINDOW_PROJECTION)
+            .sort("window_start", 1)
+            .batch_size(STREAM_BATCH_SIZE)
+        )
+        async for doc in cursor:
+            yield FlowWindow(**serialize_from_document(doc))
+
+    async def delete_before(self, cutoff: datetime, keep_hours: Collection[datetime] = ()) -> int:
+        query = self._q({"window_start": {"$lt": cutoff}})
+        if keep_hours:
+            query["$nor"] = [
+                {"window_start": {"$gte": h, "$lt": h + timedelta(hours=1)}} for h in keep_hours
+            ]
+        result = await self.collection.delete_many(query)
+        return result.deleted_count
+
+    async def count_by_hour(self, before: datetime) -> dict[datetime, int]:
+        # Date rows only, like delete_before's range: a string window_start
+        # is neither deleted nor counted until the date backfill reaches it.
+        pipeline = [
+            {"$match": self._q({"window_start": {"$type": "date", "$lt": before}})},
+            {
+                "$group": {
+                    "_id": {"$dateTrunc": {"date": "$window_start", "unit": "hour"}},
+                    "n": {"$sum": 1},
+                }
+            },
+        ]
+        cursor = await self.collection.aggregate(pipeline)
+        return {doc["_id"]: doc["n"] async for doc in cursor}
+
+    async def summarize_range(
+        self,
+        start: datetime,
+        end: datetime,
+        project_id: str | None = None,
+        editor_repo: str | None = None,
+        editor_language: str | None = None,
+        bundle_id: str | None = None,
+    ) -> FlowWindowStats:
+        query = self._range_query(start, end, project_id, editor_repo, editor_language, bundle_id)
+        pipeline: list[dict[str, Any]] = [
+            {"$match": query},
+            {
+                "$project": {
+                    "_id": 0,
+                    "flow_score": 1,
+                    "window_start": 1,
+                    **dict.fromkeys(_FLOW_SUMMARY_AXES.values(), 1),
+                }
+            },
+            {
+                "$facet": {
+                    "overall": [
+                        {
+                            "$group": {
+                                "_id": None,
+                                "count": {"$sum": 1},
+                                "avg": {"$avg": "$flow_score"},
+                            }
+                        }
+                    ],
+                    # Sort + limit 1 coalesces into a top-1 scan, not a full sort.
+                    "peak": [{"$sort": {"flow_score": -1, "window_start": 1}}, {"$limit": 1}],
+                    **{axis: _top_bucket_stages(f) for axis, f in _FLOW_SUMMARY_AXES.items()},
+                }
+            },
+        ]
+        cursor = await self.collection.aggregate(pipeline)
+        [facets] = await cursor.to_list(length=None)
+        if not facets["overall"]:
+            return FlowWindowStats()
+        [overall], [peak] = facets["overall"], facets["peak"]
+        return FlowWindowStats(
+            count=overall["count"],
+            avg=overall["avg"],
+            peak=peak["flow_score"],
+            # A string on a row the date backfill hasn't reached; the model parses it.
+            peak_at=peak["window_start"],
+            **{
+                axis: FlowBucket(key=b["_id"], avg=b["avg"], count=b["count"])
+                for axis in _FLOW_SUMMARY_AXES
+                for b in facets[axis]
+            },
+        )
+
+    def _range_query(
+        self,
+        start: datetime,
+        end: datetime,
+        project_id: str | None = None,
+        editor_repo: str | None = None,
+        editor_language: str | None = None,
+        bundle_id: str | None = None,
+        dominant_category: str | None = None,
+    ) -> dict[str, Any]:
         # Filters are AND-composed. project_id matches windows captured
         # while a timer was running on that project; editor_repo matches
         # windows where the VS Code heartbeat covered them; editor_language
@@ -840,7 +1652,7 @@ class MongoFlowWindowRepository(MongoUserScoped, FlowWindowRepository):
         # dominant_category matches the rolled-up category (e.g. "drift"
         # for the distraction events the daemon's shield posts).
         # All optional so the existing call sites keep working.
-        query: dict = {"window_start": {"$gte": start.isoformat(), "$lte": end.isoformat()}}
+        query: dict = _date_range("window_start", start, end)
         if project_id is not None:
             query["active_project_id"] = project_id
         if editor_repo is not None:
@@ -851,9 +1663,307 @@ class MongoFlowWindowRepository(MongoUserScoped, FlowWindowRepository):
             query["dominant_bundle_id"] = bundle_id
         if dominant_category is not None:
             query["dominant_category"] = dominant_category
-        cursor = self.collection.find(self._q(query)).sort("window_start", 1)
-        docs = await cursor.to_list(length=None)
-        return [FlowWindow(**serialize_from_document(doc)) for doc in docs]
+        return self._q(query)
+
+
+# Flow Hourly Rollup Repository
+
+# Materialization marker: one row per user with a null hour, written once the
+# rollups have been built from raw windows. Date range filters never match
+# null, so the marker stays out of every rollup read.
+_FLOW_ROLLUP_MARKER_HOUR = None
+
+# Hourly rows folded into the daily tier per round-trip.
+FLOW_COMPACT_BATCH_SIZE = 1000
+
+# Rollup reads skip the ids of the counted windows (``windows``), which only
+# the guarded writes use.
+_FLOW_ROLLUP_READ_PROJECTION = {"windows": 0}
+
+# Stored tally field -> the (counts, scores) attributes of FlowHourlyRollup.
+_FLOW_ROLLUP_TALLIES = {
+    "repos": ("repo_counts", "repo_scores"),
+    "languages": ("language_counts", "language_scores"),
+}
+
+
+def _tally_field(key: str) -> str:
+    """Field name for a repo / language tally entry.
+
+    Repo paths hold dots (and could start with "$"), which a field path
+    can't, so entries are keyed by a digest and carry the key itself as
+    ``k`` — that way one upserting update can $inc a new entry into place.
+    """
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+
+class FlowRollupRepository(ABC):
+    """Abstract interface for FlowHourlyRollup persistence."""
+
+    @abstractmethod
+    async def is_materialized(self) -> bool:
+        """Whether the rollups have been built from the user's raw windows."""
+        ...
+
+    @abstractmethod
+    async def insert_missing(self, rollups: list[FlowHourlyRollup]) -> list[datetime]:
+        """Store each rollup whose hour has no row yet; returns the hours
+        that already had one, which were left alone."""
+        ...
+
+    @abstractmethod
+    async def mark_materialized(self) -> None:
+        """Record that the rollups have been built from the raw windows."""
+        ...
+
+    @abstractmethod
+    async def apply(self, rollups: list[FlowHourlyRollup]) -> None:
+        """Add rollup deltas to their hours' rows, creating missing rows.
+
+        A delta is skipped when its hour's row already counts any of its
+        ``window_ids``, so re-applying a window is a no-op; callers pass one
+        window per delta where a row may hold part of a batch.
+        """
+        ...
+
+    @abstractmethod
+    async def list_range(self, start: datetime, end: datetime) -> list[FlowHourlyRollup]:
+        """Rollups with hour in [start, end], in hour order.
+
+        Days already compacted into the daily tier come back as one row
+        each, with ``hour`` at that day's UTC midnight and ``compacted`` set.
+        """
+        ...
+
+    @abstractmethod
+    async def compact_before(self, cutoff: datetime) -> int:
+        """Fold hourly rows before ``cutoff`` into daily rows and drop them;
+        returns the number of hourly rows compacted."""
+        ...
+
+    @abstractmethod
+    async def count_by_hour(self, before: datetime) -> tuple[dict[datetime, int], set[datetime]]:
+        """Windows counted per hourly row before ``before``, and the hours
+        before it already compacted into daily rows."""
+        ...
+
+    @abstractmethod
+    async def delete_all(self) -> int:
+        """Drop every rollup (both tiers) and the marker; the next read
+        rebuilds from whatever raw windows are left."""
+        ...
+
+
+class MongoFlowRollupRepository(MongoUserScoped, FlowRollupRepository):
+    """MongoDB implementation of FlowRollupRepository (``flow_hourly``).
+
+    Repo and language tallies are stored as ``repos: {<digest>: {k, n, s}}``
+    (key, window count, score sum); see ``_tally_field``. ``windows`` holds
+    the ids of the windows an hourly row counts, and guards every write
+    that adds one. ``daily`` (by default ``flow_daily`` next to
+    ``collection``) is the tier hourly rows are compacted into once they
+    age out; see beats.infrastructure.flow_retention.
+    """
+
+    def __init__(
+        self, collection: AsyncCollection, user_id: str, daily: AsyncCollection | None = None
+    ):
+        super().__init__(collection, user_id)
+        self.daily = daily if daily is not None else collection.database.flow_daily
+
+    def _document(self, rollup: FlowHourlyRollup) -> dict[str, Any]:
+        doc: dict[str, Any] = {
+            **self._q({"hour": rollup.hour}),
+            "count": rollup.count,
+            "score_sum": rollup.score_sum,
+            "score_sq_sum": rollup.score_sq_sum,
+            "score_max": rollup.score_max,
+            "drift_count": rollup.drift_count,
+            "windows": rollup.window_ids,
+        }
+        for name, (counts_attr, scores_attr) in _FLOW_ROLLUP_TALLIES.items():
+            counts, scores = getattr(rollup, counts_attr), getattr(rollup, scores_attr)
+            doc[name] = {
+                _tally_field(k): {"k": k, "n": n, "s": scores.get(k, 0.0)}
+                for k, n in counts.items()
+            }
+        return doc
+
+    @staticmethod
+    def _from_document(doc: dict[str, Any], compacted: bool = False) -> FlowHourlyRollup:
+        fields: dict[str, Any] = {}
+        for name, (counts_attr, scores_attr) in _FLOW_ROLLUP_TALLIES.items():
+            entries = (doc.get(name) or {}).values()
+            fields[counts_attr] = {e["k"]: e["n"] for e in entries}
+            fields[scores_attr] = {e["k"]: e["s"] for e in entries}
+        return FlowHourlyRollup(
+            hour=doc["hour"],
+            count=doc.get("count", 0),
+            score_sum=doc.get("score_sum", 0.0),
+            score_sq_sum=doc.get("score_sq_sum", 0.0),
+            score_max=doc.get("score_max", 0.0),
+            drift_count=doc.get("drift_count", 0),
+            compacted=compacted,
+            **fields,
+        )
+
+    async def is_materialized(self) -> bool:
+        doc = await self.collection.find_one(
+            self._q({"hour": _FLOW_ROLLUP_MARKER_HOUR}), {"_id": 1}
+        )
+        return doc is not None
+
+    async def insert_missing(self, rollups: list[FlowHourlyRollup]) -> list[datetime]:
+        if not rollups:
+            return []
+        ops = [
+            UpdateOne(self._q({"hour": r.hour}), {"$setOnInsert": self._document(r)}, upsert=True)
+            for r in rollups
+        ]
+        try:
+            inserted = set((await self.collection.bulk_write(ops, ordered=False)).upserted_ids)
+        except BulkWriteError as exc:
+            write_errors = exc.details.get("writeErrors") or []
+            if not write_errors or any(e.get("code") != DUPLICATE_KEY for e in write_errors):
+                raise
+            # Lost the insert to a concurrent writer: that hour has a row.
+            inserted = {u["index"] for u in exc.details.get("upserted", [])}
+        return [r.hour for i, r in enumerate(rollups) if i not in inserted]
+
+    async def mark_materialized(self) -> None:
+        await self.collection.update_one(
+            self._q({"hour": _FLOW_ROLLUP_MARKER_HOUR}),
+            {"$set": {"built_at": datetime.now(UTC)}},
+            upsert=True,
+        )
+
+    @staticmethod
+    def _increment(rollup: FlowHourlyRollup) -> dict[str, Any]:
+        """Update that adds ``rollup`` onto a stored row (hourly or daily)."""
+        inc: dict[str, float] = {
+            "count": rollup.count,
+            "score_sum": rollup.score_sum,
+            "score_sq_sum": rollup.score_sq_sum,
+            "drift_count": rollup.drift_count,
+        }
+        keys: dict[str, str] = {}
+        for name, (counts_attr, scores_attr) in _FLOW_ROLLUP_TALLIES.items():
+            scores = getattr(rollup, scores_attr)
+            for k, n in getattr(rollup, counts_attr).items():
+                path = f"{name}.{_tally_field(k)}"
+                inc[f"{path}.n"] = n
+                inc[f"{path}.s"] = scores.get(k, 0.0)
+                keys[f"{path}.k"] = k
+        update: dict[str, Any] = {"$inc": inc, "$max": {"score_max": rollup.score_max}}
+        if keys:
+            update["$set"] = keys
+        return update
+
+    async def apply(self, rollups: list[FlowHourlyRollup]) -> None:
+        if not rollups:
+            return
+        ops = []
+        for r in rollups:
+            update = self._increment(r)
+            if r.window_ids:
+                update["$push"] = {"windows": {"$each": r.window_ids}}
+            ops.append(
+                UpdateOne(
+                    self._q({"hour": r.hour, "windows": {"$nin": r.window_ids}}),
+                    update,
+                    upsert=True,
+                )
+            )
+        try:
+            await self.collection.bulk_write(ops, ordered=False)
+        except BulkWriteError as exc:
+            write_errors = exc.details.get("writeErrors") or []
+            if not write_errors or any(e.get("code") != DUPLICATE_KEY for e in write_errors):
+                raise
+            # A duplicate key is either a concurrent insert of the hour's row
+            # or a row that already counts the window (the filter missed, so
+            # the upsert tried to insert). Retried once the row exists, only
+            # the second kind fails again, and is meant to be skipped.
+            retry = [ops[e["index"]] for e in write_errors]
+            try:
+                await self.collection.bulk_write(retry, ordered=False)
+            except BulkWriteError as again:
+                errors = again.details.get("writeErrors") or []
+                if not errors or any(e.get("code") != DUPLICATE_KEY for e in errors):
+                    raise
+
+    async def list_range(self, start: datetime, end: datetime) -> list[FlowHourlyRollup]:
+        hourly = self.collection.find(
+            self._q({"hour": {"$gte": start, "$lte": end}}), _FLOW_ROLLUP_READ_PROJECTION
+        )
+        day_start = start.astimezone(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+        daily = self.daily.find(self._q({"day": {"$gte": day_start, "$lte": end}}))
+        rows = [self._from_document(doc) async for doc in hourly]
+        rows += [self._from_document({**doc, "hour": doc["day"]}, True) async for doc in daily]
+        # A partly compacted day has both its daily row and its remaining
+        # hours; they hold disjoint windows, so summing them is exact.
+        rows.sort(key=lambda r: r.hour)
+        return rows
+
+    async def compact_before(self, cutoff: datetime) -> int:
+        compacted = 0
+        while True:
+            cursor = (
+                self.collection.find(
+                    self._q({"hour": {"$lt": cutoff}}), _FLOW_ROLLUP_READ_PROJECTION
+                )
+                .sort("hour", 1)
+                .limit(FLOW_COMPACT_BATCH_SIZE)
+            )
+            docs = await cursor.to_list(length=None)
+            if not docs:
+                return compacted
+            days = {
+                doc["_id"]: doc["hour"].replace(hour=0, minute=0, second=0, microsecond=0)
+                for doc in docs
+            }
+            await self.daily.bulk_write(
+                [
+                    UpdateOne(
+                        self._q({"day": day}),
+                        {"$setOnInsert": {"compacted_hours": []}},
+                        upsert=True,
+                    )
+                    for day in set(days.values())
+                ],
+                ordered=False,
+            )
+            # Each hour is added at most once (compacted_hours guards the
+            # $inc), so a sweep interrupted before the delete below, or run
+            # concurrently on two instances, can't double-count it.
+            ops = []
+            for doc in docs:
+                update = self._increment(self._from_document(doc))
+                update["$push"] = {"compacted_hours": doc["hour"]}
+                ops.append(
+                    UpdateOne(
+                        self._q({"day": days[doc["_id"]], "compacted_hours": {"$ne": doc["hour"]}}),
+                        update,
+                    )
+                )
+            await self.daily.bulk_write(ops, ordered=False)
+            await self.collection.delete_many({"_id": {"$in": list(days)}})
+            compacted += len(docs)
+
+    async def count_by_hour(self, before: datetime) -> tuple[dict[datetime, int], set[datetime]]:
+        hourly = self.collection.find(
+            self._q({"hour": {"$ne": _FLOW_ROLLUP_MARKER_HOUR, "$lt": before}}),
+            {"hour": 1, "count": 1},
+        )
+        counts = {doc["hour"]: doc.get("count", 0) async for doc in hourly}
+        daily = self.daily.find(self._q({"day": {"$lt": before}}), {"compacted_hours": 1})
+        compacted = {h async for doc in daily for h in doc.get("compacted_hours", [])}
+        return counts, compacted
+
+    async def delete_all(self) -> int:
+        daily = await self.daily.delete_many(self._q())
+        result = await self.collection.delete_many(self._q())
+        return result.deleted_count + daily.deleted_count
 
 
 # Pending Suggestion Repository
@@ -897,6 +2007,15 @@ class SignalSummaryRepository(ABC):
     @abstractmethod
     async def upsert(self, summary: SignalSummary) -> SignalSummary: ...
 
+    @abstractmethod
+    async def upsert_many(self, summaries: list[SignalSummary]) -> list[str | None]:
+        """Upsert summaries (one per device/hour) without reading them back.
+
+        Returns, per summary, the new row's id when it was inserted and
+        None when it replaced the fields of an existing row.
+        """
+        ...
+
     @abstractmethod
     async def list_by_range(self, start: datetime, end: datetime) -> list[SignalSummary]: ...
 
@@ -907,31 +2026,53 @@ class SignalSummaryRepository(ABC):
 class MongoSignalSummaryRepository(MongoUserScoped, SignalSummaryRepository):
     """MongoDB implementation of SignalSummaryRepository."""
 
-    async def upsert(self, summary: SignalSummary) -> SignalSummary:
-        data = serialize_to_document(summary.model_dump(mode="json", exclude_none=True))
+    def _upsert_args(self, summary: SignalSummary) -> tuple[dict[str, Any], dict[str, Any]]:
+        """(filter, update) that upsert the summary's (device, hour) row."""
+        data = serialize_to_document(summary.model_dump(exclude_none=True))
         data.pop("_id", None)
         data["user_id"] = self.user_id
-        # Use the serialized hour value for the filter to avoid isoformat mismatch
-        # (e.g. "2026-04-18T14:00:00Z" vs "2026-04-18T14:00:00+00:00")
+        hour: Any = data["hour"]
+        if settings.legacy_date_reads:
+            # Also match a row for this hour stored before the switch to
+            # dates, in either string form it was written in ("...Z" or
+            # "...+00:00"); the $set converts it in place.
+            legacy = summary.model_dump(mode="json", include={"hour"})["hour"]
+            hour = {"$in": [data["hour"], legacy, summary.hour.isoformat()]}
+        return self._q({"device_id": data["device_id"], "hour": hour}), {"$set": data}
+
+    async def upsert(self, summary: SignalSummary) -> SignalSummary:
+        query, update = self._upsert_args(summary)
         result = await self.collection.find_one_and_update(
-            self._q(
-                {
-                    "device_id": data["device_id"],
-                    "hour": data["hour"],
-                }
-            ),
-            {"$set": data},
-            upsert=True,
-            return_document=True,
+            query, update, upsert=True, return_document=True
         )
         return SignalSummary(**serialize_from_document(result))
 
+    async def upsert_many(self, summaries: list[SignalSummary]) -> list[str | None]:
+        if not summaries:
+            return []
+        ops = [UpdateOne(*self._upsert_args(s), upsert=True) for s in summaries]
+        try:
+            result = await self.collection.bulk_write(ops, ordered=False)
+            upserted = result.upserted_ids
+        except BulkWriteError as exc:
+            write_errors = exc.details.get("writeErrors") or []
+            if not write_errors or any(e.get("code") != DUPLICATE_KEY for e in write_errors):
+                raise
+            # Lost an upsert race with a concurrent insert of the same hour:
+            # that row exists now, so a second pass updates it.
+            upserted = {u["index"]: u["_id"] for u in exc.details.get("upserted", [])}
+            retry = [e["index"] for e in write_errors]
+            again = await self.collection.bulk_write([ops[i] for i in retry], ordered=False)
+            upserted.update((retry[i], _id) for i, _id in again.upserted_ids.items())
+        return [str(upserted[i]) if i in upserted else None for i in range(len(summaries))]
+
     async def list_by_range(self, start: datetime, end: datetime) -> list[SignalSummary]:
-        cursor = self.collection.find(
-            self._q({"hour": {"$gte": start.isoformat(), "$lte": end.isoformat()}})
-        ).sort("hour", 1)
+        cursor = self.collection.find(self._q(_date_range("hour", start, end))).sort("hour", 1)
         docs = await cursor.to_list(length=None)
-        return [SignalSummary(**serialize_from_document(doc)) for doc in docs]
+        summaries = [SignalSummary(**serialize_from_document(doc)) for doc in docs]
+        if settings.legacy_date_reads:
+            summaries.sort(key=lambda s: s.hour)
+        return summaries
 
     async def delete_all(self) -> int:
         result = await self.collection.delete_many(self._q())
@@ -1063,3 +2204,286 @@ class MongoOuraIntegrationRepository(MongoUserScoped, OuraIntegrationRepository)
     async def delete(self) -> bool:
         result = await self.collection.delete_one(self._q())
         return result.deleted_count > 0
+
+
+# Beat Daily Rollup Repository
+
+# Materialization marker: one row per (user, tz) with an empty local_date,
+# written when a build of that timezone's rollups starts and stamped
+# ``built_at`` once it has folded every raw beat. ISO date filters never
+# match "", so the marker stays out of every rollup read.
+_ROLLUP_MARKER_DATE = ""
+# Rows built before they tracked their beats (no ``beats`` array) carry an
+# unversioned marker; the next read drops and rebuilds them.
+_ROLLUP_VERSION = 2
+
+
+class BeatRollupRepository(ABC):
+    """Abstract interface for BeatDailyRollup persistence."""
+
+    @abstractmethod
+    async def materialized_timezones(self) -> list[str]:
+        """IANA names of the timezones beat writes keep current — built or
+        still being built."""
+        ...
+
+    @abstractmethod
+    async def built_timezones(self) -> list[str]:
+        """The materialized timezones whose build has finished."""
+        ...
+
+    @abstractmethod
+    async def start_build(self, tz: str) -> None:
+        """Mark ``tz`` materialized ahead of its build, dropping any rows
+        left by an earlier rollup version."""
+        ...
+
+    @abstractmethod
+    async def merge(self, rollups: list[BeatDailyRollup]) -> list[BeatDailyRollup]:
+        """Add built rows into place; returns the ones left out because a
+        write already counted, or took out, one of their beats."""
+        ...
+
+    @abstractmethod
+    async def mark_built(self, tz: str) -> None:
+        """Record that ``tz`` holds every beat, so reads stop building it."""
+        ...
+
+    @abstractmethod
+    async def apply(self, rollups: list[BeatDailyRollup], sign: int = 1) -> None:
+        """Add (sign=1) or subtract (sign=-1) single-beat deltas in place.
+
+        Adding a beat a row already counts, or subtracting a version it
+        doesn't, changes nothing; a subtraction also leaves a note that
+        keeps an in-flight build from adding that beat back.
+        """
+        ...
+
+    @abstractmethod
+    async def list_range(
+        self,
+        tz: str,
+        start: date | None = None,
+        end: date | None = None,
+        project_id: str | None = None,
+        tag: str = "",
+    ) -> list[BeatDailyRollup]:
+        """List rollups for ``tz`` and ``tag`` with local_date in [start, end]."""
+        ...
+
+    @abstractmethod
+    async def delete_all(self) -> int:
+        """Drop every rollup and marker; the next read rebuilds from beats."""
+        ...
+
+
+class MongoBeatRollupRepository(MongoUserScoped, BeatRollupRepository):
+    """MongoDB implementation of BeatRollupRepository.
+
+    Slot minutes are stored sparsely as ``slots: {"<index>": minutes}`` so an
+    upserting ``$inc`` can create and bump individual slots in one write — an
+    array path like ``slot_minutes.5`` would upsert into an object anyway.
+    ``beats`` lists the ``{id, span}`` of every beat a row counts and
+    ``removed`` the ids writes took out of it; both guard the ``$inc``s, and
+    a guarded upsert that finds its row excluded fails on the unique key.
+    Rows whose last beat was removed stay, at zero, to keep that guard.
+    """
+
+    def _key(self, tz: str, day: str, project_id: str, tag: str) -> dict[str, Any]:
+        return self._q({"tz": tz, "local_date": day, "project_id": project_id, "tag": tag})
+
+    def _document(self, rollup: BeatDailyRollup) -> dict[str, Any]:
+        return {
+            **self._key(rollup.tz, rollup.local_date.isoformat(), rollup.project_id, rollup.tag),
+            "seconds": rollup.seconds,
+            "session_count": rollup.session_count,
+            "slots": {str(i): m for i, m in enumerate(rollup.slot_minutes) if m},
+        }
+
+    @staticmethod
+    def _from_document(doc: dict[str, Any]) -> BeatDailyRollup:
+        slot_minutes = [0.0] * 48
+        for index, minutes in (doc.get("slots") or {}).items():
+            slot_minutes[int(index)] = minutes
+        return BeatDailyRollup(
+            local_date=doc["local_date"],
+            tz=doc["tz"],
+            project_id=doc["project_id"],
+            tag=doc["tag"],
+            seconds=doc.get("seconds", 0.0),
+            session_count=doc.get("session_count", 0),
+            slot_minutes=slot_minutes,
+        )
+
+    def _marker(self, tz: str) -> dict[str, Any]:
+        return self._key(tz, _ROLLUP_MARKER_DATE, "", "")
+
+    @staticmethod
+    def _increments(rollup: BeatDailyRollup, sign: int = 1) -> dict[str, float]:
+        inc: dict[str, float] = {
+            "seconds": sign * rollup.seconds,
+            "session_count": sign * rollup.session_count,
+        }
+        for index, minutes in enumerate(rollup.slot_minutes):
+            if minutes:
+                inc[f"slots.{index}"] = sign * minutes
+        return inc
+
+    @staticmethod
+    def _entries(rollup: BeatDailyRollup) -> list[dict[str, str]]:
+        return [{"id": i, "span": span} for i, span in rollup.contributions.items()]
+
+    async def _upsert_guarded(self, ops: list[UpdateOne]) -> list[int]:
+        """Run guarded upserts; returns the indexes whose guard excluded
+        their row (the upsert's insert hit the unique key)."""
+        if not ops:
+            return []
+        try:
+            await self.collection.bulk_write(ops, ordered=False)
+        except BulkWriteError as exc:
+            errors = exc.details.get("writeErrors") or []
+            if not errors or any(e.get("code") != DUPLICATE_KEY for e in errors):
+                raise
+            return [e["index"] for e in errors]
+        return []
+
+    def _add_op(self, rollup: BeatDailyRollup, *, build: bool) -> UpdateOne:
+        ids = list(rollup.contributions)
+        query = self._key(rollup.tz, rollup.local_date.isoformat(), rollup.project_id, rollup.tag)
+        update: dict[str, Any] = {"$inc": self._increments(rollup)}
+        if ids:
+            query["beats.id"] = {"$nin": ids}
+            update["$push"] = {"beats": {"$each": self._entries(rollup)}}
+            if build:
+                # What the build read may be a version a write has since
+                # moved out of this row.
+                query["removed"] = {"$nin": ids}
+            else:
+                update["$pull"] = {"removed": {"$in": ids}}
+        return UpdateOne(query, update, upsert=True)
+
+    async def materialized_timezones(self) -> list[str]:
+        cursor = self.collection.find(
+            self._q({"local_date": _ROLLUP_MARKER_DATE, "version": _ROLLUP_VERSION}), {"tz": 1}
+        )
+        docs = await cursor.to_list(length=None)
+        return [doc["tz"] for doc in docs]
+
+    async def built_timezones(self) -> list[str]:
+        cursor = self.collection.find(
+            self._q(
+                {
+                    "local_date": _ROLLUP_MARKER_DATE,
+                    "version": _ROLLUP_VERSION,
+                    "built_at": {"$exists": True},
+                }
+            ),
+            {"tz": 1},
+        )
+        docs = await cursor.to_list(length=None)
+        return [doc["tz"] for doc in docs]
+
+    async def start_build(self, tz: str) -> None:
+        # Old-version rows predate the guards; no write touches them once
+        # their marker is gone, so deleting them can't lose a delta.
+        await self.collection.delete_many(
+            self._q(
+                {
+                    "tz": tz,
+                    "local_date": _ROLLUP_MARKER_DATE,
+                    "version": {"$ne": _ROLLUP_VERSION},
+                }
+            )
+        )
+        await self.collection.delete_many(
+            self._q(
+                {
+                    "tz": tz,
+                    "local_date": {"$ne": _ROLLUP_MARKER_DATE},
+                    "beats": {"$exists": False},
+                    "removed": {"$exists": False},
+                }
+            )
+        )
+        await self.collection.update_one(
+            self._marker(tz), {"$set": {"version": _ROLLUP_VERSION}}, upsert=True
+        )
+
+    async def merge(self, rollups: list[BeatDailyRollup]) -> list[BeatDailyRollup]:
+        excluded = await self._upsert_guarded([self._add_op(r, build=True) for r in rollups])
+        return [rollups[i] for i in excluded]
+
+    async def mark_built(self, tz: str) -> None:
+        await self.collection.update_one(
+            self._marker(tz), {"$set": {"built_at": datetime.now(UTC)}}
+        )
+
+    async def apply(self, rollups: list[BeatDailyRollup], sign: int = 1) -> None:
+        if not rollups:
+            return
+        if sign > 0:
+            # An excluded row already counts the beat.
+            await self._upsert_guarded([self._add_op(r, build=False) for r in rollups])
+            return
+        removals = []
+        notes = []
+        for r in rollups:
+            key = self._key(r.tz, r.local_date.isoformat(), r.project_id, r.tag)
+            ids = list(r.contributions)
+            if not ids:
+                removals.append(UpdateOne(key, {"$inc": self._increments(r, sign)}))
+                continue
+            counted = [{"$elemMatch": entry} for entry in self._entries(r)]
+            removals.append(
+                UpdateOne(
+                    {**key, "beats": {"$all": counted}},
+                    {
+                        "$inc": self._increments(r, sign),
+                        "$pull": {"beats": {"id": {"$in": ids}}},
+                    },
+                )
+            )
+            notes.append(
+                UpdateOne(
+                    {**key, "beats.id": {"$nin": ids}},
+                    {"$addToSet": {"removed": {"$each": ids}}},
+                    upsert=True,
+                )
+            )
+        await self.collection.bulk_write(removals, ordered=False)
+        # After the removals, so a row that counted the beat gets its note
+        # too; a row holding another version of it is left alone.
+        await self._upsert_guarded(notes)
+
+    async def list_range(
+        self,
+        tz: str,
+        start: date | None = None,
+        end: date | None = None,
+        project_id: str | None = None,
+        tag: str = "",
+    ) -> list[BeatDailyRollup]:
+        day_range: dict[str, str] = {"$gt": _ROLLUP_MARKER_DATE}
+        if start is not None:
+            day_range["$gte"] = start.isoformat()
+        if end is not None:
+            day_range["$lte"] = end.isoformat()
+        query: dict[str, Any] = {
+            "tz": tz,
+            "tag": tag,
+            "local_date": day_range,
+            # Emptied rows are kept for their guards; the heatmap's
+            # project_count counts rows, so they stay out of reads.
+            "session_count": {"$gt": 0},
+        }
+        if project_id:
+            query["project_id"] = project_id
+        cursor = self.collection.find(self._q(query), {"beats": 0, "removed": 0}).sort(
+            "local_date", 1
+        )
+        docs = await cursor.to_list(length=None)
+        return [self._from_document(doc) for doc in docs]
+
+    async def delete_all(self) -> int:
+        result = await self.collection.delete_many(self._q())
+        return result.deleted_count
@@ -0,0 +1,301 @@
+"""Background delivery of queued webhook events.
+
+Timer start/stop used to POST to every subscribed URL from a detached
+``asyncio.create_task``, each with its own ``httpx.AsyncClient``: nothing
+survived a restart or a Cloud Run scale-down, failures were only logged,
+and a slow receiver held a fresh socket per event. Now the request just
+writes one ``webhook_deliveries`` row per webhook (see
+``MongoWebhookOutbox``), and the ``WebhookDispatcher`` here drains that
+outbox:
+
+  - one pooled client for every delivery (HTTP/2 when ``h2`` is
+    installed), at most ``per_host`` requests in flight per receiver host
+    so one slow host can't take every slot;
+  - network errors, 408/429 and 5xx are retried with full-jitter
+    exponential backoff; any other status, or running out of
+    ``max_attempts``, leaves the row ``dead`` until it is replayed;
+  - latency and outcome counters are kept in ``DeliveryMetrics`` and
+    logged after every busy pass.
+
+Rows are claimed with a lease, so a delivery interrupted by shutdown is
+picked up again — by this instance or another — once the lease expires.
+Delivery is at-least-once; receivers can dedupe on ``X-Beats-Delivery``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import Counter, deque
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from importlib.util import find_spec
+from urllib.parse import urlsplit
+
+import httpx
+from pymongo.errors import PyMongoError
+
+from beats.domain.models import WebhookDelivery
+from beats.infrastructure.repositories import WebhookOutbox
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_CONCURRENCY = 16
+PER_HOST_CONCURRENCY = 4
+MAX_ATTEMPTS = 8
+BASE_DELAY = 5.0
+MAX_DELAY = 3600.0
+POLL_INTERVAL = 5.0
+# Long enough to cover the request timeout plus the mark_* write.
+CLAIM_LEASE = timedelta(seconds=60)
+REQUEST_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+LATENCY_SAMPLES = 1000
+
+RETRYABLE_STATUS = frozenset({408, 425, 429})
+
+# HTTP/2 needs the optional h2 package (httpx[http2]); without it the pool
+# falls back to HTTP/1.1 keep-alive connections.
+HTTP2_AVAILABLE = find_spec("h2") is not None
+
+
+def retry_delay(
+    attempt: int,
+    base: float = BASE_DELAY,
+    cap: float = MAX_DELAY,
+    rng: Callable[[], float] = random.random,
+) -> float:
+    """Seconds to wait before retrying after failed attempt number ``attempt``.
+
+    "Full jitter": uniform in ``[0, min(cap, base * 2**(attempt - 1)))``, so
+    receivers coming back from an outage aren't hit by every retry at once.
+    """
+    return rng() * min(cap, base * 2 ** (attempt - 1))
+
+
+def host_of(url: str) -> str:
+    """The receiver host a delivery counts against for ``per_host``."""
+    return (urlsplit(url).hostname or "").lower()
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    value = response.headers.get("Retry-After", "")
+    return float(value) if value.isdigit() else None
+
+
+@dataclass(slots=True)
+class DeliveryMetrics:
+    """In-process delivery counters, since the dispatcher started."""
+
+    delivered: int = 0
+    retried: int = 0
+    dead: int = 0
+    in_flight: int = 0
+    latencies_ms: deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_SAMPLES))
+
+    def snapshot(self) -> dict[str, float | int | None]:
+        return {
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "dead": self.dead,
+            "in_flight": self.in_flight,
+            "latency_p50_ms": percentile(self.latencies_ms, 0.50),
+            "latency_p95_ms": percentile(self.latencies_ms, 0.95),
+        }
+
+
+def percentile(samples: Iterable[float], q: float) -> float | None:
+    """Nearest-rank percentile of ``samples`` (None when empty)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+
+class WebhookDispatcher:
+    """Claims due outbox rows and POSTs them through one shared client."""
+
+    def __init__(
+        self,
+        outbox: WebhookOutbox,
+        client: httpx.AsyncClient | None = None,
+        *,
+        concurrency: int = DELIVERY_CONCURRENCY,
+        per_host: int = PER_HOST_CONCURRENCY,
+        max_attempts: int = MAX_ATTEMPTS,
+        poll_interval: float = POLL_INTERVAL,
+        lease: timedelta = CLAIM_LEASE,
+        delay: Callable[[int], float] = retry_delay,
+        clock: Callable[[], datetime] = lambda: datetime.now(UTC),
+    ):
+        self.outbox = outbox
+        self.client = client or httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            headers={"User-Agent": "beats-webhooks"},
+        )
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.delay = delay
+        self.clock = clock
+        self.metrics = DeliveryMetrics()
+        # Requests in flight per receiver host, and a signal that one finished.
+        self._host_load: Counter[str] = Counter()
+        self._freed = asyncio.Event()
+        self._wake = asyncio.Event()
+
+    def wake(self) -> None:
+        """Start the next pass now instead of at the next poll."""
+        self._wake.set()
+
+    async def run(self) -> None:
+        """Drain the outbox until cancelled, sleeping between passes.
+
+        Mongo errors are logged and the pass retried on the next tick; the
+        rows themselves are untouched, so nothing is lost.
+        """
+        while True:
+            self._wake.clear()
+            try:
+                if await self.drain():
+                    logger.info("Webhook deliveries: %s", self.metrics.snapshot())
+            except PyMongoError as exc:
+                logger.warning("Webhook outbox unavailable, retrying: %s", exc)
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except TimeoutError:
+                pass
+
+    async def drain(self) -> int:
+        """Deliver every row that is due now; returns how many were attempted.
+
+        Rows for a host that already has ``per_host`` requests in flight are
+        skipped at claim time rather than claimed and parked, so they hold
+        neither a delivery slot nor a ticking lease; they are claimed as
+        soon as that host frees up.
+        """
+        slots = asyncio.Semaphore(self.concurrency)
+        claimed = 0
+        claim_error: PyMongoError | None = None
+        async with asyncio.TaskGroup() as tg:
+            while True:
+                # Only claim as many rows as can be sent right away, so the
+                # leases of queued rows don't tick down in memory.
+                await slots.acquire()
+                busy = [host for host, n in self._host_load.items() if n >= self.per_host]
+                self._freed.clear()
+                try:
+                    delivery = await self.outbox.claim_due(self.clock(), self.lease, busy)
+                except PyMongoError as exc:
+                    # Raised after the in-flight deliveries finish, outside
+                    # the group so callers don't get an ExceptionGroup.
+                    claim_error, delivery, busy = exc, None, []
+                if delivery is None:
+                    slots.release()
+                    if not busy:
+                        break
+                    # Rows for the busy hosts may still be due: look again
+                    # once one of their requests finishes.
+                    await self._freed.wait()
+                    continue
+                claimed += 1
+                self._host_load[delivery.host] += 1
+                tg.create_task(self._deliver_in_slot(delivery, slots))
+        if claim_error is not None:
+            raise claim_error
+        return claimed
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def _deliver_in_slot(self, delivery: WebhookDelivery, slots: asyncio.Semaphore) -> None:
+        try:
+            await self.deliver(delivery)
+        except PyMongoError as exc:
+            # The row keeps its lease and is retried when it expires.
+            logger.warning("Could not record webhook delivery %s: %s", delivery.id, exc)
+        finally:
+            self._host_load[delivery.host] -= 1
+            if not self._host_load[delivery.host]:
+                del self._host_load[delivery.host]
+            self._freed.set()
+            slots.release()
+
+    async def deliver(self, delivery: WebhookDelivery) -> None:
+        """POST one claimed row and record the outcome on it."""
+        status_code: int | None = None
+        retry_after: float | None = None
+        self.metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            response = await self.client.post(
+                delivery.url,
+                json=delivery.body,
+                headers={
+                    "X-Beats-Event": delivery.event,
+                    "X-Beats-Delivery": delivery.id or "",
+                },
+            )
+            status_code = response.status_code
+            if response.is_success:
+                latency_ms = round((time.perf_counter() - started) * 1000, 1)
+                self.metrics.delivered += 1
+                self.metrics.latencies_ms.append(latency_ms)
+                await self.outbox.mark_delivered(delivery, status_code, latency_ms, self.clock())
+                return
+            error = f"HTTP {status_code}"
+            retryable = status_code in RETRYABLE_STATUS or status_code >= 500
+            retry_after = _retry_after(response)
+        except (httpx.InvalidURL, httpx.UnsupportedProtocol) as exc:
+            error, retryable = f"{type(exc).__name__}: {exc}", False
+        except httpx.HTTPError as exc:
+            error, retryable = f"{type(exc).__name__}: {exc}", True
+        except Exception as exc:
+            # Never let one bad row stop the loop; max_attempts still bounds it.
+            logger.exception("Unexpected error delivering webhook %s", delivery.id)
+            error, retryable = f"{type(exc).__name__}: {exc}", True
+        finally:
+            self.metrics.in_flight -= 1
+
+        if retryable and delivery.attempts < self.max_attempts:
+            wait = self.delay(delivery.attempts)
+            if retry_after is not None:
+                wait = max(wait, min(retry_after, MAX_DELAY))
+            self.metrics.retried += 1
+            await self.outbox.mark_retry(
+                delivery, self.clock() + timedelta(seconds=wait), error, status_code
+            )
+        else:
+            self.metrics.dead += 1
+            logger.warning(
+                "Webhook delivery %s to %s dead after %d attempt(s): %s",
+                delivery.id,
+                delivery.url,
+                delivery.attempts,
+                error,
+            )
+            await self.outbox.mark_dead(delivery, error, status_code)
+
+
+_dispatcher: WebhookDispatcher | None = None
+
+
+def get_webhook_dispatcher() -> WebhookDispatcher | None:
+    """The process's running dispatcher, if the lifespan started one."""
+    return _dispatcher
+
+
+def set_webhook_dispatcher(dispatcher: WebhookDispatcher | None) -> None:
+    global _dispatcher
+    _dispatcher = dispatcher
+
+
+def wake_webhook_dispatcher() -> None:
+    if _dispatcher is not None:
+        _dispatcher.wake()
@@ -1,6 +1,7 @@
 import os
 import sys
 from pathlib import Path
+from typing import Literal
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -32,6 +33,39 @@ class Settings(BaseSettings):
     # Database settings
     db_dsn: str = Field(default="mongodb://localhost:27017", validation_alias="DB_DSN")
     db_name: str = Field(default="beats", validation_alias="DB_NAME")
+    # Explain the hot repository queries at startup and warn on COLLSCAN.
+    index_advisor_enabled: bool = Field(default=True, validation_alias="INDEX_ADVISOR_ENABLED")
+    # Device-token auth caches registration state per device (see
+    # beats.auth.device_cache). The watch streams revocations from other
+    # instances and needs a replica set.
+    device_cache_ttl_seconds: float = Field(default=30.0, validation_alias="DEVICE_CACHE_TTL")
+    device_revocation_watch: bool = Field(default=False, validation_alias="DEVICE_REVOCATION_WATCH")
+    # Where session revocations, WebAuthn challenges and device heartbeats
+    # live (see beats.auth.state_store): "mongo" is shared by every worker
+    # and instance, "memory" only suits a single process.
+    shared_state_backend: Literal["mongo", "memory"] = Field(
+        default="mongo", validation_alias="SHARED_STATE"
+    )
+    # Background worker that delivers queued webhook events (see
+    # beats.infrastructure.webhook_dispatcher). Off in the test env.
+    webhook_dispatcher_enabled: bool = Field(default=True, validation_alias="WEBHOOK_DISPATCHER")
+    # flow_windows / signal_summaries timestamps used to be ISO strings. While
+    # on, reads match both types and startup backfills the strings to dates
+    # (see beats.infrastructure.migrations); turn off once nothing is left.
+    legacy_date_reads: bool = Field(default=True, validation_alias="LEGACY_DATE_READS")
+    # Add beat search terms to beats stored before search existed, in the
+    # background at startup (see backfill_search_terms); a no-op once done.
+    search_terms_backfill: bool = Field(default=True, validation_alias="SEARCH_BACKFILL")
+    # Flow-data retention tiers (see beats.infrastructure.flow_retention):
+    # raw flow windows are kept this many days, hourly rollups this many,
+    # and older hours survive only as daily rollups. Off in the test env.
+    flow_retention_enabled: bool = Field(default=True, validation_alias="FLOW_RETENTION")
+    flow_window_retention_days: int = Field(
+        default=90, ge=1, validation_alias="FLOW_WINDOW_RETENTION_DAYS"
+    )
+    flow_hourly_retention_days: int = Field(
+        default=400, ge=1, validation_alias="FLOW_HOURLY_RETENTION_DAYS"
+    )
 
     # WebAuthn settings
     webauthn_rp_id: str = Field(default="localhost", validation_alias="WEBAUTHN_RP_ID")
@@ -15,11 +15,19 @@ import pytest
 JWT_SECRET = "test-secret-do-not-use-in-prod-this-is-a-fixed-string-32+bytes"
 
 
-def _sm(session_ttl: int = 3600):
+def _sm(session_ttl: int = 3600, store=None):
     """Build a SessionManager with a fixed JWT secret."""
     from beats.auth.session import SessionManager
 
-    return SessionManager(JWT_SECRET, session_ttl=session_ttl)
+    return SessionManager(JWT_SECRET, session_ttl=session_ttl, store=store)
+
+
+def _clocked_store():
+    """An in-memory state store on a fake clock, so expiry tests don't sleep."""
+    from beats.auth.state_store import InMemoryStateStore
+
+    clock = _Clock()
+    return InMemoryStateStore(clock=clock), clock
 
 
 class TestSessionManagerSessionTokens:
@@ -27,10 +35,10 @@ class TestSessionManagerSessionTokens:
     plus the four error paths: expired, wrong type, revoked,
     malformed. Pin every path — auth bugs ship silently."""
 
-    def test_create_validate_round_trip(self):
+    async def test_create_validate_round_trip(self):
         sm = _sm()
         token = sm.create_session_token("user-1", email="a@b.com")
-        payload = sm.validate_session_token(token)
+        payload = await sm.validate_session_token(token)
         assert payload is not None
         assert payload["sub"] == "user-1"
         assert payload["email"] == "a@b.com"
@@ -38,17 +46,17 @@ class TestSessionManagerSessionTokens:
         # jti is per-token unique — pin so two issuances differ
         assert "jti" in payload
 
-    def test_token_without_email_omits_email_claim(self):
+    async def test_token_without_email_omits_email_claim(self):
         """Pin: an empty email kwarg results in NO email field on
         the payload (not "" — absent). Lets the consumer branch
         on `.get("email")` cleanly."""
         sm = _sm()
         token = sm.create_session_token("user-2")
-        payload = sm.validate_session_token(token)
+        payload = await sm.validate_session_token(token)
         assert payload is not None
         assert "email" not in payload
 
-    def test_two_tokens_have_distinct_jtis(self):
+    async def test_two_tokens_have_distinct_jtis(self):
         """jti is a per-token uuid — two tokens for the same user
         are distinct by jti. Pin so the revocation list can't
         accidentally revoke ALL sessions for a user just because
@@ -56,12 +64,12 @@ class TestSessionManagerSessionTokens:
         sm = _sm()
         a = sm.create_session_token("user-1")
         b = sm.create_session_token("user-1")
-        pa = sm.validate_session_token(a)
-        pb = sm.validate_session_token(b)
+        pa = await sm.validate_session_token(a)
+        pb = await sm.validate_session_token(b)
         assert pa is not None and pb is not None
         assert pa["jti"] != pb["jti"]
 
-    def test_validate_returns_none_for_expired_token(self):
+    async def test_validate_returns_none_for_expired_token(self):
         """An expired session token must validate to None, not
         raise. Pin so middleware can branch on None rather than
         catch jwt.ExpiredSignatureError."""
@@ -69,23 +77,23 @@ class TestSessionManagerSessionTokens:
         token = sm.create_session_token("user-1")
         # Sleep past expiry
         time.sleep(1.1)
-        assert sm.validate_session_token(token) is None
+        assert await sm.validate_session_token(token) is None
 
-    def test_validate_returns_none_for_device_token(self):
+    async def test_validate_returns_none_for_device_token(self):
         """A device token presented at a session-only endpoint
         must validate to None — pin the type field check so a
         compromised device token can't be reused as a session
         token."""
         sm = _sm()
         device_token = sm.create_device_token("user-1", "device-abc")
-        assert sm.validate_session_token(device_token) is None
+        assert await sm.validate_session_token(device_token) is None
 
-    def test_validate_returns_none_for_garbage(self):
+    async def test_validate_returns_none_for_garbage(self):
         sm = _sm()
-        assert sm.validate_session_token("not-a-jwt") is None
-        assert sm.validate_session_token("") is None
+        assert await sm.validate_session_token("not-a-jwt") is None
+        assert await sm.validate_session_token("") is None
 
-    def test_validate_returns_none_for_wrong_secret(self):
+    async def test_validate_returns_none_for_wrong_secret(self):
         """A token signed with secret A must not validate against
         secret B. Pin so a leaked secret rotation actually
         invalidates outstanding tokens."""
@@ -94,7 +102,7 @@ class TestSessionManagerSessionTokens:
         sm_a = SessionManager("secret-a-first-deploy-with-enough-length-bytes")
         sm_b = SessionManager("secret-b-second-deploy-with-enough-length-bytes")
         token = sm_a.create_session_token("user-1")
-        assert sm_b.validate_session_token(token) is None
+        assert await sm_b.validate_session_token(token) is None
 
 
 class TestSessionManagerDeviceTokens:
@@ -139,34 +147,58 @@ class TestSessionManagerRevocation:
     "logout" actually invalidates the token rather than just
     clearing the client-side cookie."""
 
-    def test_revoked_token_no_longer_validates(self):
+    async def test_revoked_token_no_longer_validates(self):
         sm = _sm()
         token = sm.create_session_token("user-1")
-        assert sm.validate_session_token(token) is not None  # baseline
-        sm.revoke_token(token)
-        assert sm.validate_session_token(token) is None
+        assert await sm.validate_session_token(token) is not None  # baseline
+        await sm.revoke_token(token)
+        assert await sm.validate_session_token(token) is None
 
-    def test_revoke_invalid_token_is_silent(self):
+    async def test_revoke_invalid_token_is_silent(self):
         """Revoking a malformed token is a no-op (doesn't raise) —
         pin so a logout endpoint can call revoke unconditionally."""
         sm = _sm()
-        sm.revoke_token("not-a-jwt")
-        sm.revoke_token("")
-
-    def test_revocation_list_self_cleans_after_natural_expiry(self):
-        """An expired token's entry is removed from the revocation
-        list on next cleanup — keeps memory bounded. Pin so a
-        long-running process doesn't grow the revoked dict
-        unboundedly."""
-        sm = _sm(session_ttl=1)
+        await sm.revoke_token("not-a-jwt")
+        await sm.revoke_token("")
+
+    async def test_revocation_expires_with_the_token(self):
+        """A revocation only lives as long as the token it revokes
+        — keeps the store bounded. Pin so a long-running deploy
+        doesn't grow the revocation list unboundedly."""
+        from beats.auth.session import REVOKED_TOKEN_NS
+
+        store, clock = _clocked_store()
+        sm = _sm(session_ttl=60, store=store)
         token = sm.create_session_token("user-1")
-        sm.revoke_token(token)
-        # internals exposed — _revoked_tokens dict
-        assert token in sm._revoked_tokens
-        time.sleep(1.1)
-        # Validation triggers cleanup
-        sm.validate_session_token("trigger-cleanup")
-        assert token not in sm._revoked_tokens
+        await sm.revoke_token(token)
+        assert await store.count(REVOKED_TOKEN_NS) == 1
+        clock.now += 61
+        assert await store.count(REVOKED_TOKEN_NS) == 0
+
+    async def test_revocation_is_stored_under_a_digest(self):
+        """The store holds a hash of the revoked token, never the
+        bearer token itself — pin so reading the shared store
+        doesn't hand out working (if revoked) credentials."""
+        from beats.auth.session import REVOKED_TOKEN_NS
+
+        store, _ = _clocked_store()
+        sm = _sm(store=store)
+        token = sm.create_session_token("user-1")
+        await sm.revoke_token(token)
+        latest = await store.latest(REVOKED_TOKEN_NS)
+        assert latest is not None
+        assert token not in latest[0]
+
+    async def test_revocation_is_seen_by_every_manager_on_the_store(self):
+        """Two API processes share one store: a logout served by
+        one must invalidate the token on the other."""
+        from beats.auth.state_store import InMemoryStateStore
+
+        store = InMemoryStateStore()
+        a, b = _sm(store=store), _sm(store=store)
+        token = a.create_session_token("user-1")
+        await a.revoke_token(token)
+        assert await b.validate_session_token(token) is None
 
 
 class TestSessionManagerRefresh:
@@ -176,21 +208,21 @@ class TestSessionManagerRefresh:
     rotation) or break the user session on every refresh
     attempt (no replacement)."""
 
-    def test_refresh_issues_new_token_and_revokes_old(self):
+    async def test_refresh_issues_new_token_and_revokes_old(self):
         sm = _sm()
         old = sm.create_session_token("user-1", email="a@b.com")
-        new = sm.refresh_token(old)
+        new = await sm.refresh_token(old)
         assert new is not None
         assert new != old
         # New token validates with the same identity
-        payload = sm.validate_session_token(new)
+        payload = await sm.validate_session_token(new)
         assert payload is not None
         assert payload["sub"] == "user-1"
         assert payload["email"] == "a@b.com"
         # Old token is now invalid
-        assert sm.validate_session_token(old) is None
+        assert await sm.validate_session_token(old) is None
 
-    def test_refresh_invalid_token_returns_none(self):
+    async def test_refresh_invalid_token_returns_none(self):
         """Refreshing an expired or garbage token returns None
         — pin so the refresh endpoint maps that to 401 rather
         than silently issuing a fresh token to an unauthenticated
@@ -198,106 +230,310 @@ class TestSessionManagerRefresh:
         sm = _sm(session_ttl=1)
         token = sm.create_session_token("user-1")
         time.sleep(1.1)
-        assert sm.refresh_token(token) is None
-        assert sm.refresh_token("garbage") is None
+        assert await sm.refresh_token(token) is None
+        assert await sm.refresh_token("garbage") is None
 
 
 class TestSessionManagerChallenges:
-    """WebAuthn challenges are stored in-memory with a 5-minute
+    """WebAuthn challenges live in the shared state store with a 5-minute
     TTL. Pin: store-then-validate-then-consumed (one-time use),
     type mismatch rejection, and expired-cleanup."""
 
-    def test_store_and_validate_round_trip(self):
+    async def test_store_and_validate_round_trip(self):
         sm = _sm()
         challenge_bytes = b"random-bytes-32-byte-challenge!!"
-        b64 = sm.store_challenge(challenge_bytes, challenge_type="registration")
-        assert sm.validate_challenge(b64, "registration") is True
+        b64 = await sm.store_challenge(challenge_bytes, challenge_type="registration")
+        assert await sm.validate_challenge(b64, "registration") is True
 
-    def test_validate_consumes_challenge_one_time_use(self):
+    async def test_validate_consumes_challenge_one_time_use(self):
         """A challenge that validated once cannot validate again.
         Pin so a replayed registration response can't succeed
         twice."""
         sm = _sm()
-        b64 = sm.store_challenge(b"X" * 32, challenge_type="registration")
-        assert sm.validate_challenge(b64, "registration") is True
-        assert sm.validate_challenge(b64, "registration") is False
+        b64 = await sm.store_challenge(b"X" * 32, challenge_type="registration")
+        assert await sm.validate_challenge(b64, "registration") is True
+        assert await sm.validate_challenge(b64, "registration") is False
 
-    def test_validate_rejects_type_mismatch(self):
+    async def test_validate_rejects_type_mismatch(self):
         """A registration challenge presented at an authentication
         endpoint must NOT validate. Pin so an attacker can't
         recycle a registration challenge for login."""
         sm = _sm()
-        b64 = sm.store_challenge(b"X" * 32, challenge_type="registration")
-        assert sm.validate_challenge(b64, "authentication") is False
+        b64 = await sm.store_challenge(b"X" * 32, challenge_type="registration")
+        assert await sm.validate_challenge(b64, "authentication") is False
         # And the type-mismatch attempt does NOT consume the challenge
-        assert sm.validate_challenge(b64, "registration") is True
+        assert await sm.validate_challenge(b64, "registration") is True
 
-    def test_validate_rejects_unknown_challenge(self):
+    async def test_validate_rejects_unknown_challenge(self):
         sm = _sm()
-        assert sm.validate_challenge("never-stored", "registration") is False
+        assert await sm.validate_challenge("never-stored", "registration") is False
 
-    def test_get_current_challenge_returns_most_recent(self):
+    async def test_get_current_challenge_returns_most_recent(self):
         """Multiple stored challenges of the same type → most
         recent wins. Pin so a slow user (challenge A) followed by
         a fresh request (challenge B) verifies against B."""
         sm = _sm()
-        first = sm.store_challenge(b"A" * 32, challenge_type="authentication")
+        first = await sm.store_challenge(b"A" * 32, challenge_type="authentication")
         # Tiny sleep so created_at differs
         time.sleep(0.01)
-        second = sm.store_challenge(b"B" * 32, challenge_type="authentication")
-        assert sm.get_current_challenge("authentication") == second
+        second = await sm.store_challenge(b"B" * 32, challenge_type="authentication")
+        assert await sm.get_current_challenge("authentication") == second
         assert second != first
 
-    def test_get_stored_challenge_decodes_back_to_bytes(self):
+    async def test_get_stored_challenge_decodes_back_to_bytes(self):
         """get_stored_challenge round-trips through urlsafe_b64
         even when the base64 length needs padding. Pin so the
         py_webauthn library gets bytes it can verify."""
         sm = _sm()
         original = bytes(range(32))  # 32 bytes — produces unpadded b64
-        sm.store_challenge(original, challenge_type="authentication")
-        recovered = sm.get_stored_challenge("authentication")
+        await sm.store_challenge(original, challenge_type="authentication")
+        recovered = await sm.get_stored_challenge("authentication")
         assert recovered == original
 
-    def test_expired_challenges_get_cleaned_up(self):
-        """A challenge older than CHALLENGE_TTL (5min) is dropped
-        on the next cleanup. Pin by monkeypatching time.time so
-        the test isn't slow."""
+    async def test_expired_challenges_get_cleaned_up(self):
+        """A challenge older than CHALLENGE_TTL (5min) is gone.
+        Pin with a fake store clock so the test isn't slow."""
         from beats.auth import session as session_mod
 
-        sm = _sm()
-        b64 = sm.store_challenge(b"X" * 32, challenge_type="registration")
-        # Force the challenge's created_at far into the past
-        sm._challenges[b64].created_at = time.time() - session_mod.CHALLENGE_TTL - 1
-        # Any cleanup-triggering call drops it
-        sm._cleanup_expired_challenges()
-        assert sm.validate_challenge(b64, "registration") is False
-        assert sm.get_challenge_count() == 0
-
-    def test_pending_registration_round_trip(self):
+        store, clock = _clocked_store()
+        sm = _sm(store=store)
+        b64 = await sm.store_challenge(b"X" * 32, challenge_type="registration")
+        clock.now += session_mod.CHALLENGE_TTL + 1
+        assert await sm.validate_challenge(b64, "registration") is False
+        assert await sm.get_challenge_count() == 0
+
+    async def test_pending_registration_round_trip(self):
         """store_pending_registration + get_pending_registration_user_id
         keep the user_id associated with a registration challenge.
         Pin so the verify step can map the validated challenge
         back to "this user is registering"."""
         sm = _sm()
-        sm.store_challenge(b"R" * 32, challenge_type="registration")
-        sm.store_pending_registration(b"R" * 32, user_id="user-1")
-        assert sm.get_pending_registration_user_id("registration") == "user-1"
+        await sm.store_challenge(b"R" * 32, challenge_type="registration")
+        await sm.store_pending_registration(b"R" * 32, user_id="user-1")
+        assert await sm.get_pending_registration_user_id("registration") == "user-1"
 
-    def test_pending_registration_dropped_with_expired_challenge(self):
+    async def test_pending_registration_dropped_with_expired_challenge(self):
         """When a registration challenge expires and is cleaned up,
         the pending-registration user_id is dropped too. Pin so a
         registration that times out can't be completed later by
         replaying the user_id."""
         from beats.auth import session as session_mod
 
-        sm = _sm()
-        sm.store_challenge(b"R" * 32, challenge_type="registration")
-        sm.store_pending_registration(b"R" * 32, user_id="user-1")
+        store, clock = _clocked_store()
+        sm = _sm(store=store)
+        await sm.store_challenge(b"R" * 32, challenge_type="registration")
+        await sm.store_pending_registration(b"R" * 32, user_id="user-1")
         # Expire the challenge
-        b64_key = next(iter(sm._challenges))
-        sm._challenges[b64_key].created_at = time.time() - session_mod.CHALLENGE_TTL - 1
-        sm._cleanup_expired_challenges()
-        assert sm.get_pending_registration_user_id("registration") is None
+        clock.now += session_mod.CHALLENGE_TTL + 1
+        assert await sm.get_pending_registration_user_id("registration") is None
+
+
+# =============================================================================
+# DeviceRegistrationCache — TTL/LRU cache behind device-token auth
+# =============================================================================
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _CountingLoader:
+    """Registration lookup that records every device id it was asked for."""
+
+    def __init__(self, regs: dict):
+        self.regs = regs
+        self.calls: list[str] = []
+
+    async def __call__(self, device_id: str):
+        self.calls.append(device_id)
+        return self.regs.get(device_id)
+
+
+def _reg(device_id: str, *, revoked: bool = False, reg_id: str | None = None):
+    from beats.domain.models import DeviceRegistration
+
+    return DeviceRegistration(
+        id=reg_id or f"reg-{device_id}", device_id=device_id, user_id="u1", revoked=revoked
+    )
+
+
+class TestDeviceRegistrationCache:
+    """The middleware asks this cache, not Mongo, whether a device token's
+    registration is still live. A stale "active" answer is a revoked
+    device still getting in, so pin every path that must drop one:
+    TTL expiry, explicit invalidation, change events and the race where
+    a revoke lands while a lookup is in flight."""
+
+    def _cache(self, **kwargs):
+        from beats.auth.device_cache import DeviceRegistrationCache
+
+        clock = _Clock()
+        return DeviceRegistrationCache(clock=clock, **kwargs), clock
+
+    async def test_hit_skips_the_lookup(self):
+        cache, _ = self._cache()
+        load = _CountingLoader({"d1": _reg("d1")})
+        assert await cache.is_active("d1", load)
+        assert await cache.is_active("d1", load)
+        assert load.calls == ["d1"]
+
+    async def test_missing_and_revoked_are_inactive_and_cached(self):
+        cache, _ = self._cache()
+        load = _CountingLoader({"d2": _reg("d2", revoked=True)})
+        assert not await cache.is_active("d1", load)
+        assert not await cache.is_active("d2", load)
+        assert not await cache.is_active("d1", load)
+        assert load.calls == ["d1", "d2"]
+
+    async def test_entries_expire_after_ttl(self):
+        cache, clock = self._cache(ttl_seconds=30)
+        regs = {"d1": _reg("d1")}
+        load = _CountingLoader(regs)
+        assert await cache.is_active("d1", load)
+        regs["d1"] = _reg("d1", revoked=True)  # revoked by another instance
+        clock.now += 29
+        assert await cache.is_active("d1", load)
+        clock.now += 2
+        assert not await cache.is_active("d1", load)
+        assert load.calls == ["d1", "d1"]
+
+    async def test_invalidate_forces_a_reload(self):
+        cache, _ = self._cache()
+        regs = {"d1": _reg("d1")}
+        load = _CountingLoader(regs)
+        assert await cache.is_active("d1", load)
+        regs["d1"] = _reg("d1", revoked=True)
+        cache.invalidate("d1")
+        assert not await cache.is_active("d1", load)
+
+    async def test_least_recently_used_entry_is_evicted(self):
+        cache, _ = self._cache(max_entries=2)
+        load = _CountingLoader({d: _reg(d) for d in ("d1", "d2", "d3")})
+        await cache.is_active("d1", load)
+        await cache.is_active("d2", load)
+        await cache.is_active("d1", load)  # d2 is now least recently used
+        await cache.is_active("d3", load)
+        assert len(cache) == 2
+        load.calls.clear()
+        await cache.is_active("d1", load)
+        await cache.is_active("d2", load)
+        assert load.calls == ["d2"]
+
+    async def test_change_events_invalidate_by_registration_id(self):
+        cache, _ = self._cache()
+        load = _CountingLoader({"d1": _reg("d1", reg_id="r1"), "d2": _reg("d2", reg_id="r2")})
+        await cache.is_active("d1", load)
+        await cache.is_active("d2", load)
+
+        cache.apply_change({"operationType": "update", "documentKey": {"_id": "r1"}})
+        assert len(cache) == 1
+        cache.apply_change({"operationType": "drop"})
+        assert len(cache) == 0
+
+    async def test_revoke_during_an_in_flight_lookup_is_not_overwritten(self):
+        """The lookup read the registration before the revoke; storing its
+        answer afterwards would re-admit the device for a full TTL."""
+        cache, _ = self._cache()
+
+        async def load(device_id):
+            cache.invalidate(device_id)  # revoke lands mid-lookup
+            return _reg(device_id)
+
+        assert await cache.is_active("d1", load)
+        assert len(cache) == 0
+
+
+class _FakeChangeStream:
+    """Yields ``events``, then raises ``error`` if one is given."""
+
+    def __init__(self, events=(), error: Exception | None = None):
+        self._events = list(events)
+        self._error = error
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def __aiter__(self):
+        for event in self._events:
+            yield event
+        if self._error is not None:
+            raise self._error
+
+
+class _FakeRegistrations:
+    """Each watch() call takes the next outcome: a stream, or an error
+    raised while opening it."""
+
+    def __init__(self, *outcomes):
+        self._outcomes = list(outcomes)
+
+    async def watch(self, _pipeline):
+        outcome = self._outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class TestWatchDeviceRevocations:
+    """The watcher is what lets another instance's revoke take effect in
+    seconds. It may only give up when the deployment can't run change
+    streams at all; any other failure must bring it back."""
+
+    UNSUPPORTED = 40573
+
+    async def test_gives_up_without_a_replica_set(self):
+        from pymongo.errors import OperationFailure
+
+        from beats.auth.device_cache import DeviceRegistrationCache, watch_device_revocations
+
+        sleeps: list[float] = []
+
+        async def sleep(delay):
+            sleeps.append(delay)
+
+        unsupported = OperationFailure("not a replica set", code=self.UNSUPPORTED)
+        await watch_device_revocations(
+            _FakeRegistrations(unsupported),  # type: ignore[arg-type]
+            DeviceRegistrationCache(),
+            sleep=sleep,
+        )
+        assert sleeps == []
+
+    async def test_reopens_with_capped_backoff_and_clears_on_reconnect(self):
+        from pymongo.errors import AutoReconnect, OperationFailure
+
+        from beats.auth.device_cache import DeviceRegistrationCache, watch_device_revocations
+
+        cache = DeviceRegistrationCache()
+        load = _CountingLoader({"d1": _reg("d1", reg_id="r1"), "d2": _reg("d2", reg_id="r2")})
+        sleeps: list[float] = []
+
+        async def sleep(delay):
+            sleeps.append(delay)
+            # A revocation nobody hears about while the stream is down.
+            await cache.is_active("d2", load)
+
+        await cache.is_active("d1", load)
+        dropped = _FakeChangeStream(error=AutoReconnect("primary stepped down"))
+        last = _FakeChangeStream(
+            [{"operationType": "update", "documentKey": {"_id": "r1"}}],
+            error=OperationFailure("not a replica set", code=self.UNSUPPORTED),
+        )
+        outcomes = [dropped, *(AutoReconnect("no primary") for _ in range(7)), last]
+        await watch_device_revocations(
+            _FakeRegistrations(*outcomes),  # type: ignore[arg-type]
+            cache,
+            sleep=sleep,
+        )
+        assert sleeps == [1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 60.0, 60.0]
+        assert len(cache) == 0
 
 
 # =============================================================================
@@ -460,8 +696,8 @@ class TestWebAuthnRegistrationOptions:
         sm = _sm()
         wam = _wam(session=sm)
         await wam.get_registration_options(_user(id_="user-42"))
-        assert sm.get_current_challenge("registration") is not None
-        assert sm.get_pending_registration_user_id("registration") == "user-42"
+        assert await sm.get_current_challenge("registration") is not None
+        assert await sm.get_pending_registration_user_id("registration") == "user-42"
 
     async def test_excludes_existing_credentials(self):
         """A user with an existing credential gets it surfaced in
@@ -544,7 +780,7 @@ class TestWebAuthnRegistrationVerificationGuards:
         storage = _FakeCredentialStorage()
         sm = _sm()
         # Seed the pending registration challenge so the pre-check passes
-        sm.store_challenge(b"X" * 32, "registration")
+        await sm.store_challenge(b"X" * 32, "registration")
         wam = _wam(storage=storage, session=sm)
 
         result = await wam.verify_registration(
@@ -564,7 +800,7 @@ class TestWebAuthnRegistrationVerificationGuards:
         assert creds[0].credential_id == "AQIDBA"
         assert creds[0].device_name == "iPhone"
         # Token validates against the SessionManager
-        payload = sm.validate_session_token(result["token"])
+        payload = await sm.validate_session_token(result["token"])
         assert payload is not None
         assert payload["sub"] == "user-1"
 
@@ -582,7 +818,7 @@ class TestWebAuthnRegistrationVerificationGuards:
         monkeypatch.setattr(webauthn_module, "verify_registration_response", fake_verify_raises)
 
         sm = _sm()
-        sm.store_challenge(b"X" * 32, "registration")
+        await sm.store_challenge(b"X" * 32, "registration")
         wam = _wam(session=sm)
 
         with pytest.raises(ValueError, match="Registration verification failed"):
@@ -607,9 +843,9 @@ class TestWebAuthnAuthenticationOptions:
         sm = _sm()
         wam = _wam(session=sm)
         await wam.get_authentication_options()
-        assert sm.get_current_challenge("authentication") is not None
+        assert await sm.get_current_challenge("authentication") is not None
         # Pin: it's NOT also a registration challenge
-        assert sm.get_current_challenge("registration") is None
+        assert await sm.get_current_challenge("registration") is None
 
 
 class TestWebAuthnAuthenticationVerificationGuards:
@@ -626,7 +862,7 @@ class TestWebAuthnAuthenticationVerificationGuards:
         not found". Pin so an attacker can't probe for valid
         credential IDs by checking which error fires."""
         sm = _sm()
-        sm.store_challenge(b"X" * 32, challenge_type="authentication")
+        await sm.store_challenge(b"X" * 32, challenge_type="authentication")
         wam = _wam(session=sm)
         with pytest.raises(ValueError, match="Credential not found"):
             await wam.verify_authentication(credential={"id": "ghost"})
@@ -651,7 +887,7 @@ class TestWebAuthnAuthenticationVerificationGuards:
             )
         )
         sm = _sm()
-        sm.store_challenge(b"X" * 32, challenge_type="authentication")
+        await sm.store_challenge(b"X" * 32, challenge_type="authentication")
         wam = _wam(storage=storage, session=sm)
         with pytest.raises(ValueError, match="No user"):
             await wam.verify_authentication(credential={"id": "orphan"})
@@ -692,7 +928,7 @@ class TestWebAuthnAuthenticationVerificationGuards:
         )
 
         sm = _sm()
-        sm.store_challenge(b"X" * 32, challenge_type="authentication")
+        await sm.store_challenge(b"X" * 32, challenge_type="authentication")
 
         user = User(id="user-99", email="ahmed@example.com")
         wam = _wam(storage=storage, session=sm, user_repo=_FakeUserRepo([user]))
@@ -710,7 +946,7 @@ class TestWebAuthnAuthenticationVerificationGuards:
         assert cred.sign_count == 42
 
         # Token validates with the user's identity
-        payload = sm.validate_session_token(result["token"])
+        payload = await sm.validate_session_token(result["token"])
         assert payload is not None
         assert payload["sub"] == "user-99"
         assert payload["email"] == "ahmed@example.com"
@@ -743,7 +979,7 @@ class TestWebAuthnAuthenticationVerificationGuards:
             )
         )
         sm = _sm()
-        sm.store_challenge(b"X" * 32, challenge_type="authentication")
+        await sm.store_challenge(b"X" * 32, challenge_type="authentication")
         wam = _wam(storage=storage, session=sm)
 
         with pytest.raises(ValueError, match="Authentication verification failed"):
@@ -1137,3 +1373,65 @@ class TestMongoCredentialStorage:
         )
         ids = await store.get_credential_ids(user_id="user-A")
         assert set(ids) == {"a1", "a2"}
+
+
+class TestMongoStateStore:
+    """The shared state store production runs on. The session tests
+    above use InMemoryStateStore; this pins the Mongo filters — a
+    due entry must read as gone before the TTL monitor deletes it,
+    and pop must be single-use."""
+
+    @pytest.fixture(autouse=True)
+    async def _setup(self):
+        from beats.infrastructure.database import Database
+
+        await Database.connect()
+        await Database.get_db().shared_state.delete_many({})
+        yield
+        await Database.disconnect()
+
+    def _store(self, clock=None):
+        from datetime import UTC, datetime
+
+        from beats.auth.state_store import MongoStateStore
+        from beats.infrastructure.database import Database
+
+        return MongoStateStore(
+            lambda: Database.get_db().shared_state, clock=clock or (lambda: datetime.now(UTC))
+        )
+
+    async def test_set_get_pop_round_trip(self):
+        store = self._store()
+        await store.set("ns", "k", {"user_id": "u1"}, ttl=60)
+        assert await store.get("ns", "k") == {"user_id": "u1"}
+        assert await store.pop("ns", "k") == {"user_id": "u1"}
+        assert await store.pop("ns", "k") is None
+        assert await store.get("ns", "k") is None
+
+    async def test_due_entries_read_as_gone(self):
+        from datetime import UTC, datetime, timedelta
+
+        now = [datetime.now(UTC)]
+        store = self._store(clock=lambda: now[0])
+        await store.set("ns", "k", {}, ttl=60)
+        now[0] += timedelta(seconds=61)
+        assert await store.get("ns", "k") is None
+        assert await store.latest("ns") is None
+        assert await store.count("ns") == 0
+
+    async def test_latest_is_scoped_to_the_namespace(self):
+        from datetime import UTC, datetime, timedelta
+
+        # Mongo keeps milliseconds: step the clock so set_at never ties.
+        now = [datetime.now(UTC)]
+
+        def clock():
+            now[0] += timedelta(seconds=1)
+            return now[0]
+
+        store = self._store(clock=clock)
+        await store.set("challenge:registration", "a", {}, ttl=60)
+        await store.set("challenge:registration", "b", {}, ttl=60)
+        await store.set("challenge:authentication", "c", {}, ttl=60)
+        assert await store.latest("challenge:registration") == ("b", {})
+        assert await store.count("challenge:registration") == 2
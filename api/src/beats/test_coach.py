@@ -22,6 +22,7 @@ from beats.coach import chat as chat_module
 from beats.coach import context as context_module
 from beats.coach import memory_rewrite as memory_rewrite_module
 from beats.coach import tools as tools_module
+from beats.coach.context_cache import CoachContextCache, RenderedContext, context_digest
 from beats.coach.gateway import (
     SONNET_CACHE_READ_PER_MTOK,
     SONNET_CACHE_WRITE_PER_MTOK,
@@ -870,6 +871,24 @@ def _resp(content_blocks, **overrides) -> GatewayResponse:
     )
 
 
+async def _stream_events(resp: GatewayResponse, chunk: int | None = None):
+    """Replay a GatewayResponse the way gateway.stream() yields it: text
+    deltas (``chunk`` chars each, whole blocks by default), a stop event
+    per content block, then message_stop."""
+    from types import SimpleNamespace
+
+    from anthropic.types import TextBlock
+
+    for index, block in enumerate(resp.content):
+        if isinstance(block, TextBlock):
+            step = chunk or len(block.text)
+            for at in range(0, len(block.text), step):
+                yield SimpleNamespace(type="text", text=block.text[at : at + step])
+        yield SimpleNamespace(type="content_block_stop", index=index, content_block=block)
+    message = SimpleNamespace(content=resp.content, model=resp.model, stop_reason=resp.stop_reason)
+    yield SimpleNamespace(type="message_stop", message=message)
+
+
 class _FakeRepos:
     """Stand-in for the CoachRepos dataclass — chat.py only calls
     `.project.list()` to seed the tool dispatch context."""
@@ -884,8 +903,8 @@ class _FakeRepos:
 class TestHandleChatTurn:
     """The streaming chat turn — runs an LLM round, optionally executes
     tools, optionally loops, and yields SSE events. Tested by replacing
-    `complete()` with a sequence of canned GatewayResponses and
-    `execute_tool` with a deterministic stub."""
+    `stream()` with a sequence of canned GatewayResponses replayed as
+    stream events and `execute_tool` with a deterministic stub."""
 
     @pytest.fixture(autouse=True)
     async def _setup(self, monkeypatch):
@@ -911,19 +930,22 @@ class TestHandleChatTurn:
         await Database.disconnect()
 
     @pytest.fixture
-    def patch_complete(self, monkeypatch):
+    def patch_stream(self, monkeypatch):
         """Returns a setter that lets a test queue a sequence of
-        GatewayResponses; chat.py's tool-loop pulls one per round."""
+        GatewayResponses; chat.py's tool-loop streams one per round,
+        replayed as the SDK's events (text, content_block_stop,
+        message_stop)."""
         responses: list[GatewayResponse] = []
         captured_calls: list[dict] = []
 
-        async def fake_complete(**kwargs):
+        async def fake_stream(**kwargs):
             captured_calls.append(kwargs)
             if not responses:
-                raise AssertionError("complete() called more times than expected")
-            return responses.pop(0)
+                raise AssertionError("stream() called more times than expected")
+            async for event in _stream_events(responses.pop(0)):
+                yield event
 
-        monkeypatch.setattr(chat_module, "complete", fake_complete)
+        monkeypatch.setattr(chat_module, "stream", fake_stream)
         return responses, captured_calls
 
     @pytest.fixture
@@ -931,7 +953,7 @@ class TestHandleChatTurn:
         """Records every tool call and returns a deterministic string."""
         calls: list[tuple] = []
 
-        async def fake_execute(_user_id, name, tool_input, *, repos, projects):
+        async def fake_execute(_user_id, name, tool_input, *, context):
             calls.append((name, tool_input))
             return f"<{name} result>"
 
@@ -944,12 +966,12 @@ class TestHandleChatTurn:
             events.append(ev)
         return events
 
-    async def test_text_only_response_emits_text_then_done(self, patch_complete):
+    async def test_text_only_response_emits_text_then_done(self, patch_stream):
         """Happy path with no tool use — single LLM round, single text
         block, terminates with the done event."""
         from anthropic.types import TextBlock
 
-        responses, _calls = patch_complete
+        responses, _calls = patch_stream
         responses.append(_resp([TextBlock(type="text", text="hello there", citations=None)]))
 
         events = await self._drain(
@@ -959,10 +981,10 @@ class TestHandleChatTurn:
         assert events[0] == {"type": "text", "text": "hello there"}
         assert events[-1] == {"type": "done", "conversation_id": "c-1"}
 
-    async def test_persists_user_and_assistant_messages(self, patch_complete):
+    async def test_persists_user_and_assistant_messages(self, patch_stream):
         from anthropic.types import TextBlock
 
-        responses, _ = patch_complete
+        responses, _ = patch_stream
         responses.append(_resp([TextBlock(type="text", text="reply", citations=None)]))
 
         await self._drain(
@@ -980,13 +1002,13 @@ class TestHandleChatTurn:
         assistant = next(r for r in rows if r["role"] == "assistant")
         assert assistant["content"] == "reply"
 
-    async def test_auto_generates_conversation_id_when_omitted(self, patch_complete):
+    async def test_auto_generates_conversation_id_when_omitted(self, patch_stream):
         """Locks the conversation_id contract — caller can pass None
         and chat.py mints a uuid that flows through to the done event
         and to every persisted row."""
         from anthropic.types import TextBlock
 
-        responses, _ = patch_complete
+        responses, _ = patch_stream
         responses.append(_resp([TextBlock(type="text", text="ok", citations=None)]))
 
         events = await self._drain(chat_module.handle_chat_turn(user_id="user-1", message="hi"))
@@ -999,13 +1021,13 @@ class TestHandleChatTurn:
         assert row is not None
         assert row["conversation_id"] == cid
 
-    async def test_tool_use_round_then_text_round(self, patch_complete, patch_execute_tool):
+    async def test_tool_use_round_then_text_round(self, patch_stream, patch_execute_tool):
         """Round 1: LLM emits tool_use → chat.py runs the tool, yields
         tool_use + tool_result events. Round 2: LLM emits text → done.
         Locks the loop's two-round happy path."""
         from anthropic.types import TextBlock
 
-        responses, calls = patch_complete
+        responses, calls = patch_stream
         responses.append(
             _resp(
                 [
@@ -1038,7 +1060,7 @@ class TestHandleChatTurn:
         assert last["content"][0]["type"] == "tool_result"
         assert last["content"][0]["content"] == "<get_score result>"
 
-    async def test_tool_execution_error_becomes_error_text(self, patch_complete, monkeypatch):
+    async def test_tool_execution_error_becomes_error_text(self, patch_stream, monkeypatch):
         """A tool that raises an exception must NOT 500 the chat
         stream — chat.py catches and surfaces "Error: ..." in the
         tool_result so the LLM can recover and the user sees the
@@ -1050,7 +1072,7 @@ class TestHandleChatTurn:
 
         monkeypatch.setattr(chat_module, "execute_tool", failing_execute)
 
-        responses, _ = patch_complete
+        responses, _ = patch_stream
         responses.append(_resp([_fake_tool_use("get_score", {}, "tu_1")]))
         responses.append(
             _resp([TextBlock(type="text", text="couldn't fetch your score", citations=None)])
@@ -1063,7 +1085,7 @@ class TestHandleChatTurn:
         tool_result = next(ev for ev in events if ev["type"] == "tool_result")
         assert "Error: tool blew up" in tool_result["result"]
 
-    async def test_tool_result_truncated_in_sse_event_only(self, patch_complete, monkeypatch):
+    async def test_tool_result_truncated_in_sse_event_only(self, patch_stream, monkeypatch):
         """The SSE event truncates the tool result to
         TOOL_RESULT_DISPLAY_LIMIT chars (so the UI doesn't render a
         novel), but the FULL text goes back to the LLM in the next
@@ -1079,7 +1101,7 @@ class TestHandleChatTurn:
 
         monkeypatch.setattr(chat_module, "execute_tool", big_execute)
 
-        responses, calls = patch_complete
+        responses, calls = patch_stream
         responses.append(_resp([_fake_tool_use("search_beats", {}, "tu_1")]))
         responses.append(_resp([TextBlock(type="text", text="ok", citations=None)]))
 
@@ -1106,7 +1128,7 @@ class TestHandleChatTurn:
         assert chat_module.MAX_TOOL_TURNS == 8
 
     async def test_tool_loop_exhaustion_emits_typed_error_event(
-        self, patch_complete, patch_execute_tool
+        self, patch_stream, patch_execute_tool
     ):
         """When the LLM can't produce text within MAX_TOOL_TURNS rounds,
         the handler emits a typed `error` event (NOT a faked text
@@ -1115,7 +1137,7 @@ class TestHandleChatTurn:
         distinctly from a model-authored text turn. Without the typed
         event, a "the coach kept failing tool calls" outcome would
         look identical to a normal coach reply."""
-        responses, _ = patch_complete
+        responses, _ = patch_stream
 
         # Queue MAX_TOOL_TURNS rounds of pure tool_use (no text), so
         # the loop never finds a non-tool response and falls through.
@@ -1138,13 +1160,13 @@ class TestHandleChatTurn:
         assert error_events[0]["code"] == 502
         assert events[-1] == {"type": "done", "conversation_id": "c-1"}
 
-    async def test_loop_does_not_call_complete_more_than_max_turns(
-        self, patch_complete, patch_execute_tool
+    async def test_loop_does_not_call_stream_more_than_max_turns(
+        self, patch_stream, patch_execute_tool
     ):
         """Hard upper bound on LLM calls per chat turn. Pin so a
         future refactor that changes the loop structure can't
         accidentally let the cap leak."""
-        responses, calls = patch_complete
+        responses, calls = patch_stream
 
         # Queue more responses than the cap; the loop must stop early.
         for i in range(chat_module.MAX_TOOL_TURNS + 5):
@@ -1154,11 +1176,11 @@ class TestHandleChatTurn:
             chat_module.handle_chat_turn(user_id="user-1", message="loop", conversation_id="c-1")
         )
 
-        # complete() called exactly MAX_TOOL_TURNS times — no more,
+        # stream() called exactly MAX_TOOL_TURNS times — no more,
         # no fewer. Locks the per-turn LLM cost ceiling.
         assert len(calls) == chat_module.MAX_TOOL_TURNS
 
-    async def test_history_is_loaded_in_chronological_order(self, patch_complete):
+    async def test_history_is_loaded_in_chronological_order(self, patch_stream):
         """Messages persist with descending sort by created_at, but
         chat.py reverses to chronological for the LLM. Pin so a
         refactor that drops the reverse() doesn't feed the LLM
@@ -1186,7 +1208,7 @@ class TestHandleChatTurn:
             ]
         )
 
-        responses, calls = patch_complete
+        responses, calls = patch_stream
         responses.append(_resp([TextBlock(type="text", text="ok", citations=None)]))
 
         await self._drain(
@@ -1194,19 +1216,19 @@ class TestHandleChatTurn:
         )
 
         # The fake build_coach_messages preserves history order; the
-        # call to complete() should see FIRST → SECOND → THIRD.
+        # call to stream() should see FIRST → SECOND → THIRD.
         sent = calls[0]["messages"]
         contents = [m["content"] for m in sent if isinstance(m.get("content"), str)]
         # Should be [FIRST, SECOND, THIRD] in order.
         assert contents == ["FIRST", "SECOND", "THIRD"]
 
-    async def test_passes_purpose_chat_to_gateway(self, patch_complete):
+    async def test_passes_purpose_chat_to_gateway(self, patch_stream):
         """The cost dashboard distinguishes chat from brief/review.
         Pin so a refactor doesn't leak chat spend into the wrong
         bucket."""
         from anthropic.types import TextBlock
 
-        responses, calls = patch_complete
+        responses, calls = patch_stream
         responses.append(_resp([TextBlock(type="text", text="ok", citations=None)]))
 
         await self._drain(
@@ -1217,6 +1239,111 @@ class TestHandleChatTurn:
         assert calls[0]["user_id"] == "user-99"
         assert calls[0]["tools"] is not None  # tools registered every call
 
+    async def test_text_deltas_are_forwarded_before_the_round_finishes(self, monkeypatch):
+        """Each text delta reaches the client as it arrives, not after
+        the completion: the first text event is yielded while the
+        stream still has the rest of the message to send."""
+        from anthropic.types import TextBlock
+
+        produced: list[str] = []
+
+        async def fake_stream(**_kwargs):
+            resp = _resp([TextBlock(type="text", text="hello there, friend", citations=None)])
+            async for event in _stream_events(resp, chunk=5):
+                produced.append(event.type)
+                yield event
+
+        monkeypatch.setattr(chat_module, "stream", fake_stream)
+        gen = chat_module.handle_chat_turn(user_id="user-1", message="hi", conversation_id="c-1")
+        first = await anext(gen)
+        assert first == {"type": "text", "text": "hello"}
+        assert "message_stop" not in produced
+
+        rest = await self._drain(gen)
+        texts = [first["text"]] + [ev["text"] for ev in rest if ev["type"] == "text"]
+        assert "".join(texts) == "hello there, friend"
+        row = await Database.get_db()[COACH_CONVERSATIONS_COLLECTION].find_one(
+            {"role": "assistant"}
+        )
+        assert row is not None
+        assert row["content"] == "hello there, friend"
+
+    async def test_tool_starts_when_its_block_closes(self, monkeypatch):
+        """A tool runs as soon as its tool_use block closes, while the
+        model is still streaming the rest of the round."""
+        import asyncio
+
+        from anthropic.types import TextBlock
+
+        started = asyncio.Event()
+        seen_before_stop: list[bool] = []
+
+        async def fake_execute(_user_id, name, _input, *, context):
+            started.set()
+            return f"<{name} result>"
+
+        async def fake_stream(**kwargs):
+            if len(kwargs["messages"]) > 1:
+                resp = _resp([TextBlock(type="text", text="done", citations=None)])
+                async for event in _stream_events(resp):
+                    yield event
+                return
+            resp = _resp(
+                [
+                    _fake_tool_use("get_score", {}, "tu_1"),
+                    TextBlock(type="text", text="checking your score", citations=None),
+                ]
+            )
+            async for event in _stream_events(resp):
+                if event.type == "message_stop":
+                    await asyncio.sleep(0)
+                    seen_before_stop.append(started.is_set())
+                yield event
+
+        monkeypatch.setattr(chat_module, "stream", fake_stream)
+        monkeypatch.setattr(chat_module, "execute_tool", fake_execute)
+        events = await self._drain(
+            chat_module.handle_chat_turn(user_id="user-1", message="score?", conversation_id="c-1")
+        )
+
+        assert seen_before_stop == [True]
+        assert [ev["type"] for ev in events] == [
+            "tool_use",
+            "text",
+            "tool_result",
+            "text",
+            "done",
+        ]
+
+    async def test_tools_share_one_context_across_rounds(self, patch_stream, monkeypatch):
+        """Every tool call of a turn gets the same ToolContext, so a read
+        made in round 1 serves round 2's tools too."""
+        from anthropic.types import TextBlock
+
+        contexts: list[object] = []
+
+        async def fake_execute(_user_id, name, _input, *, context):
+            contexts.append(context)
+            return f"<{name} result>"
+
+        monkeypatch.setattr(chat_module, "execute_tool", fake_execute)
+        responses, _ = patch_stream
+        responses.append(
+            _resp(
+                [
+                    _fake_tool_use("get_beats", {}, "tu_1"),
+                    _fake_tool_use("get_projects", {}, "tu_2"),
+                ]
+            )
+        )
+        responses.append(_resp([_fake_tool_use("get_beats", {}, "tu_3")]))
+        responses.append(_resp([TextBlock(type="text", text="done", citations=None)]))
+        await self._drain(
+            chat_module.handle_chat_turn(user_id="user-1", message="week?", conversation_id="c-1")
+        )
+        assert len(contexts) == 3
+        assert all(c is contexts[0] for c in contexts)
+
 
 class TestRecentDataSummary:
     """_recent_data_summary builds the human-readable context block
@@ -1512,10 +1639,22 @@ class _FakeBeatRepoForTools:
 
     def __init__(self, beats):
         self._beats = beats
+        self.reads: list[tuple] = []
 
     async def list_all_completed(self):
+        self.reads.append(("all",))
         return [b for b in self._beats if b.end is not None]
 
+    async def list_completed_in_range(self, start, end):
+        self.reads.append(("range", start, end))
+        return [b for b in self._beats if b.end is not None and start <= b.day <= end]
+
+    async def search(self, terms, limit, after=None):
+        from beats.domain.beat_search import search_page
+
+        self.reads.append(("search", *terms))
+        return search_page(self._beats, terms, limit, after)
+
 
 class _FakeFlowRepoForCoach:
     """Returns flow windows whose window_start falls in [start, end]."""
@@ -1526,6 +1665,37 @@ class _FakeFlowRepoForCoach:
     async def list_by_range(self, start, end, **kwargs):
         return [w for w in self._windows if start <= w.window_start <= end]
 
+    async def stream_by_range(self, start, end, **kwargs):
+        for w in await self.list_by_range(start, end):
+            yield w
+
+
+class _FakeFlowRollupRepoForCoach:
+    """Starts unmaterialized, so the first read builds from the flow fake."""
+
+    def __init__(self):
+        self._rows = {}
+        self._materialized = False
+
+    async def is_materialized(self):
+        return self._materialized
+
+    async def insert_missing(self, rollups):
+        existing = [r.hour for r in rollups if r.hour in self._rows]
+        self._rows.update((r.hour, r) for r in rollups if r.hour not in self._rows)
+        return existing
+
+    async def mark_materialized(self):
+        self._materialized = True
+
+    async def apply(self, rollups):
+        raise AssertionError("the coach only reads rollups")
+
+    async def list_range(self, start, end):
+        return sorted(
+            (r for r in self._rows.values() if start <= r.hour <= end), key=lambda r: r.hour
+        )
+
 
 class _FakeCoachRepos:
     """Mirrors the CoachRepos dataclass shape for tests."""
@@ -1535,6 +1705,7 @@ class _FakeCoachRepos:
         self.beat = _FakeBeatRepoForTools(beats or [])
         self.digest = None  # not used by tools.py
         self.flow = _FakeFlowRepoForCoach(flow_windows or [])
+        self.flow_rollup = _FakeFlowRollupRepoForCoach()
 
 
 def _project(id_: str, name: str, *, weekly_goal=None, goal_type="target", archived=False):
@@ -1686,6 +1857,65 @@ class TestToolsDispatch:
         assert "Beta" not in result
         assert "1 sessions" in result
 
+    async def test_get_beats_reads_only_the_requested_window(self):
+        """A get_beats call queries its window, not the user's lifetime."""
+        projects = [_project("p1", "Alpha")]
+        beats = [
+            _completed_beat("2026-03-02T09:00:00", 30, "p1"),
+            _completed_beat("2025-01-01T09:00:00", 30, "p1"),
+        ]
+        repos = _FakeCoachRepos(projects=projects, beats=beats)
+        result = await tools_module.execute_tool(
+            "user-1",
+            "get_beats",
+            {"start_date": "2026-03-01", "end_date": "2026-03-07"},
+            repos=repos,
+            projects=projects,
+        )
+        assert "1 sessions" in result
+        assert repos.beat.reads == [("range", date(2026, 3, 1), date(2026, 3, 7))]
+
+    async def test_turn_context_shares_reads_across_tool_calls(self, monkeypatch):
+        """Tools of one turn share a ToolContext: concurrent calls for the
+        same window make one read, a narrower window is served from it,
+        and the score is computed once however often it's asked for."""
+        import asyncio
+
+        from beats.domain.intelligence import IntelligenceService
+
+        scores: list[int] = []
+
+        async def fake_score(_self):
+            scores.append(1)
+            return {"score": 50, "components": {"consistency": 1, "goals": 2, "quality": 3}}
+
+        monkeypatch.setattr(IntelligenceService, "compute_productivity_score", fake_score)
+        projects = [_project("p1", "Alpha")]
+        repos = _FakeCoachRepos(
+            projects=projects, beats=[_completed_beat("2026-03-02T09:00:00", 30, "p1")]
+        )
+        ctx = tools_module.ToolContext(repos, projects)
+        week = {"start_date": "2026-03-01", "end_date": "2026-03-07"}
+        calls = [
+            ("get_beats", week),
+            ("get_beats", week),
+            ("get_productivity_score", {}),
+            ("get_productivity_score", {}),
+        ]
+        results = await asyncio.gather(
+            *(tools_module.execute_tool("user-1", n, i, context=ctx) for n, i in calls)
+        )
+        assert results[0] == results[1]
+        narrower = await tools_module.execute_tool(
+            "user-1",
+            "get_beats",
+            {"start_date": "2026-03-02", "end_date": "2026-03-03"},
+            context=ctx,
+        )
+        assert "1 sessions" in narrower
+        assert repos.beat.reads == [("range", date(2026, 3, 1), date(2026, 3, 7))]
+        assert scores == [1]
+
     async def test_get_beats_empty_returns_friendly_text(self):
         repos = _FakeCoachRepos(projects=[], beats=[])
         result = await tools_module.execute_tool(
@@ -1807,6 +2037,25 @@ class TestToolsDispatch:
         assert "2026-05-01" in result
         assert "2026-05-02" not in result
 
+    async def test_search_beats_matches_word_prefixes_exact_first(self):
+        """Words match by prefix through the search index; an exact word
+        outranks a newer prefix-only match."""
+        projects = [_project("p1", "Alpha")]
+        beats = [
+            _completed_beat("2026-05-01T09:00:00", 30, "p1", note="refactor auth"),
+            _completed_beat("2026-05-03T09:00:00", 30, "p1", note="refactoring billing"),
+            _completed_beat("2026-05-04T09:00:00", 30, "p1", note="prefactor"),
+        ]
+        repos = _FakeCoachRepos(projects=projects, beats=beats)
+        result = await tools_module.execute_tool(
+            "user-1", "search_beats", {"query": "Refactor"}, repos=repos, projects=projects
+        )
+        assert result.splitlines() == [
+            "2026-05-01 | Alpha | 30m — refactor auth",
+            "2026-05-03 | Alpha | 30m — refactoring billing",
+        ]
+        assert repos.beat.reads == [("search", "refactor")]
+
     async def test_search_beats_empty_query_short_circuits(self):
         repos = _FakeCoachRepos(projects=[], beats=[])
         result = await tools_module.execute_tool(
@@ -1856,7 +2105,7 @@ class TestBuildCoachMessages:
             return _FakeCoachRepos()
 
         async def fake_user_ctx(_user_id, _repos):
-            return "USER_CTX_BLOCK"
+            return RenderedContext("USER_CTX_BLOCK")
 
         async def fake_day_ctx(_user_id, _repos, _target_date, _tz=None):
             return "DAY_CTX_BLOCK"
@@ -1864,6 +2113,11 @@ class TestBuildCoachMessages:
         monkeypatch.setattr(context_module, "build_repos", fake_build_repos)
         monkeypatch.setattr(context_module, "build_user_context", fake_user_ctx)
         monkeypatch.setattr(context_module, "build_day_context", fake_day_ctx)
+        # A fresh cache per test: the process-wide one would carry a
+        # block rendered by another test's stub.
+        cache = CoachContextCache()
+        monkeypatch.setattr(context_module, "get_coach_context_cache", lambda: cache)
+        return cache
 
     async def test_returns_system_messages_and_spec(self, patched_context):
         system, messages, spec = await context_module.build_coach_messages(
@@ -1943,7 +2197,7 @@ class TestBuildCoachMessages:
             return _FakeCoachRepos()
 
         async def fake_user_ctx(_user_id, _repos):
-            return "USER"
+            return RenderedContext("USER")
 
         async def fake_day_ctx(_user_id, _repos, target_date, _tz=None):
             captured["target_date"] = target_date
@@ -1952,11 +2206,195 @@ class TestBuildCoachMessages:
         monkeypatch.setattr(context_module, "build_repos", fake_build_repos)
         monkeypatch.setattr(context_module, "build_user_context", fake_user_ctx)
         monkeypatch.setattr(context_module, "build_day_context", fake_day_ctx)
+        cache = CoachContextCache()
+        monkeypatch.setattr(context_module, "get_coach_context_cache", lambda: cache)
 
         target = date(2026, 5, 1)
         await context_module.build_coach_messages("user-1", "yesterday's brief", target_date=target)
         assert captured["target_date"] == target
 
+    async def test_user_ctx_is_served_from_the_cache(self, patched_context, monkeypatch):
+        """A second turn reuses the cached block (no 30-day reads) and
+        sends the same bytes, so the prompt cache keeps hitting."""
+        builds: list[str] = []
+
+        async def counting_user_ctx(user_id, _repos):
+            builds.append(user_id)
+            return RenderedContext("USER_CTX_BLOCK")
+
+        monkeypatch.setattr(context_module, "build_user_context", counting_user_ctx)
+        _, first, _ = await context_module.build_coach_messages("user-1", "hi")
+        _, second, _ = await context_module.build_coach_messages("user-1", "again")
+        assert builds == ["user-1"]
+        assert first[0]["content"] == second[0]["content"]
+
+        patched_context.invalidate("user-1")
+        await context_module.build_coach_messages("user-1", "after a write")
+        assert builds == ["user-1", "user-1"]
+
+
+class TestGatherSources:
+    """Context blocks fetch their sources concurrently: the brief waits
+    for the slowest source, and a stuck optional one (the calendar API)
+    only costs its own section."""
+
+    async def test_sources_run_concurrently(self):
+        import asyncio
+
+        ready = asyncio.Event()
+
+        async def waits_for_other():
+            await ready.wait()
+            return "a"
+
+        async def releases():
+            ready.set()
+            return "b"
+
+        result = await context_module._gather_sources(
+            "test",
+            {
+                "a": context_module.ContextSource(waits_for_other, timeout=1.0),
+                "b": context_module.ContextSource(releases),
+            },
+        )
+        assert result == {"a": "a", "b": "b"}
+
+    async def test_optional_source_falls_back_on_timeout_or_error(self, caplog):
+        import asyncio
+        import logging
+
+        async def stuck():
+            await asyncio.sleep(10)
+
+        async def broken():
+            raise RuntimeError("calendar down")
+
+        async def projects():
+            return ["p1"]
+
+        with caplog.at_level(logging.INFO, logger=context_module.logger.name):
+            result = await context_module._gather_sources(
+                "day",
+                {
+                    "calendar": context_module.ContextSource(stuck, timeout=0.01, default=[]),
+                    "biometrics": context_module.ContextSource(broken, timeout=1.0, default=[]),
+                    "projects": context_module.ContextSource(projects),
+                },
+            )
+        assert result == {"calendar": [], "biometrics": [], "projects": ["p1"]}
+        timing = next(r.getMessage() for r in caplog.records if r.levelno == logging.INFO)
+        assert timing.startswith("coach day context in ")
+        assert "calendar=" in timing and "ms timeout" in timing
+        assert "ms failed" in timing and "projects=" in timing
+
+    async def test_required_source_error_cancels_the_rest_and_raises_itself(self):
+        import asyncio
+
+        cancelled = asyncio.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def broken():
+            raise RuntimeError("mongo down")
+
+        with pytest.raises(RuntimeError, match="mongo down"):
+            await context_module._gather_sources(
+                "user",
+                {
+                    "score": context_module.ContextSource(slow, timeout=30.0, default=""),
+                    "beats": context_module.ContextSource(broken),
+                },
+            )
+        assert cancelled.is_set()
+
+
+class TestCoachContextCache:
+    """The user-context block is message[0] of every coach call; serving
+    a stale one means the coach reasons about data the user already
+    changed, and rebuilding it needlessly costs the 30-day reads."""
+
+    def _cache(self, **kwargs):
+        clock = {"now": 1000.0}
+        return CoachContextCache(clock=lambda: clock["now"], **kwargs), clock
+
+    def _loader(self, *texts: str):
+        calls: list[str] = []
+
+        async def load():
+            text = texts[min(len(calls), len(texts) - 1)]
+            calls.append(text)
+            return RenderedContext(text)
+
+        return load, calls
+
+    async def test_hit_until_invalidated_expired_or_another_day(self):
+        cache, clock = self._cache(ttl_seconds=600)
+        monday, tuesday = date(2026, 4, 6), date(2026, 4, 7)
+        load, calls = self._loader("block")
+        first = await cache.get("u1", monday, load)
+        assert await cache.get("u1", monday, load) is first
+        assert len(calls) == 1
+        cache.invalidate("u1")
+        await cache.get("u1", monday, load)
+        clock["now"] += 601
+        await cache.get("u1", monday, load)
+        await cache.get("u1", tuesday, load)
+        assert len(calls) == 4
+
+    async def test_identical_rebuild_keeps_the_entry(self):
+        cache, _ = self._cache()
+        load, _ = self._loader("same", "same", "changed")
+        first = await cache.get("u1", date(2026, 4, 6), load)
+        cache.invalidate("u1")
+        assert await cache.get("u1", date(2026, 4, 6), load) is first
+        cache.invalidate("u1")
+        changed = await cache.get("u1", date(2026, 4, 6), load)
+        assert changed.text == "changed"
+        assert changed.digest == context_digest("changed") != first.digest
+
+    async def test_invalidate_during_a_load_is_not_stored(self):
+        cache, _ = self._cache()
+
+        async def load():
+            cache.invalidate("u1")  # project renamed mid-build
+            return RenderedContext("stale")
+
+        assert (await cache.get("u1", date(2026, 4, 6), load)).text == "stale"
+        assert len(cache) == 0
+
+    async def test_degraded_block_is_served_but_not_stored(self):
+        """A block missing its score or flow section (a timeout, rollups
+        still building) mustn't pin that gap for the whole TTL."""
+        cache, _ = self._cache()
+        renders = iter([RenderedContext("partial", degraded=True), RenderedContext("full")])
+
+        async def load():
+            return next(renders)
+
+        day = date(2026, 4, 6)
+        assert (await cache.get("u1", day, load)).text == "partial"
+        assert len(cache) == 0
+        full = await cache.get("u1", day, load)
+        assert full.text == "full"
+        assert await cache.get("u1", day, load) is full
+
+    async def test_evicts_least_recently_used(self):
+        cache, _ = self._cache(max_entries=2)
+        load, calls = self._loader("block")
+        day = date(2026, 4, 6)
+        for user in ("u1", "u2", "u1", "u3"):
+            await cache.get(user, day, load)
+        assert len(cache) == 2
+        await cache.get("u1", day, load)
+        await cache.get("u2", day, load)
+        assert len(calls) == 4
+
 
 class TestBuildUserContext:
     """build_user_context is the heavy 30-day aggregate. Tests cover
@@ -1968,9 +2406,13 @@ class TestBuildUserContext:
     async def _setup_db(self):
         """build_user_context reads from MemoryStore which uses
         Database.get_db(). Connect for the duration of the test."""
+        import asyncio
+
         await Database.connect()
         await Database.get_db()[COACH_MEMORY_COLLECTION].delete_many({})
         yield
+        # Flow rollup builds a test's first render started in the background.
+        await asyncio.gather(*context_module._flow_builds.values())
         await Database.disconnect()
 
     async def test_renders_section_headers_in_expected_order(self, monkeypatch):
@@ -1993,7 +2435,7 @@ class TestBuildUserContext:
         monkeypatch.setattr(IntelligenceService, "compute_productivity_score", fake_score)
 
         repos = _FakeCoachRepos(projects=[_project("p1", "Alpha", weekly_goal=10)])
-        result = await context_module.build_user_context("user-1", repos)
+        result = (await context_module.build_user_context("user-1", repos)).text
 
         # Expected sections in order.
         sections = [
@@ -2025,13 +2467,17 @@ class TestBuildUserContext:
         monkeypatch.setattr(IntelligenceService, "compute_productivity_score", boom)
 
         repos = _FakeCoachRepos(projects=[_project("p1", "Alpha")])
-        result = await context_module.build_user_context("user-1", repos)
-        assert "Productivity score: unavailable" in result
+        await repos.flow_rollup.mark_materialized()
+        rendered = await context_module.build_user_context("user-1", repos)
+        assert "Productivity score: unavailable" in rendered.text
+        # Not cached, so the next turn asks for the score again.
+        assert rendered.degraded
 
     async def test_flow_rollup_renders_from_daemon_windows(self, monkeypatch):
         """The 30-day flow rollup surfaces avg score + top repo/language
         from the ambient daemon's windows — the coach's automatic
         understanding of what work looked like. Pin so it doesn't drop out."""
+        import asyncio
         from datetime import UTC, datetime, timedelta
 
         from beats.domain.intelligence import IntelligenceService
@@ -2062,10 +2508,18 @@ class TestBuildUserContext:
             ),
         ]
         repos = _FakeCoachRepos(projects=[_project("p1", "Alpha")], flow_windows=windows)
-        result = await context_module.build_user_context("user-1", repos)
-        assert "### Flow (30 days, from ambient signals)" in result
-        assert "repo beats" in result
-        assert "top language python" in result
+        # The first block goes out without the section while the rollups
+        # build in the background, outside the flow timeout.
+        first = await context_module.build_user_context("user-1", repos)
+        assert "### Flow" not in first.text
+        assert first.degraded
+        await asyncio.gather(*context_module._flow_builds.values())
+
+        rendered = await context_module.build_user_context("user-1", repos)
+        assert not rendered.degraded
+        assert "### Flow (30 days, from ambient signals)" in rendered.text
+        assert "repo beats" in rendered.text
+        assert "top language python" in rendered.text
 
     async def test_no_memory_renders_empty_marker(self, monkeypatch):
         """First-run users have no coach_memory document. The context
@@ -2087,7 +2541,7 @@ class TestBuildUserContext:
         monkeypatch.setattr(IntelligenceService, "compute_productivity_score", fake_score)
 
         repos = _FakeCoachRepos(projects=[_project("p1", "Alpha")])
-        result = await context_module.build_user_context("user-1", repos)
+        result = (await context_module.build_user_context("user-1", repos)).text
         assert "(No coach memory yet" in result
 
     async def test_existing_memory_is_inlined(self, monkeypatch):
@@ -2118,7 +2572,7 @@ class TestBuildUserContext:
             await client.close()
 
         repos = _FakeCoachRepos(projects=[_project("p1", "Alpha")])
-        result = await context_module.build_user_context("user-1", repos)
+        result = (await context_module.build_user_context("user-1", repos)).text
         assert "User ships at night." in result
 
     async def test_no_goals_renders_no_goals_set(self, monkeypatch):
@@ -2138,7 +2592,7 @@ class TestBuildUserContext:
 
         # Project with no weekly_goal.
         repos = _FakeCoachRepos(projects=[_project("p1", "Alpha", weekly_goal=None)])
-        result = await context_module.build_user_context("user-1", repos)
+        result = (await context_module.build_user_context("user-1", repos)).text
         assert "(No goals set)" in result
 
 
@@ -3048,3 +3502,110 @@ class TestGatewayRetryAndMissingKey:
             )
         # Exactly MAX_RETRIES attempts (no more, no fewer)
         assert call_count["n"] == gateway.MAX_RETRIES
+
+    @staticmethod
+    def _fake_stream_client(script: list, snapshot):
+        """A client whose messages.stream() plays one entry of ``script``
+        per call: an exception raised on entry, or a list of events
+        (an exception inside the list is raised mid-stream)."""
+
+        class _FakeStream:
+            def __init__(self, events):
+                self._events = events
+                self.current_message_snapshot = snapshot
+
+            async def __aenter__(self):
+                if isinstance(self._events, Exception):
+                    raise self._events
+                return self
+
+            async def __aexit__(self, *_exc):
+                return False
+
+            async def __aiter__(self):
+                for event in self._events:
+                    if isinstance(event, Exception):
+                        raise event
+                    yield event
+
+        class _FakeMessages:
+            def __init__(self):
+                self.calls = 0
+
+            def stream(self, **_kwargs):
+                self.calls += 1
+                return _FakeStream(script.pop(0))
+
+        class _FakeClient:
+            messages = _FakeMessages()
+
+        return _FakeClient()
+
+    @staticmethod
+    def _snapshot(output_tokens: int = 50):
+        from types import SimpleNamespace
+
+        usage = SimpleNamespace(
+            input_tokens=100,
+            output_tokens=output_tokens,
+            cache_creation_input_tokens=0,
+            cache_read_input_tokens=80,
+        )
+        return SimpleNamespace(model="claude-opus-4-7", usage=usage)
+
+    async def test_stream_retries_before_the_first_event_and_records_usage_once(self, monkeypatch):
+        """A 529 on connect is retried like complete(); the usage row
+        comes from the final message snapshot, written exactly once."""
+        from types import SimpleNamespace
+
+        from beats import settings as settings_module
+        from beats.coach import gateway
+
+        monkeypatch.setattr(gateway, "BASE_DELAY_S", 0.0)
+        monkeypatch.setattr(settings_module.settings, "coach_monthly_budget_usd", 0.0)
+        events = [SimpleNamespace(type="text", text="hi"), SimpleNamespace(type="message_stop")]
+        client = self._fake_stream_client(
+            [self.__class__._make_api_error(529), events], self._snapshot()
+        )
+        monkeypatch.setattr(gateway, "_get_client", lambda: client)
+
+        seen = [
+            ev.type
+            async for ev in gateway.stream(
+                user_id="user-1", system="sys", messages=[{"role": "user", "content": "hi"}]
+            )
+        ]
+
+        assert seen == ["text", "message_stop"]
+        assert client.messages.calls == 2
+        rows = await Database.get_db()[LLM_USAGE_COLLECTION].find({}).to_list(10)
+        assert len(rows) == 1
+        assert rows[0]["output_tokens"] == 50
+        assert rows[0]["cache_read_input_tokens"] == 80
+
+    async def test_stream_does_not_retry_after_events_were_yielded(self, monkeypatch):
+        """Once text went out, a retry would replay it: the error is
+        raised instead, and the tokens generated so far are still
+        recorded."""
+        from types import SimpleNamespace
+
+        import anthropic
+
+        from beats import settings as settings_module
+        from beats.coach import gateway
+
+        monkeypatch.setattr(gateway, "BASE_DELAY_S", 0.0)
+        monkeypatch.setattr(settings_module.settings, "coach_monthly_budget_usd", 0.0)
+        events = [SimpleNamespace(type="text", text="hi"), self.__class__._make_api_error(529)]
+        client = self._fake_stream_client([events], self._snapshot(output_tokens=7))
+        monkeypatch.setattr(gateway, "_get_client", lambda: client)
+
+        with pytest.raises(anthropic.APIStatusError):
+            async for _ev in gateway.stream(
+                user_id="user-1", system="sys", messages=[{"role": "user", "content": "hi"}]
+            ):
+                pass
+
+        assert client.messages.calls == 1
+        rows = await Database.get_db()[LLM_USAGE_COLLECTION].find({}).to_list(10)
+        assert [r["output_tokens"] for r in rows] == [7]
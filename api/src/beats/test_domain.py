@@ -15,6 +15,8 @@ from beats.domain.exceptions import (
 )
 from beats.domain.models import (
     Beat,
+    BeatDailyRollup,
+    BeatRecord,
     BiometricDay,
     GoalOverride,
     GoalType,
@@ -434,7 +436,8 @@ class _FakeBeatRepo:
     """In-memory BeatRepository fake for AnalyticsService tests.
 
     Implements only the methods AnalyticsService consumes
-    (list_all_completed, list_completed_in_range). Constructed with
+    (list_all_completed, list_completed_records for rollup
+    materialization, list_completed_in_range). Constructed with
     a fixed list of beats; deterministic, no Mongo.
     """
 
@@ -444,6 +447,13 @@ class _FakeBeatRepo:
     async def list_all_completed(self) -> list[Beat]:
         return [b for b in self._beats if b.end is not None]
 
+    async def list_completed_records(self) -> list[BeatRecord]:
+        return [
+            BeatRecord(b.project_id, b.start, b.end, tuple(b.tags), id=b.id)
+            for b in self._beats
+            if b.end is not None
+        ]
+
     async def list_completed_in_range(self, start: date, end: date) -> list[Beat]:
         return [b for b in self._beats if b.end is not None and start <= b.start.date() <= end]
 
@@ -880,6 +890,353 @@ class TestAnalyticsUntrackedGaps:
         assert out == []
 
 
+# =============================================================================
+# Daily beat rollups — materialized heatmap/rhythm inputs
+# =============================================================================
+
+
+class _FakeRollupRepo:
+    """In-memory BeatRollupRepository fake with the Mongo implementation's
+    semantics: rows track the beats they count and the ones writes took
+    out, guarding apply() and merge() the same way, and emptied rows stay
+    at zero but are left out of list_range."""
+
+    def __init__(self):
+        self.rows: dict[tuple, BeatDailyRollup] = {}
+        self.removed: dict[tuple, set[str]] = {}
+        self.timezones: set[str] = set()
+        self.built: set[str] = set()
+        self.rebuilds = 0
+
+    async def materialized_timezones(self) -> list[str]:
+        return sorted(self.timezones)
+
+    async def built_timezones(self) -> list[str]:
+        return sorted(self.built)
+
+    async def start_build(self, tz: str) -> None:
+        self.timezones.add(tz)
+        self.rebuilds += 1
+
+    async def mark_built(self, tz: str) -> None:
+        self.built.add(tz)
+
+    def _add(self, r: BeatDailyRollup, *, build: bool) -> bool:
+        key = (r.tz, r.local_date, r.project_id, r.tag)
+        empty = BeatDailyRollup(
+            local_date=r.local_date, tz=r.tz, project_id=r.project_id, tag=r.tag
+        )
+        acc = self.rows.get(key, empty)
+        removed = self.removed.setdefault(key, set())
+        if any(i in acc.contributions or (build and i in removed) for i in r.contributions):
+            return False
+        self.rows[key] = acc
+        acc.seconds += r.seconds
+        acc.session_count += r.session_count
+        acc.slot_minutes = [a + b for a, b in zip(acc.slot_minutes, r.slot_minutes, strict=True)]
+        acc.contributions.update(r.contributions)
+        removed.difference_update(r.contributions)
+        return True
+
+    async def merge(self, rollups: list[BeatDailyRollup]) -> list[BeatDailyRollup]:
+        return [r for r in rollups if not self._add(r, build=True)]
+
+    async def apply(self, rollups: list[BeatDailyRollup], sign: int = 1) -> None:
+        for r in rollups:
+            if sign > 0:
+                self._add(r, build=False)
+                continue
+            key = (r.tz, r.local_date, r.project_id, r.tag)
+            acc = self.rows.get(key)
+            if acc is not None and r.contributions.items() <= acc.contributions.items():
+                acc.seconds -= r.seconds
+                acc.session_count -= r.session_count
+                acc.slot_minutes = [
+                    a - b for a, b in zip(acc.slot_minutes, r.slot_minutes, strict=True)
+                ]
+                for i in r.contributions:
+                    del acc.contributions[i]
+            if acc is None or not acc.contributions.keys() & r.contributions.keys():
+                self.removed.setdefault(key, set()).update(r.contributions)
+
+    async def list_range(self, tz, start=None, end=None, project_id=None, tag=""):
+        return sorted(
+            (
+                r
+                for r in self.rows.values()
+                if r.tz == tz
+                and r.tag == tag
+                and r.session_count > 0
+                and (start is None or r.local_date >= start)
+                and (end is None or r.local_date <= end)
+                and (not project_id or r.project_id == project_id)
+            ),
+            key=lambda r: r.local_date,
+        )
+
+    async def delete_all(self) -> int:
+        count = len(self.rows) + len(self.timezones)
+        self.rows.clear()
+        self.removed.clear()
+        self.timezones.clear()
+        self.built.clear()
+        return count
+
+
+def _rollup_snapshot(rows) -> dict[tuple, tuple]:
+    """Compare rollups by value, tolerant of float summation order; rows
+    emptied to zero count as absent."""
+    return {
+        (r.tz, r.local_date, r.project_id, r.tag): (
+            round(r.seconds, 6),
+            r.session_count,
+            tuple(round(m, 6) for m in r.slot_minutes),
+        )
+        for r in rows
+        if r.session_count
+    }
+
+
+_ROLLUP_BEATS = [
+    _beat("2026-01-01T23:30:00", 90, project_id="p1", tags=["focus"]),
+    _beat("2026-01-02T09:00:00", 45, project_id="p2", tags=["focus", "focus"]),
+    _beat("2026-01-02T10:10:00", 20, project_id="p1", tags=["meeting"]),
+    _beat("2026-03-15T14:45:00", 200, project_id="p2"),
+    _beat("2025-12-31T22:00:00", 180, project_id="p1", tags=["focus"]),
+]
+
+
+class TestBeatRollups:
+    """The rollup path must be an exact stand-in for folding raw beats:
+    same heatmap days, same rhythm slots, across timezones and filters —
+    and it must stay exact as beats are written after materialization."""
+
+    @pytest.mark.parametrize("tz_name", ["UTC", "America/New_York", "Asia/Tokyo"])
+    @pytest.mark.parametrize(
+        "filters", [{}, {"project_id": "p2"}, {"tag": "focus"}, {"tag": "missing"}]
+    )
+    async def test_heatmap_matches_raw_beats(self, tz_name, filters):
+        tz = ZoneInfo(tz_name)
+        raw = AnalyticsService(_FakeBeatRepo(_ROLLUP_BEATS))  # type: ignore[arg-type]
+        rolled = AnalyticsService(
+            _FakeBeatRepo(_ROLLUP_BEATS),  # type: ignore[arg-type]
+            rollup_repo=_FakeRollupRepo(),  # type: ignore[arg-type]
+        )
+        for year in (2025, 2026):
+            assert await rolled.get_heatmap(year, tz=tz, **filters) == await raw.get_heatmap(
+                year, tz=tz, **filters
+            )
+
+    @pytest.mark.parametrize("period", ["all", "week", "month"])
+    @pytest.mark.parametrize("tz_name", ["UTC", "Asia/Tokyo"])
+    async def test_rhythm_matches_raw_beats(self, period, tz_name):
+        tz = ZoneInfo(tz_name)
+        now = datetime.now(UTC).replace(minute=0, second=0, microsecond=0, tzinfo=None)
+        beats = [
+            *_ROLLUP_BEATS,
+            _beat((now - timedelta(hours=3)).isoformat(), 50, project_id="p1", tags=["focus"]),
+            _beat((now - timedelta(days=2)).isoformat(), 25, project_id="p2"),
+        ]
+        raw = AnalyticsService(_FakeBeatRepo(beats))  # type: ignore[arg-type]
+        rolled = AnalyticsService(
+            _FakeBeatRepo(beats),  # type: ignore[arg-type]
+            rollup_repo=_FakeRollupRepo(),  # type: ignore[arg-type]
+        )
+        for filters in ({}, {"project_id": "p1"}, {"tag": "focus"}):
+            assert await rolled.get_daily_rhythm(
+                period, tz=tz, **filters
+            ) == await raw.get_daily_rhythm(period, tz=tz, **filters)
+
+    async def test_materializes_once_per_timezone(self):
+        rollups = _FakeRollupRepo()
+        svc = AnalyticsService(
+            _FakeBeatRepo(_ROLLUP_BEATS),  # type: ignore[arg-type]
+            rollup_repo=rollups,  # type: ignore[arg-type]
+        )
+        await svc.get_heatmap(2026)
+        await svc.get_daily_rhythm()
+        assert rollups.rebuilds == 1
+        await svc.get_heatmap(2026, tz=ZoneInfo("Asia/Tokyo"))
+        assert rollups.rebuilds == 2
+        assert await rollups.materialized_timezones() == ["Asia/Tokyo", "UTC"]
+
+    def test_duplicate_tags_count_a_session_once(self):
+        from beats.domain.rollups import rollups_for_beat
+
+        rows = rollups_for_beat(_beat("2026-01-02T09:00:00", 45, tags=["a", "a"]), ZoneInfo("UTC"))
+        assert [r.tag for r in rows] == ["", "a"]
+        assert all(r.session_count == 1 for r in rows)
+
+    @pytest.mark.parametrize("tz_name", ["UTC", "Asia/Tokyo"])
+    def test_records_build_the_same_rollups_as_beats(self, tz_name):
+        from beats.domain.rollups import build_rollups
+
+        tz = ZoneInfo(tz_name)
+        records = [BeatRecord(b.project_id, b.start, b.end, tuple(b.tags)) for b in _ROLLUP_BEATS]
+        assert _rollup_snapshot(build_rollups(records, tz)) == _rollup_snapshot(
+            build_rollups(_ROLLUP_BEATS, tz)
+        )
+
+    def test_running_beat_contributes_nothing(self):
+        from beats.domain.rollups import rollups_for_beat
+
+        running = Beat(project_id="p1", start=datetime(2026, 1, 1, 9, tzinfo=UTC))
+        assert rollups_for_beat(running, ZoneInfo("UTC")) == []
+
+    async def _materialized(self, beats: list[Beat]) -> _FakeRollupRepo:
+        from beats.domain.rollups import ensure_materialized
+
+        rollups = _FakeRollupRepo()
+        for name in ("UTC", "Asia/Tokyo"):
+            await ensure_materialized(rollups, _FakeBeatRepo(beats), ZoneInfo(name))  # type: ignore[arg-type]
+        return rollups
+
+    async def _assert_in_sync(self, rollups: _FakeRollupRepo, beats: list[Beat]) -> None:
+        from beats.domain.rollups import build_rollups
+
+        for name in ("UTC", "Asia/Tokyo"):
+            expected = build_rollups(beats, ZoneInfo(name))
+            actual = [r for r in rollups.rows.values() if r.tz == name]
+            assert _rollup_snapshot(actual) == _rollup_snapshot(expected)
+
+    async def test_beat_service_writes_keep_rollups_in_sync(self):
+        from beats.domain.services import BeatService
+
+        beats = [b.model_copy() for b in _ROLLUP_BEATS]
+        repo = _FakeBeatRepoForServices(beats)
+        rollups = await self._materialized(beats)
+        svc = BeatService(beat_repo=repo, rollup_repo=rollups)  # type: ignore[arg-type]
+
+        created = await svc.create_beat(_beat("2026-01-02T20:00:00", 30, project_id="p3"))
+        await self._assert_in_sync(rollups, repo._beats)
+
+        moved = created.model_copy(
+            update={
+                "start": datetime(2026, 1, 5, 8, tzinfo=UTC),
+                "end": datetime(2026, 1, 5, 9, tzinfo=UTC),
+            }
+        )
+        await svc.update_beat(moved)
+        await self._assert_in_sync(rollups, repo._beats)
+
+        await svc.delete_beat(beats[0].id)
+        await self._assert_in_sync(rollups, repo._beats)
+
+    async def test_writes_during_the_first_build_are_counted_once(self):
+        """Writes landing between the build's scan and its merge — and one
+        the scan already saw but whose delta lands after the merge — leave
+        the rollups exactly as a fresh build would."""
+        from beats.domain.rollups import ensure_materialized, record_beat_change
+        from beats.domain.services import BeatService
+
+        beats = [b.model_copy() for b in _ROLLUP_BEATS]
+        repo = _FakeBeatRepoForServices(beats)
+        rollups = _FakeRollupRepo()
+        svc = BeatService(beat_repo=repo, rollup_repo=rollups)  # type: ignore[arg-type]
+        tz = ZoneInfo("America/New_York")
+
+        # Stored before the scan; its delta arrives after the build.
+        late_before = beats[4]
+        late_after = late_before.model_copy(update={"end": late_before.end + timedelta(hours=1)})
+        await repo.update(late_after)
+
+        class _RacingBeatRepo(_FakeBeatRepo):
+            async def list_completed_records(self):
+                snapshot = await super().list_completed_records()
+                await svc.create_beat(_beat("2026-01-04T08:00:00", 30, project_id="p3"))
+                grown = beats[1].model_copy(update={"end": beats[1].end + timedelta(minutes=15)})
+                await svc.update_beat(grown)
+                moved = beats[2].model_copy(
+                    update={
+                        "start": datetime(2026, 1, 6, 8, tzinfo=UTC),
+                        "end": datetime(2026, 1, 6, 9, tzinfo=UTC),
+                    }
+                )
+                await svc.update_beat(moved)
+                await svc.delete_beat(beats[3].id)
+                return snapshot
+
+        await ensure_materialized(rollups, _RacingBeatRepo(repo._beats), tz)  # type: ignore[arg-type]
+        await record_beat_change(rollups, late_before, late_after)
+
+        from beats.domain.rollups import build_rollups
+
+        expected = build_rollups(repo._beats, tz)
+        assert _rollup_snapshot(rollups.rows.values()) == _rollup_snapshot(expected)
+        assert await rollups.built_timezones() == [tz.key]
+
+    async def test_update_of_unknown_beat_leaves_rollups_alone(self):
+        from beats.domain.services import BeatService
+
+        repo = _FakeBeatRepoForServices([])
+        rollups = await self._materialized([])
+        svc = BeatService(beat_repo=repo, rollup_repo=rollups)  # type: ignore[arg-type]
+        assert await svc.delete_beat("nope") is False
+        assert rollups.rows == {}
+
+    async def test_timer_stop_applies_the_finished_session(self):
+        from beats.domain.services import TimerService
+
+        project = Project(id="p1", name="P1")
+        running = Beat(id="run", project_id="p1", start=datetime(2026, 1, 3, 9, tzinfo=UTC))
+        repo = _FakeBeatRepoForServices([running])
+        rollups = await self._materialized([])
+        svc = TimerService(
+            beat_repo=repo,  # type: ignore[arg-type]
+            project_repo=_FakeProjectRepoForServices([project]),  # type: ignore[arg-type]
+            rollup_repo=rollups,  # type: ignore[arg-type]
+        )
+        await svc.stop_timer(datetime(2026, 1, 3, 10, tzinfo=UTC))
+        await self._assert_in_sync(rollups, repo._beats)
+        assert sum(r.session_count for r in rollups.rows.values() if r.tag == "") == 2
+
+    async def test_discard_rollups_forces_a_rebuild(self):
+        from beats.domain.services import BeatService
+
+        rollups = await self._materialized(list(_ROLLUP_BEATS))
+        svc = BeatService(
+            beat_repo=_FakeBeatRepoForServices([]),  # type: ignore[arg-type]
+            rollup_repo=rollups,  # type: ignore[arg-type]
+        )
+        await svc.discard_rollups()
+        assert rollups.rows == {}
+        assert await rollups.materialized_timezones() == []
+
+    async def test_writes_call_on_change(self):
+        from beats.domain.services import BeatService, TimerService
+
+        calls: list[str] = []
+        project = Project(id="p1", name="P1")
+        repo = _FakeBeatRepoForServices([])
+        timer = TimerService(
+            beat_repo=repo,  # type: ignore[arg-type]
+            project_repo=_FakeProjectRepoForServices([project]),  # type: ignore[arg-type]
+            on_change=lambda: calls.append("timer"),
+        )
+        beats = BeatService(beat_repo=repo, on_change=lambda: calls.append("beat"))  # type: ignore[arg-type]
+        await timer.start_timer("p1", datetime(2026, 1, 3, 9, tzinfo=UTC))
+        stopped = await timer.stop_timer(datetime(2026, 1, 3, 10, tzinfo=UTC))
+        await beats.delete_beat("nope")
+        await beats.delete_beat(stopped.id or "")
+        assert calls == ["timer", "timer", "beat"]
+
+    async def test_project_writes_call_on_change(self):
+        from beats.domain.services import ProjectService
+
+        calls: list[str] = []
+        svc = ProjectService(
+            project_repo=_FakeProjectRepoForServices([]),  # type: ignore[arg-type]
+            beat_repo=_FakeBeatRepoForServices([]),  # type: ignore[arg-type]
+            on_change=lambda: calls.append("project"),
+        )
+        project = await svc.create_project(Project(name="P1"))
+        await svc.update_project(project.model_copy(update={"weekly_goal": 5.0}))
+        await svc.archive_project(project.id or "")
+        await svc.unarchive_project(project.id or "")
+        await svc.list_projects()
+        assert calls == ["project"] * 4
+
+
 # IntelligenceService test scaffolding
 # ---------------------------------------------------------------------
 
@@ -888,6 +1245,12 @@ class _FakeIntelBeatRepo(_FakeBeatRepo):
     """Extends _FakeBeatRepo with the methods IntelligenceService
     consumes beyond what AnalyticsService needs."""
 
+    async def list_completed_documents(self, start: date, end: date) -> list[dict]:
+        return [
+            {"start": b.start, "end": b.end, "project_id": b.project_id, "tags": b.tags}
+            for b in await self.list_completed_in_range(start, end)
+        ]
+
 
 class _FakeProjectRepo:
     """Returns a fixed project list, optionally filtered by archived."""
@@ -2597,6 +2960,252 @@ class TestGetProjectHealth:
         assert result[1]["alert"] is None
 
 
+class _CountingIntelBeatRepo(_FakeIntelBeatRepo):
+    """Counts range queries so snapshot tests can pin round-trips."""
+
+    def __init__(self, beats: list[Beat]):
+        super().__init__(beats)
+        self.range_calls = 0
+
+    async def list_completed_in_range(self, start: date, end: date) -> list[Beat]:
+        self.range_calls += 1
+        return await super().list_completed_in_range(start, end)
+
+
+class _CountingProjectRepo(_FakeProjectRepo):
+    def __init__(self, projects: list):
+        super().__init__(projects)
+        self.list_calls = 0
+
+    async def list(self, archived: bool = False) -> list:
+        self.list_calls += 1
+        return await super().list(archived=archived)
+
+
+class TestBeatSnapshot:
+    """A request-scoped BeatSnapshot lets the Inbox's suggestions, project
+    health and focus scoring share one beats query and one projects query.
+    The snapshot must slice exactly like list_completed_in_range, or the
+    composite endpoint would drift from the standalone ones."""
+
+    @staticmethod
+    def _at(d: date, hour: int) -> datetime:
+        return datetime.combine(d, datetime.min.time(), tzinfo=UTC).replace(hour=hour)
+
+    def _history(self, today: date) -> tuple[list[Beat], list]:
+        beats = []
+        for days_ago in (0, 1, 3, 7, 14, 20, 27, 35, 49, 56, 70):
+            d = today - timedelta(days=days_ago)
+            pid = "p1" if days_ago % 2 else "p2"
+            # One beat late in the UTC day so the local date in a
+            # positive-offset tz differs from its UTC date.
+            beats.append(
+                Beat(id=f"b{days_ago}", project_id=pid, start=self._at(d, 22), end=self._at(d, 23))
+            )
+        projects = [
+            _project("p1", "Alpha", weekly_goal=10.0),
+            _project("p2", "Beta", weekly_goal=3.0),
+            _project("p3", "Gone", archived=True),
+        ]
+        return beats, projects
+
+    def test_slices_like_the_repository_query(self):
+        from beats.domain.snapshot import BeatSnapshot
+
+        today = date(2026, 5, 1)
+        beats, _ = self._history(today)
+        snap = BeatSnapshot(
+            start=today - timedelta(days=30),
+            end=today,
+            tz=ZoneInfo("UTC"),
+            beats=tuple(reversed(beats)),
+            projects=(),
+        )
+        got = snap.completed_in_range(today - timedelta(days=7), today - timedelta(days=1))
+        assert [b.id for b in got] == ["b7", "b3", "b1"]
+        assert snap.covers(today - timedelta(days=30), today)
+        assert not snap.covers(today - timedelta(days=31), today)
+
+    async def test_local_day_is_precomputed_in_snapshot_tz(self):
+        from beats.domain.snapshot import BeatSnapshot
+
+        tz = ZoneInfo("Asia/Tokyo")
+        today = date(2026, 5, 1)
+        beats, projects = self._history(today)
+        snap = await BeatSnapshot.load(
+            _FakeIntelBeatRepo(beats),
+            _FakeProjectRepo(projects),
+            today - timedelta(days=80),
+            today + timedelta(days=1),
+            tz,
+        )
+        assert [p.id for p in snap.projects] == ["p1", "p2"]
+        for b in snap.beats:
+            assert snap.local_day(b) == local_date(b.start, tz)
+
+    @pytest.mark.parametrize("tz_name", ["UTC", "Asia/Tokyo", "America/Los_Angeles"])
+    async def test_results_match_unsnapshotted_calls(self, tz_name):
+        tz = ZoneInfo(tz_name)
+        today = datetime.now(tz).date()
+        beats, projects = self._history(today)
+        svc = _intel_service(beats=beats, projects=projects)
+        snap = await svc.load_snapshot(today, tz=tz)
+
+        assert await svc.suggest_daily_plan(
+            today, tz=tz, snapshot=snap
+        ) == await svc.suggest_daily_plan(today, tz=tz)
+        assert await svc.get_project_health(tz=tz, snapshot=snap) == await svc.get_project_health(
+            tz=tz
+        )
+        yesterday = today - timedelta(days=1)
+        assert await svc.compute_focus_scores(
+            yesterday, tz=tz, snapshot=snap
+        ) == await svc.compute_focus_scores(yesterday, tz=tz)
+
+    async def test_snapshot_collapses_round_trips(self):
+        """Suggestions + project health + focus scores off one snapshot:
+        one beats query and one projects query in total."""
+        from beats.domain.intelligence import IntelligenceService
+
+        today = datetime.now(UTC).date()
+        beats, projects = self._history(today)
+        beat_repo = _CountingIntelBeatRepo(beats)
+        project_repo = _CountingProjectRepo(projects)
+        svc = IntelligenceService(beat_repo=beat_repo, project_repo=project_repo)
+
+        snap = await svc.load_snapshot(today)
+        await svc.suggest_daily_plan(today, snapshot=snap)
+        await svc.get_project_health(snapshot=snap)
+        await svc.compute_focus_scores(today, snapshot=snap)
+
+        assert beat_repo.range_calls == 1
+        assert project_repo.list_calls == 1
+
+    async def test_falls_back_to_repo_outside_the_window(self):
+        """A window the snapshot doesn't cover is queried, not truncated."""
+        from beats.domain.intelligence import IntelligenceService
+
+        today = datetime.now(UTC).date()
+        beats, projects = self._history(today)
+        beat_repo = _CountingIntelBeatRepo(beats)
+        svc = IntelligenceService(beat_repo=beat_repo, project_repo=_FakeProjectRepo(projects))
+        snap = await svc.load_snapshot(today - timedelta(days=60))
+
+        result = await svc.compute_focus_scores(today, snapshot=snap)
+        assert [r["beat_id"] for r in result] == ["b0"]
+        assert beat_repo.range_calls == 3
+
+
+class TestBeatFrame:
+    """BeatFrame is the columnar view the score, digest, pattern and
+    health math runs on. It must agree with the per-Beat derivations it
+    replaced: local dates in the requested tz, exact durations, and a
+    start-sorted layout so date ranges are contiguous slices."""
+
+    TOKYO = ZoneInfo("Asia/Tokyo")
+
+    def _docs(self) -> list[dict]:
+        # Raw timeLogs shape: naive UTC datetimes, unordered, one running.
+        return [
+            {
+                "start": datetime(2026, 5, 1, 16),
+                "end": datetime(2026, 5, 1, 17),
+                "project_id": "p2",
+                "tags": ["deep"],
+            },
+            {
+                "start": datetime(2026, 5, 1, 9),
+                "end": datetime(2026, 5, 1, 9, 30),
+                "project_id": "p1",
+                "tags": ["deep", "review"],
+            },
+            {
+                "start": datetime(2026, 5, 1, 9, 33),
+                "end": datetime(2026, 5, 1, 10),
+                "project_id": "p1",
+            },
+            {"start": datetime(2026, 5, 2, 8), "end": None, "project_id": "p1"},
+        ]
+
+    def test_from_documents_sorts_localizes_and_skips_running(self):
+        from beats.domain.beat_frame import BeatFrame
+
+        frame = BeatFrame.from_documents(self._docs(), self.TOKYO)
+        assert len(frame) == 3
+        assert list(frame.seconds) == [1800.0, 1620.0, 3600.0]
+        # 16:00 UTC is 01:00 the next day in Tokyo.
+        assert [date.fromordinal(o) for o in frame.day] == [
+            date(2026, 5, 1),
+            date(2026, 5, 1),
+            date(2026, 5, 2),
+        ]
+        assert list(frame.hour) == [18, 18, 1]
+        assert [frame.project_ids[c] for c in frame.project] == ["p1", "p1", "p2"]
+        deep = frame.tag_mask("deep")
+        assert [bool(m & deep) for m in frame.tags] == [True, False, True]
+        assert frame.tag_mask("absent") == 0
+
+    def test_from_beats_matches_from_documents(self):
+        from beats.domain.beat_frame import BeatFrame
+
+        docs = [d for d in self._docs() if d["end"] is not None]
+        beats = [Beat(**d) for d in docs]
+        a = BeatFrame.from_documents(docs, self.TOKYO)
+        b = BeatFrame.from_beats(beats, self.TOKYO)
+        assert (a.start_us, a.end_us, a.seconds, a.day) == (b.start_us, b.end_us, b.seconds, b.day)
+
+    def test_span_and_aggregations(self):
+        from beats.domain.beat_frame import BeatFrame
+
+        frame = BeatFrame.from_documents(self._docs(), self.TOKYO)
+        first = frame.span(date(2026, 5, 1), date(2026, 5, 1))
+        assert frame.seconds_by_project(first) == {"p1": 3420.0}
+        assert frame.sessions_by_project(first) == {"p1": 2}
+        assert frame.seconds_by_project(frame.span(date(2026, 5, 2))) == {"p2": 3600.0}
+        assert frame.days() == {date(2026, 5, 1), date(2026, 5, 2)}
+        assert frame.seconds_by_day() == {date(2026, 5, 1): 3420.0, date(2026, 5, 2): 3600.0}
+        assert frame.seconds_by_block(2) == {9: 3420.0, 0: 3600.0}
+        assert frame.last_day_by_project() == {"p1": date(2026, 5, 1), "p2": date(2026, 5, 2)}
+
+    def test_short_gaps_only_count_same_day_neighbours(self):
+        """The 3-minute gap between the two p1 sessions counts; the
+        jump to the next local day never does, however short."""
+        from beats.domain.beat_frame import BeatFrame
+
+        frame = BeatFrame.from_documents(self._docs(), self.TOKYO)
+        assert frame.short_gaps(5) == 1
+        assert frame.short_gaps(3) == 0
+        late = [
+            {"start": datetime(2026, 5, 1, 14), "end": datetime(2026, 5, 1, 14, 58)},
+            {"start": datetime(2026, 5, 1, 15), "end": datetime(2026, 5, 1, 15, 30)},
+        ]
+        # 23:58 and 00:00 Tokyo — two minutes apart but different days.
+        assert BeatFrame.from_documents(late, self.TOKYO).short_gaps(5) == 0
+
+    async def test_long_score_history_loads_once(self):
+        """A year of weekly scores is one documents query and a bisected
+        slice per week — not a rescan of every beat for every week."""
+        from beats.domain.intelligence import IntelligenceService
+
+        class _CountingDocsRepo(_FakeIntelBeatRepo):
+            calls = 0
+
+            async def list_completed_documents(self, start, end):
+                type(self).calls += 1
+                return await super().list_completed_documents(start, end)
+
+        today = datetime.now(UTC).date()
+        beats = [_beat(f"{today - timedelta(days=d)}T09:00:00", 45, "p1") for d in range(7, 365, 3)]
+        repo = _CountingDocsRepo(beats)
+        svc = IntelligenceService(
+            beat_repo=repo, project_repo=_FakeProjectRepo([_project("p1", weekly_goal=2.0)])
+        )
+        history = await svc.compute_productivity_score_history(weeks=52)
+        assert len(history) == 52
+        assert repo.calls == 1
+        assert all(0 < h["score"] <= 100 for h in history)
+
+
 # =============================================================================
 # Domain Services — TimerService, BeatService, ProjectService
 # =============================================================================
@@ -2670,6 +3279,11 @@ class _FakeBeatRepoForServices:
     async def list_by_project(self, project_id: str) -> list[Beat]:
         return [b for b in self._beats if b.project_id == project_id]
 
+    async def search(self, terms, limit, after=None):
+        from beats.domain.beat_search import search_page
+
+        return search_page(self._beats, terms, limit, after)
+
     async def list_grouped_by_project_ids(self, project_ids: list[str]) -> dict[str, list[Beat]]:
         # Mirror the real repo: every requested id is present in the result
         # (empty list when no beats), and unsolicited project_ids are not.
@@ -2680,6 +3294,47 @@ class _FakeBeatRepoForServices:
                 buckets[b.project_id].append(b)
         return buckets
 
+    async def sum_durations(
+        self, project_id, unit="day", start=None, end=None, tz="UTC", include_active=False
+    ):
+        # Python mirror of the Mongo $dateTrunc pipeline.
+        from beats.domain.models import BeatDurationBucket
+
+        zone = ZoneInfo(tz)
+        buckets: dict[date, BeatDurationBucket] = {}
+        for b in self._beats:
+            if b.project_id != project_id or (b.end is None and not include_active):
+                continue
+            day = local_date(b.start, zone)
+            if (start is not None and day < start) or (end is not None and day > end):
+                continue
+            key = day if unit == "day" else day.replace(day=1)
+            acc = buckets.setdefault(key, BeatDurationBucket(start=key))
+            acc.duration += b.duration
+            acc.session_count += 1
+        return [buckets[k] for k in sorted(buckets)]
+
+    async def daily_totals(self, start, end, tz="UTC"):
+        from beats.domain.models import BeatDurationBucket
+
+        zone = ZoneInfo(tz)
+        buckets: dict[date, BeatDurationBucket] = {}
+        for b in self._beats:
+            day = local_date(b.start, zone)
+            if b.end is None or not start <= day <= end:
+                continue
+            acc = buckets.setdefault(day, BeatDurationBucket(start=day))
+            acc.duration += b.duration
+            acc.session_count += 1
+        return [buckets[k] for k in sorted(buckets)]
+
+    async def list_longer_than(self, project_id: str, threshold: timedelta) -> list[Beat]:
+        return [
+            b
+            for b in self._beats
+            if b.project_id == project_id and b.end is not None and b.duration > threshold
+        ]
+
 
 class _FakeProjectRepoForServices:
     """In-memory ProjectRepository fake."""
@@ -2872,6 +3527,194 @@ class TestSummarizeFlow:
         assert fs.peak_score == 0.8
 
 
+class TestFlowRollups:
+    """Hourly flow rollups hold enough to answer what the raw-window
+    reductions answer: summarize_flow's headline, per-bucket series
+    stats, and the chronotype label."""
+
+    def _windows(self):
+        from beats.domain.models import FlowWindow
+
+        start = datetime(2026, 4, 6, 22, 0, tzinfo=UTC)  # a Monday
+        rows = [
+            (0, 0.8, "/home/me/beats", "Python"),
+            (5, 0.6, "/home/me/beats", "python"),
+            (30, 0.0, "/home/me/beats", "Python"),  # drift marker
+            (70, 1.0, "acme/widgets", "Go"),
+            (75, 0.4, None, None),
+            (26 * 60, 0.5, "acme/widgets", "Go"),
+        ]
+        return [
+            FlowWindow(
+                device_id="d",
+                window_start=start + timedelta(minutes=m),
+                window_end=start + timedelta(minutes=m + 1),
+                flow_score=score,
+                editor_repo=repo,
+                editor_language=lang,
+            )
+            for m, score, repo, lang in rows
+        ]
+
+    def test_summary_matches_summarize_flow(self):
+        from beats.domain.flow import summarize_flow
+        from beats.domain.flow_rollups import build_flow_rollups, summarize_rollups
+
+        windows = self._windows()
+        rollups = build_flow_rollups(windows)
+        assert [r.hour.hour for r in rollups] == [22, 23, 0]
+        assert rollups[0].drift_count == 1
+        assert rollups[0].repo_counts == {"/home/me/beats": 2}
+        assert rollups[0].language_counts == {"python": 2}
+        assert summarize_rollups(rollups) == summarize_flow(windows)
+        assert summarize_rollups([]) is None
+
+    def test_series_buckets_are_local(self):
+        from beats.domain.flow_rollups import build_flow_rollups, flow_series
+
+        rollups = build_flow_rollups(self._windows())
+        hourly = flow_series(rollups, "hour", ZoneInfo("UTC"))
+        assert [(p.start.hour, p.count) for p in hourly] == [(22, 3), (23, 2), (0, 1)]
+        first = hourly[0]
+        assert first.avg == pytest.approx(1.4 / 3)
+        assert first.stddev == pytest.approx((1.0 / 3 - (1.4 / 3) ** 2) ** 0.5)
+        assert (first.peak, first.drift_count) == (0.8, 1)
+        assert (first.top_repo, first.top_language) == ("/home/me/beats", "python")
+
+        # In UTC the windows span Monday and Wednesday; in Berlin (UTC+2)
+        # they start on Tuesday, and all fall in the same week.
+        daily = flow_series(rollups, "day", ZoneInfo("UTC"))
+        assert [(p.start.day, p.count) for p in daily] == [(6, 5), (8, 1)]
+        berlin = ZoneInfo("Europe/Berlin")
+        daily = flow_series(rollups, "day", berlin)
+        assert [(p.start.day, p.count) for p in daily] == [(7, 5), (8, 1)]
+        assert daily[0].start == datetime(2026, 4, 7, tzinfo=berlin)
+        [week] = flow_series(rollups, "week", berlin)
+        assert (week.start.day, week.count, week.top_repo) == (6, 6, "acme/widgets")
+
+    def test_chronotype_from_rollups_agrees_with_raw(self):
+        from beats.domain.flow_rollups import build_flow_rollups
+        from beats.domain.intelligence import detect_chronotype, detect_chronotype_from_rollups
+
+        windows = []
+        for d in range(14):
+            day = date(2026, 4, 1) + timedelta(days=d)
+            windows += [_flow_window(day=day, hour=h, score=0.9) for h in range(19, 22)]
+            windows += [_flow_window(day=day, hour=h, score=0.1) for h in range(8, 12)]
+        [raw] = detect_chronotype(windows)
+        [rolled] = detect_chronotype_from_rollups(build_flow_rollups(windows))
+        assert rolled.data == raw.data
+        assert rolled.data["label"] == "evening"
+        assert detect_chronotype_from_rollups(build_flow_rollups(windows[:40])) == []
+
+    def test_retention_cutoffs_align_to_utc_midnight(self):
+        from beats.infrastructure.flow_retention import retention_cutoffs
+
+        now = datetime(2026, 4, 6, 1, 30, tzinfo=ZoneInfo("Europe/Berlin"))  # 23:30Z on the 5th
+        cutoffs = retention_cutoffs(now, raw_days=90, hourly_days=400)
+        assert cutoffs.raw == datetime(2026, 1, 5, tzinfo=UTC)
+        assert cutoffs.hourly == datetime(2025, 3, 1, tzinfo=UTC)
+        # Hours aren't compacted ahead of their raw windows' expiry.
+        assert retention_cutoffs(now, raw_days=90, hourly_days=30).hourly == cutoffs.raw
+
+    def test_compacted_days_keep_their_utc_date(self):
+        """A daily-tier row only knows its UTC day; a negative-offset zone
+        must not shift it onto the previous local day."""
+        from beats.domain.flow_rollups import flow_series
+        from beats.domain.models import FlowHourlyRollup
+
+        day = FlowHourlyRollup(
+            hour=datetime(2025, 1, 7, tzinfo=UTC), count=4, score_sum=2.0, compacted=True
+        )
+        new_york = ZoneInfo("America/New_York")
+        [point] = flow_series([day], "day", new_york)
+        assert point.start == datetime(2025, 1, 7, tzinfo=new_york)
+        [point] = flow_series([day], "hour", new_york)
+        assert point.start == datetime(2025, 1, 7, tzinfo=new_york)
+        [week] = flow_series([day], "week", new_york)
+        assert week.start == datetime(2025, 1, 6, tzinfo=new_york)
+
+    def test_stats_from_rollups_match_the_raw_reduction(self):
+        from beats.domain.flow_rollups import build_flow_rollups, stats_from_rollups
+
+        windows = self._windows()
+        stats = stats_from_rollups(build_flow_rollups(windows))
+        scores = [w.flow_score for w in windows]
+        assert stats.count == len(windows)
+        assert stats.avg == pytest.approx(sum(scores) / len(scores))
+        assert (stats.peak, stats.peak_at) == (1.0, datetime(2026, 4, 6, 23, tzinfo=UTC))
+        # Focused windows only: the drift marker leaves beats tied with
+        # acme on count, and acme's higher average breaks the tie.
+        assert (stats.top_repo.key, stats.top_repo.count) == ("acme/widgets", 2)
+        assert stats.top_repo.avg == pytest.approx(0.75)
+        assert stats.top_language.key == "go"
+        assert stats.top_bundle is None
+        assert stats_from_rollups([]).count == 0
+
+
+class TestDeviceStatusCache:
+    """The wall clock's status is served from this cache between writes;
+    a stale entry is the clock showing a stopped timer as running."""
+
+    def _cache(self, **kwargs):
+        from beats.domain.device_status import DeviceStatusCache
+
+        clock = {"now": 1000.0}
+        return DeviceStatusCache(clock=lambda: clock["now"], **kwargs), clock
+
+    def _loader(self, day: date, tz: str = "UTC"):
+        from beats.domain.device_status import DeviceStatusSnapshot
+
+        calls: list[date] = []
+
+        async def load():
+            calls.append(day)
+            return DeviceStatusSnapshot(day=day, tz=tz, completed_seconds=60.0 * len(calls))
+
+        return load, calls
+
+    async def test_hit_until_invalidated_expired_or_another_day(self):
+        cache, clock = self._cache(ttl_seconds=15)
+        monday, tuesday = date(2026, 4, 6), date(2026, 4, 7)
+        load, calls = self._loader(monday)
+        first = await cache.get("u1", monday, "UTC", load)
+        assert await cache.get("u1", monday, "UTC", load) is first
+        cache.invalidate("u1")
+        await cache.get("u1", monday, "UTC", load)
+        clock["now"] += 16
+        await cache.get("u1", monday, "UTC", load)
+        assert len(calls) == 3
+
+        load, calls = self._loader(tuesday)
+        await cache.get("u1", tuesday, "UTC", load)
+        await cache.get("u1", tuesday, "Asia/Tokyo", load)
+        assert len(calls) == 2
+
+    async def test_invalidate_during_a_load_is_not_overwritten(self):
+        from beats.domain.device_status import DeviceStatusSnapshot
+
+        cache, _ = self._cache()
+
+        async def load():
+            cache.invalidate("u1")  # timer stopped mid-read
+            return DeviceStatusSnapshot(day=date(2026, 4, 6), tz="UTC", completed_seconds=0.0)
+
+        await cache.get("u1", date(2026, 4, 6), "UTC", load)
+        assert len(cache) == 0
+
+    async def test_invalidate_wakes_every_waiter(self):
+        import asyncio
+
+        cache, _ = self._cache()
+        waiters = [asyncio.create_task(cache.wait_for_change("u1", 5)) for _ in range(2)]
+        other = asyncio.create_task(cache.wait_for_change("u2", 0.01))
+        await asyncio.sleep(0)
+        cache.invalidate("u1")
+        assert await asyncio.gather(*waiters) == [True, True]
+        assert await other is False
+        assert cache._changed == {} and cache._waiters == {}
+
+
 class TestTimerServiceStart:
     """TimerService.start_timer pre-flight checks: project must exist
     and no other timer can be running. Pin both error paths so a
@@ -3496,6 +4339,155 @@ class TestProjectServiceBeatsBatchHelpers:
         assert float(result["total_hours"]) * 60 == 90.0
 
 
+class TestProjectStatsAggregationAgainstMongo:
+    """The per-project statistics run as a $dateTrunc/$group pipeline in
+    Mongo. The FF.15 pure-Python helpers are the oracle: seeded beats read
+    back from Mongo must produce the same dicts through either path."""
+
+    USER = "agg-stats-user"
+
+    @pytest.fixture(autouse=True)
+    async def _setup(self):
+        from beats.infrastructure.database import Database
+
+        await Database.connect()
+        db = Database.get_db()
+        await db.timeLogs.delete_many({"user_id": self.USER})
+        await db.projects.delete_many({"user_id": self.USER})
+        yield
+        await Database.disconnect()
+
+    async def _seed(self):
+        from beats.domain.services import ProjectService
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.repositories import MongoBeatRepository, MongoProjectRepository
+
+        db = Database.get_db()
+        beat_repo = MongoBeatRepository(db.timeLogs, user_id=self.USER)
+        project_repo = MongoProjectRepository(db.projects, user_id=self.USER)
+        project = await project_repo.create(Project(name="Agg", weekly_goal=4.0))
+        other = await project_repo.create(Project(name="Other"))
+
+        today = datetime.combine(date.today(), datetime.min.time(), tzinfo=UTC)
+        monday = today - timedelta(days=today.weekday())
+        spans = [
+            (monday + timedelta(hours=9), 95),
+            (monday + timedelta(hours=23, minutes=40), 50),  # crosses midnight UTC
+            (monday + timedelta(days=2, hours=14, seconds=7), 33),
+            (today - timedelta(days=10) + timedelta(hours=8), 61),
+            (today - timedelta(days=40) + timedelta(hours=10), 1500),  # runaway (>24h)
+            (datetime(2025, 11, 30, 22, 0, tzinfo=UTC), 180),  # month boundary
+        ]
+        for start, minutes in spans:
+            await beat_repo.create(
+                Beat(project_id=project.id, start=start, end=start + timedelta(minutes=minutes))
+            )
+        # Another project's session must never leak into the pipeline's $match.
+        other_start = today + timedelta(hours=1)
+        await beat_repo.create(
+            Beat(project_id=other.id, start=other_start, end=other_start + timedelta(hours=2))
+        )
+        service = ProjectService(project_repo=project_repo, beat_repo=beat_repo)
+        beats = await beat_repo.list_by_project(project.id)
+        return service, project, beats
+
+    async def test_monthly_totals_match_helper(self):
+        from beats.domain.services import ProjectService
+
+        service, project, beats = await self._seed()
+        via_pipeline = await service.get_monthly_totals(project.id)
+        assert via_pipeline == ProjectService._monthly_totals_from_beats(beats)
+        assert len(via_pipeline["warnings"]) == 1
+
+    async def test_week_breakdown_matches_helper(self):
+        from beats.domain.services import ProjectService
+
+        service, project, beats = await self._seed()
+        for weeks_ago in (0, 1, 6):
+            via_pipeline = await service.get_week_breakdown(project.id, weeks_ago=weeks_ago)
+            assert via_pipeline == ProjectService._week_breakdown_from_beats(
+                beats, project, weeks_ago=weeks_ago
+            )
+
+    async def test_daily_average_and_summary_match_python_fold(self):
+        service, project, beats = await self._seed()
+        cutoff = date.today() - timedelta(days=30)
+        by_day: dict[date, timedelta] = {}
+        for b in beats:
+            if b.start.date() >= cutoff:
+                by_day[b.start.date()] = by_day.get(b.start.date(), timedelta()) + b.duration
+        expected_avg = round(sum(by_day.values(), timedelta()).total_seconds() / 60 / len(by_day))
+        assert await service.get_daily_average(project.id) == {
+            "avg_minutes": expected_avg,
+            "days_tracked": len(by_day),
+        }
+
+        summary: dict[str, timedelta] = {}
+        for b in beats:
+            summary[str(b.day)] = summary.get(str(b.day), timedelta()) + b.duration
+        assert await service.get_daily_summary(project.id) == {
+            day: str(total) for day, total in sorted(summary.items())
+        }
+
+    async def test_sum_durations_buckets_by_local_day(self):
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.repositories import MongoBeatRepository
+
+        repo = MongoBeatRepository(Database.get_db().timeLogs, user_id=self.USER)
+        start = datetime(2026, 1, 1, 23, 30, tzinfo=UTC)
+        await repo.create(Beat(project_id="p-tz", start=start, end=start + timedelta(minutes=30)))
+
+        utc = await repo.sum_durations("p-tz", "day")
+        tokyo = await repo.sum_durations("p-tz", "day", tz="Asia/Tokyo")
+        assert [(b.start, b.duration) for b in utc] == [(date(2026, 1, 1), timedelta(minutes=30))]
+        assert [b.start for b in tokyo] == [date(2026, 1, 2)]
+        # Bounds are local days too: Tokyo's Jan 1 holds nothing.
+        assert await repo.sum_durations("p-tz", "day", end=date(2026, 1, 1), tz="Asia/Tokyo") == []
+
+    async def test_daily_totals_sum_every_project_per_local_day(self):
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.repositories import MongoBeatRepository
+
+        repo = MongoBeatRepository(Database.get_db().timeLogs, user_id=self.USER)
+        start = datetime(2026, 1, 1, 23, 30, tzinfo=UTC)
+        for project_id in ("p-a", "p-b"):
+            await repo.create(
+                Beat(project_id=project_id, start=start, end=start + timedelta(minutes=20))
+            )
+        await repo.create(Beat(project_id="p-a", start=start + timedelta(hours=1)))  # running
+
+        days = (date(2026, 1, 1), date(2026, 1, 2))
+        utc = await repo.daily_totals(*days)
+        assert [(b.start, b.duration, b.session_count) for b in utc] == [
+            (date(2026, 1, 1), timedelta(minutes=40), 2)
+        ]
+        tokyo = await repo.daily_totals(*days, tz="Asia/Tokyo")
+        assert [b.start for b in tokyo] == [date(2026, 1, 2)]
+
+    async def test_sums_skip_string_dated_rows(self):
+        """A row still holding ISO strings must not fail the aggregation."""
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.repositories import MongoBeatRepository
+
+        col = Database.get_db().timeLogs
+        repo = MongoBeatRepository(col, user_id=self.USER)
+        start = datetime(2026, 1, 1, 9, tzinfo=UTC)
+        await repo.create(Beat(project_id="p-s", start=start, end=start + timedelta(minutes=15)))
+        await col.insert_one(
+            {
+                "user_id": self.USER,
+                "project_id": "p-s",
+                "start": "2026-01-01T10:00:00Z",
+                "end": "2026-01-01T11:00:00Z",
+            }
+        )
+
+        sums = await repo.sum_durations("p-s", "day", include_active=True)
+        assert [(b.start, b.duration) for b in sums] == [(date(2026, 1, 1), timedelta(minutes=15))]
+        totals = await repo.daily_totals(date(2026, 1, 1), date(2026, 1, 1))
+        assert [b.duration for b in totals] == [timedelta(minutes=15)]
+
+
 # =============================================================================
 # Export bundle signing — Ed25519 sign/verify primitives
 # =============================================================================
@@ -3853,6 +4845,254 @@ class TestExportSqlite:
         assert b"\n" not in out
 
 
+# =============================================================================
+# Streaming exports — incremental CSV / JSON serializers
+# =============================================================================
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+async def _drain(chunks) -> list[str]:
+    return [chunk async for chunk in chunks]
+
+
+class TestExportStream:
+    """domain.export_stream feeds the CSV and JSON export endpoints from
+    batched cursors instead of one rendered string.
+
+    Risk: the streamed bytes drift from what the old whole-file render
+    produced — a missing comma between chunks, an empty array written
+    with a dangling newline — and backups stop round-tripping through /import.
+    Pin byte equality with csv.writer / json.dumps and that output is
+    really chunked."""
+
+    async def test_csv_matches_a_single_writer(self):
+        import csv
+        import io
+
+        from beats.domain.export_stream import csv_chunks
+
+        header = ["a", "b"]
+        rows = [[i, f"note, with comma {i}"] for i in range(7)]
+        expected = io.StringIO()
+        writer = csv.writer(expected)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+        chunks = await _drain(csv_chunks(header, _aiter(rows), chunk_rows=3))
+
+        assert "".join(chunks) == expected.getvalue()
+        # 7 rows at 3 per chunk: two full chunks plus the tail.
+        assert len(chunks) == 3
+
+    async def test_csv_with_no_rows_is_just_the_header(self):
+        from beats.domain.export_stream import csv_chunks
+
+        chunks = await _drain(csv_chunks(["a", "b"], _aiter([])))
+        assert chunks == ["a,b\r\n"]
+
+    async def test_json_matches_json_dumps(self):
+        import json
+
+        from beats.domain.export_stream import json_object_chunks
+
+        beats = [{"id": f"b{i}", "tags": ["x", "y"], "note": None} for i in range(5)]
+        fields = {
+            "exported_at": "2026-04-01T00:00:00+00:00",
+            "version": "1.0",
+            "projects": [{"id": "p1", "name": "Alpha"}],
+        }
+        expected = json.dumps({**fields, "beats": beats}, indent=2, default=str)
+
+        chunks = await _drain(json_object_chunks({**fields, "beats": _aiter(beats)}, chunk_rows=2))
+
+        assert "".join(chunks) == expected
+        assert len(chunks) > 1
+
+    async def test_json_empty_stream_is_an_empty_array(self):
+        import json
+
+        from beats.domain.export_stream import json_object_chunks
+
+        out = "".join(await _drain(json_object_chunks({"projects": [], "beats": _aiter([])})))
+        assert out == json.dumps({"projects": [], "beats": []}, indent=2)
+
+    async def test_json_stream_is_consumed_lazily(self):
+        """The first chunk must go out before the source is exhausted —
+        otherwise the endpoint would still buffer the whole export."""
+        from beats.domain.export_stream import json_object_chunks
+
+        pulled = 0
+
+        async def source():
+            nonlocal pulled
+            for i in range(10):
+                pulled += 1
+                yield {"i": i}
+
+        chunks = json_object_chunks({"beats": source()}, chunk_rows=2)
+        first = await anext(chunks)
+        assert '"i": 1' in first
+        assert pulled == 2
+        await chunks.aclose()
+
+
+# =============================================================================
+# Bulk import — incremental backup reader + batched writers
+# =============================================================================
+
+
+def _byte_reader(data: bytes):
+    """UploadFile.read-style coroutine over an in-memory payload."""
+    pos = 0
+
+    async def read(size: int) -> bytes:
+        nonlocal pos
+        chunk = data[pos : pos + size]
+        pos += len(chunk)
+        return chunk
+
+    return read
+
+
+class TestBulkImport:
+    """domain.bulk_import replaces the one-upsert-per-row restore loop.
+
+    Risk: the incremental reader mis-parses a value that straddles a read
+    boundary (silently corrupting a restored beat), or a failing batch
+    aborts the restore / is counted as written. Tiny chunk sizes force
+    every value across a boundary."""
+
+    async def _collect(self, data: bytes, chunk_size: int = 7) -> list[tuple[str, dict]]:
+        from beats.domain.bulk_import import iter_json_backup
+
+        return [row async for row in iter_json_backup(_byte_reader(data), chunk_size=chunk_size)]
+
+    async def test_reader_yields_every_row_across_chunk_boundaries(self):
+        import json
+
+        backup = {
+            "exported_at": "2026-04-01T00:00:00+00:00",
+            "version": "1.0",
+            "projects": [{"id": "p1", "name": "Café ☕", "weekly_goal": 12.5}],
+            "beats": [{"id": f"b{i}", "project_id": "p1", "tags": ["x"]} for i in range(5)],
+        }
+        for payload in (json.dumps(backup, indent=2), json.dumps(backup)):
+            rows = await self._collect(payload.encode())
+            assert rows == [("projects", backup["projects"][0])] + [
+                ("beats", b) for b in backup["beats"]
+            ]
+
+    async def test_reader_handles_empty_arrays_and_unknown_keys(self):
+        rows = await self._collect(b'{"meta": {"a": [1, 2]}, "projects": [], "beats": []}')
+        assert rows == []
+        assert await self._collect(b"{}") == []
+
+    async def test_reader_rejects_truncated_input(self):
+        with pytest.raises(ValueError):
+            await self._collect(b'{"beats": [{"id": "b1"}, {"id": ')
+
+    async def test_batches_and_counts(self):
+        from beats.domain.bulk_import import BulkImporter
+
+        written: list[tuple[str, list[str]]] = []
+
+        def writer(name):
+            async def write(batch):
+                written.append((name, [r["id"] for r in batch]))
+                return []
+
+            return write
+
+        importer = BulkImporter(
+            {"projects": writer("projects"), "beats": writer("beats")}, batch_size=2
+        )
+        rows = [("projects", {"id": "p1"})] + [("beats", {"id": f"b{i}"}) for i in range(5)]
+        rows.append(("tags", {"id": "ignored"}))
+        report = await importer.run(rows)
+
+        assert report.counts == {"projects": 1, "beats": 5}
+        assert report.batches == 4
+        assert report.failures == []
+        assert sorted(written) == [
+            ("beats", ["b0", "b1"]),
+            ("beats", ["b2", "b3"]),
+            ("beats", ["b4"]),
+            ("projects", ["p1"]),
+        ]
+
+    async def test_failures_are_reported_not_raised(self):
+        """A row-level rejection and a whole-batch crash each land in the
+        report; every other batch is still written."""
+        from beats.domain.bulk_import import BatchFailure, BulkImporter
+
+        async def write(batch):
+            ids = [r["id"] for r in batch]
+            if "b2" in ids:
+                raise ConnectionError("socket closed")
+            return ["b1: duplicate key"] if "b1" in ids else []
+
+        report = await BulkImporter({"beats": write}, batch_size=2).run(
+            [("beats", {"id": f"b{i}"}) for i in range(6)]
+        )
+
+        assert report.counts == {"beats": 3}
+        assert sorted(report.failures, key=lambda f: f.offset) == [
+            BatchFailure("beats", 0, 2, ("b1: duplicate key",)),
+            BatchFailure("beats", 2, 2, ("batch failed: socket closed",)),
+        ]
+
+    async def test_concurrency_is_bounded(self):
+        import asyncio
+
+        from beats.domain.bulk_import import BulkImporter
+
+        in_flight = peak = 0
+
+        async def write(batch):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return []
+
+        report = await BulkImporter({"beats": write}, batch_size=1, concurrency=3).run(
+            [("beats", {"id": str(i)}) for i in range(12)]
+        )
+        assert report.counts == {"beats": 12}
+        assert peak == 3
+
+    async def test_source_error_surfaces_unwrapped(self):
+        """A malformed upload must reach the router as the reader's own
+        ValueError (-> 400), not an ExceptionGroup from the task group."""
+        from beats.domain.bulk_import import BulkImporter, iter_json_backup
+
+        async def write(batch):
+            return []
+
+        rows = iter_json_backup(_byte_reader(b'{"beats": [{"id": "b1"}, oops]}'))
+        with pytest.raises(ValueError):
+            await BulkImporter({"beats": write}, batch_size=1).run(rows)
+
+    def test_sqlite_rows_round_trip(self, tmp_path):
+        from beats.domain.export_sqlite import ExportPayload, build_sqlite_bytes, iter_sqlite_rows
+
+        payload = ExportPayload(
+            projects=[{"id": "p1", "name": "Alpha"}],
+            beats=[{"id": f"b{i}", "project_id": "p1", "tags": []} for i in range(3)],
+        )
+        db_path = tmp_path / "data.sqlite"
+        db_path.write_bytes(build_sqlite_bytes(payload))
+
+        rows = list(iter_sqlite_rows(db_path, fetch_size=2))
+        assert rows[0] == ("projects", {"id": "p1", "name": "Alpha"})
+        assert sorted(r["id"] for t, r in rows if t == "beats") == ["b0", "b1", "b2"]
+
+
 # =============================================================================
 # Oura Service — personal access token + daily biometric fetch
 # =============================================================================
@@ -5394,3 +6634,1219 @@ class TestNormalizeTz:
         out = normalize_tz(aware)
         assert out.tzinfo is pacific
         assert out.hour == 9
+
+
+# =============================================================================
+# Webhook dispatcher — outbox draining, retries, per-host limits
+# =============================================================================
+
+
+_DISPATCH_NOW = datetime(2026, 3, 1, 9, tzinfo=UTC)
+
+
+class _FakeOutbox:
+    """In-memory WebhookOutbox with MongoWebhookOutbox's claim semantics."""
+
+    def __init__(self, deliveries):
+        self.rows = {d.id: d for d in deliveries}
+
+    async def claim_due(self, now, lease, skip_hosts=()):
+        due = [
+            d
+            for d in self.rows.values()
+            if d.status == "pending" and d.next_attempt_at <= now and d.host not in skip_hosts
+        ]
+        if not due:
+            return None
+        row = min(due, key=lambda d: d.next_attempt_at)
+        claimed = row.model_copy(
+            update={"attempts": row.attempts + 1, "next_attempt_at": now + lease}
+        )
+        self.rows[row.id] = claimed
+        return claimed
+
+    def _finish(self, delivery, **fields):
+        if self.rows[delivery.id].attempts == delivery.attempts:
+            self.rows[delivery.id] = self.rows[delivery.id].model_copy(update=fields)
+
+    async def mark_delivered(self, delivery, status_code, latency_ms, at):
+        self._finish(
+            delivery,
+            status="delivered",
+            delivered_at=at,
+            last_status_code=status_code,
+            latency_ms=latency_ms,
+        )
+
+    async def mark_retry(self, delivery, next_attempt_at, error, status_code):
+        self._finish(
+            delivery,
+            next_attempt_at=next_attempt_at,
+            last_error=error,
+            last_status_code=status_code,
+        )
+
+    async def mark_dead(self, delivery, error, status_code):
+        self._finish(delivery, status="dead", last_error=error, last_status_code=status_code)
+
+
+def _delivery(n: int, url: str = "https://hooks.test/a", **fields):
+    from beats.domain.models import WebhookDelivery
+    from beats.infrastructure.webhook_dispatcher import host_of
+
+    return WebhookDelivery(
+        id=f"d{n}",
+        webhook_id="w1",
+        url=url,
+        host=host_of(url),
+        event="timer.stop",
+        body={"event": "timer.stop", "data": {"n": n}},
+        next_attempt_at=_DISPATCH_NOW,
+        **fields,
+    )
+
+
+def _dispatcher(outbox, handler, **kwargs):
+    import httpx
+
+    from beats.infrastructure.webhook_dispatcher import WebhookDispatcher
+
+    kwargs.setdefault("delay", lambda attempt: 30.0)
+    return WebhookDispatcher(
+        outbox,
+        httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        clock=lambda: _DISPATCH_NOW,
+        **kwargs,
+    )
+
+
+class TestWebhookDispatcher:
+    """Timer start/stop only writes outbox rows; everything about actually
+    reaching the receiver — retries, dead-lettering, not letting one slow
+    host hog the pool — lives in the dispatcher and is pinned here."""
+
+    def test_retry_delay_is_full_jitter_under_a_capped_exponential(self):
+        from beats.infrastructure.webhook_dispatcher import retry_delay
+
+        assert [retry_delay(n, base=5, cap=60, rng=lambda: 1.0) for n in (1, 2, 3, 4, 5)] == [
+            5,
+            10,
+            20,
+            40,
+            60,
+        ]
+        assert retry_delay(7, base=5, cap=60, rng=lambda: 0.0) == 0
+        assert retry_delay(2, base=5, cap=60, rng=lambda: 0.5) == 5
+
+    async def test_success_marks_delivered_and_records_latency(self):
+        import json
+
+        import httpx
+
+        seen = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request)
+            return httpx.Response(204)
+
+        outbox = _FakeOutbox([_delivery(1)])
+        dispatcher = _dispatcher(outbox, handler)
+        assert await dispatcher.drain() == 1
+
+        row = outbox.rows["d1"]
+        assert (row.status, row.attempts, row.last_status_code) == ("delivered", 1, 204)
+        assert row.delivered_at == _DISPATCH_NOW and row.latency_ms is not None
+        assert json.loads(seen[0].content) == {"event": "timer.stop", "data": {"n": 1}}
+        assert seen[0].headers["X-Beats-Delivery"] == "d1"
+        assert seen[0].headers["X-Beats-Event"] == "timer.stop"
+        snapshot = dispatcher.metrics.snapshot()
+        assert (snapshot["delivered"], snapshot["in_flight"]) == (1, 0)
+        assert snapshot["latency_p50_ms"] is not None
+
+    async def test_server_errors_retry_with_backoff_then_go_dead(self):
+        import httpx
+
+        outbox = _FakeOutbox([_delivery(1)])
+        dispatcher = _dispatcher(outbox, lambda request: httpx.Response(503), max_attempts=2)
+        await dispatcher.drain()
+        row = outbox.rows["d1"]
+        assert (row.status, row.attempts, row.last_error) == ("pending", 1, "HTTP 503")
+        assert row.next_attempt_at == _DISPATCH_NOW + timedelta(seconds=30)
+        # Not due yet: a second pass leaves it alone.
+        assert await dispatcher.drain() == 0
+
+        outbox.rows["d1"] = row.model_copy(update={"next_attempt_at": _DISPATCH_NOW})
+        await dispatcher.drain()
+        row = outbox.rows["d1"]
+        assert (row.status, row.attempts, row.last_status_code) == ("dead", 2, 503)
+        assert (dispatcher.metrics.retried, dispatcher.metrics.dead) == (1, 1)
+
+    async def test_client_errors_are_not_retried(self):
+        import httpx
+
+        outbox = _FakeOutbox([_delivery(1)])
+        await _dispatcher(outbox, lambda request: httpx.Response(410)).drain()
+        assert (outbox.rows["d1"].status, outbox.rows["d1"].attempts) == ("dead", 1)
+
+    async def test_network_errors_retry_and_retry_after_is_honoured(self):
+        import httpx
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.host == "down.test":
+                raise httpx.ConnectError("connection refused", request=request)
+            return httpx.Response(429, headers={"Retry-After": "120"})
+
+        outbox = _FakeOutbox(
+            [_delivery(1, url="https://down.test/"), _delivery(2, url="https://busy.test/")]
+        )
+        await _dispatcher(outbox, handler).drain()
+        down, busy = outbox.rows["d1"], outbox.rows["d2"]
+        assert down.status == "pending" and down.last_error.startswith("ConnectError")
+        assert down.next_attempt_at == _DISPATCH_NOW + timedelta(seconds=30)
+        assert busy.status == "pending" and busy.last_status_code == 429
+        assert busy.next_attempt_at == _DISPATCH_NOW + timedelta(seconds=120)
+
+    async def test_unsupported_url_goes_dead_at_once(self):
+        import httpx
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise httpx.UnsupportedProtocol("Request URL has an unsupported protocol 'ftp://'.")
+
+        outbox = _FakeOutbox([_delivery(1, url="ftp://files.test/hook")])
+        await _dispatcher(outbox, handler).drain()
+        row = outbox.rows["d1"]
+        assert row.status == "dead" and row.last_error.startswith("UnsupportedProtocol")
+
+    async def test_unexpected_errors_are_retried_not_raised(self):
+        def handler(request):
+            raise RuntimeError("boom")
+
+        outbox = _FakeOutbox([_delivery(1)])
+        assert await _dispatcher(outbox, handler).drain() == 1
+        row = outbox.rows["d1"]
+        assert row.status == "pending" and row.last_error == "RuntimeError: boom"
+
+    async def test_per_host_limit_keeps_a_slow_host_from_taking_every_slot(self):
+        import asyncio
+
+        import httpx
+
+        release = asyncio.Event()
+        active: dict[str, int] = {}
+        peak: dict[str, int] = {}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            host = request.url.host
+            active[host] = active.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), active[host])
+            if host == "slow.test":
+                await release.wait()
+            active[host] -= 1
+            return httpx.Response(200)
+
+        rows = [_delivery(n, url="https://slow.test/") for n in range(6)]
+        rows += [_delivery(n, url="https://fast.test/") for n in range(6, 8)]
+        outbox = _FakeOutbox(rows)
+        dispatcher = _dispatcher(outbox, handler, concurrency=4, per_host=2)
+
+        drain = asyncio.create_task(dispatcher.drain())
+        for _ in range(50):
+            await asyncio.sleep(0)
+            if all(outbox.rows[f"d{n}"].status == "delivered" for n in (6, 7)):
+                break
+        # The fast host got through while slow.test held its two slots.
+        assert all(outbox.rows[f"d{n}"].status == "delivered" for n in (6, 7))
+        assert peak["slow.test"] == 2
+        release.set()
+        assert await drain == 8
+        assert {d.status for d in outbox.rows.values()} == {"delivered"}
+
+
+# =============================================================================
+# Legacy date backfill — ISO strings to BSON dates
+# =============================================================================
+
+
+class TestParseLegacyDate:
+    """Every string form the old json-mode writes produced lands on the
+    same UTC instant the date write path stores now."""
+
+    def test_z_and_offset_forms_agree(self):
+        from beats.infrastructure.migrations import parse_legacy_date
+
+        expected = datetime(2026, 4, 18, 14, 0, tzinfo=UTC)
+        assert parse_legacy_date("2026-04-18T14:00:00Z") == expected
+        assert parse_legacy_date("2026-04-18T14:00:00+00:00") == expected
+        assert parse_legacy_date("2026-04-18T16:00:00+02:00") == expected
+        assert parse_legacy_date("2026-04-18T16:00:00+02:00").tzinfo is UTC
+
+    def test_naive_is_utc(self):
+        from beats.infrastructure.migrations import parse_legacy_date
+
+        assert parse_legacy_date("2026-04-18T14:00:00.250000") == datetime(
+            2026, 4, 18, 14, 0, 0, 250000, tzinfo=UTC
+        )
+
+    def test_garbage_raises(self):
+        from beats.infrastructure.migrations import parse_legacy_date
+
+        with pytest.raises(ValueError):
+            parse_legacy_date("yesterday")
+
+
+# =============================================================================
+# Index advisor — explain() plan walk + COLLSCAN detection
+# =============================================================================
+
+
+class TestIndexAdvisorPlanStages:
+    """plan_stages walks any nesting of an explain() winningPlan. Pin
+    both the classic inputStage chain and SBE's queryPlan wrapper —
+    a walker that missed either would report every shape as indexed."""
+
+    def test_classic_plan_chain(self):
+        from beats.infrastructure.index_advisor import plan_stages
+
+        plan = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "x"}}
+        assert list(plan_stages(plan)) == ["FETCH", "IXSCAN"]
+
+    def test_sbe_and_multi_input_plans(self):
+        from beats.infrastructure.index_advisor import plan_stages
+
+        plan = {
+            "queryPlan": {
+                "stage": "SORT_MERGE",
+                "inputStages": [{"stage": "IXSCAN"}, {"stage": "COLLSCAN"}],
+            }
+        }
+        assert "COLLSCAN" in list(plan_stages(plan))
+
+    def test_non_plan_values_are_ignored(self):
+        from beats.infrastructure.index_advisor import plan_stages
+
+        assert list(plan_stages({"stage": 3, "filter": {"end": None}})) == []
+
+
+class TestIndexAdvisorAgainstMongo:
+    """Every hot repository query shape must resolve to an index once
+    Database._ensure_indexes has run. A failure here means a query in
+    repositories.py drifted from the indexes that serve it."""
+
+    @pytest.fixture(autouse=True)
+    async def _setup(self):
+        from beats.infrastructure.database import Database
+
+        await Database.connect()
+        yield
+        await Database.disconnect()
+
+    async def test_no_hot_query_collscans(self):
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.index_advisor import find_collscans
+
+        assert await find_collscans(Database.get_db()) == []
+
+    async def test_unindexed_shape_is_reported(self):
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.index_advisor import QueryShape, check_query_plans, find_collscans
+
+        shape = QueryShape("beats.by_note", "timeLogs", {"note": "probe"})
+        assert await find_collscans(Database.get_db(), (shape,)) == ["beats.by_note"]
+        # The default shapes are all indexed, so the logging wrapper is quiet.
+        assert await check_query_plans(Database.get_db()) == []
+
+
+class TestBulkReadsAgainstMongo:
+    """The client decodes BSON dates UTC-aware and the bulk beat reads
+    project away everything Beat doesn't declare. BeatRecord rows (the
+    rollup materialization scan) must carry the same data as the Beats."""
+
+    USER = "bulk-read-user"
+
+    @pytest.fixture(autouse=True)
+    async def _setup(self):
+        from beats.infrastructure.database import Database
+
+        await Database.connect()
+        await Database.get_db().timeLogs.delete_many({"user_id": self.USER})
+        yield
+        await Database.disconnect()
+
+    async def test_records_match_models_and_are_utc_aware(self):
+        from beats.domain.rollups import build_rollups
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.repositories import MongoBeatRepository
+
+        db = Database.get_db()
+        repo = MongoBeatRepository(db.timeLogs, user_id=self.USER)
+        start = datetime(2026, 3, 1, 22, 30, tzinfo=UTC)
+        await repo.create(
+            Beat(project_id="p1", start=start, end=start + timedelta(hours=2), tags=["deep"])
+        )
+        await repo.create(Beat(project_id="p2", start=start + timedelta(days=1)))  # running
+
+        raw = await db.timeLogs.find_one({"user_id": self.USER, "project_id": "p1"})
+        assert raw["start"].tzinfo is not None
+
+        beats = await repo.list_all_completed()
+        records = await repo.list_completed_records()
+        assert [(r.project_id, r.start, r.end, r.tags) for r in records] == [
+            ("p1", start, start + timedelta(hours=2), ("deep",))
+        ]
+        assert [(b.project_id, b.start, b.end) for b in beats] == [
+            (r.project_id, r.start, r.end) for r in records
+        ]
+        assert [r.id for r in records] == [b.id for b in beats]
+        tz = ZoneInfo("Asia/Tokyo")
+        assert _rollup_snapshot(build_rollups(records, tz)) == _rollup_snapshot(
+            build_rollups(beats, tz)
+        )
+
+    async def test_records_parse_string_dated_rows(self):
+        """Rows stored with ISO-string dates (before the timeLogs date
+        backfill reaches them) still come back as aware datetimes."""
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.repositories import MongoBeatRepository
+
+        db = Database.get_db()
+        await db.timeLogs.insert_one(
+            {
+                "user_id": self.USER,
+                "project_id": "p1",
+                "start": "2026-03-01T09:00:00Z",
+                "end": "2026-03-01T10:30:00",
+            }
+        )
+        records = await MongoBeatRepository(db.timeLogs, user_id=self.USER).list_completed_records()
+        assert [(r.start, r.duration) for r in records] == [
+            (datetime(2026, 3, 1, 9, tzinfo=UTC), timedelta(minutes=90))
+        ]
+
+
+class TestBulkImportAgainstMongo:
+    """upsert_many is the batched form of upsert: same id-keyed upsert
+    semantics, but bad rows come back as messages instead of raising."""
+
+    USER = "bulk-import-user"
+
+    @pytest.fixture(autouse=True)
+    async def _setup(self):
+        from beats.infrastructure.database import Database
+
+        await Database.connect()
+        await Database.get_db().timeLogs.delete_many({"user_id": self.USER})
+        yield
+        await Database.get_db().timeLogs.delete_many({"user_id": self.USER})
+        await Database.disconnect()
+
+    async def test_upsert_many_is_idempotent_and_reports_bad_rows(self):
+        from bson import ObjectId
+
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.repositories import MongoBeatRepository
+
+        repo = MongoBeatRepository(Database.get_db().timeLogs, user_id=self.USER)
+        start = datetime(2026, 3, 1, 9, tzinfo=UTC)
+        rows = [
+            {
+                "id": str(ObjectId()),
+                "project_id": "p1",
+                "start": start + timedelta(days=i),
+                "end": start + timedelta(days=i, hours=1),
+                "duration": "1:00:00",
+                "is_active": False,
+            }
+            for i in range(3)
+        ]
+
+        assert await repo.upsert_many(rows) == []
+        errors = await repo.upsert_many(rows + [{"id": "not-an-object-id", "project_id": "p1"}])
+        assert len(errors) == 1
+        assert errors[0].startswith("#3: ") and "not a valid ObjectId" in errors[0]
+
+        beats = await repo.list_all_completed()
+        assert sorted(b.id for b in beats) == sorted(r["id"] for r in rows)
+        raw = await Database.get_db().timeLogs.find_one({"user_id": self.USER})
+        assert "duration" not in raw and "is_active" not in raw
+
+    async def test_upsert_many_stores_backup_strings_as_dates(self):
+        from bson import ObjectId
+
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.repositories import MongoBeatRepository
+
+        repo = MongoBeatRepository(Database.get_db().timeLogs, user_id=self.USER)
+        beat_id = str(ObjectId())
+        row = {"id": beat_id, "project_id": "p1", "start": "2026-03-01T09:00:00Z"}
+        assert await repo.upsert_many([{**row, "end": "2026-03-01T10:00:00+00:00"}]) == []
+        # Re-importing it as still running unsets the stored end.
+        errors = await repo.upsert_many([row, {"project_id": "p1", "start": "soon"}])
+        assert len(errors) == 1 and errors[0].startswith("#1: ")
+
+        raw = await Database.get_db().timeLogs.find_one({"_id": ObjectId(beat_id)})
+        assert raw["start"] == datetime(2026, 3, 1, 9, tzinfo=UTC)
+        assert "end" not in raw
+
+
+class TestBeatRollupsAgainstMongo:
+    """The guarded rollup writes against a real collection: a build racing
+    beat writes converges on what a fresh build computes, and rows from
+    before the guards are rebuilt rather than merged into."""
+
+    USER = "beat-rollup-user"
+
+    @pytest.fixture(autouse=True)
+    async def _setup(self):
+        from beats.infrastructure.database import Database
+
+        await Database.connect()
+        db = Database.get_db()
+        for collection in (db.timeLogs, db.beat_daily_rollups):
+            await collection.delete_many({"user_id": self.USER})
+        yield
+        await Database.disconnect()
+
+    def _repos(self):
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.repositories import (
+            MongoBeatRepository,
+            MongoBeatRollupRepository,
+        )
+
+        db = Database.get_db()
+        return (
+            MongoBeatRepository(db.timeLogs, user_id=self.USER),
+            MongoBeatRollupRepository(db.beat_daily_rollups, user_id=self.USER),
+        )
+
+    async def test_writes_during_the_first_build_are_counted_once(self):
+        from beats.domain.rollups import build_rollups, ensure_materialized
+        from beats.domain.services import BeatService
+        from beats.infrastructure.repositories import MongoBeatRepository
+
+        beats, rollups = self._repos()
+        svc = BeatService(beat_repo=beats, rollup_repo=rollups)
+        start = datetime(2026, 3, 2, 9, 0, 0, 123456, tzinfo=UTC)
+        stored = [
+            await beats.create(
+                Beat(
+                    project_id="p1",
+                    start=start + timedelta(days=i),
+                    end=start + timedelta(days=i, hours=1),
+                    tags=["deep"],
+                )
+            )
+            for i in range(3)
+        ]
+
+        class _RacingBeatRepo(MongoBeatRepository):
+            async def list_completed_records(self):
+                snapshot = await super().list_completed_records()
+                moved = stored[0].model_copy(
+                    update={
+                        "start": start + timedelta(days=5),
+                        "end": start + timedelta(days=5, hours=2),
+                    }
+                )
+                await svc.update_beat(moved)
+                await svc.delete_beat(stored[1].id)
+                await svc.create_beat(
+                    Beat(project_id="p2", start=start, end=start + timedelta(minutes=20))
+                )
+                return snapshot
+
+        tz = ZoneInfo("Europe/Berlin")
+        await ensure_materialized(rollups, _RacingBeatRepo(beats.collection, user_id=self.USER), tz)
+
+        expected = build_rollups(await beats.list_completed_records(), tz)
+        for tag in ("", "deep"):
+            actual = await rollups.list_range(tz.key, tag=tag)
+            assert _rollup_snapshot(actual) == _rollup_snapshot(
+                [r for r in expected if r.tag == tag]
+            )
+        assert await rollups.built_timezones() == [tz.key]
+
+    async def test_rows_from_before_the_guards_are_rebuilt(self):
+        from beats.domain.rollups import ensure_materialized
+
+        beats, rollups = self._repos()
+        start = datetime(2026, 3, 2, 9, tzinfo=UTC)
+        await beats.create(Beat(project_id="p1", start=start, end=start + timedelta(hours=1)))
+        legacy = {"user_id": self.USER, "tz": "UTC", "project_id": "p1", "tag": ""}
+        await rollups.collection.insert_many(
+            [
+                {**legacy, "local_date": "", "project_id": "", "built_at": start},
+                {**legacy, "local_date": "2026-03-02", "seconds": 7200.0, "session_count": 2},
+            ]
+        )
+        assert await rollups.materialized_timezones() == []
+
+        await ensure_materialized(rollups, beats, ZoneInfo("UTC"))
+        [row] = await rollups.list_range("UTC")
+        assert (row.seconds, row.session_count) == (3600.0, 1)
+
+
+class TestWebhookOutboxAgainstMongo:
+    """Claims are atomic and leased: a claimed row isn't handed out again
+    until its lease runs out, and a stale claim can't overwrite a newer
+    one's outcome."""
+
+    @pytest.fixture(autouse=True)
+    async def _setup(self):
+        from beats.infrastructure.database import Database
+
+        await Database.connect()
+        await Database.get_db().webhook_deliveries.delete_many({})
+        yield
+        await Database.get_db().webhook_deliveries.delete_many({})
+        await Database.disconnect()
+
+    async def test_claim_lease_and_stale_outcomes(self):
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.repositories import (
+            MongoWebhookDeliveryRepository,
+            MongoWebhookOutbox,
+        )
+
+        db = Database.get_db()
+        repo = MongoWebhookDeliveryRepository(db.webhook_deliveries, user_id="outbox-user")
+        outbox = MongoWebhookOutbox(db.webhook_deliveries)
+        lease = timedelta(seconds=60)
+        [queued, other] = await repo.enqueue(
+            [
+                _delivery(1, next_attempt_at=_DISPATCH_NOW - timedelta(seconds=1)),
+                _delivery(2, url="https://other.test/"),
+            ]
+        )
+        assert queued.id != "d1"
+
+        claimed = await outbox.claim_due(_DISPATCH_NOW, lease, skip_hosts=["other.test"])
+        assert (claimed.id, claimed.attempts) == (queued.id, 1)
+        assert claimed.next_attempt_at == _DISPATCH_NOW + lease
+        assert await outbox.claim_due(_DISPATCH_NOW, lease, skip_hosts=["other.test"]) is None
+
+        # Lease expired: the row is claimed again, and the first claim's
+        # late outcome no longer applies.
+        reclaimed = await outbox.claim_due(_DISPATCH_NOW + lease, lease)
+        assert (reclaimed.id, reclaimed.attempts) == (queued.id, 2)
+        await outbox.mark_dead(claimed, "HTTP 500", 500)
+        await outbox.mark_delivered(reclaimed, 200, 12.5, _DISPATCH_NOW + lease)
+
+        assert await repo.count_by_status() == {"delivered": 1, "pending": 1}
+        assert await repo.recent_latencies() == [12.5]
+        [delivered] = await repo.list_recent("delivered")
+        assert delivered.delivered_at == _DISPATCH_NOW + lease
+        assert (await repo.requeue(delivered.id)).status == "pending"
+        assert await repo.requeue(other.id) is None
+
+
+class TestLegacyDateBackfillAgainstMongo:
+    """String rows are found by the dual-read path, converted in place by
+    the backfill, and dropped when a date row for the same key exists."""
+
+    @pytest.fixture(autouse=True)
+    async def _setup(self):
+        from beats.infrastructure.database import Database
+
+        await Database.connect()
+        db = Database.get_db()
+        await db.flow_windows.delete_many({"user_id": "backfill-user"})
+        await db.signal_summaries.delete_many({"user_id": "backfill-user"})
+        yield
+        await db.flow_windows.delete_many({"user_id": "backfill-user"})
+        await db.signal_summaries.delete_many({"user_id": "backfill-user"})
+        await Database.disconnect()
+
+    async def test_backfill_and_dual_read(self):
+        from beats.domain.models import FlowWindow, SignalSummary
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.migrations import backfill_dates, count_legacy
+        from beats.infrastructure.repositories import (
+            MongoFlowWindowRepository,
+            MongoSignalSummaryRepository,
+        )
+
+        db = Database.get_db()
+        flow = MongoFlowWindowRepository(db.flow_windows, user_id="backfill-user")
+        summaries = MongoSignalSummaryRepository(db.signal_summaries, user_id="backfill-user")
+        t0 = datetime(2026, 4, 18, 14, 0, tzinfo=UTC)
+
+        def legacy_window(minute: int, device_id: str = "mac") -> dict:
+            start = t0 + timedelta(minutes=minute)
+            return {
+                "user_id": "backfill-user",
+                "device_id": device_id,
+                "window_start": start.isoformat().replace("+00:00", "Z"),
+                "window_end": (start + timedelta(minutes=1)).isoformat(),
+                "created_at": start.isoformat(),
+                "flow_score": 0.5,
+            }
+
+        await db.flow_windows.insert_many(
+            [legacy_window(0), legacy_window(2), legacy_window(1, "other"), legacy_window(3)]
+        )
+        # Re-sent after the switch: a date row for the same key as minute 3.
+        await flow.create(
+            FlowWindow(
+                device_id="mac",
+                window_start=t0 + timedelta(minutes=3),
+                window_end=t0 + timedelta(minutes=4),
+            )
+        )
+        await flow.create(
+            FlowWindow(
+                device_id="mac",
+                window_start=t0 + timedelta(minutes=4),
+                window_end=t0 + timedelta(minutes=5),
+            )
+        )
+        await db.signal_summaries.insert_one(
+            {
+                "user_id": "backfill-user",
+                "device_id": "mac",
+                "hour": "2026-04-18T14:00:00Z",
+                "created_at": "2026-04-18T14:00:00Z",
+                "total_samples": 10,
+            }
+        )
+
+        # Dual read: both types, in time order.
+        window = await flow.list_by_range(t0, t0 + timedelta(hours=1))
+        assert [w.window_start.minute for w in window] == [0, 1, 2, 3, 3, 4]
+        # The upsert finds the legacy "...Z" row and rewrites it as a date.
+        await summaries.upsert(SignalSummary(device_id="mac", hour=t0, total_samples=12))
+        assert await db.signal_summaries.count_documents({"user_id": "backfill-user"}) == 1
+        assert await count_legacy(db.signal_summaries, ("hour",)) == 0
+
+        fields = ("window_start", "window_end", "created_at")
+        assert await backfill_dates(db.flow_windows, fields, batch_size=2) == 3
+        assert await count_legacy(db.flow_windows, fields) == 0
+        stored = await db.flow_windows.find_one({"user_id": "backfill-user", "device_id": "other"})
+        assert stored["window_start"] == t0 + timedelta(minutes=1)
+        assert stored["window_end"] == t0 + timedelta(minutes=2)
+        # The superseded legacy copy of minute 3 is gone.
+        window = await flow.list_by_range(t0, t0 + timedelta(hours=1))
+        assert [w.window_start.minute for w in window] == [0, 1, 2, 3, 4]
+        assert await backfill_dates(db.flow_windows, fields) == 0
+
+    async def test_dedupe_flow_windows_keeps_first_copy(self):
+        """Replays stored before the unique index are deleted, the first
+        stored copy of each window kept, and the index then builds."""
+        from beats.infrastructure.database import FLOW_WINDOW_DEDUPE_KEYS, Database
+        from beats.infrastructure.migrations import dedupe_flow_windows
+
+        # A scratch collection: flow_windows already has the unique index.
+        col = Database.get_db().flow_windows_dedupe_test
+        await col.drop()
+        t0 = datetime(2026, 4, 18, 14, 0, tzinfo=UTC)
+
+        def window(device_id: str, minute: int, score: float) -> dict:
+            return {
+                "user_id": "backfill-user",
+                "device_id": device_id,
+                "window_start": t0 + timedelta(minutes=minute),
+                "flow_score": score,
+            }
+
+        await col.insert_many(
+            [window("mac", 0, 0.1), window("mac", 0, 0.2), window("mac", 1, 0.3)]
+            + [window("mac", 0, 0.4), window("other", 0, 0.5)]
+        )
+        try:
+            assert await dedupe_flow_windows(col) == 2
+            docs = await col.find({}, {"_id": 0, "flow_score": 1}).sort("_id", 1).to_list()
+            assert [d["flow_score"] for d in docs] == [0.1, 0.3, 0.5]
+            await col.create_index(FLOW_WINDOW_DEDUPE_KEYS, unique=True)
+            assert await dedupe_flow_windows(col) == 0
+        finally:
+            await col.drop()
+
+
+class TestFlowWindowSummaryAgainstMongo:
+    """summarize_range's $facet agrees with the in-memory reductions it
+    replaced: the router's _top_bucket per axis and summarize_flow."""
+
+    @pytest.fixture(autouse=True)
+    async def _setup(self):
+        from beats.infrastructure.database import Database
+
+        await Database.connect()
+        await Database.get_db().flow_windows.delete_many({"user_id": "summary-user"})
+        yield
+        await Database.get_db().flow_windows.delete_many({"user_id": "summary-user"})
+        await Database.disconnect()
+
+    async def test_matches_reference_reductions(self):
+        import random
+
+        from beats.api.routers.signals import _top_bucket
+        from beats.domain.flow import summarize_flow
+        from beats.domain.models import FlowWindow
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.repositories import MongoFlowWindowRepository
+
+        repo = MongoFlowWindowRepository(Database.get_db().flow_windows, user_id="summary-user")
+        start = datetime(2026, 3, 1, tzinfo=UTC)
+        end = start + timedelta(days=30)
+        assert (await repo.summarize_range(start, end)).count == 0
+
+        rng = random.Random(14)
+        # Scores on a quarter grid sum exactly, so count/avg ties are real
+        # ties on both sides and the first-seen tiebreak is exercised.
+        windows = [
+            FlowWindow(
+                device_id="mac",
+                window_start=start + timedelta(minutes=7 * i),
+                window_end=start + timedelta(minutes=7 * i + 1),
+                flow_score=rng.choice([0.25, 0.5, 0.75, 1.0]),
+                editor_repo=rng.choice([None, "", "acme/widgets", "/home/me/beats"]),
+                editor_language=rng.choice([None, "go", "python"]),
+                dominant_bundle_id=rng.choice(["", "com.apple.Terminal", "com.microsoft.VSCode"]),
+            )
+            for i in range(300)
+        ]
+        await repo.insert_many(windows)
+
+        stats = await repo.summarize_range(start, end)
+        loaded = await repo.list_by_range(start, end)
+        peak = max(loaded, key=lambda w: w.flow_score)
+        assert stats.count == len(loaded) == 300
+        assert stats.avg == pytest.approx(sum(w.flow_score for w in loaded) / 300)
+        assert (stats.peak, stats.peak_at) == (peak.flow_score, peak.window_start)
+        for axis, key_of in (
+            ("top_repo", lambda w: w.editor_repo or ""),
+            ("top_language", lambda w: w.editor_language or ""),
+            ("top_bundle", lambda w: w.dominant_bundle_id or ""),
+        ):
+            expected = _top_bucket(loaded, key_of)
+            assert getattr(stats, axis).model_dump() == expected.model_dump(), axis
+
+        fs = summarize_flow(loaded)
+        assert (stats.count, stats.peak) == (fs.count, fs.peak_score)
+        assert stats.avg == pytest.approx(fs.avg_score)
+        assert stats.top_repo.key.rstrip("/").split("/")[-1] == fs.top_repo
+
+        filtered = await repo.summarize_range(start, end, editor_language="go")
+        go = [w for w in loaded if w.editor_language == "go"]
+        assert filtered.count == len(go)
+        expected = _top_bucket(go, lambda w: w.editor_repo or "")
+        assert filtered.top_repo.model_dump() == expected.model_dump()
+
+
+class TestFlowRollupRepositoryAgainstMongo:
+    """Ingest deltas and the lazy rebuild land on the same rows, and
+    repo keys with dots survive the digest-keyed tallies."""
+
+    @pytest.fixture(autouse=True)
+    async def _setup(self):
+        from beats.infrastructure.database import Database
+
+        await Database.connect()
+        db = Database.get_db()
+        await db.flow_windows.delete_many({"user_id": "rollup-user"})
+        await db.flow_hourly.delete_many({"user_id": "rollup-user"})
+        yield
+        await db.flow_windows.delete_many({"user_id": "rollup-user"})
+        await db.flow_hourly.delete_many({"user_id": "rollup-user"})
+        await Database.disconnect()
+
+    async def test_apply_and_rebuild_converge(self):
+        from beats.domain.flow_rollups import (
+            build_flow_rollups,
+            load_flow_rollups,
+            record_flow_windows,
+        )
+        from beats.domain.models import FlowWindow
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.repositories import (
+            MongoFlowRollupRepository,
+            MongoFlowWindowRepository,
+        )
+
+        db = Database.get_db()
+        flow = MongoFlowWindowRepository(db.flow_windows, user_id="rollup-user")
+        rollups = MongoFlowRollupRepository(db.flow_hourly, user_id="rollup-user")
+        start = datetime(2026, 4, 6, 9, 0, tzinfo=UTC)
+        windows = [
+            FlowWindow(
+                device_id="d",
+                window_start=start + timedelta(minutes=20 * i),
+                window_end=start + timedelta(minutes=20 * i + 1),
+                flow_score=[0.5, 0.0, 0.75][i % 3],
+                editor_repo=["github.com/acme/app.v2", "$weird.repo"][i % 2],
+                editor_language="Go",
+            )
+            for i in range(9)
+        ]
+        # Windows stored before the rollups existed; one of them also had its
+        # delta applied before the first read built them.
+        ids = await flow.insert_many(windows[:8])
+        stored = [w.model_copy(update={"id": i}) for w, i in zip(windows[:8], ids, strict=True)]
+        assert not await rollups.is_materialized()
+        await record_flow_windows(rollups, stored[7:])
+
+        rows = await load_flow_rollups(rollups, flow, start, start + timedelta(hours=3))
+        assert await rollups.is_materialized()
+        assert [r.model_dump() for r in rows] == [
+            r.model_dump() for r in build_flow_rollups(windows[:8])
+        ]
+
+        # Deltas now add onto the rebuilt rows, and a replayed one is skipped.
+        [new_id] = await flow.insert_many(windows[8:])
+        new = [windows[8].model_copy(update={"id": new_id})]
+        await record_flow_windows(rollups, new)
+        await record_flow_windows(rollups, new)
+        rows = await rollups.list_range(start, start + timedelta(hours=3))
+        expected = build_flow_rollups(windows)
+        assert [r.model_dump() for r in rows] == [r.model_dump() for r in expected]
+        assert rows[1].repo_counts == {"$weird.repo": 2}
+        assert rows[2].repo_counts == {"github.com/acme/app.v2": 2}
+
+    async def test_window_ingested_during_the_build_is_counted_once(self):
+        """A delta that lands while the first build is scanning is kept,
+        whether or not the scan saw its window."""
+        from beats.domain.flow_rollups import build_flow_rollups, ensure_flow_rollups
+        from beats.domain.flow_rollups import record_flow_windows as record
+        from beats.domain.models import FlowWindow
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.repositories import (
+            MongoFlowRollupRepository,
+            MongoFlowWindowRepository,
+        )
+
+        db = Database.get_db()
+        rollups = MongoFlowRollupRepository(db.flow_hourly, user_id="rollup-user")
+        start = datetime(2026, 4, 6, 9, 0, tzinfo=UTC)
+        windows = [
+            FlowWindow(
+                device_id="d",
+                window_start=start + timedelta(minutes=25 * i),
+                window_end=start + timedelta(minutes=25 * i + 1),
+                flow_score=0.5,
+            )
+            for i in range(4)
+        ]
+
+        class IngestMidScan(MongoFlowWindowRepository):
+            async def stream_by_range(self, *args, **kwargs):
+                scanned = 0
+                async for window in super().stream_by_range(*args, **kwargs):
+                    yield window
+                    scanned += 1
+                    if scanned == 1 and not await rollups.is_materialized():
+                        for w in windows[2:]:
+                            [window_id] = await self.insert_many([w])
+                            await record(rollups, [w.model_copy(update={"id": window_id})])
+
+        flow = IngestMidScan(db.flow_windows, user_id="rollup-user")
+        await flow.insert_many(windows[:2])
+        await ensure_flow_rollups(rollups, flow)
+
+        rows = await rollups.list_range(start, start + timedelta(hours=2))
+        assert [r.model_dump() for r in rows] == [
+            r.model_dump() for r in build_flow_rollups(windows)
+        ]
+
+
+class TestFlowRetentionAgainstMongo:
+    """The retention sweep moves windows down the tiers without changing
+    what the rollup reads return, and re-running it is a no-op."""
+
+    USER = "retention-user"
+
+    @pytest.fixture(autouse=True)
+    async def _setup(self):
+        from beats.infrastructure.database import Database
+
+        await Database.connect()
+        db = Database.get_db()
+        for name in ("flow_windows", "flow_hourly", "flow_daily"):
+            await db[name].delete_many({"user_id": self.USER})
+        yield
+        for name in ("flow_windows", "flow_hourly", "flow_daily"):
+            await db[name].delete_many({"user_id": self.USER})
+        await Database.disconnect()
+
+    async def test_sweep_expires_raw_and_compacts_hours(self):
+        from beats.domain.flow_rollups import build_flow_rollups, flow_series
+        from beats.domain.models import FlowWindow
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.flow_retention import RetentionCutoffs, sweep_flow_retention
+        from beats.infrastructure.repositories import (
+            MongoFlowRollupRepository,
+            MongoFlowWindowRepository,
+        )
+
+        db = Database.get_db()
+        flow = MongoFlowWindowRepository(db.flow_windows, user_id=self.USER)
+        rollups = MongoFlowRollupRepository(db.flow_hourly, self.USER, daily=db.flow_daily)
+        start = datetime(2025, 1, 6, 9, 0, tzinfo=UTC)
+        windows = [
+            FlowWindow(
+                device_id="d",
+                window_start=start + timedelta(days=i // 4, hours=i % 4),
+                window_end=start + timedelta(days=i // 4, hours=i % 4, minutes=1),
+                flow_score=[0.5, 0.0, 0.75, 0.25][i % 4],
+                editor_repo="github.com/acme/app.v2",
+                editor_language="Go",
+            )
+            for i in range(12)
+        ]
+        # Never read, so the rollups don't exist yet when the sweep runs.
+        await flow.insert_many(windows)
+        everything = (start, start + timedelta(days=3))
+        expected = flow_series(build_flow_rollups(windows), "day", ZoneInfo("UTC"))
+
+        cutoffs = RetentionCutoffs(
+            raw=datetime(2025, 1, 8, tzinfo=UTC), hourly=datetime(2025, 1, 7, tzinfo=UTC)
+        )
+        result = await sweep_flow_retention(db, cutoffs)
+        assert result == {"expired_windows": 8, "compacted_hours": 4}
+        assert [w.window_start for w in await flow.list_by_range(*everything)] == [
+            w.window_start for w in windows[8:]
+        ]
+        assert await db.flow_daily.count_documents({"user_id": self.USER}) == 1
+
+        rows = await rollups.list_range(*everything)
+        assert [r.hour for r in rows][:2] == [
+            datetime(2025, 1, 6, tzinfo=UTC),
+            datetime(2025, 1, 7, 9, tzinfo=UTC),
+        ]
+        assert flow_series(rows, "day", ZoneInfo("UTC")) == expected
+
+        assert await sweep_flow_retention(db, cutoffs) == {
+            "expired_windows": 0,
+            "compacted_hours": 0,
+        }
+        assert flow_series(await rollups.list_range(*everything), "day", ZoneInfo("UTC")) == (
+            expected
+        )
+
+    async def _stored(self, flow, windows):
+        ids = await flow.insert_many(windows)
+        return [w.model_copy(update={"id": i}) for w, i in zip(windows, ids, strict=True)]
+
+    def _window(self, start: datetime, minutes: int, score: float = 0.5):
+        from beats.domain.models import FlowWindow
+
+        return FlowWindow(
+            device_id="d",
+            window_start=start + timedelta(minutes=minutes),
+            window_end=start + timedelta(minutes=minutes + 1),
+            flow_score=score,
+        )
+
+    async def test_sweep_tops_up_hours_the_rollups_missed(self):
+        """A window stored without its delta reaching the rollups is folded
+        in before its raw row expires."""
+        from beats.domain.flow_rollups import ensure_flow_rollups
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.flow_retention import RetentionCutoffs, sweep_flow_retention
+        from beats.infrastructure.repositories import (
+            MongoFlowRollupRepository,
+            MongoFlowWindowRepository,
+        )
+
+        db = Database.get_db()
+        flow = MongoFlowWindowRepository(db.flow_windows, user_id=self.USER)
+        rollups = MongoFlowRollupRepository(db.flow_hourly, self.USER, daily=db.flow_daily)
+        start = datetime(2025, 1, 6, 9, 0, tzinfo=UTC)
+        await self._stored(flow, [self._window(start, 0), self._window(start, 10)])
+        await ensure_flow_rollups(rollups, flow)
+        await self._stored(flow, [self._window(start, 20, score=1.0)])  # delta lost
+
+        cutoffs = RetentionCutoffs(
+            raw=datetime(2025, 1, 8, tzinfo=UTC), hourly=datetime(2025, 1, 1, tzinfo=UTC)
+        )
+        assert await sweep_flow_retention(db, cutoffs) == {
+            "expired_windows": 3,
+            "compacted_hours": 0,
+        }
+        [row] = await rollups.list_range(start, start + timedelta(hours=1))
+        assert (row.count, row.score_max) == (3, 1.0)
+
+    async def test_sweep_keeps_windows_of_compacted_hours_it_cannot_verify(self):
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.flow_retention import RetentionCutoffs, sweep_flow_retention
+        from beats.infrastructure.repositories import (
+            MongoFlowRollupRepository,
+            MongoFlowWindowRepository,
+        )
+
+        db = Database.get_db()
+        flow = MongoFlowWindowRepository(db.flow_windows, user_id=self.USER)
+        rollups = MongoFlowRollupRepository(db.flow_hourly, self.USER, daily=db.flow_daily)
+        start = datetime(2025, 1, 6, 9, 0, tzinfo=UTC)
+        await self._stored(flow, [self._window(start, 0)])
+        cutoffs = RetentionCutoffs(
+            raw=datetime(2025, 1, 8, tzinfo=UTC), hourly=datetime(2025, 1, 8, tzinfo=UTC)
+        )
+        assert await sweep_flow_retention(db, cutoffs) == {
+            "expired_windows": 1,
+            "compacted_hours": 1,
+        }
+
+        # A late window for the compacted hour: nothing can count it now.
+        await self._stored(flow, [self._window(start, 30)])
+        assert await sweep_flow_retention(db, cutoffs) == {
+            "expired_windows": 0,
+            "compacted_hours": 0,
+        }
+        assert len(await flow.list_by_range(start, start + timedelta(hours=1))) == 1
+        [day] = await rollups.list_range(start, start + timedelta(days=1))
+        assert (day.compacted, day.count) == (True, 1)
+
+
+def _noted_beat(id_: str, start: datetime, note: str | None = None, tags=()) -> Beat:
+    return Beat(
+        id=id_,
+        project_id="p1",
+        start=start,
+        end=start + timedelta(minutes=30),
+        note=note,
+        tags=list(tags),
+    )
+
+
+class TestBeatSearch:
+    """Beat search semantics (beat_search): every query word must prefix a
+    note or tag word; exact hits rank first, then recency; cursors page
+    through that order without repeats."""
+
+    def test_terms_cover_note_words_and_whole_tags(self):
+        from beats.domain.beat_search import query_terms, search_terms
+
+        assert search_terms("Auth refactor: auth flow", ["Deep-Work"]) == [
+            "auth",
+            "refactor",
+            "flow",
+            "deep-work",
+            "deep",
+            "work",
+        ]
+        assert search_terms(None, []) == []
+        assert query_terms("  REFAC auth refac ") == ["refac", "auth"]
+
+    def test_every_word_must_prefix_a_term(self):
+        from beats.domain.beat_search import rank
+
+        terms = ["auth", "refactor", "planning"]
+        assert rank(terms, ["refac"]) == 0
+        assert rank(terms, ["auth", "refac"]) == 1
+        assert rank(terms, ["auth", "meeting"]) is None
+        assert rank(terms, ["factor"]) is None  # prefix, not substring
+
+    def test_cursor_round_trip_and_garbage(self):
+        from beats.domain.beat_search import SearchCursor
+        from beats.domain.exceptions import InvalidSearchCursor
+
+        cursor = SearchCursor(2, datetime(2026, 3, 1, 9, tzinfo=UTC), "b7")
+        assert SearchCursor.decode(cursor.encode()) == cursor
+        for garbage in ("", "not-a-cursor", "W10"):
+            with pytest.raises(InvalidSearchCursor):
+                SearchCursor.decode(garbage)
+
+    async def test_service_ranks_and_pages_without_repeats(self):
+        from beats.domain.services import BeatService
+
+        t0 = datetime(2026, 3, 1, 9, tzinfo=UTC)
+        beats = [
+            _noted_beat("b1", t0, "refactor auth"),
+            _noted_beat("b2", t0 + timedelta(days=1), "refactoring billing"),
+            _noted_beat("b3", t0 + timedelta(days=2), "meeting"),
+            _noted_beat("b4", t0 + timedelta(days=3), None, tags=["refactor"]),
+            _noted_beat("b5", t0 + timedelta(days=4), "refactors"),
+        ]
+        service = BeatService(beat_repo=_FakeBeatRepoForServices(beats))  # type: ignore[arg-type]
+
+        # Exact "refactor" first (newest first), then the prefix-only hits.
+        seen: list[str] = []
+        cursor = None
+        while True:
+            page = await service.search_beats("Refactor", limit=2, cursor=cursor)
+            seen += [b.id or "" for b in page.beats]
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+        assert seen == ["b4", "b1", "b5", "b2"]
+
+        assert (await service.search_beats("  ")).beats == []
+        assert (await service.search_beats("refactor auth")).next_cursor is None
+
+
+class TestBeatSearchAgainstMongo:
+    """The Mongo search pipeline against the in-memory reference, plus
+    the search terms every write path and the backfill store."""
+
+    USER = "beat-search-user"
+
+    @pytest.fixture(autouse=True)
+    async def _setup(self):
+        from beats.infrastructure.database import Database
+
+        await Database.connect()
+        await Database.get_db().timeLogs.delete_many({"user_id": self.USER})
+        yield
+        await Database.disconnect()
+
+    def _repo(self):
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.repositories import MongoBeatRepository
+
+        return MongoBeatRepository(Database.get_db().timeLogs, user_id=self.USER)
+
+    async def test_pages_match_the_reference(self):
+        from beats.domain.beat_search import search_page
+
+        repo = self._repo()
+        t0 = datetime(2026, 3, 1, 9, tzinfo=UTC)
+        notes = ["refactor auth", "refactoring", "auth flow", None, "refactor", "lunch"]
+        for i, note in enumerate(notes):
+            start = t0 + timedelta(hours=i % 3)  # equal starts: order falls to _id
+            await repo.create(_noted_beat(None, start, note, tags=["auth"] if i == 3 else ()))
+        await repo.create(Beat(project_id="p1", start=t0, note="refactor"))  # active
+        stored = await repo.list_all_completed()
+
+        for terms in (["refac"], ["auth"], ["refactor", "auth"], ["nothing"]):
+            after = None
+            while True:
+                got = await repo.search(terms, 2, after)
+                want = search_page(stored, terms, 2, after)
+                assert [(h.beat.id, h.rank) for h in got] == [(h.beat.id, h.rank) for h in want]
+                if len(got) < 2:
+                    break
+                after = got[-1].cursor
+
+    async def test_writes_and_backfill_store_search_terms(self):
+        from beats.infrastructure.database import Database
+        from beats.infrastructure.migrations import backfill_search_terms
+
+        repo = self._repo()
+        t0 = datetime(2026, 3, 1, 9, tzinfo=UTC)
+        created = await repo.create(_noted_beat(None, t0, "first draft"))
+        await repo.update(created.model_copy(update={"note": "final draft"}))
+        await repo.upsert_many([{"project_id": "p1", "start": t0, "end": t0, "tags": ["Ops"]}])
+        col = Database.get_db().timeLogs
+        await col.insert_one({"user_id": self.USER, "project_id": "p1", "start": t0, "note": "old"})
+
+        assert await backfill_search_terms(col) >= 1  # other suites' raw inserts too
+        assert await backfill_search_terms(col) == 0
+        docs = await col.find({"user_id": self.USER}).sort("_id", 1).to_list(length=None)
+        assert [d["search_terms"] for d in docs] == [["final", "draft"], ["ops"], ["old"]]
+
+    async def test_upsert_takes_terms_from_the_whole_beat(self):
+        """Re-importing a beat without its note leaves none of the note's
+        terms behind, and keeps its tags' terms."""
+        from bson import ObjectId
+
+        from beats.infrastructure.database import Database
+
+        repo = self._repo()
+        t0 = datetime(2026, 3, 1, 9, tzinfo=UTC)
+        created = await repo.create(_noted_beat(None, t0, "first draft", tags=["Ops"]))
+        row = {"id": created.id, "project_id": "p1", "start": t0, "end": t0, "tags": ["Ops"]}
+        await repo.upsert(row)
+
+        doc = await Database.get_db().timeLogs.find_one({"_id": ObjectId(created.id)})
+        assert "note" not in doc
+        assert doc["search_terms"] == ["ops"]
@@ -62,14 +62,31 @@ def clean_db():
     db.users.create_index("email", unique=True)
     db.credentials.create_index("credential_id", unique=True)
     db.credentials.create_index("user_id")
+    db.timeLogs.create_index([("user_id", 1), ("end", 1)])
+    db.timeLogs.create_index([("user_id", 1), ("start", -1)])
+    db.timeLogs.create_index([("user_id", 1), ("project_id", 1), ("start", -1)])
+    db.timeLogs.create_index([("user_id", 1), ("search_terms", 1), ("start", -1)])
+    db.projects.create_index([("user_id", 1), ("archived", 1)])
+    db.beat_daily_rollups.create_index(
+        [("user_id", 1), ("tz", 1), ("tag", 1), ("local_date", 1), ("project_id", 1)],
+        unique=True,
+    )
     db.pairing_codes.create_index("code_hash", unique=True)
     db.device_registrations.create_index("device_id", unique=True)
     db.device_registrations.create_index("user_id")
     db.flow_windows.create_index([("user_id", 1), ("window_start", -1)])
+    db.flow_windows.create_index(
+        [("user_id", 1), ("device_id", 1), ("window_start", 1)], unique=True
+    )
     db.signal_summaries.create_index([("user_id", 1), ("device_id", 1), ("hour", 1)], unique=True)
+    db.flow_hourly.create_index([("user_id", 1), ("hour", 1)], unique=True)
+    db.flow_daily.create_index([("user_id", 1), ("day", 1)], unique=True)
+    db.shared_state.create_index([("ns", 1), ("set_at", -1)])
     db.biometric_days.create_index([("user_id", 1), ("date", 1), ("source", 1)], unique=True)
     db.fitbit_integrations.create_index("user_id", unique=True)
     db.oura_integrations.create_index("user_id", unique=True)
+    db.webhook_deliveries.create_index([("status", 1), ("next_attempt_at", 1)])
+    db.webhook_deliveries.create_index([("user_id", 1), ("created_at", -1)])
     sync_client.close()
     yield
 
@@ -1,8 +1,9 @@
 """FastAPI application entry point with DDD architecture."""
 
+import asyncio
 import logging
-from collections.abc import AsyncGenerator, Callable
-from contextlib import asynccontextmanager
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.exceptions import RequestValidationError
@@ -10,14 +11,15 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from beats.api.errors import envelope as error_envelope
 from beats.api.errors import http_exception_handler, validation_exception_handler
 from beats.api.middleware import IdempotencyMiddleware, ensure_mutation_log_indexes
 from beats.api.routers.account import router as account_router
 from beats.api.routers.analytics import router as analytics_router
-from beats.api.routers.auth import get_session_manager, limiter
+from beats.api.routers.auth import get_device_cache, get_session_manager, limiter
 from beats.api.routers.auth import router as auth_router
 from beats.api.routers.auto_start import router as auto_start_router
 from beats.api.routers.beats import router as beats_router
@@ -35,9 +37,19 @@ from beats.api.routers.projects import router as projects_router
 from beats.api.routers.signals import router as signals_router
 from beats.api.routers.timer import router as timer_router
 from beats.api.routers.webhooks import router as webhooks_router
+from beats.auth.device_cache import watch_device_revocations
 from beats.domain.exceptions import DomainException
+from beats.domain.models import DeviceRegistration
 from beats.infrastructure.database import Database
-from beats.infrastructure.repositories import MongoDeviceRegistrationRepository
+from beats.infrastructure.flow_retention import run_flow_retention
+from beats.infrastructure.index_advisor import check_query_plans
+from beats.infrastructure.migrations import run_legacy_date_backfill, run_search_terms_backfill
+from beats.infrastructure.repositories import (
+    MongoDeviceRegistrationRepository,
+    MongoWebhookOutbox,
+)
+from beats.infrastructure.webhook_dispatcher import WebhookDispatcher, set_webhook_dispatcher
+from beats.settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -80,7 +92,60 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
     await Database.connect()
     logger.info("Database connected.")
     await ensure_mutation_log_indexes()
+    if settings.index_advisor_enabled:
+        await check_query_plans(Database.get_db())
+    revocation_watch = None
+    if settings.device_revocation_watch:
+        revocation_watch = asyncio.create_task(
+            watch_device_revocations(Database.get_db().device_registrations, get_device_cache())
+        )
+    date_backfill = None
+    if settings.legacy_date_reads:
+        date_backfill = asyncio.create_task(run_legacy_date_backfill(Database.get_db()))
+    search_backfill = None
+    if settings.search_terms_backfill:
+        search_backfill = asyncio.create_task(run_search_terms_backfill(Database.get_db()))
+    flow_retention = None
+    if settings.flow_retention_enabled:
+        flow_retention = asyncio.create_task(
+            run_flow_retention(
+                Database.get_db(),
+                settings.flow_window_retention_days,
+                settings.flow_hourly_retention_days,
+            )
+        )
+    dispatcher = dispatch_loop = None
+    if settings.webhook_dispatcher_enabled:
+        dispatcher = WebhookDispatcher(MongoWebhookOutbox(Database.get_db().webhook_deliveries))
+        set_webhook_dispatcher(dispatcher)
+        dispatch_loop = asyncio.create_task(dispatcher.run())
     yield
+    if dispatcher is not None:
+        # Anything mid-delivery keeps its claim lease and is retried
+        # (here or on another instance) once the lease expires.
+        set_webhook_dispatcher(None)
+        dispatch_loop.cancel()
+        with suppress(asyncio.CancelledError):
+            await dispatch_loop
+        await dispatcher.aclose()
+    if flow_retention is not None:
+        # Every sweep step is idempotent; the next start finishes the job.
+        flow_retention.cancel()
+        with suppress(asyncio.CancelledError):
+            await flow_retention
+    if date_backfill is not None:
+        # Safe to stop mid-batch; the next start resumes from what's left.
+        date_backfill.cancel()
+        with suppress(asyncio.CancelledError):
+            await date_backfill
+    if search_backfill is not None:
+        search_backfill.cancel()
+        with suppress(asyncio.CancelledError):
+            await search_backfill
+    if revocation_watch is not None:
+        revocation_watch.cancel()
+        with suppress(asyncio.CancelledError):
+            await revocation_watch
     # Shutdown: Disconnect from database
     logger.info("Disconnecting from database...")
     await Database.disconnect()
@@ -104,42 +169,61 @@ origins = [
 ]
 
 
-class AuthenticationMiddleware(BaseHTTPMiddleware):
-    """Async middleware for API authentication.
+async def _load_registration(device_id: str) -> DeviceRegistration | None:
+    repo = MongoDeviceRegistrationRepository(Database.get_db().device_registrations)
+    return await repo.get_by_device_id(device_id)
+
+
+class AuthenticationMiddleware:
+    """Pure ASGI middleware for API authentication.
 
     All requests (except public paths) require a JWT Bearer token (WebAuthn sessions).
-    Sets request.state.user_id on successful auth.
+    Sets request.state.user_id on successful auth. Only the Authorization
+    header is read — the body and the response stream pass through untouched.
     """
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Allow OPTIONS requests (CORS preflight) to pass through
-        if request.method == "OPTIONS":
-            return await call_next(request)
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
-        is_public = any(request.url.path.startswith(prefix) for prefix in PUBLIC_PREFIXES)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Allow OPTIONS requests (CORS preflight) to pass through
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        rejection = await self.authenticate(scope)
+        if rejection is not None:
+            await rejection(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def authenticate(scope: Scope) -> Response | None:
+        """Record the caller in the request state, or return the error response."""
+        path = scope["path"]
+        headers = Headers(scope=scope)
+        state = scope.setdefault("state", {})
+        is_public = any(path.startswith(prefix) for prefix in PUBLIC_PREFIXES)
 
         # Try to extract user_id from Bearer token (for both public and protected paths)
-        auth_header = request.headers.get("Authorization", "")
+        auth_header = headers.get("Authorization", "")
         if auth_header.startswith("Bearer "):
             token = auth_header[7:]
             session_manager = get_session_manager()
 
             # Try session token first
-            payload = session_manager.validate_session_token(token)
+            payload = await session_manager.validate_session_token(token)
             if payload is not None:
-                request.state.user_id = payload["sub"]
-                return await call_next(request)
+                state["user_id"] = payload["sub"]
+                return None
 
             # Try device token
             device_payload = session_manager.validate_device_token(token)
             if device_payload is not None:
                 device_id = device_payload["device_id"]
 
-                # Verify device is not revoked
-                db = Database.get_db()
-                repo = MongoDeviceRegistrationRepository(db.device_registrations)
-                reg = await repo.get_by_device_id(device_id)
-                if not reg or reg.revoked:
+                # Verify device is not revoked (cached; see beats.auth.device_cache)
+                if not await get_device_cache().is_active(device_id, _load_registration):
                     return error_envelope(
                         status_code=status.HTTP_403_FORBIDDEN,
                         detail="Device token has been revoked",
@@ -147,7 +231,6 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
                     )
 
                 # Check path allowlist
-                path = request.url.path
                 if not any(path.startswith(p) for p in DEVICE_ALLOWED_PREFIXES):
                     return error_envelope(
                         status_code=status.HTTP_403_FORBIDDEN,
@@ -155,15 +238,15 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
                         code="DEVICE_PATH_FORBIDDEN",
                     )
 
-                request.state.user_id = device_payload["sub"]
-                request.state.device_id = device_id
-                return await call_next(request)
+                state["user_id"] = device_payload["sub"]
+                state["device_id"] = device_id
+                return None
 
             if not is_public:
-                origin = request.headers.get("origin", "unknown")
+                origin = headers.get("origin", "unknown")
                 logger.warning(
                     "Invalid JWT token to %s from origin: %s",
-                    request.url.path,
+                    path,
                     origin,
                 )
                 return error_envelope(
@@ -174,11 +257,11 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
 
         # Public endpoints pass through without auth
         if is_public:
-            return await call_next(request)
+            return None
 
         # No valid authentication provided for protected endpoint
-        origin = request.headers.get("origin", "unknown")
-        logger.warning("Unauthorized request to %s from: %s", request.url.path, origin)
+        origin = headers.get("origin", "unknown")
+        logger.warning("Unauthorized request to %s from: %s", path, origin)
         return error_envelope(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Authentication required. Provide a Bearer token.",
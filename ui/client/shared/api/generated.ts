@@ -1777,7 +1777,10 @@ export interface paths {
         post?: never;
         /**
          * Delete All Signals
-         * @description Delete all signal summaries for the current user (privacy dashboard).
+         * @description Delete all signal summaries and flow rollups for the current user
+         *     (privacy dashboard). Rollups outlive the raw windows they were built
+         *     from, repo paths included; the next flow read rebuilds them from the
+         *     windows still within retention.
          */
         delete: operations["delete_all_signals_api_signals_all_delete"];
         options?: never;
@@ -2331,6 +2334,8 @@ export interface components {
         DeleteSignalsResponse: {
             /** Deleted Summaries */
             deleted_summaries: number;
+            /** Deleted Flow Rollups */
+            deleted_flow_rollups: number;
         };
         /** DeviceFavoriteProject */
         DeviceFavoriteProject: {